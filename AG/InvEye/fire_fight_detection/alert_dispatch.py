@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+InvEye Alert Dispatch
+Coalescing, rate-limited alert delivery off the detection path
+
+Alerts are grouped per key (alert type + camera) over a time window: the
+first one is delivered at once, repeats are counted and sent as a single
+summary when the window closes. A token bucket caps notifications across
+all cameras (alerts over it wait for the next token; critical alerts
+skip it and go first), and a worker thread delivers them with retries.
+"""
+
+import time
+import heapq
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+
+# ============================================================
+# ALERT DISPATCHER
+# ============================================================
+
+class _AlertWindow:
+    """Open coalescing window of one (alert type, camera) key."""
+    __slots__ = ('alert', 'payload', 'payload_confidence', 'start', 'end', 'count', 'max_confidence', 'delivered',
+                 'critical')
+
+    def __init__(self, alert: Dict, payload, start: float, end: float, confidence: float, critical: bool):
+        self.alert = alert
+        self.payload = payload
+        self.payload_confidence = confidence
+        self.start = start
+        self.end = end
+        self.count = 1
+        self.max_confidence = confidence
+        self.delivered = False
+        self.critical = critical
+
+
+class AlertDispatcher:
+    """Coalescing, rate-limited, asynchronous alert delivery.
+
+    The first alert of a key opens a window of `window_s` and is delivered
+    right away; repeats inside the window are only counted. When the window
+    closes, one summary (count, peak confidence, payload of the most
+    confident repeat) is delivered if anything was folded into it. All
+    deliveries share a token bucket of `rate_per_min` with `burst`; alerts
+    and summaries that find it empty wait in a FIFO that drains as tokens
+    refill. Critical alerts (and their summaries) bypass the bucket and go
+    ahead of everything queued. `deliver(alert, payload, attempt)` runs on
+    a worker thread and is retried with exponential backoff when it raises.
+    submit() is O(1) and never blocks on delivery.
+    """
+
+    def __init__(self, deliver, rate_per_min: float = 20, burst: int = 5, queue_size: int = 256,
+                 max_retries: int = 3, retry_backoff_s: float = 1.0):
+        self.deliver = deliver
+        self.rate = rate_per_min / 60.0
+        self.burst = burst
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+
+        self._tokens = float(burst)
+        self._refilled_at = time.time()
+        self._windows: Dict[str, _AlertWindow] = {}
+        self._deadlines: List[Tuple[float, int, str]] = []  # heap of window ends (stale entries skipped)
+        self._seq = 0
+        self.queue_size = queue_size
+        self._queue = deque()                        # (alert, payload, critical) ready to deliver, critical first
+        self._critical_queued = 0                    # leading entries of _queue that are critical
+        self._waiting = deque(maxlen=queue_size)     # (alert, payload) waiting for tokens, never critical
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._running = True
+
+        self.stats = defaultdict(int)
+        self._thread = threading.Thread(target=self._run, name='alert-dispatch', daemon=True)
+        self._thread.start()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _take_token(self, now: float) -> bool:
+        self._refill(now)
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def _send(self, alert: Dict, payload, critical: bool, now: float):
+        """Queue for delivery now, or hold until a token is free (caller holds the lock)."""
+        if critical:
+            # Critical alerts never wait: use a token if there is one, and jump the queue
+            if not self._take_token(now):
+                self.stats['critical_unmetered'] += 1
+            self._enqueue(alert, payload, True)
+        elif not self._waiting and self._take_token(now):
+            self._enqueue(alert, payload, False)
+        else:
+            if len(self._waiting) == self._waiting.maxlen:
+                self.stats['queue_dropped'] += 1
+            self._waiting.append((alert, payload))
+            self.stats['rate_limited'] += 1
+        self._idle.clear()
+        self._wake.set()
+
+    def _enqueue(self, alert: Dict, payload, critical: bool):
+        """Add to the delivery queue (caller holds the lock).
+
+        Critical entries go after the critical ones already queued, ahead of
+        the rest. At `queue_size` the oldest non-critical entry is dropped to
+        make room; critical entries are never dropped, so only they can push
+        the queue past the cap.
+        """
+        if len(self._queue) >= self.queue_size:
+            if self._critical_queued < len(self._queue):
+                del self._queue[self._critical_queued]  # oldest non-critical
+                self.stats['queue_dropped'] += 1
+            elif not critical:
+                self.stats['queue_dropped'] += 1
+                return
+            else:
+                self.stats['queue_over_cap'] += 1
+        if critical:
+            self._queue.insert(self._critical_queued, (alert, payload, True))
+            self._critical_queued += 1
+        else:
+            self._queue.append((alert, payload, False))
+
+    def submit(self, key: str, alert: Dict, payload=None, window_s: float = 30.0,
+               confidence: float = 0.0, now: float = None, critical: bool = False) -> bool:
+        """Offer an alert; True if it opened a new window for its key, False if it was coalesced."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.stats['generated'] += 1
+            window = self._windows.get(key)
+            if window is not None and now < window.end:
+                window.count += 1
+                window.max_confidence = max(window.max_confidence, confidence)
+                if payload is not None and confidence >= window.payload_confidence:
+                    window.payload, window.payload_confidence = payload, confidence
+                self.stats['coalesced'] += 1
+                return False
+            if window is not None:
+                self._close_window(key, window, now)
+
+            window = _AlertWindow(alert, payload, now, now + window_s, confidence, critical)
+            self._windows[key] = window
+            self._seq += 1
+            heapq.heappush(self._deadlines, (window.end, self._seq, key))
+            window.delivered = True
+            window.payload, window.payload_confidence = None, -1.0  # sent with the alert
+            self._send(alert, payload, critical, now)
+            return True
+
+    def _close_window(self, key: str, window: _AlertWindow, now: float):
+        """Emit the window's summary (caller holds the lock)."""
+        if self._windows.get(key) is window:
+            del self._windows[key]
+        folded = window.count - (1 if window.delivered else 0)
+        if folded == 0:
+            return
+        summary = dict(window.alert)
+        summary.update({
+            'id': f"{window.alert.get('id', key)}_x{window.count}",
+            'coalesced_count': window.count,
+            'folded_count': folded,  # alerts of the window not delivered before
+            'window_start': datetime.fromtimestamp(window.start).isoformat(),
+            'window_end': datetime.fromtimestamp(min(now, window.end)).isoformat(),
+            'max_confidence': window.max_confidence,
+            'message': f"{window.alert.get('message', key)} ({window.count}x in "
+                       f"{min(now, window.end) - window.start:.0f}s)",
+        })
+        self.stats['summaries'] += 1
+        self._send(summary, window.payload, window.critical, now)
+
+    def _run(self):
+        while self._running:
+            with self._lock:
+                now = time.time()
+                timeout = 0.5
+                if self._deadlines:
+                    timeout = min(timeout, max(0.0, self._deadlines[0][0] - now))
+                if self._waiting:
+                    self._refill(now)
+                    timeout = min(timeout, max(0.0, (1.0 - self._tokens) / self.rate))
+            self._wake.wait(timeout=timeout)
+            self._wake.clear()
+
+            now = time.time()
+            with self._lock:
+                # Windows that ended
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _, _, key = heapq.heappop(self._deadlines)
+                    window = self._windows.get(key)
+                    if window is not None and window.end <= now:
+                        self._close_window(key, window, now)
+                # Alerts and summaries waiting for tokens, oldest first
+                while self._waiting and self._take_token(now):
+                    self._enqueue(*self._waiting.popleft(), False)
+
+            while True:
+                with self._lock:
+                    if not self._queue:
+                        break
+                    alert, payload, critical = self._queue.popleft()
+                    if critical:
+                        self._critical_queued -= 1
+                self._deliver(alert, payload)
+
+            with self._lock:
+                if not self._queue and not self._waiting:
+                    self._idle.set()
+
+    def _deliver(self, alert: Dict, payload):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.deliver(alert, payload, attempt)
+                self.stats['delivered'] += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries or not self._running:
+                    self.stats['failed'] += 1
+                    print(f"[Alert] Delivery failed after {attempt + 1} attempts: {e}")
+                    return
+                self.stats['retries'] += 1
+                time.sleep(self.retry_backoff_s * (2 ** attempt))
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Close every open window and wait for pending deliveries (held alerts ignore the rate limit)."""
+        now = time.time()
+        with self._lock:
+            for key, window in list(self._windows.items()):
+                self._close_window(key, window, now)
+            while self._waiting:
+                self._enqueue(*self._waiting.popleft(), False)
+            if self._queue:
+                self._idle.clear()
+        self._wake.set()
+        return self._idle.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        """Flush, then stop the worker."""
+        self.flush(timeout)
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout=timeout)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['open_windows'] = len(self._windows)
+            stats['pending'] = len(self._queue) + len(self._waiting)
+            return stats
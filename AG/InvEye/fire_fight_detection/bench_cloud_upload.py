@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Cloud Upload Probe-Time Benchmark
+
+Drives the detection probe's bookkeeping at camera rate (one call per
+batched frame of all sources) against a local stub HTTP server that adds
+latency and can go down for a while, and measures how long each probe
+call takes:
+
+- legacy: frames appended to unbounded lists, synchronous requests.post
+  from inside the probe every upload_interval frames (previous code)
+- uploader: DetectionBuffer + CloudUploader thread (probe only enqueues)
+
+Runs without DeepStream: the per-object work on pyds metadata is replaced
+by building the same detection dicts in Python.
+
+Usage:
+    python3 bench_cloud_upload.py
+    python3 bench_cloud_upload.py --latency-ms 800 --outage 10:20 --duration 40
+"""
+
+import io
+import gzip
+import json
+import time
+import shutil
+import random
+import tempfile
+import argparse
+import threading
+import contextlib
+from collections import defaultdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+from cloud_uploader import DetectionBuffer, CloudUploader
+
+
+# ============================================================
+# STUB CLOUD API
+# ============================================================
+
+class StubAPI:
+    """Local HTTP endpoint with added latency and an optional outage window"""
+
+    def __init__(self, latency_s: float, jitter_s: float, outage: tuple):
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.outage = outage
+        self.t0 = time.time()
+        self.received = defaultdict(int)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                time.sleep(stub.latency_s + random.uniform(0, stub.jitter_s))
+                elapsed = time.time() - stub.t0
+                if stub.outage and stub.outage[0] <= elapsed < stub.outage[1]:
+                    stub.received['rejected'] += 1
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                if self.headers.get('Content-Encoding') == 'gzip':
+                    body = gzip.decompress(body)
+                json.loads(body)
+                stub.received['accepted'] += 1
+                stub.received['payload_bytes'] += len(body)
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1/inveye/detections"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ============================================================
+# PROBE SIMULATION
+# ============================================================
+
+def make_frame(source_id: int, frame_number: int, rng, objects: int) -> dict:
+    """What the probe builds per frame from the DeepStream object metadata"""
+    detections = []
+    for _ in range(rng.poisson(objects)):
+        class_id = int(rng.integers(0, 36))
+        detections.append({
+            "class_id": class_id,
+            "class_name": f"class_{class_id}",
+            "confidence": float(rng.uniform(0.3, 1.0)),
+            "bbox": {"x": float(rng.uniform(0, 600)), "y": float(rng.uniform(0, 600)),
+                     "width": float(rng.uniform(10, 200)), "height": float(rng.uniform(10, 200))},
+            "tracker_id": int(rng.integers(0, 1000)),
+        })
+    return {"source_id": source_id, "frame_number": frame_number, "timestamp": datetime.now().isoformat(),
+            "detections": detections, "alerts": []}
+
+
+def summarize(device_id: str, drained: dict) -> dict:
+    """Same payload as InvEyeDeepStreamPipeline._build_upload_payload"""
+    payload = {"device_id": device_id, "timestamp": datetime.now().isoformat(), "cameras": {}}
+    for source_id, (frames, frames_seen) in drained.items():
+        if frames:
+            recent = frames[-30:]
+            class_counts = defaultdict(int)
+            detections = [d for f in recent for d in f['detections']]
+            for det in detections:
+                class_counts[det['class_name']] += 1
+            payload['cameras'][f"camera_{source_id}"] = {
+                "source_id": source_id,
+                "frame_count": frames_seen,
+                "detection_counts": dict(class_counts),
+                "alerts": [a for f in recent for a in f['alerts']],
+                "avg_detections_per_frame": len(detections) / max(len(recent), 1),
+            }
+    return payload
+
+
+class LegacyProbe:
+    """Previous probe bookkeeping: unbounded lists, synchronous upload"""
+
+    def __init__(self, url: str, upload_interval: int):
+        self.url = url
+        self.upload_interval = upload_interval
+        self.detection_buffer = defaultdict(list)
+        self.frame_count = 0
+        self.uploads = 0
+
+    def on_frame(self, source_id: int, frame_data: dict):
+        self.detection_buffer[source_id].append(frame_data)
+        self.frame_count += 1
+        if self.frame_count % self.upload_interval == 0:
+            drained = {s: (frames, len(frames)) for s, frames in self.detection_buffer.items()}
+            payload = summarize("bench", drained)
+            self.detection_buffer.clear()
+            try:
+                requests.post(self.url, json=payload, headers={"Authorization": "Bearer bench"}, timeout=5)
+                self.uploads += 1
+            except Exception:
+                pass
+
+    def close(self):
+        pass
+
+
+class UploaderProbe:
+    def __init__(self, url: str, upload_interval: int, buffer_frames: int, spill_dir: str, backoff_max: float):
+        self.upload_interval = upload_interval
+        self.detection_buffer = DetectionBuffer(buffer_frames)
+        self.uploader = CloudUploader(url, lambda: summarize("bench", self.detection_buffer.drain()) or None,
+                                      api_key="bench", spill_dir=spill_dir, backoff_min=0.5,
+                                      backoff_max=backoff_max, max_interval=5.0)
+        self.uploader.start()
+        self.frame_count = 0
+
+    def on_frame(self, source_id: int, frame_data: dict):
+        self.detection_buffer.add(source_id, frame_data)
+        self.frame_count += 1
+        if self.frame_count % self.upload_interval == 0:
+            self.uploader.notify()
+
+    def close(self):
+        self.uploader.close()
+
+
+def run(mode: str, args, work: str) -> dict:
+    api = StubAPI(args.latency_ms / 1000.0, args.jitter_ms / 1000.0, args.outage)
+    if mode == 'legacy':
+        probe = LegacyProbe(api.url, args.upload_interval)
+    else:
+        probe = UploaderProbe(api.url, args.upload_interval, args.buffer_frames, f"{work}/spill_{mode}",
+                              args.backoff_max)
+    rng = np.random.default_rng(args.seed)
+    # Pre-built frames, so the measurement is the probe bookkeeping, not the RNG
+    frames = [[make_frame(s, i, rng, args.objects) for s in range(args.sources)] for i in range(256)]
+
+    interval = 1.0 / args.fps
+    probe_ms, late = [], 0
+    next_due = time.time()
+    end = next_due + args.duration
+    batch = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        while time.time() < end:
+            wait = next_due - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            next_due += interval
+            start = time.perf_counter()
+            for frame_data in frames[batch % len(frames)]:
+                probe.on_frame(frame_data['source_id'], frame_data)
+            elapsed = time.perf_counter() - start
+            probe_ms.append(elapsed * 1000)
+            late += elapsed > interval
+            batch += 1
+        close_start = time.perf_counter()
+        probe.close()
+        close_s = time.perf_counter() - close_start
+    api.close()
+
+    t = np.asarray(probe_ms)
+    row = {
+        "mode": mode,
+        "probe_calls": len(t),
+        "probe_p50_ms": round(float(np.percentile(t, 50)), 3),
+        "probe_p99_ms": round(float(np.percentile(t, 99)), 3),
+        "probe_max_ms": round(float(t.max()), 1),
+        "probe_calls_over_frame_budget": int(late),
+        "achieved_fps": round(len(t) / args.duration, 1),
+        "server_accepted": api.received['accepted'],
+        "server_rejected": api.received['rejected'],
+        "stop_s": round(close_s, 2),
+    }
+    if mode != 'legacy':
+        stats = probe.uploader.get_stats()
+        row.update({
+            "spilled": stats.get("spilled", 0),
+            "replayed": stats.get("replayed", 0),
+            "spill_queue_end": stats["spill_queue"],
+            "compression_ratio": round(stats.get("raw_bytes", 0) / max(1, stats.get("sent_bytes", 1)), 1),
+        })
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DeepStream probe time: synchronous upload vs background uploader')
+    parser.add_argument('--modes', default='legacy,uploader')
+    parser.add_argument('--sources', type=int, default=4)
+    parser.add_argument('--fps', type=float, default=30.0, help='Batched frames per second (all sources)')
+    parser.add_argument('--objects', type=float, default=6.0, help='Mean detections per frame')
+    parser.add_argument('--upload-interval', type=int, default=90, help='Frames between uploads')
+    parser.add_argument('--buffer-frames', type=int, default=300)
+    parser.add_argument('--latency-ms', type=float, default=400.0, help='Stub API response delay')
+    parser.add_argument('--jitter-ms', type=float, default=200.0)
+    parser.add_argument('--outage', default='8:14', help='start:end seconds the API returns 503 ("" for none)')
+    parser.add_argument('--backoff-max', type=float, default=4.0)
+    parser.add_argument('--duration', type=float, default=25.0, help='Seconds per mode')
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+    args.outage = tuple(float(x) for x in args.outage.split(':')) if args.outage else None
+
+    work = tempfile.mkdtemp(prefix='inveye_upload_')
+    try:
+        for mode in args.modes.split(','):
+            print(json.dumps(run(mode.strip(), args, work)))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+InvEye Detection Buffer & Cloud Uploader
+Keeps network I/O out of the DeepStream probe
+
+- DetectionBuffer: fixed-size ring of recent frames per camera source.
+  The probe only appends to it (a short lock, never I/O).
+- CloudUploader: a dedicated thread that builds the payload, gzips it,
+  POSTs it with exponential backoff, and spills payloads it cannot deliver
+  to a bounded on-disk queue that is replayed once the API is back.
+  Payloads the API rejects (4xx) or that keep failing are moved to a
+  dead-letter directory instead of blocking the queue.
+"""
+
+import os
+import gzip
+import json
+import time
+import random
+import threading
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+# Outcome of one POST
+SENT, RETRY, REJECTED = "sent", "retry", "rejected"
+
+
+# ============================================================
+# DETECTION BUFFER
+# ============================================================
+
+class DetectionBuffer:
+    """Per-source ring buffer of frame results, drained by the uploader"""
+
+    def __init__(self, max_frames: int = 300):
+        self.max_frames = max_frames
+        self._frames = defaultdict(lambda: deque(maxlen=max_frames))
+        self._seen = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, source_id: int, frame_data: dict):
+        """Store one frame result (oldest frame of the source is dropped when full)"""
+        with self._lock:
+            self._frames[source_id].append(frame_data)
+            self._seen[source_id] += 1
+
+    def drain(self) -> Dict[int, Tuple[List[dict], int]]:
+        """Take everything buffered: {source_id: (frames kept, frames seen since last drain)}"""
+        with self._lock:
+            frames, seen = self._frames, self._seen
+            self._frames = defaultdict(lambda: deque(maxlen=self.max_frames))
+            self._seen = defaultdict(int)
+        return {source_id: (list(frames[source_id]), count) for source_id, count in seen.items()}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(frames) for frames in self._frames.values())
+
+
+# ============================================================
+# CLOUD UPLOADER
+# ============================================================
+
+class CloudUploader:
+    """
+    Background uploader for detection metadata
+
+    notify() (cheap, safe from the probe) wakes the thread, which calls
+    build_payload() and sends the result. Failed payloads go to spill_dir
+    and are retried oldest-first after the next successful upload; the
+    spill queue is capped at max_spill_mb (oldest files dropped). A payload
+    answered with a 4xx other than 408/429, or whose replay has failed
+    max_replay_attempts times, is moved to spill_dir/dead_letter (same cap)
+    so the payloads behind it keep flowing.
+    """
+
+    def __init__(self, url: str, build_payload: Callable[[], Optional[dict]], api_key: str = None,
+                 spill_dir: str = "upload_spill", compress: bool = True, timeout: float = 5.0,
+                 max_interval: float = 30.0, backoff_min: float = 1.0, backoff_max: float = 300.0,
+                 max_spill_mb: float = 100.0, replay_per_cycle: int = 20, max_replay_attempts: int = 5):
+        self.url = url
+        self.build_payload = build_payload
+        self.api_key = api_key
+        self.spill_dir = Path(spill_dir)
+        self.compress = compress
+        self.timeout = timeout
+        self.max_interval = max_interval
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.max_spill_bytes = int(max_spill_mb * 1024 * 1024)
+        self.replay_per_cycle = replay_per_cycle
+        self.max_replay_attempts = max_replay_attempts
+        self.dead_dir = self.spill_dir / "dead_letter"
+
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+        self._wake = threading.Event()
+        self._stopping = False
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._spill_seq = 0
+        self._replay_attempts = defaultdict(int)  # spill file name -> failed replays
+        self._thread = None
+
+        self.stats = defaultdict(int)
+        self.last_error = None
+
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.dead_dir.mkdir(exist_ok=True)
+
+    def start(self):
+        """Start the uploader thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="inveye-uploader", daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """Ask for an upload of what is buffered now (never blocks)"""
+        self._wake.set()
+
+    def close(self, timeout: float = 10.0):
+        """Final upload, then stop the thread; anything undelivered stays spilled"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self.session.close()
+
+    # ------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            wait = self.max_interval
+            if self._retry_at:
+                wait = min(wait, max(0.0, self._retry_at - time.time()))
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+            stopping = self._stopping
+
+            try:
+                self._cycle(final=stopping)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[InvEye] Uploader error: {e}")
+
+            if stopping:
+                break
+
+    def _cycle(self, final: bool = False):
+        payload = self.build_payload()
+        body = self._encode(payload) if payload else None
+        in_backoff = time.time() < self._retry_at and not final
+
+        if body is not None:
+            outcome = RETRY if in_backoff else self._send(body, self.compress)
+            if outcome == RETRY:
+                self._spill(body)
+                return
+            if outcome == REJECTED:
+                self._dead_letter(self._write_spill(self.dead_dir, body))
+        elif in_backoff:
+            return
+        if final:
+            return  # the spill queue is replayed after the next start
+
+        # API reachable: replay spilled payloads, oldest first
+        answered = body is not None  # the live payload got an answer this cycle
+        for path in self._spilled()[:self.replay_per_cycle]:
+            if self._stopping:
+                break
+            outcome = self._send(path.read_bytes(), path.suffix == ".gz")
+            if outcome == SENT:
+                path.unlink(missing_ok=True)
+                self._replay_attempts.pop(path.name, None)
+                self.stats["replayed"] += 1
+                answered = True
+                continue
+            if outcome == RETRY:
+                # Only count failures of this payload while others get through (not outages)
+                if answered:
+                    self._replay_attempts[path.name] += 1
+                if self._replay_attempts[path.name] < self.max_replay_attempts:
+                    break
+            # Rejected, or failing again and again while other payloads get through
+            self._replay_attempts.pop(path.name, None)
+            target = self.dead_dir / path.name
+            os.replace(path, target)
+            self._dead_letter(target)
+            if outcome == RETRY:
+                break
+
+    def _encode(self, payload: dict) -> bytes:
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        self.stats["raw_bytes"] += len(body)
+        return gzip.compress(body, compresslevel=5) if self.compress else body
+
+    def _send(self, body: bytes, gzipped: bool) -> str:
+        """POST one payload: SENT, RETRY (network / 408 / 429 / 5xx) or REJECTED (other 4xx)"""
+        headers = {"Content-Encoding": "gzip"} if gzipped else None
+        try:
+            response = self.session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+            status = response.status_code
+            if 200 <= status < 300:
+                outcome = SENT
+            else:
+                outcome = REJECTED if 400 <= status < 500 and status not in (408, 429) else RETRY
+                self.last_error = f"HTTP {status}"
+        except requests.RequestException as e:
+            outcome = RETRY
+            self.last_error = str(e)
+
+        if outcome == SENT:
+            self.stats["uploaded"] += 1
+            self.stats["sent_bytes"] += len(body)
+        if outcome != RETRY:
+            # The API answered: no reason to back off
+            self._backoff = 0.0
+            self._retry_at = 0.0
+        else:
+            self.stats["failed"] += 1
+            self._backoff = min(self.backoff_max, max(self.backoff_min, self._backoff * 2))
+            self._retry_at = time.time() + self._backoff * random.uniform(0.8, 1.2)
+            print(f"[InvEye] Cloud upload failed ({self.last_error}), retry in {self._backoff:.0f}s")
+        return outcome
+
+    def _spilled(self, directory: Path = None) -> List[Path]:
+        directory = directory or self.spill_dir
+        return sorted([*directory.glob("*.json"), *directory.glob("*.json.gz")], key=lambda p: p.name)
+
+    def _write_spill(self, directory: Path, body: bytes) -> Path:
+        self._spill_seq += 1
+        suffix = ".json.gz" if self.compress else ".json"
+        path = directory / f"{time.time_ns():020d}-{self._spill_seq:06d}{suffix}"
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+        return path
+
+    def _spill(self, body: bytes):
+        self._write_spill(self.spill_dir, body)
+        self.stats["spilled"] += 1
+        self.stats["spill_dropped"] += self._trim(self.spill_dir)
+
+    def _dead_letter(self, path: Path):
+        self.stats["dead_lettered"] += 1
+        print(f"[InvEye] Cloud upload gave up on {path.name} ({self.last_error}), kept in {self.dead_dir}")
+        self._trim(self.dead_dir)
+
+    def _trim(self, directory: Path) -> int:
+        """Bound a payload directory on disk: drop the oldest files first. Returns how many were dropped."""
+        files = self._spilled(directory)
+        total = sum(p.stat().st_size for p in files)
+        dropped = 0
+        while files and total > self.max_spill_bytes:
+            oldest = files.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+            dropped += 1
+        return dropped
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["spill_queue"] = len(self._spilled())
+        stats["backoff_s"] = round(self._backoff, 1)
+        stats["last_error"] = self.last_error
+        return stats
@@ -26,16 +26,17 @@ gi.require_version('GstRtspServer', '1.0')
 from gi.repository import Gst, GLib, GstRtspServer
 
 import pyds
-import json
-import time
 import threading
 import argparse
 import yaml
 from datetime import datetime
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
 import requests
 
+from cloud_uploader import DetectionBuffer, CloudUploader
+from alert_dispatch import AlertDispatcher
+
 # Initialize GStreamer
 Gst.init(None)
 
@@ -99,6 +100,7 @@ CLASS_NAMES = {
 
 # Alert classes - these trigger immediate notifications
 ALERT_CLASSES = {"fire", "smoke", "fighting", "crowd", "no_helmet", "no_vest", "smoking"}
+CRITICAL_ALERTS = {"FIRE", "FIGHTING"}  # Alert types that bypass the notification rate limit
 
 # Colors for visualization (R, G, B)
 CLASS_COLORS = {
@@ -147,14 +149,26 @@ class InvEyeDeepStreamPipeline:
         self.pipeline = None
         self.loop = None
         
-        # Detection tracking
-        self.detection_buffer = defaultdict(list)
+        # Detection tracking (ring buffer per source, drained by the uploader)
+        self.detection_buffer = DetectionBuffer(self.config.get('buffer_frames', 300))
         self.alert_callback = None
         self.frame_count = 0
         
-        # Cloud upload queue
-        self.upload_queue = []
-        self.last_upload_time = time.time()
+        # Cloud upload runs on its own thread; the probe only wakes it
+        self.uploader = None
+        cloud_api = self.config.get('cloud_api', {})
+        if cloud_api.get('url'):
+            self.uploader = CloudUploader(
+                cloud_api['url'],
+                self._build_upload_payload,
+                api_key=cloud_api.get('key'),
+                spill_dir=cloud_api.get('spill_dir', 'upload_spill'),
+                compress=cloud_api.get('compress', True),
+                timeout=cloud_api.get('timeout', 5),
+                backoff_max=cloud_api.get('backoff_max', 300),
+                max_spill_mb=cloud_api.get('max_spill_mb', 100),
+                max_replay_attempts=cloud_api.get('max_replay_attempts', 5),
+            )
         
         print(f"[InvEye] Initializing with {len(self.config['cameras'])} cameras")
     
@@ -329,16 +343,16 @@ class InvEyeDeepStreamPipeline:
                 "alerts": alerts
             }
             
-            self.detection_buffer[source_id].append(frame_data)
+            self.detection_buffer.add(source_id, frame_data)
             
             # Trigger alert callback
             if alerts and self.alert_callback:
                 self.alert_callback(alerts)
             
-            # Upload to cloud periodically
+            # Upload to cloud periodically (the uploader thread does the work)
             self.frame_count += 1
-            if self.frame_count % self.config.get('upload_interval', 90) == 0:
-                self._upload_to_cloud()
+            if self.uploader and self.frame_count % self.config.get('upload_interval', 90) == 0:
+                self.uploader.notify()
             
             try:
                 l_frame = l_frame.next
@@ -372,14 +386,12 @@ class InvEyeDeepStreamPipeline:
         
         return True
     
-    def _upload_to_cloud(self):
-        """Upload detection metadata to cloud (NOT video)"""
+    def _build_upload_payload(self):
+        """Summarize buffered detections for the cloud (NOT video); runs on the uploader thread"""
         
-        api_url = self.config.get('cloud_api', {}).get('url')
-        api_key = self.config.get('cloud_api', {}).get('key')
-        
-        if not api_url:
-            return
+        drained = self.detection_buffer.drain()
+        if not drained:
+            return None
         
         # Aggregate data from all sources
         payload = {
@@ -388,7 +400,7 @@ class InvEyeDeepStreamPipeline:
             "cameras": {}
         }
         
-        for source_id, frames in self.detection_buffer.items():
+        for source_id, (frames, frames_seen) in drained.items():
             if frames:
                 # Summarize last batch
                 camera_name = self.config['cameras'][source_id].get('name', f'camera_{source_id}')
@@ -406,37 +418,13 @@ class InvEyeDeepStreamPipeline:
                 
                 payload['cameras'][camera_name] = {
                     "source_id": source_id,
-                    "frame_count": len(frames),
+                    "frame_count": frames_seen,
                     "detection_counts": dict(class_counts),
                     "alerts": all_alerts,
                     "avg_detections_per_frame": len(all_detections) / max(len(frames[-30:]), 1)
                 }
         
-        # Clear buffer
-        self.detection_buffer.clear()
-        
-        # Send to cloud
-        try:
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(
-                api_url,
-                json=payload,
-                headers=headers,
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                data_size = len(json.dumps(payload))
-                print(f"[InvEye] Uploaded {data_size} bytes to cloud")
-            else:
-                print(f"[InvEye] Cloud upload failed: {response.status_code}")
-        
-        except Exception as e:
-            print(f"[InvEye] Cloud upload error: {e}")
+        return payload
     
     def set_alert_callback(self, callback):
         """Set callback function for alerts"""
@@ -449,6 +437,8 @@ class InvEyeDeepStreamPipeline:
             self.create_pipeline()
         
         print("[InvEye] Starting pipeline...")
+        if self.uploader:
+            self.uploader.start()
         self.pipeline.set_state(Gst.State.PLAYING)
         
         self.loop = GLib.MainLoop()
@@ -470,8 +460,10 @@ class InvEyeDeepStreamPipeline:
         if self.loop and self.loop.is_running():
             self.loop.quit()
         
-        # Final upload
-        self._upload_to_cloud()
+        # Final upload (spilled to disk if the cloud is unreachable)
+        if self.uploader:
+            self.uploader.close()
+            print(f"[InvEye] Uploader: {self.uploader.get_stats()}")
         print("[InvEye] Pipeline stopped")
 
 
@@ -484,52 +476,61 @@ class AlertHandler:
     
     def __init__(self, config: dict):
         self.config = config
-        self.alert_history = []
-        self.cooldown = config.get('alert_cooldown', 30)  # seconds
-        self.last_alert_time = {}
+        self.alert_history = deque(maxlen=config.get('history_size', 1000))
+        self.cooldown = config.get('alert_cooldown', 30)  # seconds (coalescing window)
+        self.session = requests.Session()
+        
+        # Repeats within the cooldown are folded into one summary; delivery runs off the probe
+        self.dispatcher = AlertDispatcher(
+            self._send_notification,
+            rate_per_min=config.get('rate_per_min', 20),
+            burst=config.get('burst', 5),
+            max_retries=config.get('retries', 3),
+        )
     
     def handle_alert(self, alerts: list):
-        """Process incoming alerts"""
+        """Process incoming alerts (called from the probe, never blocks)"""
         
         for alert in alerts:
             alert_key = f"{alert['type']}_{alert['source_id']}"
             
-            # Check cooldown
-            last_time = self.last_alert_time.get(alert_key, 0)
-            if time.time() - last_time < self.cooldown:
-                continue
-            
-            self.last_alert_time[alert_key] = time.time()
-            self.alert_history.append(alert)
-            
-            # Send notifications
-            self._send_notification(alert)
+            if self.dispatcher.submit(alert_key, alert, window_s=self.cooldown,
+                                      confidence=alert['confidence'],
+                                      critical=alert['type'] in CRITICAL_ALERTS):
+                self.alert_history.append(alert)
     
-    def _send_notification(self, alert: dict):
-        """Send alert notification"""
+    def _send_notification(self, alert: dict, payload=None, attempt: int = 0):
+        """Send alert notification (dispatcher thread; raising triggers a retry)"""
         
-        print(f"""
+        if attempt == 0:
+            repeats = f"{alert['coalesced_count']}x until {alert['window_end'][11:19]}" \
+                if 'coalesced_count' in alert else "first"
+            print(f"""
 ╔══════════════════════════════════════════════════════════════╗
 ║ 🚨 INVEYE ALERT                                               ║
 ╠══════════════════════════════════════════════════════════════╣
 ║ Type: {alert['type']:<54} ║
 ║ Camera: {alert['source_id']:<52} ║
-║ Confidence: {alert['confidence']:.2%:<48} ║
+║ Confidence: {alert.get('max_confidence', alert['confidence']):<48.2%} ║
 ║ Time: {alert['timestamp']:<54} ║
+║ Occurrences: {repeats:<47} ║
 ╚══════════════════════════════════════════════════════════════╝
         """)
         
         # Webhook notification
         webhook_url = self.config.get('webhook_url')
         if webhook_url:
-            try:
-                requests.post(
-                    webhook_url,
-                    json=alert,
-                    timeout=3
-                )
-            except Exception as e:
-                print(f"[Alert] Webhook failed: {e}")
+            response = self.session.post(
+                webhook_url,
+                json=alert,
+                timeout=3
+            )
+            response.raise_for_status()
+    
+    def close(self):
+        """Deliver pending alerts and summaries, then stop the dispatcher"""
+        self.dispatcher.close()
+        print(f"[Alert] Dispatch: {self.dispatcher.get_stats()}")
 
 
 # ============================================================
@@ -582,7 +583,10 @@ def main():
     # Create and run pipeline
     pipeline = InvEyeDeepStreamPipeline(args.config)
     pipeline.set_alert_callback(alert_handler.handle_alert)
-    pipeline.start()
+    try:
+        pipeline.start()
+    finally:
+        alert_handler.close()
 
 
 def create_sample_config(path: str):
@@ -1,178 +1,587 @@
 """
 Detection Log Analyzer
 Generates detailed statistics and identifies anomalies in detection_log.json
+
+Streams the log in a single pass with online aggregators, so memory stays
+flat however large the log is:
+- per-label counts, confidence mean/stdev/min/max (Welford) and a
+  confidence histogram (quantiles to 0.001)
+- an exact histogram of detections per frame, from which the anomaly
+  thresholds, counts and the first listed frames are derived after the pass
+- per-camera time buckets (frames, detections, frames with alerts)
+
+Reads rotated segments (detection_log.json.5 ... .1, then the live file)
+and gzip segments (.gz). With --workers the segments (and byte ranges of
+large uncompressed segments) are analyzed in parallel processes and the
+aggregates merged.
+
+Understands both record layouts: top-level frame_id/detections, and the
+edge logger's {"meta": {"ts", "cam_id"}, "data": {"fid", "detections",
+"triggers"}, "alerts"} records.
+
+Usage:
+    python analyze_detections.py detection_log.json
+    python analyze_detections.py /var/log/roboi/ --workers 4 --bucket-minutes 15 --json summary.json
 """
 
+import os
+import re
 import json
-from collections import defaultdict
-from statistics import mean, stdev
+import io
+import gzip
+import math
+import time
+import argparse
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from multiprocessing import Pool
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+LOW_CONFIDENCE = 0.30
+CONF_BINS = 1000            # Confidence histogram resolution (0.001)
+MAX_LISTED = 20             # Anomalous frames listed per direction
+LOG_SUFFIXES = ('.json', '.jsonl', '.ndjson')
+_SEGMENT_RE = re.compile(r'^(?P<base>.+?)(?:\.(?P<n>\d+))?(?P<gz>\.gz)?$')
+
+
+# ============================================================
+# LOG SEGMENTS
+# ============================================================
+
+def find_segments(path):
+    """Log files for `path`, oldest first: rotated backups (highest number first), then the live file.
+
+    `path` may be the live log (its .N / .gz siblings are picked up), a single
+    rotated or gzip segment, or a directory of logs.
+    """
+    if os.path.isdir(path):
+        bases = set()
+        for name in os.listdir(path):
+            base = _SEGMENT_RE.match(name).group('base')
+            if base.endswith(LOG_SUFFIXES):
+                bases.add(os.path.join(path, base))
+        return [segment for base in sorted(bases) for segment in find_segments(base)]
+
+    directory, name = os.path.split(path)
+    if os.path.exists(path) and name != _SEGMENT_RE.match(name).group('base'):
+        return [path]
+
+    segments = []
+    for candidate in os.listdir(directory or '.'):
+        match = _SEGMENT_RE.match(candidate)
+        if match.group('base') == name:
+            segments.append((-int(match.group('n') or 0), candidate))
+    return [os.path.join(directory, candidate) for _, candidate in sorted(segments)]
+
+
+def segment_size(path):
+    """Uncompressed size of a segment (gzip ISIZE trailer, modulo 4 GiB, for .gz)."""
+    if not path.endswith('.gz'):
+        return os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.seek(-4, os.SEEK_END)
+        return int.from_bytes(f.read(4), 'little')
+
+
+def _open_segment(path):
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb', buffering=1024 * 1024)
+
+
+def is_json_array(path):
+    """True if the segment is a JSON array rather than NDJSON (first non-blank character is '[')."""
+    with _open_segment(path) as f:
+        while True:
+            chunk = f.read(4096)
+            if not chunk:
+                return False
+            chunk = chunk.lstrip()
+            if chunk:
+                return chunk.startswith(b'[')
+
+
+def split_segments(segments, chunk_bytes):
+    """(path, start, end) tasks; uncompressed NDJSON segments larger than chunk_bytes are split into byte ranges."""
+    tasks = []
+    for path in segments:
+        size = os.path.getsize(path)
+        if path.endswith('.gz') or not chunk_bytes or size <= chunk_bytes or is_json_array(path):
+            tasks.append((path, 0, None))
+            continue
+        for start in range(0, size, chunk_bytes):
+            tasks.append((path, start, min(start + chunk_bytes, size)))
+    return tasks
+
+
+def _read_lines(path, start=0, end=None):
+    """Raw lines of a segment, or of the lines starting in [start, end) for a byte range."""
+    if path.endswith('.gz'):
+        with _open_segment(path) as f:
+            yield from f
+        return
+    with open(path, 'rb', buffering=1024 * 1024) as f:
+        pos = start
+        if start:
+            # The line straddling `start` belongs to the previous range
+            f.seek(start - 1)
+            pos += len(f.readline()) - 1
+        for line in f:
+            if end is not None and pos >= end:
+                break
+            pos += len(line)
+            yield line
+
+
+def _iter_json_array(path, chunk_chars=1024 * 1024):
+    """Elements of a JSON array segment in any layout (pretty-printed too), decoded one at a time."""
+    decoder = json.JSONDecoder()
+    with _open_segment(path) as raw, io.TextIOWrapper(raw, encoding='utf-8') as f:
+        buf, pos, eof = '', 0, False
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,[':
+                pos += 1
+            if pos < len(buf):
+                if buf[pos] == ']':
+                    return
+                try:
+                    entry, pos = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    entry = None  # Element runs past the buffer (or is malformed): read more
+                if entry is not None:
+                    yield entry
+                    continue
+            if eof:
+                return  # Truncated or malformed tail
+            more = f.read(chunk_chars)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+
+
+def iter_detection_log(filepath, start=0, end=None):
+    """Yield the entries of one log segment (NDJSON, or a JSON array in any layout)."""
+    if start == 0 and is_json_array(filepath):
+        yield from _iter_json_array(filepath)
+        return
+    for line in _read_lines(filepath, start, end):
+        line = line.strip()
+        if line.endswith(b','):
+            line = line[:-1]
+        if line.startswith(b'{'):
+            try:
+                yield _loads(line)
+            except ValueError:
+                continue
+
 
 def load_detection_log(filepath):
-    """Load and parse the detection log JSON file."""
-    with open(filepath, 'r') as f:
-        content = f.read().strip()
-        # Handle JSON array or newline-delimited JSON
-        if content.startswith('['):
-            return json.loads(content)
+    """Load and parse the detection log JSON file (all segments, into memory)."""
+    return [entry for segment in find_segments(filepath) for entry in iter_detection_log(segment)]
+
+
+# ============================================================
+# ONLINE AGGREGATORS
+# ============================================================
+
+class RunningStats:
+    """Count, mean, sample stdev, min and max in one pass (Welford), mergeable (Chan et al.)."""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+def histogram_quantile(hist, q, scale=1.0):
+    """q-quantile of a histogram of bin counts (bin i covers i*scale)."""
+    total = sum(hist.values()) if isinstance(hist, dict) else sum(hist)
+    if not total:
+        return 0.0
+    rank = q * (total - 1)
+    seen = 0
+    items = sorted(hist.items()) if isinstance(hist, dict) else enumerate(hist)
+    for value, count in items:
+        seen += count
+        if seen > rank:
+            return value * scale
+    return value * scale
+
+
+class LogAggregate:
+    """Everything the report needs, accumulated entry by entry."""
+
+    def __init__(self, bucket_seconds=3600):
+        self.bucket_seconds = bucket_seconds
+        self.frames = 0
+        self.entries_without_ts = 0
+        self.bytes = 0
+        self.segments = 0
+        self.conf = defaultdict(RunningStats)                 # label -> confidence stats
+        self.conf_hist = defaultdict(lambda: [0] * (CONF_BINS + 1))
+        self.low_conf = Counter()                             # label -> detections below LOW_CONFIDENCE
+        self.per_frame = Counter()                            # detections in a frame -> frames
+        self.examples = defaultdict(list)                     # detections in a frame -> [(order, frame id)]
+        self.buckets = defaultdict(lambda: defaultdict(lambda: [0, 0, 0]))  # camera -> bucket -> [frames, dets, alerts]
+
+    def add(self, entry, order, index):
+        data = entry.get('data')
+        if not isinstance(data, dict):
+            data = entry
+        meta = entry.get('meta') or {}
+        detections = data.get('detections') or []
+
+        n = len(detections)
+        self.frames += 1
+        self.per_frame[n] += 1
+        examples = self.examples[n]
+        if len(examples) < MAX_LISTED:
+            examples.append((order, frame_label(entry, data, meta, index)))
+
+        for det in detections:
+            label = det.get('label', 'unknown')
+            confidence = det.get('confidence', 0) or 0
+            self.conf[label].add(confidence)
+            self.conf_hist[label][min(CONF_BINS, max(0, int(confidence * CONF_BINS)))] += 1
+            if confidence < LOW_CONFIDENCE:
+                self.low_conf[label] += 1
+
+        ts = parse_ts(meta.get('ts', entry.get('timestamp')))
+        if ts is None:
+            self.entries_without_ts += 1
+            bucket = None
         else:
-            # Newline-delimited JSON objects
-            entries = []
-            for line in content.split('\n'):
-                line = line.strip().rstrip(',')
-                if line and line.startswith('{'):
-                    try:
-                        entries.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        continue
-            return entries
-
-def analyze_detections(log_path):
+            bucket = int(ts // self.bucket_seconds * self.bucket_seconds)
+        alerts = entry.get('alerts') or data.get('triggers')
+        row = self.buckets[str(meta.get('cam_id', entry.get('camera_id', 'unknown')))][bucket]
+        row[0] += 1
+        row[1] += n
+        row[2] += bool(alerts)
+
+    def merge(self, other):
+        self.frames += other.frames
+        self.entries_without_ts += other.entries_without_ts
+        self.bytes += other.bytes
+        self.segments += other.segments
+        for label, stats in other.conf.items():
+            self.conf[label].merge(stats)
+        for label, hist in other.conf_hist.items():
+            mine = self.conf_hist[label]
+            for i, count in enumerate(hist):
+                if count:
+                    mine[i] += count
+        self.low_conf.update(other.low_conf)
+        self.per_frame.update(other.per_frame)
+        for n, examples in other.examples.items():
+            self.examples[n] = sorted(self.examples[n] + examples)[:MAX_LISTED]
+        for camera, buckets in other.buckets.items():
+            for bucket, row in buckets.items():
+                mine = self.buckets[camera][bucket]
+                for i, value in enumerate(row):
+                    mine[i] += value
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['conf'] = dict(self.conf)
+        state['conf_hist'] = dict(self.conf_hist)
+        state['examples'] = dict(self.examples)
+        state['buckets'] = {camera: dict(buckets) for camera, buckets in self.buckets.items()}
+        return state
+
+    def __setstate__(self, state):
+        self.__init__(state['bucket_seconds'])
+        for key in ('conf', 'conf_hist', 'examples'):
+            getattr(self, key).update(state.pop(key))
+        for camera, buckets in state.pop('buckets').items():
+            self.buckets[camera].update(buckets)
+        self.__dict__.update(state)
+
+    # --------------------------------------------------------
+    # Frame-level statistics (exact, from the per-frame histogram)
+    # --------------------------------------------------------
+
+    def frame_stats(self):
+        n = self.frames
+        total = sum(k * v for k, v in self.per_frame.items())
+        squares = sum(k * k * v for k, v in self.per_frame.items())
+        avg = total / n
+        std = math.sqrt(max(0.0, (squares - total * total / n) / (n - 1))) if n > 1 else 0.0
+        return avg, min(self.per_frame), max(self.per_frame), std
+
+    def frames_where(self, predicate):
+        """(frames matching, first MAX_LISTED of them in log order) for a predicate on the detection count."""
+        found = sum(count for n, count in self.per_frame.items() if predicate(n))
+        listed = sorted((order, frame_id, n) for n, examples in self.examples.items() if predicate(n)
+                        for order, frame_id in examples)[:MAX_LISTED]
+        return found, [(frame_id, n) for _, frame_id, n in listed]
+
+    def to_dict(self):
+        """JSON-serializable summary, including the full per-camera buckets."""
+        return {
+            'frames': self.frames,
+            'segments': self.segments,
+            'bytes': self.bytes,
+            'detections_per_frame': {str(k): v for k, v in sorted(self.per_frame.items())},
+            'labels': {
+                label: {
+                    'count': stats.count,
+                    'mean': stats.mean, 'stdev': stats.stdev, 'min': stats.min, 'max': stats.max,
+                    'p50': histogram_quantile(self.conf_hist[label], 0.5, 1 / CONF_BINS),
+                    'p90': histogram_quantile(self.conf_hist[label], 0.9, 1 / CONF_BINS),
+                    'p99': histogram_quantile(self.conf_hist[label], 0.99, 1 / CONF_BINS),
+                    'low_confidence': self.low_conf[label],
+                    'histogram': [sum(self.conf_hist[label][i:i + 100]) for i in range(0, CONF_BINS, 100)],
+                }
+                for label, stats in sorted(self.conf.items())
+            },
+            'bucket_seconds': self.bucket_seconds,
+            'cameras': {
+                camera: [{'bucket': bucket, 'frames': row[0], 'detections': row[1], 'alert_frames': row[2]}
+                         for bucket, row in sorted(buckets.items(), key=lambda kv: (kv[0] is None, kv[0] or 0))]
+                for camera, buckets in sorted(self.buckets.items())
+            },
+        }
+
+
+def parse_ts(value):
+    """Epoch seconds from an epoch number or an ISO-8601 string (UTC if no offset)."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else value   # epoch ms
+    try:
+        dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def frame_label(entry, data, meta, index):
+    """frame_id / fid when logged, else camera@ts, else the entry index within the segment (or byte range)."""
+    frame_id = entry.get('frame_id', data.get('fid'))
+    if frame_id is not None:
+        return frame_id
+    if 'ts' in meta:
+        return f"{meta.get('cam_id', '?')}@{meta['ts']}"
+    return index
+
+
+def _analyze_task(args):
+    """Aggregate one (segment, start, end) task; runs in a worker process with --workers."""
+    order, (path, start, end), bucket_seconds = args
+    agg = LogAggregate(bucket_seconds)
+    for index, entry in enumerate(iter_detection_log(path, start, end)):
+        if isinstance(entry, dict):
+            agg.add(entry, (order, index), index)
+    agg.bytes = (end if end is not None else segment_size(path)) - start
+    agg.segments = int(start == 0)
+    return agg
+
+
+def aggregate_log(log_path, workers=1, bucket_minutes=60, chunk_mb=256):
+    """Single-pass aggregate of every segment of the log, optionally across worker processes."""
+    segments = find_segments(log_path)
+    if not segments:
+        raise FileNotFoundError(f"No detection log segments found for {log_path}")
+    bucket_seconds = int(bucket_minutes * 60)
+    tasks = split_segments(segments, int(chunk_mb * 1024 * 1024) if workers > 1 else 0)
+    jobs = [(order, task, bucket_seconds) for order, task in enumerate(tasks)]
+
+    total = LogAggregate(bucket_seconds)
+    if workers > 1 and len(jobs) > 1:
+        with Pool(min(workers, len(jobs))) as pool:
+            for agg in pool.imap(_analyze_task, jobs):
+                total.merge(agg)
+    else:
+        for job in jobs:
+            total.merge(_analyze_task(job))
+    return total
+
+
+# ============================================================
+# REPORT
+# ============================================================
+
+def analyze_detections(log_path, workers=1, bucket_minutes=60, chunk_mb=256, json_out=None):
     """Main analysis function."""
     print("=" * 70)
     print("DETECTION LOG ANALYSIS REPORT")
     print("=" * 70)
-    
-    # Load data
-    print("\nLoading detection log...")
-    entries = load_detection_log(log_path)
-    print(f"Loaded {len(entries)} frames\n")
-    
-    # Initialize counters
-    object_counts = defaultdict(int)
-    object_confidences = defaultdict(list)
-    detections_per_frame = []
-    frame_anomalies = []
-    
-    # Process each frame
-    for entry in entries:
-        frame_id = entry.get('frame_id', 'unknown')
-        detections = entry.get('detections', [])
-        detections_per_frame.append(len(detections))
-        
-        for det in detections:
-            label = det.get('label', 'unknown')
-            confidence = det.get('confidence', 0)
-            
-            object_counts[label] += 1
-            object_confidences[label].append(confidence)
-    
+
+    print("\nScanning detection log...")
+    started = time.perf_counter()
+    agg = aggregate_log(log_path, workers, bucket_minutes, chunk_mb)
+    elapsed = time.perf_counter() - started
+    print(f"Scanned {agg.frames:,} frames from {agg.segments} segment(s), {agg.bytes / 1e6:,.1f} MB "
+          f"in {elapsed:.1f}s ({agg.bytes / 1e6 / max(elapsed, 1e-9):,.1f} MB/s)\n")
+    if not agg.frames:
+        print("No frames found")
+        return agg
+
     # ============================================================
     # PART 1: DETAILED STATISTICS
     # ============================================================
     print("=" * 70)
     print("PART 1: DETAILED STATISTICS BY OBJECT TYPE")
     print("=" * 70)
-    
+
     # Sort by count (descending)
-    sorted_objects = sorted(object_counts.items(), key=lambda x: -x[1])
-    
+    sorted_objects = sorted(agg.conf.items(), key=lambda x: -x[1].count)
+
     print(f"\n{'Object':<15} {'Count':>10} {'Avg Conf':>12} {'Min Conf':>10} {'Max Conf':>10} {'Std Dev':>10}")
     print("-" * 70)
-    
+
     total_detections = 0
-    for label, count in sorted_objects:
-        confs = object_confidences[label]
-        avg_conf = mean(confs)
-        min_conf = min(confs)
-        max_conf = max(confs)
-        std_conf = stdev(confs) if len(confs) > 1 else 0
-        total_detections += count
-        
-        print(f"{label:<15} {count:>10,} {avg_conf:>12.4f} {min_conf:>10.4f} {max_conf:>10.4f} {std_conf:>10.4f}")
-    
+    for label, stats in sorted_objects:
+        total_detections += stats.count
+        print(f"{label:<15} {stats.count:>10,} {stats.mean:>12.4f} {stats.min:>10.4f} {stats.max:>10.4f} "
+              f"{stats.stdev:>10.4f}")
+
     print("-" * 70)
     print(f"{'TOTAL':<15} {total_detections:>10,}")
-    
+
+    print(f"\n{'Object':<15} {'P50 Conf':>12} {'P90 Conf':>12} {'P99 Conf':>12}")
+    print("-" * 70)
+    for label, _ in sorted_objects:
+        hist = agg.conf_hist[label]
+        p50, p90, p99 = (histogram_quantile(hist, q, 1 / CONF_BINS) for q in (0.5, 0.9, 0.99))
+        print(f"{label:<15} {p50:>12.3f} {p90:>12.3f} {p99:>12.3f}")
+
     # Frame-level statistics
     print(f"\n{'FRAME-LEVEL STATISTICS':^70}")
     print("-" * 70)
-    avg_det_per_frame = mean(detections_per_frame)
-    min_det_per_frame = min(detections_per_frame)
-    max_det_per_frame = max(detections_per_frame)
-    std_det_per_frame = stdev(detections_per_frame) if len(detections_per_frame) > 1 else 0
-    
-    print(f"Total Frames Analyzed: {len(entries):,}")
+    avg_det_per_frame, min_det_per_frame, max_det_per_frame, std_det_per_frame = agg.frame_stats()
+
+    print(f"Total Frames Analyzed: {agg.frames:,}")
     print(f"Average Detections/Frame: {avg_det_per_frame:.2f}")
     print(f"Min Detections in a Frame: {min_det_per_frame}")
     print(f"Max Detections in a Frame: {max_det_per_frame}")
     print(f"Std Dev of Detections/Frame: {std_det_per_frame:.2f}")
-    
+    print("Detections/Frame P50 / P90 / P99: "
+          + " / ".join(f"{histogram_quantile(agg.per_frame, q):.0f}" for q in (0.5, 0.9, 0.99)))
+
+    # Per-camera activity
+    print(f"\n{'PER-CAMERA ACTIVITY':^70}")
+    print("-" * 70)
+    print(f"{'Camera':<20} {'Frames':>10} {'Detections':>12} {'Alert Frames':>13} {'Busiest Bucket (UTC)':>20}")
+    for camera, buckets in sorted(agg.buckets.items()):
+        frames = sum(row[0] for row in buckets.values())
+        detections = sum(row[1] for row in buckets.values())
+        alerts = sum(row[2] for row in buckets.values())
+        timed = {b: row for b, row in buckets.items() if b is not None}
+        busiest = max(timed, key=lambda b: timed[b][1]) if timed else None
+        busiest = datetime.fromtimestamp(busiest, timezone.utc).strftime('%Y-%m-%d %H:%M') if busiest is not None else '-'
+        print(f"{camera:<20} {frames:>10,} {detections:>12,} {alerts:>13,} {busiest:>20}")
+    if agg.entries_without_ts:
+        print(f"({agg.entries_without_ts:,} frames without a timestamp are bucketed as unknown)")
+
     # ============================================================
     # PART 2: ANOMALY DETECTION
     # ============================================================
     print("\n" + "=" * 70)
     print("PART 2: ANOMALY DETECTION")
     print("=" * 70)
-    
+
     # Define thresholds for anomalies
     low_threshold = avg_det_per_frame - 2 * std_det_per_frame
     high_threshold = avg_det_per_frame + 2 * std_det_per_frame
-    
+
     print(f"\nAnomaly Thresholds (±2 std dev):")
     print(f"  Low: < {low_threshold:.2f} detections")
     print(f"  High: > {high_threshold:.2f} detections")
-    
+
     # Find frame anomalies (unusual detection counts)
-    low_detection_frames = []
-    high_detection_frames = []
-    
-    for i, entry in enumerate(entries):
-        frame_id = entry.get('frame_id', i)
-        det_count = len(entry.get('detections', []))
-        
-        if det_count < low_threshold:
-            low_detection_frames.append((frame_id, det_count))
-        elif det_count > high_threshold:
-            high_detection_frames.append((frame_id, det_count))
-    
-    print(f"\n--- FRAMES WITH UNUSUALLY LOW DETECTIONS ({len(low_detection_frames)} found) ---")
-    if low_detection_frames:
-        for frame_id, count in low_detection_frames[:20]:  # Show first 20
-            print(f"  Frame {frame_id}: {count} detections")
-        if len(low_detection_frames) > 20:
-            print(f"  ... and {len(low_detection_frames) - 20} more")
-    else:
-        print("  None found")
-    
-    print(f"\n--- FRAMES WITH UNUSUALLY HIGH DETECTIONS ({len(high_detection_frames)} found) ---")
-    if high_detection_frames:
-        for frame_id, count in high_detection_frames[:20]:  # Show first 20
-            print(f"  Frame {frame_id}: {count} detections")
-        if len(high_detection_frames) > 20:
-            print(f"  ... and {len(high_detection_frames) - 20} more")
-    else:
-        print("  None found")
-    
+    low_found, low_detection_frames = agg.frames_where(lambda n: n < low_threshold)
+    high_found, high_detection_frames = agg.frames_where(lambda n: n > high_threshold)
+
+    for title, found, listed in (("LOW", low_found, low_detection_frames),
+                                 ("HIGH", high_found, high_detection_frames)):
+        print(f"\n--- FRAMES WITH UNUSUALLY {title} DETECTIONS ({found} found) ---")
+        if listed:
+            for frame_id, count in listed:  # Show first 20
+                print(f"  Frame {frame_id}: {count} detections")
+            if found > len(listed):
+                print(f"  ... and {found - len(listed)} more")
+        else:
+            print("  None found")
+
     # Confidence anomalies per object type
-    print(f"\n--- LOW CONFIDENCE DETECTIONS (< 0.30) ---")
-    low_conf_counts = defaultdict(int)
-    for entry in entries:
-        for det in entry.get('detections', []):
-            if det.get('confidence', 0) < 0.30:
-                low_conf_counts[det.get('label', 'unknown')] += 1
-    
-    if low_conf_counts:
-        for label, count in sorted(low_conf_counts.items(), key=lambda x: -x[1]):
-            pct = (count / object_counts[label]) * 100
+    print(f"\n--- LOW CONFIDENCE DETECTIONS (< {LOW_CONFIDENCE:.2f}) ---")
+    if agg.low_conf:
+        for label, count in sorted(agg.low_conf.items(), key=lambda x: -x[1]):
+            pct = (count / agg.conf[label].count) * 100
             print(f"  {label}: {count} low-confidence detections ({pct:.1f}% of total)")
     else:
         print("  None found")
-    
-    # Sudden confidence drops between consecutive frames
+
+    # Confidence spread per object type
     print(f"\n--- CONFIDENCE TREND ANALYSIS ---")
-    for label in sorted(object_counts.keys()):
-        confs = object_confidences[label]
-        avg = mean(confs)
-        if len(confs) > 1:
-            std = stdev(confs)
-            variance_pct = (std / avg) * 100 if avg > 0 else 0
+    for label in sorted(agg.conf):
+        stats = agg.conf[label]
+        if stats.count > 1:
+            variance_pct = (stats.stdev / stats.mean) * 100 if stats.mean > 0 else 0
             stability = "STABLE" if variance_pct < 20 else "VARIABLE" if variance_pct < 40 else "UNSTABLE"
             print(f"  {label}: {stability} (variance: {variance_pct:.1f}%)")
-    
+
+    if json_out:
+        with open(json_out, 'w') as f:
+            json.dump(agg.to_dict(), f, indent=1)
+        print(f"\nSummary written to {json_out}")
+
     print("\n" + "=" * 70)
     print("ANALYSIS COMPLETE")
     print("=" * 70)
+    return agg
+
 
 if __name__ == "__main__":
-    log_path = r"c:\Users\LENOVO\Desktop\my_docs\AG\InvEye\poc\detection_log.json"
-    analyze_detections(log_path)
+    parser = argparse.ArgumentParser(description='Streaming statistics and anomalies for detection logs')
+    parser.add_argument('log_path', nargs='?', default='detection_log.json',
+                        help='Live log file (rotated/.gz siblings included), one segment, or a directory')
+    parser.add_argument('--workers', type=int, default=1, help='Processes analyzing segments in parallel')
+    parser.add_argument('--bucket-minutes', type=float, default=60, help='Per-camera time bucket size')
+    parser.add_argument('--chunk-mb', type=float, default=256,
+                        help='With --workers, split uncompressed segments into byte ranges of this size')
+    parser.add_argument('--json', dest='json_out', help='Also write the full summary (incl. buckets) as JSON')
+    args = parser.parse_args()
+    analyze_detections(args.log_path, args.workers, args.bucket_minutes, args.chunk_mb, args.json_out)
@@ -0,0 +1,229 @@
+"""
+Detection Log Analyzer Benchmark
+Peak RSS and throughput of the streaming analyzer on a generated log
+
+Generates an edge-logger style detection log ({"type", "meta": {"ts",
+"cam_id"}, "data": {"detections", "triggers"}} per line) of --size-gb,
+rotated into --segment-mb segments with the older backups gzipped, then
+runs each mode in a fresh subprocess:
+
+- legacy: the previous analyzer (whole file into a list, several passes),
+  on the oldest uncompressed rotated segment only, since on the full log it
+  runs out of memory
+- stream-segment: streaming analyzer on that same segment
+- stream: streaming analyzer on the whole log, 1 process
+- stream-parallel: streaming analyzer on the whole log, --workers processes
+
+Usage:
+    python bench_analyze_detections.py
+    python bench_analyze_detections.py --size-gb 1 --segment-mb 128 --workers 4 --keep /data/bench_log
+"""
+
+import os
+import sys
+import json
+import gzip
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+from collections import defaultdict
+from statistics import mean, stdev
+
+from analyze_detections import aggregate_log, find_segments, segment_size
+
+LABELS = ['person', 'chair', 'laptop', 'bottle', 'cell phone', 'backpack', 'car', 'book', 'dining table', 'tv']
+
+
+# ============================================================
+# LOG GENERATION
+# ============================================================
+
+def generate_log(directory, size_bytes, segment_bytes, gzip_backups, cameras, seed):
+    """Write detection_log.json (+ .1 ... .N, older ones gzipped) totalling about size_bytes."""
+    rng = random.Random(seed)
+    # Pre-encoded detection lists, so generation is bound by disk, not by json.dumps
+    pool = []
+    for _ in range(4096):
+        detections = [{"class_id": i, "label": rng.choice(LABELS), "confidence": round(rng.betavariate(5, 2), 4),
+                       "bbox": {"top": rng.randint(0, 600), "left": rng.randint(0, 1000),
+                                "width": rng.randint(10, 300), "height": rng.randint(10, 400)}}
+                      for i in range(max(0, int(rng.gauss(6, 3))))]
+        pool.append((json.dumps(detections, separators=(',', ':')), sum(d['label'] == 'person' for d in detections)))
+
+    segments = []
+    written, ts = 0, 1760000000
+    while written < size_bytes:
+        path = os.path.join(directory, f"segment_{len(segments):05d}.tmp")
+        size = 0
+        with open(path, 'w', buffering=4 * 1024 * 1024) as f:
+            while size < segment_bytes and written + size < size_bytes:
+                lines = []
+                for _ in range(1000):
+                    ts += 1
+                    detections, people = pool[rng.randrange(len(pool))]
+                    triggers = '["crowd_detected"]' if people >= 4 else '[]'
+                    lines.append(
+                        f'{{"type":"{"event" if people >= 4 else "metric"}","meta":{{"ts":{ts},'
+                        f'"cam_id":"cam_{ts % cameras:02d}","site_id":"bench"}},"data":{{"triggers":{triggers},'
+                        f'"status":"safe","people_count":{people},"detections":{detections}}}}}\n')
+                chunk = ''.join(lines)
+                f.write(chunk)
+                size += len(chunk)
+        segments.append(path)
+        written += size
+
+    # Newest segment is the live file, the rest rotated backups (oldest = highest number)
+    base = os.path.join(directory, 'detection_log.json')
+    for age, path in enumerate(reversed(segments)):
+        target = base if age == 0 else f"{base}.{age}"
+        if age > len(segments) - 1 - gzip_backups and age > 0:
+            with open(path, 'rb') as src, gzip.open(target + '.gz', 'wb', compresslevel=1) as dst:
+                shutil.copyfileobj(src, dst, 4 * 1024 * 1024)
+            os.remove(path)
+        else:
+            os.replace(path, target)
+    return written
+
+
+# ============================================================
+# PREVIOUS ANALYZER
+# ============================================================
+
+def legacy_analyze(log_path):
+    """The previous load_detection_log + analyze_detections passes, minus the printing."""
+    with open(log_path, 'r') as f:
+        content = f.read().strip()
+        entries = []
+        for line in content.split('\n'):
+            line = line.strip().rstrip(',')
+            if line and line.startswith('{'):
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+
+    def detections_of(entry):
+        return entry.get('detections', entry.get('data', {}).get('detections', []))
+
+    object_counts = defaultdict(int)
+    object_confidences = defaultdict(list)
+    detections_per_frame = []
+    for entry in entries:
+        detections = detections_of(entry)
+        detections_per_frame.append(len(detections))
+        for det in detections:
+            object_counts[det.get('label', 'unknown')] += 1
+            object_confidences[det.get('label', 'unknown')].append(det.get('confidence', 0))
+    for confs in object_confidences.values():
+        mean(confs), min(confs), max(confs), stdev(confs) if len(confs) > 1 else 0
+
+    avg = mean(detections_per_frame)
+    std = stdev(detections_per_frame) if len(detections_per_frame) > 1 else 0
+    low, high = [], []
+    for i, entry in enumerate(entries):
+        n = len(detections_of(entry))
+        if n < avg - 2 * std:
+            low.append((i, n))
+        elif n > avg + 2 * std:
+            high.append((i, n))
+    low_conf = defaultdict(int)
+    for entry in entries:
+        for det in detections_of(entry):
+            if det.get('confidence', 0) < 0.30:
+                low_conf[det.get('label', 'unknown')] += 1
+    return len(entries)
+
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+
+def run_mode(mode, path, workers):
+    """Runs in a fresh interpreter; returns frames, time and peak RSS of this process and its workers."""
+    started = time.perf_counter()
+    if mode == 'legacy':
+        frames = legacy_analyze(path)
+    else:
+        frames = aggregate_log(path, workers=workers).frames
+    elapsed = time.perf_counter() - started
+    return {
+        'frames': frames,
+        'seconds': round(elapsed, 2),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'worker_peak_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def measure(mode, path, workers, size_bytes):
+    proc = subprocess.run([sys.executable, __file__, '--worker', json.dumps([mode, path, workers])],
+                          capture_output=True, text=True)
+    row = {'mode': mode, 'workers': workers, 'input_mb': round(size_bytes / 1e6, 1)}
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        row['error'] = lines[-1] if lines else f'exit code {proc.returncode}'
+        return row
+    row.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+    row['mb_per_s'] = round(size_bytes / 1e6 / max(row['seconds'], 1e-9), 1)
+    row['frames_per_s'] = round(row['frames'] / max(row['seconds'], 1e-9))
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak RSS and throughput: in-memory vs streaming log analyzer')
+    parser.add_argument('--modes', default='legacy,stream-segment,stream,stream-parallel')
+    parser.add_argument('--size-gb', type=float, default=5.0, help='Generated log size (uncompressed)')
+    parser.add_argument('--segment-mb', type=float, default=256.0, help='Rotation size of the generated log')
+    parser.add_argument('--gzip-backups', type=int, default=2, help='Oldest rotated segments stored as .gz')
+    parser.add_argument('--cameras', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--keep', help='Generate into (or reuse) this directory instead of a temp dir')
+    parser.add_argument('--seed', type=int, default=9)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_mode(*json.loads(args.worker))))
+        return
+
+    directory = args.keep or tempfile.mkdtemp(prefix='inveye_log_bench_')
+    os.makedirs(directory, exist_ok=True)
+    try:
+        base = os.path.join(directory, 'detection_log.json')
+        if not find_segments(base):
+            started = time.perf_counter()
+            written = generate_log(directory, int(args.size_gb * 1e9), int(args.segment_mb * 1e6),
+                                   args.gzip_backups, args.cameras, args.seed)
+            print(json.dumps({'generated_mb': round(written / 1e6, 1),
+                              'seconds': round(time.perf_counter() - started, 1)}), file=sys.stderr)
+        segments = find_segments(base)
+        # Logical (uncompressed) size is what the analyzer parses
+        total = sum(segment_size(p) for p in segments)
+        # A closed, uncompressed backup: the live file would make the streaming analyzer read every segment
+        oldest_plain = next((p for p in segments if p != base and not p.endswith('.gz')), None)
+
+        for mode in [m.strip() for m in args.modes.split(',')]:
+            if mode in ('legacy', 'stream-segment'):
+                if oldest_plain is None:
+                    print(json.dumps({'mode': mode, 'error': 'no uncompressed rotated segment '
+                                                             '(raise --size-gb or lower --gzip-backups)'}))
+                    continue
+                row = measure('legacy' if mode == 'legacy' else 'stream', oldest_plain, 1,
+                              os.path.getsize(oldest_plain))
+                row['mode'] = mode
+            elif mode == 'stream':
+                row = measure('stream', base, 1, total)
+            else:
+                row = measure('stream', base, args.workers, total)
+                row['mode'] = mode
+            print(json.dumps(row))
+    finally:
+        if not args.keep:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Adaptive Inference Benchmark
+============================
+
+Replays recorded clips (one per camera, in lockstep at the clip frame rate
+on a simulated clock) through InvEyePipeline twice:
+
+- reference: face and object detection on every frame
+- adaptive: InferenceScheduler deciding per frame (motion, detections,
+  shared inference budget), skipped frames keeping the last detections
+
+and reports the detector runs saved and the recall of the reference
+detections kept (same class, IoU >= --iou on the same frame). Several
+budgets can be compared in one run.
+
+Needs the YOLO model files (ultralytics); face recognition is disabled.
+
+Usage:
+    python bench_adaptive_inference.py --video forecourt.mp4 --video cash_counter.mp4
+    python bench_adaptive_inference.py --video a.mp4 --video b.mp4 --budgets 0.8,0.4,0.2 --device cuda:0
+"""
+
+import os
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+from typing import Dict, List, Tuple
+
+import cv2
+
+from main_pipeline import InvEyePipeline
+
+Key = Tuple[str, int]  # (camera_id, frame index)
+
+
+def iou(a, b) -> float:
+    ix1, iy1, ix2, iy2 = max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def replay(pipeline: InvEyePipeline, videos: List[str], fps: float, max_frames: int) -> Dict[Key, List]:
+    """Feed the clips frame by frame as one batch per tick; returns (class, bbox) detections per frame."""
+    caps = {f"camera_{i}": cv2.VideoCapture(path) for i, path in enumerate(videos)}
+    detections: Dict[Key, List] = {}
+    index = 0
+    while index < max_frames:
+        items = []
+        for camera_id, cap in caps.items():
+            ok, frame = cap.read()
+            if ok:
+                items.append((camera_id, frame, index + 1))
+        if not items:
+            break
+        for result in pipeline.process_batch(items, now=index / fps):
+            detections[(result.camera_id, index)] = [(d.class_name, d.bbox) for d in result.faces + result.objects]
+        index += 1
+    for cap in caps.values():
+        cap.release()
+    return detections
+
+
+def recall(reference: Dict[Key, List], adaptive: Dict[Key, List], min_iou: float) -> Dict[str, float]:
+    found = {'face': [0, 0], 'object': [0, 0]}
+    for key, ref in reference.items():
+        candidates = list(adaptive.get(key, []))
+        for class_name, bbox in ref:
+            group = 'face' if class_name == 'face' else 'object'
+            found[group][1] += 1
+            best = max(((iou(bbox, c[1]), j) for j, c in enumerate(candidates) if c[0] == class_name),
+                       default=(0.0, -1))
+            if best[0] >= min_iou:
+                found[group][0] += 1
+                candidates.pop(best[1])
+    total = [sum(v[0] for v in found.values()), sum(v[1] for v in found.values())]
+    return {
+        'recall': round(total[0] / total[1], 4) if total[1] else None,
+        'face_recall': round(found['face'][0] / found['face'][1], 4) if found['face'][1] else None,
+        'object_recall': round(found['object'][0] / found['object'][1], 4) if found['object'][1] else None,
+        'reference_detections': total[1],
+    }
+
+
+def make_pipeline(args, work: str, name: str, adaptive: bool, budget: float = 0.8) -> InvEyePipeline:
+    return InvEyePipeline(config={
+        'models': {
+            'device': args.device,
+            'face_detection_model': args.face_model,
+            'object_detection_model': args.object_model,
+            'recognition_model': 'buffalo_sc',
+        },
+        'face_database_path': os.path.join(work, f"faces_{name}"),
+        'face_detection_interval': 1,
+        'object_detection_interval': 1,
+        'recognition_interval': 10 ** 9,  # detection only
+        'face_confidence': args.conf,
+        'object_confidence': args.conf,
+        'save_alert_frames': False,
+        'adaptive_inference': adaptive,
+        'motion_threshold': args.motion_threshold,
+        'active_hold_s': args.active_hold,
+        'idle_inference_interval_s': args.idle_interval,
+        'inference_budget': budget,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detector runs saved and recall kept by adaptive inference scheduling')
+    parser.add_argument('--video', action='append', required=True, help='Recorded clip, one per camera')
+    parser.add_argument('--budgets', default='0.8', help='Comma list of inference budgets (s of inference per s)')
+    parser.add_argument('--fps', type=float, default=0, help='Replay rate (default: clip frame rate)')
+    parser.add_argument('--max-frames', type=int, default=3000, help='Frames per camera')
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--face-model', default='models/yolov11n-face.pt')
+    parser.add_argument('--object-model', default='models/yolov11n.pt')
+    parser.add_argument('--conf', type=float, default=0.5)
+    parser.add_argument('--motion-threshold', type=float, default=0.003)
+    parser.add_argument('--active-hold', type=float, default=3.0)
+    parser.add_argument('--idle-interval', type=float, default=2.0)
+    parser.add_argument('--iou', type=float, default=0.5)
+    args = parser.parse_args()
+
+    logging.getLogger('InvEye').setLevel(logging.ERROR)
+    fps = args.fps
+    if not fps:
+        cap = cv2.VideoCapture(args.video[0])
+        fps = cap.get(cv2.CAP_PROP_FPS) or 15.0
+        cap.release()
+
+    work = tempfile.mkdtemp(prefix='inveye_adaptive_')
+    try:
+        pipeline = make_pipeline(args, work, 'reference', adaptive=False)
+        reference = replay(pipeline, args.video, fps, args.max_frames)
+        pipeline.face_database.close()
+        frames = len(reference)
+        print(json.dumps({'mode': 'reference', 'cameras': len(args.video), 'frames': frames,
+                          'detector_runs': frames, 'fps': fps}))
+
+        for budget in [float(b) for b in args.budgets.split(',')]:
+            pipeline = make_pipeline(args, work, f"adaptive_{budget}", adaptive=True, budget=budget)
+            adaptive = replay(pipeline, args.video, fps, args.max_frames)
+            pipeline.face_database.close()
+            stats = pipeline.scheduler.get_stats()
+            runs = sum(v for k, v in stats.items() if k.startswith('run_'))
+            print(json.dumps({
+                'mode': 'adaptive',
+                'budget': budget,
+                'frames': len(adaptive),
+                'detector_runs': runs,
+                'runs_saved_pct': round(100.0 * (1 - runs / max(1, frames)), 1),
+                **recall(reference, adaptive, args.iou),
+                'runs_by_reason': {k[4:]: v for k, v in stats.items() if k.startswith('run_')},
+                'skipped_static': stats.get('skipped_static', 0),
+                'skipped_budget': stats.get('skipped_budget', 0),
+            }))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
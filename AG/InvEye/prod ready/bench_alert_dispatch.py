@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Alert Dispatch Benchmark
+========================
+
+Simulates a burst of alert-class detections (a fire on one camera, a
+fight on another, unknown faces on all of them) at camera frame rate and
+feeds every detection to AlertManager.create_alert, as _handle_objects
+does. Notification delivery is a stand-in webhook with latency and a
+failure rate.
+
+- legacy: the previous create_alert (cooldown, then callback inline in the
+  frame thread, failures logged and lost)
+- dispatch: AlertManager with AlertDispatcher (coalescing window, token
+  bucket, worker with retries)
+
+Reports alerts generated versus notifications delivered, how many
+generated alerts the delivered notifications account for (summaries carry
+their count), and the caller-side latency of create_alert.
+
+Usage:
+    python bench_alert_dispatch.py
+    python bench_alert_dispatch.py --webhook-ms 800 --failure-rate 0.3 --window 10 --duration 40
+"""
+
+import time
+import json
+import random
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from main_pipeline import AlertManager, Detection
+
+
+class LegacyAlertManager(AlertManager):
+    """The previous AlertManager: per-key cooldown, callback inline."""
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.alert_history: List[Dict] = []
+        self.last_alert_time: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def create_alert(self, alert_type: str, camera_id: str, detection: Detection = None,
+                     message: str = None, frame: np.ndarray = None) -> Optional[Dict]:
+        config = self.ALERT_CONFIG.get(alert_type, {'severity': 'medium', 'cooldown': 60})
+        with self._lock:
+            key = f"{alert_type}_{camera_id}"
+            now = time.time()
+            if now - self.last_alert_time[key] < config['cooldown']:
+                return None
+            self.last_alert_time[key] = now
+        alert = {
+            'id': f"{alert_type}_{camera_id}_{int(now)}", 'type': alert_type, 'severity': config['severity'],
+            'camera_id': camera_id, 'timestamp': datetime.now().isoformat(),
+            'message': message or f"{alert_type.upper()} detected on {camera_id}",
+            'detection': {'class': detection.class_name, 'confidence': detection.confidence,
+                          'bbox': detection.bbox} if detection else None,
+        }
+        self.alert_history.append(alert)
+        if len(self.alert_history) > 1000:
+            self.alert_history = self.alert_history[-500:]
+        if self.callback:
+            try:
+                self.callback(alert, frame)
+            except Exception:
+                pass
+        return alert
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        return True
+
+
+class Webhook:
+    """Notification endpoint stand-in: fixed latency, random failures."""
+
+    def __init__(self, latency_s: float, failure_rate: float, seed: int):
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.delivered = 0
+        self.accounted = 0  # generated alerts represented by delivered notifications
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, alert: Dict, frame=None, attempt: int = 0):
+        time.sleep(self.latency_s)
+        with self._lock:
+            if self.rng.random() < self.failure_rate:
+                self.failures += 1
+                raise ConnectionError("webhook unavailable")
+            self.delivered += 1
+            self.accounted += alert.get('folded_count', 1)
+
+
+def schedule(args) -> List[Dict]:
+    """Which alert types each camera sees over the run (seconds from start)."""
+    events = [
+        {'camera': 'camera_0', 'type': 'fire', 'start': 1.0, 'end': args.duration * 0.8, 'per_frame': 3},
+        {'camera': 'camera_1', 'type': 'fight', 'start': args.duration * 0.2, 'end': args.duration * 0.6,
+         'per_frame': 2},
+        {'camera': 'camera_1', 'type': 'violence', 'start': args.duration * 0.25, 'end': args.duration * 0.5,
+         'per_frame': 1},
+    ]
+    for i in range(args.cameras):
+        events.append({'camera': f'camera_{i}', 'type': 'unknown_person', 'start': 0.0, 'end': args.duration,
+                       'per_frame': 1, 'probability': 0.3})
+    return events
+
+
+def run(mode: str, args) -> Dict:
+    webhook = Webhook(args.webhook_ms / 1000.0, args.failure_rate, args.seed)
+    if mode == 'legacy':
+        manager = LegacyAlertManager(callback=webhook)
+    else:
+        manager = AlertManager(callback=webhook, rate_per_min=args.rate_per_min, burst=args.burst)
+        manager.dispatcher.retry_backoff_s = 0.2
+    manager.ALERT_CONFIG = {k: dict(v, cooldown=args.window) for k, v in AlertManager.ALERT_CONFIG.items()}
+
+    rng = random.Random(args.seed)
+    events = schedule(args)
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    generated = 0
+    latencies = []
+    interval = 1.0 / args.fps
+    start = time.time()
+    next_due = start
+    while time.time() - start < args.duration:
+        wait = next_due - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        next_due += interval
+        t = time.time() - start
+        for event in events:
+            if not event['start'] <= t < event['end'] or rng.random() > event.get('probability', 1.0):
+                continue
+            for _ in range(event['per_frame']):
+                detection = Detection(event['type'], rng.uniform(0.5, 0.99), (100, 100, 300, 300), 0)
+                call = time.perf_counter()
+                manager.create_alert(event['type'], event['camera'], detection, frame=frame)
+                latencies.append((time.perf_counter() - call) * 1000)
+                generated += 1
+
+    flush_start = time.time()
+    manager.flush(timeout=60)
+    flush_s = time.time() - flush_start
+
+    lat = np.asarray(latencies)
+    row = {
+        'mode': mode,
+        'generated': generated,
+        'delivered': webhook.delivered,
+        'accounted_for': webhook.accounted,
+        'accounted_pct': round(100.0 * webhook.accounted / max(1, generated), 1),
+        'webhook_failures': webhook.failures,
+        'caller_p50_ms': round(float(np.percentile(lat, 50)), 4),
+        'caller_p99_ms': round(float(np.percentile(lat, 99)), 3),
+        'caller_max_ms': round(float(lat.max()), 1),
+        'caller_total_s': round(float(lat.sum()) / 1000, 2),
+        'flush_s': round(flush_s, 2),
+    }
+    if mode != 'legacy':
+        stats = manager.dispatcher.get_stats()
+        row.update({k: stats.get(k, 0) for k in ('coalesced', 'summaries', 'rate_limited', 'retries', 'failed')})
+        manager.dispatcher.close()
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Alert burst: inline cooldown alerts vs coalescing dispatcher')
+    parser.add_argument('--modes', default='legacy,dispatch')
+    parser.add_argument('--cameras', type=int, default=4)
+    parser.add_argument('--fps', type=float, default=15.0)
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds of simulated burst')
+    parser.add_argument('--window', type=float, default=5.0, help='Cooldown / coalescing window for every type')
+    parser.add_argument('--rate-per-min', type=float, default=20)
+    parser.add_argument('--burst', type=int, default=5)
+    parser.add_argument('--webhook-ms', type=float, default=300.0)
+    parser.add_argument('--failure-rate', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=4)
+    args = parser.parse_args()
+
+    logging.getLogger('InvEye').setLevel(logging.CRITICAL)
+    for mode in args.modes.split(','):
+        print(json.dumps(run(mode.strip(), args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Analytics Output Benchmark
+==========================
+
+Cost of the analytics JSON output after 1 hour and after 24 hours of
+simulated traffic (visitors, employees, incidents across cameras, on a
+simulated clock):
+
+- legacy: what the previous code did every interval (whole snapshot with
+  indent=2, KPI counts recomputed over active incidents) and at exit
+  (every face and every incident ever, indent=2)
+- incremental: AnalyticsEngine's NDJSON delta per interval, the periodic
+  compact snapshot, and their amortised cost per interval
+
+Usage:
+    python bench_analytics_output.py
+    python bench_analytics_output.py --incidents-per-hour 120 --resolve-share 0
+    python bench_analytics_output.py --snapshot-interval 60
+"""
+
+import os
+import time
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+from petrol_pump_analytics import (FaceTracker, IncidentManager, AnalyticsEngine, AnalyticsSnapshot,
+                                   PETROL_PUMP_KPIS)
+
+CHECKPOINTS_H = (1, 24)
+
+
+def legacy_interval(path: str, engine: AnalyticsEngine, tracker: FaceTracker, manager: IncidentManager,
+                    now: datetime) -> float:
+    """Previous maybe_output: recount KPIs over active incidents, rewrite the whole file with indent=2."""
+    start = time.perf_counter()
+    by_severity, by_kpi = {}, {}
+    for incident in list(manager.active_incidents.values()):
+        by_severity[incident.severity] = by_severity.get(incident.severity, 0) + 1
+        by_kpi[incident.kpi_name] = by_kpi.get(incident.kpi_name, 0) + 1
+    snapshot = AnalyticsSnapshot(
+        timestamp=now,
+        camera_stats=dict(engine.camera_stats),
+        active_incidents=manager.get_active_incidents(),
+        face_stats=tracker.get_stats(),
+        kpi_summary={"today": dict(manager.daily_stats.get(now.strftime("%Y-%m-%d"), {})),
+                     "by_severity": by_severity, "by_kpi": by_kpi,
+                     "active_count": len(manager.active_incidents)},
+    )
+    with open(path, 'w') as f:
+        json.dump(snapshot.to_dict(), f, indent=2)
+    return (time.perf_counter() - start) * 1000
+
+
+def legacy_final(path: str, engine: AnalyticsEngine, tracker: FaceTracker, all_faces: List[Dict],
+                 all_incidents: List[Dict]) -> float:
+    """Previous _output_json: every face and incident of the session, indent=2."""
+    start = time.perf_counter()
+    analytics = {
+        "generated_at": datetime.now().isoformat(),
+        "face_stats": tracker.get_stats(),
+        "faces": all_faces,
+        "incidents": all_incidents,
+        "camera_stats": dict(engine.camera_stats),
+    }
+    with open(path, 'w') as f:
+        json.dump(analytics, f, indent=2, default=str)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analytics output cost after 1h and 24h of simulated traffic')
+    parser.add_argument('--cameras', type=int, default=4)
+    parser.add_argument('--visitors-per-hour', type=int, default=250)
+    parser.add_argument('--incidents-per-hour', type=int, default=60, help='Incident attempts (cooldowns apply)')
+    parser.add_argument('--resolve-share', type=float, default=0.5, help='Share of incidents resolved by an operator')
+    parser.add_argument('--output-interval', type=int, default=5)
+    parser.add_argument('--snapshot-interval', type=int, default=5, help='Snapshot every N s (config default: analytics_interval)')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed repeats of each checkpoint measurement')
+    parser.add_argument('--seed', type=int, default=9)
+    args = parser.parse_args()
+
+    logging.getLogger('PetrolPump').setLevel(logging.ERROR)
+    rng = np.random.default_rng(args.seed)
+    work = tempfile.mkdtemp(prefix='inveye_analytics_')
+    try:
+        tracker = FaceTracker()
+        manager = IncidentManager(output_dir=os.path.join(work, "incidents"))
+        engine = AnalyticsEngine(output_file=os.path.join(work, "analytics_output.json"),
+                                 output_interval=args.output_interval, snapshot_interval=args.snapshot_interval)
+        engine.last_output_time = 0.0
+        cameras = [f"cam_{i}" for i in range(args.cameras)]
+        kpis = list(PETROL_PUMP_KPIS)
+        all_faces: List[Dict] = []
+        all_incidents: List[Dict] = []
+        to_resolve: List = []
+
+        start = datetime(2025, 1, 1, 6, 0, 0)
+        step = timedelta(seconds=args.output_interval)
+        steps_per_hour = 3600 // args.output_interval
+        delta_ms: List[float] = []
+        snapshot_ms: List[float] = []
+        now = start
+        for hour in range(1, max(CHECKPOINTS_H) + 1):
+            for _ in range(steps_per_hour):
+                now += step
+                for cam in cameras:
+                    engine.update_camera_stats(cam, int(rng.integers(0, 4)), int(rng.integers(0, 10)),
+                                               float(rng.uniform(30, 80)))
+                for _ in range(rng.poisson(args.visitors_per_hour * 2 / steps_per_hour)):
+                    emb = rng.standard_normal(512).astype(np.float32)
+                    info = tracker.process_face(emb, now=now)
+                    if info["is_new"]:
+                        all_faces.append(tracker.known_faces[info["face_id"]].to_dict())
+                for _ in range(rng.poisson(args.incidents_per_hour / steps_per_hour)):
+                    incident = manager.create_incident(kpis[int(rng.integers(len(kpis)))],
+                                                       cameras[int(rng.integers(len(cameras)))],
+                                                       float(rng.uniform(0.5, 1.0)), (0, 0, 50, 50), now=now)
+                    if incident:
+                        all_incidents.append(incident.to_dict())
+                        if rng.random() < args.resolve_share:
+                            to_resolve.append((now + timedelta(minutes=float(rng.uniform(1, 30))), incident.id))
+                due = [r for r in to_resolve if r[0] <= now]
+                for when, incident_id in due:
+                    manager.resolve_incident(incident_id, now=when)
+                to_resolve = [r for r in to_resolve if r[0] > now]
+
+                snapshots = engine.output_stats["snapshots"]
+                t0 = time.perf_counter()
+                engine.maybe_output(tracker, manager, now=now.timestamp())
+                elapsed = (time.perf_counter() - t0) * 1000
+                (snapshot_ms if engine.output_stats["snapshots"] > snapshots else delta_ms).append(elapsed)
+
+            if hour in CHECKPOINTS_H:
+                legacy_path = os.path.join(work, "legacy.json")
+                legacy_tick = min(legacy_interval(legacy_path, engine, tracker, manager, now)
+                                  for _ in range(args.repeats))
+                legacy_size = os.path.getsize(legacy_path)
+                legacy_exit = min(legacy_final(legacy_path, engine, tracker, all_faces, all_incidents)
+                                  for _ in range(args.repeats))
+                legacy_exit_size = os.path.getsize(legacy_path)
+                delta = float(np.mean(delta_ms[-steps_per_hour:])) if delta_ms else 0.0
+                snapshot = float(np.mean(snapshot_ms[-60:])) if snapshot_ms else 0.0
+                ratio = args.output_interval / args.snapshot_interval
+                print(json.dumps({
+                    "hours": hour,
+                    "faces_seen": len(all_faces),
+                    "incidents": len(all_incidents),
+                    "active_incidents": len(manager.active_incidents),
+                    "legacy_interval_ms": round(legacy_tick, 3),
+                    "legacy_interval_kb": round(legacy_size / 1024, 1),
+                    "legacy_exit_ms": round(legacy_exit, 3),
+                    "legacy_exit_kb": round(legacy_exit_size / 1024, 1),
+                    "delta_ms": round(delta, 3),
+                    "snapshot_ms": round(snapshot, 3),
+                    "snapshot_kb": round(engine.output_stats["snapshot_bytes"] / 1024, 1),
+                    "incremental_interval_ms": round(delta * (1 - ratio) + snapshot * ratio, 3),
+                    "avg_delta_bytes": round(engine.output_stats["delta_bytes"] / max(1, engine.output_stats["deltas"]), 1),
+                }))
+        engine.close()
+        manager.close()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Batched Inference Benchmark
+===========================
+
+Aggregate throughput and capture-to-result latency of InvEyePipeline with
+2-8 simulated cameras, running the serial loop (one face and one object
+detection call per camera frame) against cross-camera batching (the
+latest frame of every camera in one call per detector, issued by the
+deadline-based BatchFormer). Per-camera result rates are reported too, so
+a camera left out of the batches (more cameras than --max-batch) shows up
+as starved.
+
+Cameras are synthetic streams producing frames at a fixed rate, so
+neither video decoding nor a camera link is part of the measurement.
+Needs the YOLO model files (ultralytics); face recognition is disabled.
+
+Usage:
+    python bench_batched_inference.py --device cuda:0
+    python bench_batched_inference.py --device cpu --cameras 2,4 --duration 20 --max-wait-ms 50
+    python bench_batched_inference.py --cameras 10 --max-batch 8   # fairness past the batch size
+"""
+
+import os
+import time
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from main_pipeline import InvEyePipeline, CameraStream
+
+
+class SyntheticStream(CameraStream):
+    """CameraStream fed by a generated moving scene instead of cv2.VideoCapture."""
+
+    def __init__(self, camera_id: str, fps_limit: int, width: int, height: int, seed: int):
+        super().__init__(camera_id, f"synthetic://{camera_id}", fps_limit)
+        rng = np.random.default_rng(seed)
+        self.background = cv2.resize(rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8),
+                                     (width, height))
+        self.produced = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._read_frames, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2.0)
+
+    def _read_frames(self):
+        interval = 1.0 / self.fps_limit
+        next_due = time.time()
+        height, width = self.background.shape[:2]
+        while self.running:
+            wait = next_due - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            next_due += interval
+            frame = self.background.copy()
+            x = (self.produced * 9) % (width - 160)
+            cv2.rectangle(frame, (x, height // 3), (x + 160, height // 3 + 220), (60, 60, 200), -1)
+            self.produced += 1
+            if self.frame_queue.full():
+                try:
+                    self.frame_queue.get_nowait()
+                except Exception:
+                    pass
+            self.frame_queue.put_nowait((frame, datetime.now()))
+
+
+def run_mode(mode: str, cameras: int, args, work: str) -> Dict:
+    pipeline = InvEyePipeline(config={
+        'models': {
+            'device': args.device,
+            'face_detection_model': args.face_model,
+            'object_detection_model': args.object_model,
+            'recognition_model': 'buffalo_sc',
+        },
+        'face_database_path': os.path.join(work, f"faces_{mode}_{cameras}"),
+        'face_detection_interval': 1,
+        'object_detection_interval': 1,
+        'recognition_interval': 10 ** 9,  # detection only
+        'save_alert_frames': False,
+        'batch_inference': mode == 'batched',
+        'batch_max_wait_ms': args.max_wait_ms,
+        'batch_max_size': args.max_batch,
+    })
+    for i in range(cameras):
+        pipeline.cameras[f"camera_{i}"] = SyntheticStream(f"camera_{i}", args.camera_fps, args.width, args.height,
+                                                         seed=i)
+
+    # Warm up both detectors at the batch sizes this run will use
+    warm = [np.zeros((args.height, args.width, 3), dtype=np.uint8)] * min(cameras, args.max_batch)
+    for size in ({1, len(warm)} if mode == 'batched' else {1}):
+        pipeline.model_manager.detect_faces_batch(warm[:size])
+        pipeline.model_manager.detect_objects_batch(warm[:size])
+
+    for camera in pipeline.cameras.values():
+        camera.start()
+    frame_counts = {camera_id: 0 for camera_id in pipeline.cameras}
+    latencies: List[float] = []
+    per_camera = {camera_id: 0 for camera_id in pipeline.cameras}
+    processed = 0
+    end = time.time() + args.duration
+    start = time.time()
+    while time.time() < end:
+        tick = pipeline._batched_tick(frame_counts) if mode == 'batched' else pipeline._serial_tick(frame_counts)
+        for result, timestamp in tick:
+            latencies.append((time.time() - timestamp.timestamp()) * 1000)
+            per_camera[result.camera_id] += 1
+            processed += 1
+    elapsed = time.time() - start
+    produced = sum(camera.produced for camera in pipeline.cameras.values())
+    for camera in pipeline.cameras.values():
+        camera.stop()
+    pipeline.face_database.close()
+
+    lat = np.asarray(latencies) if latencies else np.zeros(1)
+    row = {
+        'mode': mode,
+        'cameras': cameras,
+        'throughput_fps': round(processed / elapsed, 2),
+        'per_camera_fps': round(processed / elapsed / cameras, 2),
+        'dropped_pct': round(100.0 * (1 - processed / max(1, produced)), 1),
+        'latency_p50_ms': round(float(np.percentile(lat, 50)), 1),
+        'latency_p95_ms': round(float(np.percentile(lat, 95)), 1),
+        'latency_max_ms': round(float(lat.max()), 1),
+        'camera_fps_min': round(min(per_camera.values()) / elapsed, 2),
+        'camera_fps_max': round(max(per_camera.values()) / elapsed, 2),
+        'starved_cameras': sum(1 for count in per_camera.values() if count == 0),
+    }
+    if mode == 'batched':
+        stats = pipeline.batch_former.stats
+        row['avg_batch'] = round(stats['frames'] / max(1, stats['batches']), 2)
+        row['deadline_hits'] = stats['deadline_hits']
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serial vs cross-camera batched YOLO inference, 2-8 cameras')
+    parser.add_argument('--cameras', default='2,4,8', help='Comma list of camera counts')
+    parser.add_argument('--modes', default='serial,batched')
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--face-model', default='models/yolov11n-face.pt')
+    parser.add_argument('--object-model', default='models/yolov11n.pt')
+    parser.add_argument('--camera-fps', type=int, default=15)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--max-wait-ms', type=float, default=30.0)
+    parser.add_argument('--max-batch', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds per run')
+    args = parser.parse_args()
+
+    logging.getLogger('InvEye').setLevel(logging.ERROR)
+    work = tempfile.mkdtemp(prefix='inveye_batching_')
+    try:
+        for cameras in [int(c) for c in args.cameras.split(',')]:
+            for mode in args.modes.split(','):
+                print(json.dumps(run_mode(mode.strip(), cameras, args, work)))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
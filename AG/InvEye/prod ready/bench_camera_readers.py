@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Camera Reader Harness
+=====================
+
+Runs local video files as simulated live cameras through the previous
+serial capture loop (cap.read() on each camera in turn, then process) and
+through PetrolPumpPipeline.run with per-camera CameraReader threads, and
+reports per-camera effective FPS and frame staleness (time from capture
+to processing).
+
+A simulated camera produces frames on a real-time schedule like a live
+stream, buffers a few of them when nobody reads, and can be made slow
+(`--slow`: extra read latency, e.g. a congested RTSP link) or flaky
+(`--flaky`: periodic outages where read blocks and then fails, as a
+dropped RTSP stream does before the reconnect).
+
+Model inference is replaced by a fixed per-frame processing time.
+
+Usage:
+    python bench_camera_readers.py
+    python bench_camera_readers.py --video a.mp4 --video b.mp4 --cameras 4 --slow 1 --flaky 2
+"""
+
+import io
+import os
+import time
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import contextlib
+from collections import defaultdict
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from petrol_pump_analytics import PetrolPumpPipeline
+
+
+def make_video(path: str, seconds: float, fps: float, width: int, height: int, seed: int):
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    background = cv2.resize(rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8), (width, height))
+    for i in range(int(seconds * fps)):
+        frame = background.copy()
+        x = int((i * 7) % (width - 120))
+        cv2.rectangle(frame, (x, height // 3), (x + 120, height // 3 + 80), (40, 40, 220), -1)
+        writer.write(frame)
+    writer.release()
+
+
+class SimulatedSource:
+    """Schedule shared by every capture opened on one simulated camera (they survive reconnects)."""
+
+    def __init__(self, video: str, fps: float, buffer: int, read_delay_s: float,
+                 outage_every_s: float, outage_s: float, read_timeout_s: float):
+        self.video = video
+        self.fps = fps
+        self.buffer = buffer
+        self.read_delay_s = read_delay_s
+        self.outage_every_s = outage_every_s
+        self.outage_s = outage_s
+        self.read_timeout_s = read_timeout_s
+        self.t0 = time.time()
+        self.next_index = 0
+        self.capture_times: Dict[int, float] = {}  # id(frame) -> when the camera captured it
+        self._lock = threading.Lock()
+
+    def in_outage(self, now: float) -> float:
+        """Seconds left of the current outage, 0 if the stream is up."""
+        if not self.outage_every_s:
+            return 0.0
+        phase = (now - self.t0) % self.outage_every_s
+        start = self.outage_every_s - self.outage_s
+        return self.outage_every_s - phase if phase >= start else 0.0
+
+    def capture(self, _source=None) -> "SimulatedCapture":
+        return SimulatedCapture(self)
+
+
+class SimulatedCapture:
+    """cv2.VideoCapture stand-in with live-camera timing on top of a real decoded video file."""
+
+    def __init__(self, source: SimulatedSource):
+        self.source = source
+        self.cap = cv2.VideoCapture(source.video)
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened() and self.source.in_outage(time.time()) == 0.0
+
+    def set(self, prop, value) -> bool:
+        return True
+
+    def get(self, prop) -> float:
+        return 0.0
+
+    def release(self):
+        self.cap.release()
+
+    def read(self):
+        src = self.source
+        outage = src.in_outage(time.time())
+        if outage:
+            # A dropped stream blocks until the read times out
+            time.sleep(min(outage, src.read_timeout_s))
+            return False, None
+        if src.read_delay_s:
+            time.sleep(src.read_delay_s)
+
+        # Live stream: the next frame is the oldest one still buffered, or the next one to be captured
+        live_index = int((time.time() - src.t0) * src.fps)
+        index = max(src.next_index, live_index - src.buffer + 1)
+        due = src.t0 + index / src.fps
+        wait = due - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        ok, frame = self.cap.read()
+        if not ok:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+        if not ok:
+            return False, None
+        src.next_index = index + 1
+        with src._lock:
+            src.capture_times[id(frame)] = due
+            if len(src.capture_times) > 512:
+                for key in list(src.capture_times)[:256]:
+                    del src.capture_times[key]
+        return True, frame
+
+
+class Recorder:
+    def __init__(self, sources: Dict[str, SimulatedSource], process_s: float):
+        self.sources = sources
+        self.process_s = process_s
+        self.processed = defaultdict(int)
+        self.staleness = defaultdict(list)
+
+    def process(self, camera_id: str, frame: np.ndarray):
+        captured = self.sources[camera_id].capture_times.get(id(frame))
+        if captured is not None:
+            self.staleness[camera_id].append((time.time() - captured) * 1000)
+        self.processed[camera_id] += 1
+        time.sleep(self.process_s)
+
+    def report(self, mode: str, duration: float, roles: Dict[str, str], reconnects: Dict[str, int]) -> List[Dict]:
+        rows = []
+        for camera_id in self.sources:
+            ages = np.asarray(self.staleness[camera_id]) if self.staleness[camera_id] else np.zeros(1)
+            rows.append({
+                "mode": mode,
+                "camera": camera_id,
+                "role": roles[camera_id],
+                "effective_fps": round(self.processed[camera_id] / duration, 2),
+                "staleness_p50_ms": round(float(np.percentile(ages, 50)), 1),
+                "staleness_p95_ms": round(float(np.percentile(ages, 95)), 1),
+                "reconnects": reconnects.get(camera_id, 0),
+            })
+        return rows
+
+
+def run_serial(sources, fps_limit: float, process_s: float, duration: float) -> Recorder:
+    """The previous PetrolPumpPipeline.run loop: read each camera in turn on the processing thread."""
+    recorder = Recorder(sources, process_s)
+    caps = {camera_id: src.capture() for camera_id, src in sources.items()}
+    interval = 1.0 / fps_limit
+    last = defaultdict(float)
+    end = time.time() + duration
+    while time.time() < end:
+        for camera_id, cap in caps.items():
+            now = time.time()
+            if now - last[camera_id] < interval:
+                continue
+            last[camera_id] = now
+            ret, frame = cap.read()
+            if not ret:
+                continue
+            recorder.process(camera_id, frame)
+    for cap in caps.values():
+        cap.release()
+    return recorder
+
+
+class HarnessPipeline(PetrolPumpPipeline):
+    """PetrolPumpPipeline whose per-frame work is the recorder's fixed processing time."""
+
+    def __init__(self, config: Dict, recorder: Recorder):
+        super().__init__(config)
+        self.recorder = recorder
+
+    def process_frame(self, camera_id: str, frame: np.ndarray) -> Dict:
+        self.recorder.process(camera_id, frame)
+        return {"camera_id": camera_id}
+
+
+def run_threaded(sources, fps_limit: float, process_s: float, duration: float, work: str):
+    recorder = Recorder(sources, process_s)
+    pipeline = HarnessPipeline({
+        "incidents_dir": os.path.join(work, "incidents"),
+        "json_output": os.path.join(work, "analytics_output.json"),
+        "reconnect_min_s": 0.5,
+        "reconnect_max_s": 4.0,
+    }, recorder)
+    for camera_id, src in sources.items():
+        pipeline.add_camera(camera_id, f"sim://{camera_id}", fps_limit=fps_limit, capture_factory=src.capture)
+    timer = threading.Timer(duration, lambda: setattr(pipeline, "running", False))
+    timer.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(show=False)
+    timer.cancel()
+    return recorder, {camera_id: reader.stats["reconnects"] for camera_id, reader in pipeline.cameras.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-camera FPS and staleness: serial capture loop vs threaded camera readers')
+    parser.add_argument('--video', action='append', help='Video file(s) to use as cameras (default: generated)')
+    parser.add_argument('--cameras', type=int, default=4)
+    parser.add_argument('--camera-fps', type=float, default=15.0, help='Rate the simulated cameras capture at')
+    parser.add_argument('--fps-limit', type=float, default=15.0, help='Pipeline fps_limit per camera')
+    parser.add_argument('--process-ms', type=float, default=8.0, help='Simulated inference time per frame')
+    parser.add_argument('--slow', default='1', help='Comma list of camera indexes with slow reads')
+    parser.add_argument('--slow-ms', type=float, default=80.0)
+    parser.add_argument('--flaky', default='2', help='Comma list of camera indexes with periodic outages')
+    parser.add_argument('--outage-every', type=float, default=10.0)
+    parser.add_argument('--outage', type=float, default=3.0)
+    parser.add_argument('--read-timeout', type=float, default=2.0, help='How long a read blocks on a dropped stream')
+    parser.add_argument('--buffer', type=int, default=4, help='Frames a camera buffers while nobody reads')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds per mode')
+    parser.add_argument('--modes', default='serial,threaded')
+    args = parser.parse_args()
+
+    logging.getLogger('PetrolPump').setLevel(logging.ERROR)
+    work = tempfile.mkdtemp(prefix='inveye_cameras_')
+    try:
+        videos = args.video or []
+        if not videos:
+            for i in range(min(args.cameras, 2)):
+                path = os.path.join(work, f"camera_{i}.mp4")
+                make_video(path, 10, args.camera_fps, 640, 360, seed=i)
+                videos.append(path)
+        slow = {int(i) for i in args.slow.split(',') if i != ''}
+        flaky = {int(i) for i in args.flaky.split(',') if i != ''}
+
+        for mode in args.modes.split(','):
+            sources, roles = {}, {}
+            for i in range(args.cameras):
+                camera_id = f"camera_{i}"
+                sources[camera_id] = SimulatedSource(
+                    videos[i % len(videos)], args.camera_fps, args.buffer,
+                    read_delay_s=args.slow_ms / 1000.0 if i in slow else 0.0,
+                    outage_every_s=args.outage_every if i in flaky else 0.0,
+                    outage_s=args.outage, read_timeout_s=args.read_timeout)
+                roles[camera_id] = "slow" if i in slow else "flaky" if i in flaky else "normal"
+            if mode == 'serial':
+                recorder = run_serial(sources, args.fps_limit, args.process_ms / 1000.0, args.duration)
+                reconnects = {}
+            else:
+                recorder, reconnects = run_threaded(sources, args.fps_limit, args.process_ms / 1000.0,
+                                                    args.duration, work)
+            for row in recorder.report(mode, args.duration, roles, reconnects):
+                print(json.dumps(row))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
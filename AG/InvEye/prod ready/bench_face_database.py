@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Face Database Benchmark
+=======================
+
+Measures the FaceDatabase store against the previous dict-of-embeddings
+layout (per-person Python loop for matching, npz + JSON rewrite per add):
+
+- Match latency at N identities (single face and a batch of faces)
+- Bulk registration time (add_faces) and one-by-one add_face time
+- Cold load time (memory-mapped snapshot + append log replay)
+
+Usage:
+    python bench_face_database.py --identities 100000
+    python bench_face_database.py --identities 10000 --legacy-adds 200
+"""
+
+import time
+import json
+import logging
+import argparse
+import tempfile
+import shutil
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from main_pipeline import FaceDatabase
+
+
+def percentiles(samples_ms):
+    arr = np.asarray(samples_ms)
+    return {
+        'mean_ms': round(float(arr.mean()), 3),
+        'p50_ms': round(float(np.percentile(arr, 50)), 3),
+        'p95_ms': round(float(np.percentile(arr, 95)), 3),
+    }
+
+
+def random_embeddings(rng, count: int, dim: int) -> np.ndarray:
+    emb = rng.standard_normal((count, dim)).astype(np.float32)
+    return emb / np.linalg.norm(emb, axis=1, keepdims=True)
+
+
+def noisy(rng, embeddings: np.ndarray, noise: float) -> np.ndarray:
+    """Query embeddings: a registered face seen again under different conditions."""
+    out = embeddings + noise * rng.standard_normal(embeddings.shape).astype(np.float32)
+    return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+
+def legacy_find_match(embeddings: Dict, embedding: np.ndarray, threshold: float = 0.5):
+    """The previous FaceDatabase.find_match loop."""
+    best_match = None
+    best_score = 0.0
+    embedding = embedding / np.linalg.norm(embedding)
+    for person_id, stored_emb in embeddings.items():
+        stored_emb = stored_emb / np.linalg.norm(stored_emb)
+        score = np.dot(embedding, stored_emb)
+        if score > best_score and score > threshold:
+            best_score = score
+            best_match = person_id
+    return best_match, float(best_score)
+
+
+def legacy_add(db_path: Path, embeddings: Dict, metadata: Dict, person_id: str, embedding: np.ndarray):
+    """The previous FaceDatabase.add_face: full npz + JSON rewrite."""
+    embeddings[person_id] = embedding
+    metadata[person_id] = {}
+    np.savez(db_path / "embeddings.npz", **embeddings)
+    with open(db_path / "metadata.json", 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FaceDatabase match latency and registration benchmark')
+    parser.add_argument('--identities', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=512, help='Embedding size (buffalo_sc: 512)')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=8, help='Faces per find_matches call')
+    parser.add_argument('--noise', type=float, default=0.04)
+    parser.add_argument('--single-adds', type=int, default=2000, help='add_face calls to time one by one')
+    parser.add_argument('--legacy-adds', type=int, default=100, help='Old npz-rewrite adds to time (0 to skip)')
+    parser.add_argument('--legacy-queries', type=int, default=20, help='Old loop matches to time (0 to skip)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    logging.getLogger('InvEye').setLevel(logging.WARNING)
+    rng = np.random.default_rng(args.seed)
+    work = Path(tempfile.mkdtemp(prefix='inveye_facedb_'))
+    try:
+        ids = [f"person_{i:06d}" for i in range(args.identities)]
+        embeddings = random_embeddings(rng, args.identities, args.dim)
+
+        # Bulk registration
+        db = FaceDatabase(str(work / "store"), compact_every=args.identities + args.single_adds + 1)
+        start = time.perf_counter()
+        db.add_faces([(pid, emb, {'source': 'bench'}) for pid, emb in zip(ids, embeddings)])
+        bulk_s = time.perf_counter() - start
+        start = time.perf_counter()
+        db.save_database()
+        compact_s = time.perf_counter() - start
+        print(json.dumps({'bench': 'bulk_register', 'identities': args.identities,
+                          'add_faces_s': round(bulk_s, 3), 'compact_s': round(compact_s, 3),
+                          'faces_per_s': round(args.identities / bulk_s, 1)}))
+
+        # One-by-one registration on top of the full database
+        extra = random_embeddings(rng, args.single_adds, args.dim)
+        samples = []
+        for i, emb in enumerate(extra):
+            start = time.perf_counter()
+            db.add_face(f"walkin_{i:06d}", emb, {'source': 'bench'})
+            samples.append((time.perf_counter() - start) * 1000)
+        print(json.dumps({'bench': 'add_face', 'identities': len(db), 'adds': args.single_adds,
+                          **percentiles(samples)}))
+
+        # Match latency
+        picks = rng.integers(0, args.identities, args.queries)
+        queries = noisy(rng, embeddings[picks], args.noise)
+        db.find_match(queries[0])  # warm up BLAS
+        samples, correct = [], 0
+        for q, pick in zip(queries, picks):
+            start = time.perf_counter()
+            person_id, _ = db.find_match(q)
+            samples.append((time.perf_counter() - start) * 1000)
+            correct += person_id == ids[pick]
+        print(json.dumps({'bench': 'find_match', 'identities': len(db), 'queries': args.queries,
+                          'accuracy': round(correct / args.queries, 3), **percentiles(samples)}))
+
+        samples = []
+        for i in range(0, args.queries, args.batch):
+            start = time.perf_counter()
+            db.find_matches(queries[i:i + args.batch])
+            samples.append((time.perf_counter() - start) * 1000)
+        print(json.dumps({'bench': 'find_matches', 'identities': len(db), 'batch': args.batch,
+                          **percentiles(samples),
+                          'per_face_ms': round(float(np.mean(samples)) / args.batch, 3)}))
+        db.close()
+
+        # Cold load: memory-mapped snapshot plus replay of the single adds in the append log
+        start = time.perf_counter()
+        reloaded = FaceDatabase(str(work / "store"), compact_every=args.identities + args.single_adds + 1)
+        load_s = time.perf_counter() - start
+        start = time.perf_counter()
+        reloaded.find_match(queries[0])
+        first_match_ms = (time.perf_counter() - start) * 1000
+        print(json.dumps({'bench': 'load', 'identities': len(reloaded), 'load_s': round(load_s, 3),
+                          'first_match_ms': round(first_match_ms, 3)}))
+        reloaded.close()
+
+        # Previous layout, for comparison
+        legacy = {pid: emb for pid, emb in zip(ids, embeddings)}
+        if args.legacy_queries:
+            samples = []
+            for q in queries[:args.legacy_queries]:
+                start = time.perf_counter()
+                legacy_find_match(legacy, q)
+                samples.append((time.perf_counter() - start) * 1000)
+            print(json.dumps({'bench': 'legacy_find_match', 'identities': len(legacy),
+                              'queries': len(samples), **percentiles(samples)}))
+        if args.legacy_adds:
+            legacy_path = work / "legacy"
+            legacy_path.mkdir()
+            legacy_meta = {pid: {} for pid in ids}
+            samples = []
+            for i, emb in enumerate(extra[:args.legacy_adds]):
+                start = time.perf_counter()
+                legacy_add(legacy_path, legacy, legacy_meta, f"walkin_{i:06d}", emb)
+                samples.append((time.perf_counter() - start) * 1000)
+            print(json.dumps({'bench': 'legacy_add_face', 'identities': len(legacy),
+                              'adds': len(samples), **percentiles(samples)}))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Face Recognition Benchmark
+==========================
+
+CPU time for recognising every face in a frame, per-crop insightface
+`get()` (detector re-run inside each crop, one recognition call per face)
+versus the pipeline's batched path (faces aligned from the detector boxes /
+landmarks, one recognition call per frame).
+
+Frames are built by pasting faces from a source image onto a 1080p canvas,
+so the face boxes and landmarks are known and the YOLO face detector is not
+part of the measurement.
+
+Usage:
+    python bench_face_recognition.py
+    python bench_face_recognition.py --faces 1,5,20 --face-image group_photo.jpg
+"""
+
+import time
+import json
+import logging
+import argparse
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+from insightface.app import FaceAnalysis
+
+from petrol_pump_analytics import align_faces
+
+
+def load_faces(app: FaceAnalysis, image_path: str, margin: float) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """(patch, box, landmarks) per face of the source image, box and landmarks relative to the patch."""
+    if image_path:
+        image = cv2.imread(image_path)
+        if image is None:
+            raise SystemExit(f"Cannot read {image_path}")
+    else:
+        from insightface.data import get_image
+        image = get_image('t1')
+    faces = []
+    for face in app.get(image):
+        x1, y1, x2, y2 = face.bbox
+        mx, my = margin * (x2 - x1), margin * (y2 - y1)
+        px1, py1 = int(max(0, x1 - mx)), int(max(0, y1 - my))
+        px2, py2 = int(min(image.shape[1], x2 + mx)), int(min(image.shape[0], y2 + my))
+        offset = np.array([px1, py1], dtype=np.float32)
+        box = np.array([x1 - px1, y1 - py1, x2 - px1, y2 - py1], dtype=np.float32)
+        faces.append((image[py1:py2, px1:px2].copy(), box, face.kps.astype(np.float32) - offset))
+    if not faces:
+        raise SystemExit("No faces found in the source image")
+    return faces
+
+
+def make_frame(faces, count: int, width: int, height: int, rng) -> Tuple[np.ndarray, List, List]:
+    """Canvas with `count` faces in a grid; returns frame, boxes and landmarks in frame coordinates."""
+    frame = rng.integers(30, 90, size=(height, width, 3), dtype=np.uint8)
+    cols = int(np.ceil(np.sqrt(count * width / height)))
+    rows = int(np.ceil(count / cols))
+    cell_w, cell_h = width // cols, height // rows
+    boxes, landmarks = [], []
+    for i in range(count):
+        patch, box, kps = faces[i % len(faces)]
+        scale = min(cell_w / patch.shape[1], cell_h / patch.shape[0], 2.0) * 0.9
+        resized = cv2.resize(patch, (int(patch.shape[1] * scale), int(patch.shape[0] * scale)))
+        x0 = (i % cols) * cell_w + (cell_w - resized.shape[1]) // 2
+        y0 = (i // cols) * cell_h + (cell_h - resized.shape[0]) // 2
+        frame[y0:y0 + resized.shape[0], x0:x0 + resized.shape[1]] = resized
+        offset = np.array([x0, y0], dtype=np.float32)
+        b = box * scale
+        boxes.append((int(b[0] + x0), int(b[1] + y0), int(b[2] + x0), int(b[3] + y0)))
+        landmarks.append(kps * scale + offset)
+    return frame, boxes, landmarks
+
+
+def per_crop(app: FaceAnalysis, frame: np.ndarray, boxes) -> List:
+    """The previous process_frame path: insightface get() on each face crop."""
+    embeddings = []
+    for x1, y1, x2, y2 in boxes:
+        faces = app.get(frame[y1:y2, x1:x2])
+        embeddings.append(faces[0].embedding if faces else None)
+    return embeddings
+
+
+def batched(recognizer, frame: np.ndarray, boxes, landmarks) -> np.ndarray:
+    aligned = align_faces(frame, boxes, landmarks, size=recognizer.input_size[0])
+    return recognizer.get_feat(aligned)
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def time_mode(fn, frames, repeats: int) -> Tuple[float, List]:
+    fn(*frames[0])  # warm up
+    outputs = []
+    start = time.perf_counter()
+    for _ in range(repeats):
+        outputs = [fn(*f) for f in frames]
+    return (time.perf_counter() - start) * 1000 / (repeats * len(frames)), outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-crop insightface get() vs batched aligned recognition, CPU')
+    parser.add_argument('--faces', default='1,5,20', help='Faces per frame to test')
+    parser.add_argument('--face-image', help='Image with faces to paste (default: insightface sample t1)')
+    parser.add_argument('--model', default='buffalo_sc')
+    parser.add_argument('--frames', type=int, default=5, help='Distinct frames per face count')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--threads', type=int, default=0, help='onnxruntime intra-op threads (0 = default)')
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.getLogger('PetrolPump').setLevel(logging.WARNING)
+    app = FaceAnalysis(name=args.model, allowed_modules=['detection', 'recognition'],
+                       providers=['CPUExecutionProvider'])
+    app.prepare(ctx_id=-1, det_size=(160, 160))
+    if args.threads:
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = args.threads
+        for model in app.models.values():
+            model.session = onnxruntime.InferenceSession(model.model_file, options, providers=['CPUExecutionProvider'])
+    recognizer = app.models['recognition']
+
+    # Source faces detected once at full resolution
+    app.det_model.input_size = (640, 640)
+    faces = load_faces(app, args.face_image, margin=0.4)
+    app.det_model.input_size = (160, 160)
+
+    rng = np.random.default_rng(args.seed)
+    for count in [int(c) for c in args.faces.split(',')]:
+        frames = [make_frame(faces, count, args.width, args.height, rng) for _ in range(args.frames)]
+        crop_ms, crop_out = time_mode(lambda f, b, l: per_crop(app, f, b), frames, args.repeats)
+        lm_ms, lm_out = time_mode(lambda f, b, l: batched(recognizer, f, b, l), frames, args.repeats)
+        box_ms, box_out = time_mode(lambda f, b, l: batched(recognizer, f, b, None), frames, args.repeats)
+
+        # Agreement with the per-crop embeddings, where get() found the face at all
+        agreement: Dict[str, List[float]] = {'landmarks': [], 'box_only': []}
+        missed = 0
+        for crop_emb, lm_emb, box_emb in zip(crop_out, lm_out, box_out):
+            for i, ref in enumerate(crop_emb):
+                if ref is None:
+                    missed += 1
+                    continue
+                agreement['landmarks'].append(cosine(ref, lm_emb[i]))
+                agreement['box_only'].append(cosine(ref, box_emb[i]))
+
+        print(json.dumps({
+            'faces_per_frame': count,
+            'per_crop_ms': round(crop_ms, 2),
+            'batched_landmarks_ms': round(lm_ms, 2),
+            'batched_box_only_ms': round(box_ms, 2),
+            'speedup': round(crop_ms / lm_ms, 2) if lm_ms else 0.0,
+            'per_face_ms': {'per_crop': round(crop_ms / count, 2), 'batched': round(lm_ms / count, 2)},
+            'per_crop_missed_faces': missed,
+            'cosine_vs_per_crop': {k: round(float(np.mean(v)), 3) if v else None for k, v in agreement.items()},
+        }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Face Tracker Benchmark
+======================
+
+Replays a simulated 24-hour day through FaceTracker on a simulated clock:
+employees seen throughout their shift, visitors arriving at a daily traffic
+profile (some of them returning later), each visit producing a few noisy
+embeddings. Prints one JSON line per simulated hour with tracked faces,
+memory and process_face latency, then a summary.
+
+`--modes tracker,legacy` also replays the previous dict-and-loop tracker
+for comparison (slow: its latency grows with every visitor of the day).
+
+Usage:
+    python bench_face_tracker.py
+    python bench_face_tracker.py --visitors-per-hour 400 --max-faces 2000
+    python bench_face_tracker.py --modes tracker,legacy --visitors-per-hour 60
+"""
+
+import time
+import json
+import logging
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from petrol_pump_analytics import FaceTracker, FaceRecord
+
+# Share of the daily visitors arriving in each hour (forecourt traffic: morning and evening peaks)
+HOURLY_PROFILE = [1, 1, 1, 1, 2, 4, 7, 9, 8, 6, 5, 5, 6, 5, 5, 6, 8, 9, 8, 6, 4, 3, 2, 1]
+
+
+class LegacyFaceTracker(FaceTracker):
+    """The previous FaceTracker: unbounded dicts, linear scan under the lock."""
+
+    def __init__(self, similarity_threshold: float = 0.5):
+        super().__init__(similarity_threshold=similarity_threshold)
+        self.known_faces = {}
+
+    def find_match(self, embedding: np.ndarray) -> Tuple[Optional[str], float, bool]:
+        best_match, best_score, is_employee = None, 0.0, False
+        with self._lock:
+            for records, employee in ((self.employees, True), (self.known_faces, False)):
+                for face_id, record in records.items():
+                    score = self._cosine_similarity(embedding, record.embedding)
+                    if score > best_score:
+                        best_score, best_match, is_employee = score, face_id, employee
+        if best_score >= self.similarity_threshold:
+            return best_match, best_score, is_employee
+        return None, best_score, False
+
+    def process_face(self, embedding, frame=None, bbox=None, now: datetime = None) -> Dict:
+        match_id, score, is_employee = self.find_match(embedding)
+        with self._lock:
+            if match_id:
+                record = (self.employees if is_employee else self.known_faces)[match_id]
+                record.last_seen = now
+                return {"face_id": match_id, "is_new": False}
+            face_id = self._generate_face_id(embedding)
+            self.known_faces[face_id] = FaceRecord(face_id=face_id, first_seen=now, last_seen=now,
+                                                   embedding=embedding.copy())
+            return {"face_id": face_id, "is_new": True}
+
+    def register_employee(self, person_name: str, embedding: np.ndarray):
+        face_id = self._generate_face_id(embedding)
+        self.employees[face_id] = FaceRecord(face_id=face_id, first_seen=datetime.now(), last_seen=datetime.now(),
+                                             is_employee=True, person_name=person_name, embedding=embedding.copy())
+        return face_id
+
+    def memory_bytes(self) -> int:
+        return sum(r.embedding.nbytes for r in list(self.employees.values()) + list(self.known_faces.values()))
+
+
+def make_events(args, rng) -> List[Tuple[float, int, int]]:
+    """(seconds since midnight, identity, visit) for every face sighting of the day."""
+    events = []
+    identity = 0
+    employees = list(range(args.employees))
+    identity += args.employees
+    # Employees: one sighting every few minutes over a 12-hour shift, half on each shift
+    for e in employees:
+        start = 6 * 3600 if e % 2 == 0 else 18 * 3600
+        t = start
+        while t < start + 12 * 3600:
+            events.append((t % 86400, e, -1))
+            t += rng.uniform(60, 600)
+
+    visit = 0
+    past_visitors = []
+    total = args.visitors_per_hour * 24
+    weights = np.array(HOURLY_PROFILE, dtype=float) / sum(HOURLY_PROFILE)
+    for hour, share in enumerate(weights):
+        for _ in range(rng.poisson(total * share)):
+            if past_visitors and rng.random() < args.returning:
+                person = past_visitors[rng.integers(len(past_visitors))]
+            else:
+                person = identity
+                identity += 1
+                past_visitors.append(person)
+            arrive = hour * 3600 + rng.uniform(0, 3600)
+            for k in range(args.sightings):
+                events.append((arrive + k * rng.uniform(10, 60), person, visit))
+            visit += 1
+    events.sort()
+    return [e for e in events if e[0] < 86400], identity
+
+
+def run(mode: str, args, events, identities: np.ndarray) -> Dict:
+    rng = np.random.default_rng(args.seed + 1)
+    if mode == "legacy":
+        tracker = LegacyFaceTracker(similarity_threshold=args.threshold)
+    else:
+        tracker = FaceTracker(similarity_threshold=args.threshold, max_faces=args.max_faces,
+                              face_ttl_hours=args.ttl_hours)
+    employee_ids = {e: tracker.register_employee(f"employee_{e}", identities[e]) for e in range(args.employees)}
+
+    midnight = datetime(2025, 1, 1)
+    tracemalloc.start()
+    visit_ids: Dict[int, str] = {}
+    consistent = total = 0
+    employee_hits = employee_total = 0
+    hour_samples: List[float] = []
+    all_samples: List[float] = []
+    hour = 0
+    started = time.perf_counter()
+
+    def report(h):
+        current, _ = tracemalloc.get_traced_memory()
+        samples = np.asarray(hour_samples) if hour_samples else np.zeros(1)
+        print(json.dumps({
+            "mode": mode, "hour": h,
+            "tracked_faces": len(tracker.known_faces),
+            "matrix_kb": round(tracker.memory_bytes() / 1024, 1),
+            "traced_kb": round(current / 1024, 1),
+            "calls": len(hour_samples),
+            "p50_ms": round(float(np.percentile(samples, 50)), 3),
+            "p95_ms": round(float(np.percentile(samples, 95)), 3),
+            "evicted": tracker.stats.get("evicted_faces", 0),
+        }))
+
+    for t, person, visit in events:
+        while t >= (hour + 1) * 3600:
+            report(hour)
+            hour += 1
+            hour_samples = []
+        emb = identities[person] + args.noise * rng.standard_normal(identities.shape[1]).astype(np.float32)
+        now = midnight + timedelta(seconds=t)
+        start = time.perf_counter()
+        info = tracker.process_face(emb, now=now)
+        elapsed = (time.perf_counter() - start) * 1000
+        hour_samples.append(elapsed)
+        all_samples.append(elapsed)
+        if visit < 0:
+            employee_total += 1
+            employee_hits += info["face_id"] == employee_ids[person]
+        elif visit in visit_ids:
+            total += 1
+            consistent += info["face_id"] == visit_ids[visit]
+        else:
+            visit_ids[visit] = info["face_id"]
+    report(hour)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    samples = np.asarray(all_samples)
+    return {
+        "mode": mode, "summary": True,
+        "sightings": len(events),
+        "visitors_created": tracker.stats["total_unique_faces"] if mode != "legacy" else len(tracker.known_faces),
+        "tracked_faces_end": len(tracker.known_faces),
+        "peak_traced_kb": round(peak / 1024, 1),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+        "same_visit_match_pct": round(100.0 * consistent / total, 2) if total else 0.0,
+        "employee_match_pct": round(100.0 * employee_hits / employee_total, 2) if employee_total else 0.0,
+        "wall_s": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='24-hour FaceTracker simulation: memory and match latency over the day')
+    parser.add_argument('--modes', default='tracker', help='Comma list of: tracker, legacy')
+    parser.add_argument('--visitors-per-hour', type=int, default=250, help='Average over the day')
+    parser.add_argument('--returning', type=float, default=0.15, help='Share of visits by an earlier visitor')
+    parser.add_argument('--sightings', type=int, default=6, help='Recognitions per visit')
+    parser.add_argument('--employees', type=int, default=12)
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--noise', type=float, default=0.03, help='Per-dimension noise on each sighting')
+    parser.add_argument('--threshold', type=float, default=0.5)
+    parser.add_argument('--max-faces', type=int, default=2000)
+    parser.add_argument('--ttl-hours', type=float, default=4.0)
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    logging.getLogger('PetrolPump').setLevel(logging.WARNING)
+    rng = np.random.default_rng(args.seed)
+    events, count = make_events(args, rng)
+    identities = rng.standard_normal((count, args.dim)).astype(np.float32)
+    identities /= np.linalg.norm(identities, axis=1, keepdims=True)
+
+    for mode in args.modes.split(','):
+        print(json.dumps(run(mode.strip(), args, events, identities)))
+
+
+if __name__ == '__main__':
+    main()
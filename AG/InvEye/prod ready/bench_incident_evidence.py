@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Incident Evidence Benchmark
+===========================
+
+Frame-thread stall caused by saving incident frames during incident bursts:
+synchronous cv2.imwrite on the frame thread (previous IncidentManager)
+versus the background EvidenceWriter.
+
+Each burst frame raises several incidents on one camera (e.g. fire + smoke
++ person count), cameras take turns, and the scene changes every
+`--scene-every` frames, so consecutive evidence frames are near-identical
+in between. Incidents left without a saved frame are counted, critical ones
+separately (the writer evicts non-critical frames first).
+
+Usage:
+    python bench_incident_evidence.py
+    python bench_incident_evidence.py --bursts 5 --burst-frames 60 --incidents-per-frame 4
+"""
+
+import time
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from petrol_pump_analytics import IncidentManager, EvidenceWriter
+
+KPIS = ["fire", "smoke", "person_count", "fight", "mobile_phone", "smoking"]
+
+
+class SyncEvidence:
+    """The previous behaviour: full-resolution cv2.imwrite on the calling thread."""
+
+    def submit(self, camera_id: str, path: Path, frame: np.ndarray, critical: bool = False) -> Optional[str]:
+        cv2.imwrite(str(path), frame)
+        return str(path)
+
+    def take_lost(self) -> List[str]:
+        return []
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def get_stats(self) -> Dict:
+        return {}
+
+
+def make_scene(rng, width: int, height: int) -> np.ndarray:
+    scene = cv2.resize(rng.integers(0, 255, (height // 16, width // 16, 3), dtype=np.uint8), (width, height))
+    for _ in range(12):
+        x, y = int(rng.integers(0, width - 200)), int(rng.integers(0, height - 200))
+        cv2.rectangle(scene, (x, y), (x + int(rng.integers(40, 200)), y + int(rng.integers(40, 200))),
+                      tuple(int(c) for c in rng.integers(0, 255, 3)), -1)
+    return scene
+
+
+def make_frames(args, rng) -> List[np.ndarray]:
+    frames = []
+    scene = None
+    for i in range(args.burst_frames):
+        if i % args.scene_every == 0:
+            scene = make_scene(rng, args.width, args.height)
+        frame = scene.copy()
+        x = 100 + 6 * (i % args.scene_every)  # a vehicle moving through the scene
+        cv2.rectangle(frame, (x, args.height // 2), (x + 300, args.height // 2 + 150), (30, 30, 200), -1)
+        noise = rng.integers(-3, 4, frame.shape, dtype=np.int16)
+        frames.append(np.clip(frame + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def run(mode: str, args, frames: List[np.ndarray], work: Path) -> Dict:
+    out = work / mode
+    if mode == "sync":
+        writer = SyncEvidence()
+    else:
+        writer = EvidenceWriter(workers=args.workers, queue_size=args.queue_size, jpeg_quality=args.jpeg_quality,
+                                max_width=args.max_width,
+                                dedup_distance=args.dedup_distance if mode == "async_dedup" else -1)
+    manager = IncidentManager(output_dir=str(out), evidence_writer=writer)
+    manager._get_cooldown = lambda kpi_name: 0  # every detection is an incident during the burst
+
+    stalls = []
+    incidents = 0
+    started = time.perf_counter()
+    for burst in range(args.bursts):
+        for i, frame in enumerate(frames):
+            camera_id = f"cam_{(burst + i // args.scene_every) % args.cameras}"
+            start = time.perf_counter()
+            for k in range(args.incidents_per_frame):
+                if manager.create_incident(KPIS[k % len(KPIS)], camera_id, 0.9, (0, 0, 10, 10), frame):
+                    incidents += 1
+            stalls.append((time.perf_counter() - start) * 1000)
+            time.sleep(args.frame_gap_ms / 1000.0)
+    submitted_s = time.perf_counter() - started
+    writer.flush()
+    drained_s = time.perf_counter() - started
+    stats = writer.get_stats()
+    manager.close()
+
+    arr = np.asarray(stalls)
+    on_disk = sum(p.stat().st_size for p in out.glob("*.jpg"))
+    index = manager.read_index()
+    # Incidents without evidence (dropped or evicted frames), and any still pointing at a file never written
+    missing = [r for r in index if not r.get("frame_path")]
+    dangling = [r for r in index if r.get("frame_path") and not Path(r["frame_path"]).exists()]
+    return {
+        "mode": mode,
+        "frames": len(stalls),
+        "incidents": incidents,
+        "stall_p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "stall_p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "stall_max_ms": round(float(arr.max()), 3),
+        "stall_total_s": round(float(arr.sum()) / 1000, 3),
+        "burst_s": round(submitted_s, 3),
+        "all_written_s": round(drained_s, 3),
+        "files": len(list(out.glob("*.jpg"))),
+        "disk_mb": round(on_disk / 1e6, 2),
+        "indexed_ids": len(index),
+        "without_frame": len(missing),
+        "critical_without_frame": sum(r["severity"] == "critical" for r in missing),
+        "dangling_frame_path": len(dangling),
+        **{k: v for k, v in stats.items() if k in ("written", "deduplicated", "dropped", "evicted", "failed")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Frame-thread stall of incident evidence saving during bursts')
+    parser.add_argument('--modes', default='sync,async,async_dedup')
+    parser.add_argument('--bursts', type=int, default=3)
+    parser.add_argument('--burst-frames', type=int, default=45, help='Frames per burst, all raising incidents')
+    parser.add_argument('--incidents-per-frame', type=int, default=3)
+    parser.add_argument('--cameras', type=int, default=4)
+    parser.add_argument('--scene-every', type=int, default=15, help='Frames before the scene changes')
+    parser.add_argument('--frame-gap-ms', type=float, default=20.0, help='Rest of the frame loop (inference etc.)')
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=32)
+    parser.add_argument('--jpeg-quality', type=int, default=85)
+    parser.add_argument('--max-width', type=int, default=1280)
+    parser.add_argument('--dedup-distance', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger('PetrolPump').setLevel(logging.ERROR)
+    frames = make_frames(args, np.random.default_rng(args.seed))
+    work = Path(tempfile.mkdtemp(prefix='inveye_evidence_'))
+    try:
+        for mode in args.modes.split(','):
+            print(json.dumps(run(mode.strip(), args, frames, work)))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Model Format Benchmark (CPU)
+============================
+
+CPU inference latency of the YOLO models as PyTorch, ONNX Runtime and
+OpenVINO, over a grid of batch sizes, image sizes and thread counts:
+
+- load time, first (cold) inference, warmup kept apart from the timed runs
+- p50 / p90 / p99 / mean latency, throughput in images per second
+- peak RSS of the process (empty on Windows unless psutil is installed)
+
+Each case runs in its own subprocess, so load time and peak RSS are not
+polluted by the cases before it and thread settings cannot leak between
+cases. Latency is the bare model call on a preprocessed NCHW float32 batch
+(no letterboxing or NMS), so formats are compared like for like.
+
+Missing ONNX / OpenVINO exports are created next to the .pt with
+ultralytics (dynamic shapes, so one export covers every batch and image
+size). Results go to <out>.json and <out>.csv with stable ordering and
+rounding, so reports from two commits can be diffed directly.
+
+Usage:
+    python bench_model_formats.py --model models/yolov11n.pt
+    python bench_model_formats.py --formats onnx,openvino --batch-sizes 1,8 --imgsz 640 --threads 1,4
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import platform
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FORMATS = ('pytorch', 'onnx', 'openvino')
+CSV_FIELDS = ['model', 'format', 'batch', 'imgsz', 'threads', 'load_s', 'first_ms', 'p50_ms', 'p90_ms',
+              'p99_ms', 'mean_ms', 'throughput_ips', 'peak_rss_mb', 'iterations', 'error']
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+
+def exported_path(model_path: str, fmt: str) -> Path:
+    """Where ultralytics puts the export of `model_path` in `fmt`."""
+    model = Path(model_path)
+    if fmt == 'onnx':
+        return model.with_suffix('.onnx')
+    if fmt == 'openvino':
+        return model.parent / f"{model.stem}_openvino_model"
+    return model
+
+
+def export_model(model_path: str, fmt: str) -> Path:
+    """Export on CPU unless an export already exists."""
+    path = exported_path(model_path, fmt)
+    if fmt == 'pytorch' or path.exists():
+        return path
+    from ultralytics import YOLO
+
+    print(f"🔧 Exporting {model_path} to {fmt}", file=sys.stderr)
+    YOLO(model_path).export(format=fmt, dynamic=True, simplify=fmt == 'onnx', device='cpu')
+    return path
+
+
+def load_backend(fmt: str, path: Path, threads: int) -> Callable[[np.ndarray], object]:
+    """Load a model and return a function running it on an NCHW float32 batch."""
+    if fmt == 'pytorch':
+        import torch
+        from ultralytics import YOLO
+
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+        module = YOLO(str(path)).model.float().eval()
+
+        def run(batch):
+            with torch.inference_mode():
+                return module(torch.from_numpy(batch))
+        return run
+
+    if fmt == 'onnx':
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = onnxruntime.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+        input_name = session.get_inputs()[0].name
+        return lambda batch: session.run(None, {input_name: batch})
+
+    if fmt == 'openvino':
+        import openvino
+
+        core = openvino.Core()
+        model = core.read_model(str(next(path.glob('*.xml'))))
+        compiled = core.compile_model(model, 'CPU', {'INFERENCE_NUM_THREADS': threads,
+                                                     'PERFORMANCE_HINT': 'LATENCY'})
+        request = compiled.create_infer_request()
+        return lambda batch: request.infer([batch])
+
+    raise ValueError(f"Unknown format: {fmt}")
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process, or None where it cannot be read."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)  # bytes on macOS, KiB on Linux
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)  # peak working set on Windows
+
+
+def run_case(case: Dict) -> Dict:
+    """Measure one (model, format, batch, imgsz, threads) case in this process."""
+    start = time.perf_counter()
+    run = load_backend(case['format'], Path(case['path']), case['threads'])
+    load_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    batch = rng.random((case['batch'], 3, case['imgsz'], case['imgsz']), dtype=np.float32)
+
+    start = time.perf_counter()
+    run(batch)
+    first_ms = (time.perf_counter() - start) * 1000
+    for _ in range(case['warmup']):
+        run(batch)
+
+    times = []
+    deadline = time.perf_counter() + case['max_seconds']
+    while len(times) < case['iterations'] and (len(times) < 5 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        run(batch)
+        times.append((time.perf_counter() - start) * 1000)
+
+    t = np.asarray(times)
+    return {
+        'load_s': round(load_s, 3),
+        'first_ms': round(first_ms, 2),
+        'p50_ms': round(float(np.percentile(t, 50)), 2),
+        'p90_ms': round(float(np.percentile(t, 90)), 2),
+        'p99_ms': round(float(np.percentile(t, 99)), 2),
+        'mean_ms': round(float(t.mean()), 2),
+        'throughput_ips': round(case['batch'] * 1000 / float(t.mean()), 1),
+        'peak_rss_mb': peak_rss_mb(),
+        'iterations': len(times),
+    }
+
+
+def run_isolated(case: Dict, timeout: float) -> Dict:
+    """run_case in a fresh interpreter; the worker prints its result as the last stdout line."""
+    env = dict(os.environ, CUDA_VISIBLE_DEVICES='', OMP_NUM_THREADS=str(case['threads']))
+    try:
+        proc = subprocess.run([sys.executable, __file__, '--worker', json.dumps(case)], env=env,
+                              capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': f'timeout after {timeout:.0f}s'}
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return {'error': lines[-1] if lines else f'exit code {proc.returncode}'}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def host_info() -> Dict:
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+    try:
+        info['git_commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                            text=True, cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        info['git_commit'] = None
+    for package in ('numpy', 'torch', 'ultralytics', 'onnxruntime', 'openvino'):
+        try:
+            info[package] = __import__(package).__version__
+        except Exception:
+            info[package] = None
+    return info
+
+
+def write_report(out: str, meta: Dict, rows: List[Dict]):
+    rows = sorted(rows, key=lambda r: (r['model'], FORMATS.index(r['format']), r['batch'], r['imgsz'], r['threads']))
+    with open(f"{out}.json", 'w') as f:
+        json.dump({'meta': meta, 'results': rows}, f, indent=1, sort_keys=True)
+        f.write('\n')
+    with open(f"{out}.csv", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CPU latency of PyTorch / ONNX Runtime / OpenVINO YOLO models')
+    parser.add_argument('--model', action='append', help='.pt model(s) (default: models/*.pt)')
+    parser.add_argument('--formats', default=','.join(FORMATS))
+    parser.add_argument('--batch-sizes', default='1,4')
+    parser.add_argument('--imgsz', default='320,640')
+    parser.add_argument('--threads', default=None, help='Comma list (default: 1 and all cores)')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--max-seconds', type=float, default=60.0, help='Cap on timed runs per case')
+    parser.add_argument('--timeout', type=float, default=600.0, help='Per-case subprocess timeout')
+    parser.add_argument('--out', default='model_benchmark', help='Report path prefix (.json and .csv)')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    formats = [f.strip() for f in args.formats.split(',')]
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)} (choose from {', '.join(FORMATS)})")
+
+    if args.worker:
+        print(json.dumps(run_case(json.loads(args.worker))))
+        return
+
+    os.environ['CUDA_VISIBLE_DEVICES'] = ''
+    models = args.model or sorted(str(p) for p in Path('models').glob('*.pt'))
+    if not models:
+        raise SystemExit("No models given and none found in models/")
+    threads = ([int(t) for t in args.threads.split(',')] if args.threads
+               else sorted({1, os.cpu_count() or 1}))
+
+    rows = []
+    for model in models:
+        for fmt in formats:
+            try:
+                path = export_model(model, fmt)
+            except Exception as e:
+                rows.append({'model': model, 'format': fmt, 'batch': 0, 'imgsz': 0, 'threads': 0,
+                             'error': f'export failed: {e}'})
+                print(json.dumps(rows[-1]))
+                continue
+            for batch in [int(b) for b in args.batch_sizes.split(',')]:
+                for imgsz in [int(s) for s in args.imgsz.split(',')]:
+                    for n in threads:
+                        case = {'model': model, 'format': fmt, 'path': str(path), 'batch': batch,
+                                'imgsz': imgsz, 'threads': n, 'warmup': args.warmup,
+                                'iterations': args.iterations, 'max_seconds': args.max_seconds}
+                        row = {k: case[k] for k in ('model', 'format', 'batch', 'imgsz', 'threads')}
+                        row.update(run_isolated(case, args.timeout))
+                        rows.append(row)
+                        print(json.dumps(row))
+
+    write_report(args.out, host_info(), rows)
+    print(f"📄 Report: {args.out}.json, {args.out}.csv", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,7 @@ Usage:
     python jetson_deploy.py --convert-all
     python jetson_deploy.py --convert-face
     python jetson_deploy.py --benchmark
+    python bench_model_formats.py          # CPU: PyTorch vs ONNX Runtime vs OpenVINO
 """
 
 import os
@@ -69,43 +70,66 @@ def convert_onnx(model_path: str, output_path: str = None):
     return onnx_path
 
 
-def benchmark_model(model_path: str, iterations: int = 100):
-    """Benchmark model inference speed."""
+def benchmark_model(model_path: str, iterations: int = 100, warmup: int = 10,
+                    imgsz: int = 640, batch: int = 1):
+    """Benchmark end-to-end predict() latency (pre/post-processing included).
+    
+    For a format / batch / thread comparison of the bare models on CPU, use
+    bench_model_formats.py.
+    """
     import numpy as np
     from ultralytics import YOLO
     
     print(f"\n📊 Benchmarking: {model_path}")
     
+    start = time.perf_counter()
     model = YOLO(model_path)
+    load_s = time.perf_counter() - start
+    
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (imgsz, imgsz, 3), dtype=np.uint8) for _ in range(batch)]
+    source = frames if batch > 1 else frames[0]
     
-    # Warmup
-    dummy_input = np.random.randint(0, 255, (640, 640, 3), dtype=np.uint8)
-    for _ in range(10):
-        model.predict(dummy_input, verbose=False)
+    # Warmup (first call includes lazy initialisation, reported separately)
+    start = time.perf_counter()
+    model.predict(source, imgsz=imgsz, verbose=False)
+    first_ms = (time.perf_counter() - start) * 1000
+    for _ in range(warmup):
+        model.predict(source, imgsz=imgsz, verbose=False)
     
     # Benchmark
     times = []
     for i in range(iterations):
-        start = time.time()
-        model.predict(dummy_input, verbose=False)
-        times.append((time.time() - start) * 1000)
+        start = time.perf_counter()
+        model.predict(source, imgsz=imgsz, verbose=False)
+        times.append((time.perf_counter() - start) * 1000)
     
-    avg_time = sum(times) / len(times)
-    min_time = min(times)
-    max_time = max(times)
-    fps = 1000 / avg_time
+    times = np.asarray(times)
+    avg_time = float(times.mean())
+    p50, p90, p99 = (float(np.percentile(times, q)) for q in (50, 90, 99))
+    fps = 1000 * batch / avg_time
     
-    print(f"   Iterations: {iterations}")
+    print(f"   Iterations: {iterations} (warmup {warmup}, batch {batch}, imgsz {imgsz})")
+    print(f"   Load Time:  {load_s:.2f} s")
+    print(f"   First Run:  {first_ms:.2f} ms")
     print(f"   Avg Time:   {avg_time:.2f} ms")
-    print(f"   Min Time:   {min_time:.2f} ms")
-    print(f"   Max Time:   {max_time:.2f} ms")
+    print(f"   p50/p90/p99: {p50:.2f} / {p90:.2f} / {p99:.2f} ms")
+    print(f"   Min Time:   {times.min():.2f} ms")
+    print(f"   Max Time:   {times.max():.2f} ms")
     print(f"   FPS:        {fps:.1f}")
     
     return {
         'model': model_path,
+        'batch': batch,
+        'imgsz': imgsz,
+        'load_s': load_s,
+        'first_ms': first_ms,
         'avg_ms': avg_time,
-        'min_ms': min_time,
-        'max_ms': max_time,
+        'p50_ms': p50,
+        'p90_ms': p90,
+        'p99_ms': p99,
+        'min_ms': float(times.min()),
+        'max_ms': float(times.max()),
         'fps': fps
     }
 
@@ -223,10 +247,10 @@ def main():
             print("\n" + "="*60)
             print("BENCHMARK SUMMARY")
             print("="*60)
-            print(f"{'Model':<40} {'Avg (ms)':<12} {'FPS':<10}")
-            print("-"*60)
-            for r in sorted(results, key=lambda x: x['avg_ms']):
-                print(f"{r['model']:<40} {r['avg_ms']:<12.2f} {r['fps']:<10.1f}")
+            print(f"{'Model':<40} {'p50 (ms)':<10} {'p99 (ms)':<10} {'FPS':<10}")
+            print("-"*70)
+            for r in sorted(results, key=lambda x: x['p50_ms']):
+                print(f"{r['model']:<40} {r['p50_ms']:<10.2f} {r['p99_ms']:<10.2f} {r['fps']:<10.1f}")
     
     if not any([args.convert_all, args.convert_face, args.convert_object, 
                 args.benchmark, args.model, args.setup]):
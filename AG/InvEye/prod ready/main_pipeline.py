@@ -19,15 +19,17 @@ import os
 import sys
 import time
 import json
+import struct
 import logging
 import argparse
+import heapq
 import threading
 import queue
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import defaultdict, deque
 
 import cv2
 import numpy as np
@@ -127,58 +129,72 @@ class ModelManager:
                 self._face_recognizer = None
         return self._face_recognizer
     
+    @staticmethod
+    def _face_detections(result) -> List[Detection]:
+        """Convert one ultralytics result of the face model to detections."""
+        detections = []
+        for box in result.boxes:
+            x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
+            conf = float(box.conf[0].cpu().numpy())
+            
+            detections.append(Detection(
+                class_name='face',
+                confidence=conf,
+                bbox=(x1, y1, x2, y2),
+                class_id=0
+            ))
+        return detections
+    
+    @staticmethod
+    def _object_detections(result) -> List[Detection]:
+        """Convert one ultralytics result of the object model to detections."""
+        detections = []
+        names = result.names
+        for box in result.boxes:
+            x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
+            conf = float(box.conf[0].cpu().numpy())
+            cls_id = int(box.cls[0].cpu().numpy())
+            cls_name = names.get(cls_id, f'class_{cls_id}')
+            
+            detections.append(Detection(
+                class_name=cls_name,
+                confidence=conf,
+                bbox=(x1, y1, x2, y2),
+                class_id=cls_id
+            ))
+        return detections
+    
     def detect_faces(self, frame: np.ndarray, conf: float = 0.5) -> List[Detection]:
         """Detect faces in frame."""
-        detections = []
-        
+        return self.detect_faces_batch([frame], conf)[0]
+    
+    def detect_objects(self, frame: np.ndarray, conf: float = 0.5) -> List[Detection]:
+        """Detect objects (fire, fight, smoke, person) in frame."""
+        return self.detect_objects_batch([frame], conf)[0]
+    
+    def detect_faces_batch(self, frames: List[np.ndarray], conf: float = 0.5) -> List[List[Detection]]:
+        """Detect faces in several frames with one model call; one detection list per frame."""
+        if not frames:
+            return []
         results = self.face_detector.predict(
-            source=frame,
+            source=frames if len(frames) > 1 else frames[0],
             conf=conf,
             device=self.device,
             verbose=False
         )
-        
-        for r in results:
-            for box in r.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-                conf = float(box.conf[0].cpu().numpy())
-                
-                detections.append(Detection(
-                    class_name='face',
-                    confidence=conf,
-                    bbox=(x1, y1, x2, y2),
-                    class_id=0
-                ))
-        
-        return detections
+        return [self._face_detections(r) for r in results]
     
-    def detect_objects(self, frame: np.ndarray, conf: float = 0.5) -> List[Detection]:
-        """Detect objects (fire, fight, smoke, person) in frame."""
-        detections = []
-        
+    def detect_objects_batch(self, frames: List[np.ndarray], conf: float = 0.5) -> List[List[Detection]]:
+        """Detect objects in several frames with one model call; one detection list per frame."""
+        if not frames:
+            return []
         results = self.object_detector.predict(
-            source=frame,
+            source=frames if len(frames) > 1 else frames[0],
             conf=conf,
             device=self.device,
             verbose=False
         )
-        
-        for r in results:
-            names = r.names
-            for box in r.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-                conf = float(box.conf[0].cpu().numpy())
-                cls_id = int(box.cls[0].cpu().numpy())
-                cls_name = names.get(cls_id, f'class_{cls_id}')
-                
-                detections.append(Detection(
-                    class_name=cls_name,
-                    confidence=conf,
-                    bbox=(x1, y1, x2, y2),
-                    class_id=cls_id
-                ))
-        
-        return detections
+        return [self._object_detections(r) for r in results]
     
     def recognize_face(self, frame: np.ndarray, bbox: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
         """Get face embedding for recognition."""
@@ -211,75 +227,575 @@ class ModelManager:
 
 
 class FaceDatabase:
-    """Manages known face embeddings for recognition."""
-    
-    def __init__(self, db_path: str = "face_database"):
+    """Manages known face embeddings for recognition.
+
+    Embeddings live in one contiguous float32 matrix of L2-normalised rows, so
+    matching a face is a single matrix-vector product plus a top-k selection.
+
+    On disk, a compacted snapshot (``matrix-<gen>.npy`` + ``index.json``) is
+    memory-mapped on load, and every change after it is appended to
+    ``append-<gen>.log``. The log is folded into a new snapshot once it holds
+    ``compact_every`` records (or on ``save_database()``), so registering a face
+    costs one small append instead of rewriting the whole database. A legacy
+    ``embeddings.npz`` / ``metadata.json`` database is imported on first load.
+    """
+
+    _RECORD = struct.Struct('<cHIH')  # op, id bytes, metadata bytes, embedding dim
+
+    def __init__(self, db_path: str = "face_database", compact_every: int = 1000):
         self.db_path = Path(db_path)
         self.db_path.mkdir(parents=True, exist_ok=True)
-        
-        self.embeddings: Dict[str, np.ndarray] = {}
+        self.compact_every = compact_every
+
         self.metadata: Dict[str, Dict] = {}
-        
+        self._ids: List[Optional[str]] = []      # row -> person id, None for replaced/removed rows
+        self._rows: Dict[str, int] = {}          # person id -> live row
+        self._base = np.zeros((0, 0), dtype=np.float32)   # memory-mapped snapshot rows
+        self._extra = np.zeros((0, 0), dtype=np.float32)  # rows added since, growable
+        self._n_extra = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._dead = 0
+        self._generation = 0
+        self._log = None
+        self._log_records = 0
+        self._lock = threading.Lock()
+
         self._load_database()
-    
+
+    # -- persistence -------------------------------------------------------
+
+    def _snapshot_files(self, generation: int) -> Tuple[Path, Path]:
+        return self.db_path / f"matrix-{generation}.npy", self.db_path / f"append-{generation}.log"
+
     def _load_database(self):
         """Load existing face database."""
-        db_file = self.db_path / "embeddings.npz"
+        index_file = self.db_path / "index.json"
+        if index_file.exists():
+            with open(index_file, 'r') as f:
+                index = json.load(f)
+            self._generation = index['generation']
+            self.metadata = index.get('metadata', {})
+            matrix_file, _ = self._snapshot_files(self._generation)
+            if index['ids']:
+                self._base = np.load(matrix_file, mmap_mode='r')
+            self._ids = list(index['ids'])
+            self._rows = {person_id: row for row, person_id in enumerate(self._ids)}
+            self._alive = np.ones(len(self._ids), dtype=bool)
+            replayed = self._replay_log()
+            logger.info(f"Loaded {len(self._rows)} face embeddings ({replayed} from append log)")
+        elif (self.db_path / "embeddings.npz").exists():
+            self._import_legacy()
+        if self._log is None:
+            self._open_log()
+
+    def _import_legacy(self):
+        """One-time import of the old embeddings.npz / metadata.json layout."""
+        data = np.load(self.db_path / "embeddings.npz", allow_pickle=True)
         meta_file = self.db_path / "metadata.json"
-        
-        if db_file.exists():
-            data = np.load(db_file, allow_pickle=True)
-            for name in data.files:
-                self.embeddings[name] = data[name]
-            logger.info(f"Loaded {len(self.embeddings)} face embeddings")
-        
+        metadata = {}
         if meta_file.exists():
             with open(meta_file, 'r') as f:
-                self.metadata = json.load(f)
-    
+                metadata = json.load(f)
+        for name in data.files:
+            self._put(name, data[name], metadata.get(name, {}))
+        self.compact()
+        logger.info(f"Imported {len(self._rows)} face embeddings from embeddings.npz")
+
+    def _replay_log(self) -> int:
+        _, log_file = self._snapshot_files(self._generation)
+        if not log_file.exists():
+            return 0
+        count = 0
+        with open(log_file, 'rb') as f:
+            data = f.read()
+        pos = 0
+        header = self._RECORD.size
+        while pos + header <= len(data):
+            op, id_len, meta_len, dim = self._RECORD.unpack_from(data, pos)
+            end = pos + header + id_len + meta_len + dim * 4
+            if end > len(data):
+                logger.warning(f"Ignoring truncated record at end of {log_file.name}")
+                break
+            body = pos + header
+            person_id = data[body:body + id_len].decode('utf-8')
+            if op == b'A':
+                meta = json.loads(data[body + id_len:body + id_len + meta_len]) if meta_len else {}
+                embedding = np.frombuffer(data, dtype=np.float32, count=dim, offset=body + id_len + meta_len)
+                self._put(person_id, embedding, meta)
+            elif op == b'D':
+                self._drop(person_id)
+            pos = end
+            count += 1
+        self._log_records = count
+        if pos < len(data):
+            # Cut off a partial record from an interrupted write so later appends stay readable
+            with open(log_file, 'r+b') as f:
+                f.truncate(pos)
+        return count
+
+    def _open_log(self):
+        _, log_file = self._snapshot_files(self._generation)
+        self._log = open(log_file, 'ab')
+
+    def _append(self, op: bytes, person_id: str, embedding: np.ndarray = None, metadata: Dict = None):
+        id_bytes = person_id.encode('utf-8')
+        meta_bytes = json.dumps(metadata).encode('utf-8') if metadata else b''
+        emb_bytes = embedding.astype(np.float32, copy=False).tobytes() if embedding is not None else b''
+        dim = embedding.shape[0] if embedding is not None else 0
+        self._log.write(self._RECORD.pack(op, len(id_bytes), len(meta_bytes), dim) + id_bytes + meta_bytes + emb_bytes)
+        self._log_records += 1
+
+    def compact(self):
+        """Write live rows as a new memory-mapped snapshot and start an empty append log."""
+        with self._lock:
+            live = [row for row, person_id in enumerate(self._ids) if person_id is not None]
+            ids = [self._ids[row] for row in live]
+            generation = self._generation + 1
+            matrix_file, log_file = self._snapshot_files(generation)
+            if ids:
+                matrix = self._matrix_rows(live)
+                tmp = matrix_file.with_suffix('.tmp')
+                with open(tmp, 'wb') as f:
+                    np.save(f, matrix)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, matrix_file)
+            open(log_file, 'wb').close()
+
+            index = {'generation': generation, 'ids': ids,
+                     'metadata': {person_id: self.metadata.get(person_id, {}) for person_id in ids}}
+            tmp = self.db_path / "index.json.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(index, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.db_path / "index.json")
+
+            # The new snapshot is live; drop the previous generation
+            if self._log is not None:
+                self._log.close()
+            old_matrix, old_log = self._snapshot_files(self._generation)
+            for old in (old_matrix, old_log):
+                if old.exists():
+                    old.unlink()
+
+            self._generation = generation
+            self._base = np.load(matrix_file, mmap_mode='r') if ids else np.zeros((0, 0), dtype=np.float32)
+            self._extra = np.zeros((0, 0), dtype=np.float32)
+            self._n_extra = 0
+            self._ids = ids
+            self._rows = {person_id: row for row, person_id in enumerate(ids)}
+            self._alive = np.ones(len(ids), dtype=bool)
+            self._dead = 0
+            self._log_records = 0
+            self._open_log()
+
     def save_database(self):
         """Save face database to disk."""
-        if self.embeddings:
-            np.savez(self.db_path / "embeddings.npz", **self.embeddings)
-        
-        with open(self.db_path / "metadata.json", 'w') as f:
-            json.dump(self.metadata, f, indent=2)
-        
-        logger.info(f"Saved {len(self.embeddings)} face embeddings")
-    
+        self.compact()
+        logger.info(f"Saved {len(self._rows)} face embeddings")
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    # -- in-memory matrix --------------------------------------------------
+
+    def _matrix_rows(self, rows: List[int]) -> np.ndarray:
+        n_base = self._base.shape[0]
+        parts = []
+        base_rows = [r for r in rows if r < n_base]
+        extra_rows = [r - n_base for r in rows if r >= n_base]
+        if base_rows:
+            parts.append(np.asarray(self._base[base_rows], dtype=np.float32))
+        if extra_rows:
+            parts.append(self._extra[extra_rows])
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def _put(self, person_id: str, embedding: np.ndarray, metadata: Dict):
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            embedding = embedding / norm
+        dim = embedding.shape[0]
+        if self._base.shape[0] and self._base.shape[1] != dim:
+            raise ValueError(f"Embedding size {dim} does not match database size {self._base.shape[1]}")
+        if self._extra.shape[1] != dim:
+            if self._n_extra:
+                raise ValueError(f"Embedding size {dim} does not match database size {self._extra.shape[1]}")
+            self._extra = np.zeros((0, dim), dtype=np.float32)
+        if self._n_extra == self._extra.shape[0]:
+            # Grow geometrically so bulk registration stays linear
+            grown = np.zeros((max(64, 2 * self._extra.shape[0]), dim), dtype=np.float32)
+            grown[:self._n_extra] = self._extra[:self._n_extra]
+            self._extra = grown
+        self._extra[self._n_extra] = embedding
+
+        self._drop(person_id)
+        row = len(self._ids)
+        self._ids.append(person_id)
+        self._rows[person_id] = row
+        if row >= self._alive.shape[0]:
+            alive = np.zeros(max(64, 2 * self._alive.shape[0]), dtype=bool)
+            alive[:self._alive.shape[0]] = self._alive
+            self._alive = alive
+        self._alive[row] = True
+        self._n_extra += 1
+        self.metadata[person_id] = metadata or {}
+
+    def _drop(self, person_id: str) -> bool:
+        row = self._rows.pop(person_id, None)
+        if row is None:
+            return False
+        self._ids[row] = None
+        self._alive[row] = False
+        self._dead += 1
+        self.metadata.pop(person_id, None)
+        return True
+
+    def _maybe_compact(self):
+        if self._log_records >= self.compact_every:
+            self.compact()
+
+    # -- public API --------------------------------------------------------
+
     def add_face(self, person_id: str, embedding: np.ndarray, metadata: Dict = None):
         """Add or update a face in the database."""
-        self.embeddings[person_id] = embedding
-        self.metadata[person_id] = metadata or {}
-        self.save_database()
+        with self._lock:
+            self._put(person_id, embedding, metadata)
+            self._append(b'A', person_id, self._extra[self._n_extra - 1], metadata)
+            self._log.flush()
+        self._maybe_compact()
         logger.info(f"Added face for: {person_id}")
-    
+
+    def add_faces(self, faces: List[Tuple[str, np.ndarray, Optional[Dict]]]):
+        """Bulk registration: one log flush for the whole batch."""
+        with self._lock:
+            for person_id, embedding, metadata in faces:
+                self._put(person_id, embedding, metadata)
+                self._append(b'A', person_id, self._extra[self._n_extra - 1], metadata)
+            self._log.flush()
+        self._maybe_compact()
+        logger.info(f"Added {len(faces)} faces")
+
+    def remove_face(self, person_id: str) -> bool:
+        """Remove a person; returns False if they were not registered."""
+        with self._lock:
+            if not self._drop(person_id):
+                return False
+            self._append(b'D', person_id)
+            self._log.flush()
+        self._maybe_compact()
+        return True
+
+    def get_embedding(self, person_id: str) -> Optional[np.ndarray]:
+        row = self._rows.get(person_id)
+        if row is None:
+            return None
+        return self._matrix_rows([row])[0]
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine similarity of each query row against every stored row; dead rows get -inf."""
+        n_base = self._base.shape[0]
+        n_extra = self._n_extra
+        parts = []
+        if n_base:
+            parts.append(queries @ self._base.T)
+        if n_extra:
+            parts.append(queries @ self._extra[:n_extra].T)
+        scores = np.concatenate(parts, axis=1) if len(parts) > 1 else parts[0]
+        if self._dead:
+            scores[:, ~self._alive[:n_base + n_extra]] = -np.inf
+        return scores
+
+    def top_k(self, embeddings: np.ndarray, k: int = 1) -> List[List[Tuple[str, float]]]:
+        """Best `k` (person_id, similarity) per query embedding, best first."""
+        queries = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        if not self._rows:
+            return [[] for _ in range(queries.shape[0])]
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1.0)
+        with self._lock:
+            # compact() rebinds _ids, so this reference stays aligned with the scored rows
+            scores = self._scores(queries)
+            ids = self._ids
+        k = min(k, len(self._rows))
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+        results = []
+        for q in range(scores.shape[0]):
+            order = top[q][np.argsort(-scores[q, top[q]])]
+            results.append([(ids[row], float(scores[q, row])) for row in order[:k] if ids[row] is not None])
+        return results
+
+    def find_matches(self, embeddings: np.ndarray, threshold: float = 0.5) -> List[Tuple[Optional[str], float]]:
+        """find_match for several faces with one matrix product; scores are clamped to [0, 1]."""
+        matches = []
+        for best in self.top_k(embeddings, k=1):
+            if not best:
+                matches.append((None, 0.0))
+                continue
+            person_id, score = best[0]
+            # Cosine similarity is in [-1, 1]; callers have always seen 0 for "nothing similar"
+            score = min(1.0, max(0.0, score))
+            matches.append((person_id, score) if score >= threshold else (None, score))
+        return matches
+
     def find_match(self, embedding: np.ndarray, threshold: float = 0.5) -> Tuple[Optional[str], float]:
         """Find matching face in database."""
-        if not self.embeddings or embedding is None:
+        if not self._rows or embedding is None:
             return None, 0.0
+        return self.find_matches(embedding, threshold)[0]
+
+    def get_all_persons(self) -> List[str]:
+        """Get list of all registered persons."""
+        return list(self._rows.keys())
+
+    def __contains__(self, person_id: str) -> bool:
+        return person_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+class _AlertWindow:
+    """Open coalescing window of one (alert type, camera) key."""
+    __slots__ = ('alert', 'payload', 'payload_confidence', 'start', 'end', 'count', 'max_confidence', 'delivered',
+                 'critical')
+    
+    def __init__(self, alert: Dict, payload, start: float, end: float, confidence: float, critical: bool):
+        self.alert = alert
+        self.payload = payload
+        self.payload_confidence = confidence
+        self.start = start
+        self.end = end
+        self.count = 1
+        self.max_confidence = confidence
+        self.delivered = False
+        self.critical = critical
+
+
+class AlertDispatcher:
+    """Coalescing, rate-limited, asynchronous alert delivery.
+    
+    The first alert of a key opens a window of `window_s` and is delivered
+    right away; repeats inside the window are only counted. When the window
+    closes, one summary (count, peak confidence, payload of the most
+    confident repeat) is delivered if anything was folded into it. All
+    deliveries share a token bucket of `rate_per_min` with `burst`; alerts
+    and summaries that find it empty wait in a FIFO that drains as tokens
+    refill. Critical alerts (and their summaries) bypass the bucket and go
+    ahead of everything queued. `deliver(alert, payload, attempt)` runs on
+    a worker thread and is retried with exponential backoff when it raises.
+    submit() is O(1) and never blocks on delivery.
+    """
+    
+    def __init__(self, deliver, rate_per_min: float = 20, burst: int = 5, queue_size: int = 256,
+                 max_retries: int = 3, retry_backoff_s: float = 1.0):
+        self.deliver = deliver
+        self.rate = rate_per_min / 60.0
+        self.burst = burst
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        
+        self._tokens = float(burst)
+        self._refilled_at = time.time()
+        self._windows: Dict[str, _AlertWindow] = {}
+        self._deadlines: List[Tuple[float, int, str]] = []  # heap of window ends (stale entries skipped)
+        self._seq = 0
+        self.queue_size = queue_size
+        self._queue = deque()                        # (alert, payload, critical) ready to deliver, critical first
+        self._critical_queued = 0                    # leading entries of _queue that are critical
+        self._waiting = deque(maxlen=queue_size)     # (alert, payload) waiting for tokens, never critical
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._running = True
+        
+        self.stats = defaultdict(int)
+        self._thread = threading.Thread(target=self._run, name='alert-dispatch', daemon=True)
+        self._thread.start()
+    
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+    
+    def _take_token(self, now: float) -> bool:
+        self._refill(now)
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+    
+    def _send(self, alert: Dict, payload, critical: bool, now: float):
+        """Queue for delivery now, or hold until a token is free (caller holds the lock)."""
+        if critical:
+            # Critical alerts never wait: use a token if there is one, and jump the queue
+            if not self._take_token(now):
+                self.stats['critical_unmetered'] += 1
+            self._enqueue(alert, payload, True)
+        elif not self._waiting and self._take_token(now):
+            self._enqueue(alert, payload, False)
+        else:
+            if len(self._waiting) == self._waiting.maxlen:
+                self.stats['queue_dropped'] += 1
+            self._waiting.append((alert, payload))
+            self.stats['rate_limited'] += 1
+        self._idle.clear()
+        self._wake.set()
+    
+    def _enqueue(self, alert: Dict, payload, critical: bool):
+        """Add to the delivery queue (caller holds the lock).
         
-        best_match = None
-        best_score = 0.0
-        
-        for person_id, stored_embedding in self.embeddings.items():
-            # Cosine similarity
-            similarity = np.dot(embedding, stored_embedding) / (
-                np.linalg.norm(embedding) * np.linalg.norm(stored_embedding)
-            )
+        Critical entries go after the critical ones already queued, ahead of
+        the rest. At `queue_size` the oldest non-critical entry is dropped to
+        make room; critical entries are never dropped, so only they can push
+        the queue past the cap.
+        """
+        if len(self._queue) >= self.queue_size:
+            if self._critical_queued < len(self._queue):
+                del self._queue[self._critical_queued]  # oldest non-critical
+                self.stats['queue_dropped'] += 1
+            elif not critical:
+                self.stats['queue_dropped'] += 1
+                return
+            else:
+                self.stats['queue_over_cap'] += 1
+        if critical:
+            self._queue.insert(self._critical_queued, (alert, payload, True))
+            self._critical_queued += 1
+        else:
+            self._queue.append((alert, payload, False))
+    
+    def submit(self, key: str, alert: Dict, payload=None, window_s: float = 30.0,
+               confidence: float = 0.0, now: float = None, critical: bool = False) -> bool:
+        """Offer an alert; True if it opened a new window for its key, False if it was coalesced."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.stats['generated'] += 1
+            window = self._windows.get(key)
+            if window is not None and now < window.end:
+                window.count += 1
+                window.max_confidence = max(window.max_confidence, confidence)
+                if payload is not None and confidence >= window.payload_confidence:
+                    window.payload, window.payload_confidence = payload, confidence
+                self.stats['coalesced'] += 1
+                return False
+            if window is not None:
+                self._close_window(key, window, now)
             
-            if similarity > best_score:
-                best_score = similarity
-                best_match = person_id
-        
-        if best_score >= threshold:
-            return best_match, best_score
-        
-        return None, best_score
+            window = _AlertWindow(alert, payload, now, now + window_s, confidence, critical)
+            self._windows[key] = window
+            self._seq += 1
+            heapq.heappush(self._deadlines, (window.end, self._seq, key))
+            window.delivered = True
+            window.payload, window.payload_confidence = None, -1.0  # sent with the alert
+            self._send(alert, payload, critical, now)
+            return True
     
-    def get_all_persons(self) -> List[str]:
-        """Get list of all registered persons."""
-        return list(self.embeddings.keys())
+    def _close_window(self, key: str, window: _AlertWindow, now: float):
+        """Emit the window's summary (caller holds the lock)."""
+        if self._windows.get(key) is window:
+            del self._windows[key]
+        folded = window.count - (1 if window.delivered else 0)
+        if folded == 0:
+            return
+        summary = dict(window.alert)
+        summary.update({
+            'id': f"{window.alert.get('id', key)}_x{window.count}",
+            'coalesced_count': window.count,
+            'folded_count': folded,  # alerts of the window not delivered before
+            'window_start': datetime.fromtimestamp(window.start).isoformat(),
+            'window_end': datetime.fromtimestamp(min(now, window.end)).isoformat(),
+            'max_confidence': window.max_confidence,
+            'message': f"{window.alert.get('message', key)} ({window.count}x in "
+                       f"{min(now, window.end) - window.start:.0f}s)",
+        })
+        self.stats['summaries'] += 1
+        self._send(summary, window.payload, window.critical, now)
+    
+    def _run(self):
+        while self._running:
+            with self._lock:
+                now = time.time()
+                timeout = 0.5
+                if self._deadlines:
+                    timeout = min(timeout, max(0.0, self._deadlines[0][0] - now))
+                if self._waiting:
+                    self._refill(now)
+                    timeout = min(timeout, max(0.0, (1.0 - self._tokens) / self.rate))
+            self._wake.wait(timeout=timeout)
+            self._wake.clear()
+            
+            now = time.time()
+            with self._lock:
+                # Windows that ended
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _, _, key = heapq.heappop(self._deadlines)
+                    window = self._windows.get(key)
+                    if window is not None and window.end <= now:
+                        self._close_window(key, window, now)
+                # Alerts and summaries waiting for tokens, oldest first
+                while self._waiting and self._take_token(now):
+                    self._enqueue(*self._waiting.popleft(), False)
+            
+            while True:
+                with self._lock:
+                    if not self._queue:
+                        break
+                    alert, payload, critical = self._queue.popleft()
+                    if critical:
+                        self._critical_queued -= 1
+                self._deliver(alert, payload)
+            
+            with self._lock:
+                if not self._queue and not self._waiting:
+                    self._idle.set()
+    
+    def _deliver(self, alert: Dict, payload):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.deliver(alert, payload, attempt)
+                self.stats['delivered'] += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries or not self._running:
+                    self.stats['failed'] += 1
+                    logger.error(f"Alert delivery failed after {attempt + 1} attempts: {e}")
+                    return
+                self.stats['retries'] += 1
+                time.sleep(self.retry_backoff_s * (2 ** attempt))
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Close every open window and wait for pending deliveries (held alerts ignore the rate limit)."""
+        now = time.time()
+        with self._lock:
+            for key, window in list(self._windows.items()):
+                self._close_window(key, window, now)
+            while self._waiting:
+                self._enqueue(*self._waiting.popleft(), False)
+            if self._queue:
+                self._idle.clear()
+        self._wake.set()
+        return self._idle.wait(timeout)
+    
+    def close(self, timeout: float = 10.0):
+        """Flush, then stop the worker."""
+        self.flush(timeout)
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout=timeout)
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['open_windows'] = len(self._windows)
+            stats['pending'] = len(self._queue) + len(self._waiting)
+            return stats
 
 
 class AlertManager:
@@ -291,7 +807,7 @@ class AlertManager:
     SEVERITY_HIGH = 'high'
     SEVERITY_CRITICAL = 'critical'
     
-    # Alert types with severity mapping
+    # Alert types with severity mapping (cooldown = coalescing window, seconds)
     ALERT_CONFIG = {
         'fire': {'severity': 'critical', 'cooldown': 30},
         'smoke': {'severity': 'high', 'cooldown': 30},
@@ -301,11 +817,10 @@ class AlertManager:
         'no_employee': {'severity': 'low', 'cooldown': 300},
     }
     
-    def __init__(self, callback=None):
+    def __init__(self, callback=None, rate_per_min: float = 20, burst: int = 5, history_size: int = 1000):
         self.callback = callback
-        self.alert_history: List[Dict] = []
-        self.last_alert_time: Dict[str, float] = defaultdict(float)
-        self._lock = threading.Lock()
+        self.alert_history: deque = deque(maxlen=history_size)
+        self.dispatcher = AlertDispatcher(self._deliver, rate_per_min=rate_per_min, burst=burst)
     
     def create_alert(
         self,
@@ -315,18 +830,16 @@ class AlertManager:
         message: str = None,
         frame: np.ndarray = None
     ) -> Optional[Dict]:
-        """Create an alert if cooldown allows."""
+        """Create an alert unless one for this camera and type is still in its window.
         
-        config = self.ALERT_CONFIG.get(alert_type, {'severity': 'medium', 'cooldown': 60})
+        Repeats inside the window return None and are delivered as one
+        summary when the window closes. The callback runs on the dispatcher
+        thread, never inline.
+        """
         
-        with self._lock:
-            key = f"{alert_type}_{camera_id}"
-            now = time.time()
-            
-            if now - self.last_alert_time[key] < config['cooldown']:
-                return None  # Still in cooldown
-            
-            self.last_alert_time[key] = now
+        config = self.ALERT_CONFIG.get(alert_type, {'severity': 'medium', 'cooldown': 60})
+        key = f"{alert_type}_{camera_id}"
+        now = time.time()
         
         alert = {
             'id': f"{alert_type}_{camera_id}_{int(now)}",
@@ -342,22 +855,28 @@ class AlertManager:
             } if detection else None
         }
         
-        self.alert_history.append(alert)
+        confidence = detection.confidence if detection else 0.0
+        if not self.dispatcher.submit(key, alert, frame, window_s=config['cooldown'],
+                                      confidence=confidence, now=now,
+                                      critical=config['severity'] == 'critical'):
+            return None  # Coalesced into the open window
         
-        # Keep only last 1000 alerts
-        if len(self.alert_history) > 1000:
-            self.alert_history = self.alert_history[-500:]
-        
-        # Trigger callback
-        if self.callback:
-            try:
-                self.callback(alert, frame)
-            except Exception as e:
-                logger.error(f"Alert callback failed: {e}")
+        self.alert_history.append(alert)
         
         logger.warning(f"ALERT [{alert['severity'].upper()}]: {alert['message']}")
         
         return alert
+    
+    def _deliver(self, alert: Dict, frame: np.ndarray, attempt: int):
+        """Dispatcher worker: hand the alert to the callback (raising makes it retry)."""
+        if attempt == 0 and 'coalesced_count' in alert:
+            logger.warning(f"ALERT [{alert['severity'].upper()}]: {alert['message']}")
+        if self.callback:
+            self.callback(alert, frame)
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Deliver pending alerts and summaries of open windows."""
+        return self.dispatcher.flush(timeout)
 
 
 class CameraStream:
@@ -444,6 +963,183 @@ class CameraStream:
             return self.frame_queue.get(timeout=timeout)
         except queue.Empty:
             return None
+    
+    def get_latest(self) -> Optional[Tuple[np.ndarray, datetime]]:
+        """Newest queued frame without waiting, dropping older ones; None if nothing new."""
+        latest = None
+        while True:
+            try:
+                latest = self.frame_queue.get_nowait()
+            except queue.Empty:
+                return latest
+
+
+class BatchFormer:
+    """Collects one frame per camera into an inference batch.
+    
+    A batch is issued as soon as every camera (or `max_batch` of them) has a
+    new frame, or `max_wait_ms` after its first frame arrived, whichever
+    comes first. A fast camera therefore never waits on a stalled one for
+    longer than the deadline.
+    
+    Cameras are polled round-robin: each batch starts after the last camera
+    taken into the previous one, so with more cameras than `max_batch` every
+    camera still gets its turn.
+    """
+    
+    def __init__(self, max_batch: int = 8, max_wait_ms: float = 30.0, poll_ms: float = 1.0):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.poll = poll_ms / 1000.0
+        self.stats = {'batches': 0, 'frames': 0, 'deadline_hits': 0}
+        self._next = 0
+    
+    def form(self, cameras: Dict[str, 'CameraStream'], timeout: float = 0.5) -> List[Tuple[str, np.ndarray, datetime]]:
+        """Block until a batch is ready (or `timeout` passes with no frames); returns (camera_id, frame, timestamp)."""
+        batch: Dict[str, Tuple[np.ndarray, datetime]] = {}
+        camera_ids = list(cameras)
+        if not camera_ids:
+            return []
+        start = self._next % len(camera_ids)
+        order = camera_ids[start:] + camera_ids[:start]
+        target = min(self.max_batch, len(cameras))
+        last_taken = -1
+        started = time.time()
+        first_at = None
+        
+        while True:
+            for position, camera_id in enumerate(order):
+                if camera_id in batch or len(batch) >= target:
+                    continue
+                frame_data = cameras[camera_id].get_latest()
+                if frame_data is not None:
+                    batch[camera_id] = frame_data
+                    last_taken = max(last_taken, position)
+                    if first_at is None:
+                        first_at = time.time()
+            
+            if len(batch) >= target:
+                break
+            now = time.time()
+            if first_at is not None and now - first_at >= self.max_wait:
+                self.stats['deadline_hits'] += 1
+                break
+            if first_at is None and now - started >= timeout:
+                return []
+            time.sleep(self.poll)
+        
+        self._next = start + last_taken + 1
+        self.stats['batches'] += 1
+        self.stats['frames'] += len(batch)
+        return [(camera_id, frame, timestamp) for camera_id, (frame, timestamp) in batch.items()]
+
+
+class InferenceScheduler:
+    """Decides per camera frame whether detection has to run.
+    
+    - Static frames are skipped: a motion score (share of pixels of a small
+      grayscale thumbnail that changed since the last inference) must reach
+      `motion_threshold`.
+    - A camera with detections is "hot" for `active_hold_s` and runs on
+      every frame regardless of motion.
+    - Every camera still runs at least every `idle_interval_s`, so slow
+      changes (smoke building up, lighting) are not missed.
+    - All cameras share an inference-time budget: `budget` seconds of
+      inference per second of wall time, as a token bucket holding up to
+      `burst_s`. When it runs short, hot cameras go first, then the camera
+      that has waited longest.
+    """
+    
+    THUMB_SIZE = (96, 54)
+    PIXEL_DELTA = 15  # gray levels for a thumbnail pixel to count as changed
+    
+    def __init__(self, motion_threshold: float = 0.003, active_hold_s: float = 3.0,
+                 idle_interval_s: float = 2.0, budget: float = 0.8, burst_s: float = 0.5):
+        self.motion_threshold = motion_threshold
+        self.active_hold_s = active_hold_s
+        self.idle_interval_s = idle_interval_s
+        self.budget = budget
+        self.burst_s = burst_s
+        
+        self._tokens = burst_s
+        self._refilled_at = None
+        self._reference: Dict[str, np.ndarray] = {}   # thumbnail at the last inference
+        self._last_run: Dict[str, float] = {}
+        self._hot_until: Dict[str, float] = defaultdict(float)
+        self._cost: Dict[str, float] = defaultdict(lambda: 0.05)  # EWMA inference seconds per frame
+        self._pending: Dict[str, Tuple[float, np.ndarray]] = {}
+        self._lock = threading.Lock()
+        
+        self.stats = defaultdict(int)
+    
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        small = cv2.resize(frame, self.THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    
+    def motion_score(self, camera_id: str, thumb: np.ndarray) -> float:
+        """Share of thumbnail pixels that changed since the camera's last inference (1.0 if none yet)."""
+        reference = self._reference.get(camera_id)
+        if reference is None or reference.shape != thumb.shape:
+            return 1.0
+        return float(np.count_nonzero(cv2.absdiff(thumb, reference) > self.PIXEL_DELTA)) / thumb.size
+    
+    def plan(self, frames: List[Tuple[str, np.ndarray]], now: float = None) -> List[bool]:
+        """Which of the given (camera_id, frame) pairs to run detection on."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._refilled_at is not None:
+                self._tokens = min(self.burst_s, self._tokens + (now - self._refilled_at) * self.budget)
+            self._refilled_at = now
+            
+            candidates = []
+            for i, (camera_id, frame) in enumerate(frames):
+                thumb = self._thumbnail(frame)
+                hot = now < self._hot_until[camera_id]
+                waited = now - self._last_run.get(camera_id, float('-inf'))
+                if hot:
+                    reason = 'hot'
+                elif self.motion_score(camera_id, thumb) >= self.motion_threshold:
+                    reason = 'motion'
+                elif waited >= self.idle_interval_s:
+                    reason = 'idle'
+                else:
+                    self.stats['skipped_static'] += 1
+                    continue
+                candidates.append((not hot, -waited, i, camera_id, thumb, reason))
+            
+            run = [False] * len(frames)
+            for _, _, i, camera_id, thumb, reason in sorted(candidates, key=lambda c: c[:3]):
+                cost = self._cost[camera_id]
+                if (self._tokens < cost and reason != 'idle') or self._tokens <= 0:
+                    # Over budget; the idle keep-alive may dip into the next refill, the rest waits
+                    self.stats['skipped_budget'] += 1
+                    continue
+                self._tokens -= cost
+                self._pending[camera_id] = (cost, thumb)
+                self._last_run[camera_id] = now
+                self.stats[f'run_{reason}'] += 1
+                run[i] = True
+            return run
+    
+    def record(self, camera_id: str, seconds: float, detections: int, now: float = None):
+        """Report a planned inference: its measured time and how many detections it produced."""
+        now = time.time() if now is None else now
+        with self._lock:
+            estimate, thumb = self._pending.pop(camera_id, (self._cost[camera_id], None))
+            self._tokens += estimate - seconds
+            self._cost[camera_id] = 0.8 * self._cost[camera_id] + 0.2 * seconds
+            if thumb is not None:
+                self._reference[camera_id] = thumb
+            if detections:
+                self._hot_until[camera_id] = now + self.active_hold_s
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            runs = sum(v for k, v in stats.items() if k.startswith('run_'))
+            stats['inference_share'] = round(runs / max(1, runs + stats.get('skipped_static', 0)
+                                                         + stats.get('skipped_budget', 0)), 3)
+            return stats
 
 
 class InvEyePipeline:
@@ -461,7 +1157,11 @@ class InvEyePipeline:
         # Initialize components
         self.model_manager = ModelManager(self.config.get('models', {}))
         self.face_database = FaceDatabase(self.config.get('face_database_path', 'face_database'))
-        self.alert_manager = AlertManager(callback=self._on_alert)
+        self.alert_manager = AlertManager(
+            callback=self._on_alert,
+            rate_per_min=self.config.get('alert_rate_per_min', 20),
+            burst=self.config.get('alert_burst', 5),
+        )
         
         # Cameras
         self.cameras: Dict[str, CameraStream] = {}
@@ -471,6 +1171,25 @@ class InvEyePipeline:
         self.object_detection_interval = self.config.get('object_detection_interval', 1)
         self.recognition_interval = self.config.get('recognition_interval', 3)
         
+        # Adaptive inference scheduling (replaces the fixed detection intervals)
+        self.scheduler = None
+        if self.config.get('adaptive_inference', True):
+            self.scheduler = InferenceScheduler(
+                motion_threshold=self.config.get('motion_threshold', 0.003),
+                active_hold_s=self.config.get('active_hold_s', 3.0),
+                idle_interval_s=self.config.get('idle_inference_interval_s', 2.0),
+                budget=self.config.get('inference_budget', 0.8),
+            )
+        self.inference_counts: Dict[str, int] = defaultdict(int)
+        self.last_detections: Dict[str, Tuple[List[Detection], List[Detection]]] = {}
+        
+        # Cross-camera batching: one detector call per tick for all cameras with a new frame
+        self.batch_inference = self.config.get('batch_inference', True)
+        self.batch_former = BatchFormer(
+            max_batch=self.config.get('batch_max_size', 8),
+            max_wait_ms=self.config.get('batch_max_wait_ms', 30),
+        )
+        
         # Stats
         self.stats = defaultdict(lambda: defaultdict(int))
         self.running = False
@@ -505,6 +1224,14 @@ class InvEyePipeline:
             'object_confidence': 0.5,
             'recognition_threshold': 0.5,
             'alert_classes': ['fire', 'smoke', 'fight', 'violence'],
+            'batch_inference': True,
+            'batch_max_wait_ms': 30,
+            'batch_max_size': 8,
+            'adaptive_inference': True,
+            'motion_threshold': 0.003,
+            'active_hold_s': 3.0,
+            'idle_inference_interval_s': 2.0,
+            'inference_budget': 0.8,
         }
     
     def _on_alert(self, alert: Dict, frame: np.ndarray = None):
@@ -556,74 +1283,122 @@ class InvEyePipeline:
         self.face_database.add_face(person_id, embedding, {'registered_at': datetime.now().isoformat()})
         return True
     
-    def process_frame(self, camera_id: str, frame: np.ndarray, frame_num: int) -> FrameResult:
+    def process_frame(self, camera_id: str, frame: np.ndarray, frame_num: int, now: float = None) -> FrameResult:
         """Process a single frame through all detection pipelines."""
-        start_time = time.time()
-        
-        result = FrameResult(
-            camera_id=camera_id,
-            timestamp=datetime.now(),
-            frame=frame
-        )
+        return self.process_batch([(camera_id, frame, frame_num)], now=now)[0]
+    
+    def process_batch(self, items: List[Tuple[str, np.ndarray, int]], now: float = None) -> List[FrameResult]:
+        """Process frames from several cameras, with one face and one object detection call for the batch.
         
-        # Face detection (every N frames)
-        if frame_num % self.face_detection_interval == 0:
-            faces = self.model_manager.detect_faces(
-                frame, 
+        Args:
+            items: (camera_id, frame, frame_num) per camera
+            now: Frame time for the inference scheduler (default: wall clock)
+        """
+        start_time = time.time()
+        now = start_time if now is None else now
+        results = [FrameResult(camera_id=camera_id, timestamp=datetime.now(), frame=frame)
+                   for camera_id, frame, _ in items]
+        
+        if self.scheduler:
+            # Adaptive: detection on frames the scheduler picks, recognition every N of those
+            due = self.scheduler.plan([(camera_id, frame) for camera_id, frame, _ in items], now=now)
+            face_idx = object_idx = [i for i, run in enumerate(due) if run]
+            frame_nums = []
+            for (camera_id, _, frame_num), run in zip(items, due):
+                if run:
+                    self.inference_counts[camera_id] += 1
+                frame_nums.append(self.inference_counts[camera_id])
+        else:
+            # Fixed intervals (every N frames)
+            face_idx = [i for i, (_, _, frame_num) in enumerate(items) if frame_num % self.face_detection_interval == 0]
+            object_idx = [i for i, (_, _, frame_num) in enumerate(items) if frame_num % self.object_detection_interval == 0]
+            frame_nums = [frame_num for _, _, frame_num in items]
+        
+        # Face detection
+        if face_idx:
+            batch_faces = self.model_manager.detect_faces_batch(
+                [items[i][1] for i in face_idx],
                 conf=self.config.get('face_confidence', 0.5)
             )
-            result.faces = faces
-            
-            # Face recognition (less frequent)
-            if frame_num % self.recognition_interval == 0:
-                for face in faces:
-                    embedding = self.model_manager.recognize_face(frame, face.bbox)
-                    if embedding is not None:
-                        face.embedding = embedding
-                        identity, score = self.face_database.find_match(
-                            embedding,
-                            threshold=self.config.get('recognition_threshold', 0.5)
-                        )
-                        face.identity = identity
-                        face.metadata['match_score'] = score
-                        
-                        # Alert for unknown person
-                        if identity is None and self.config.get('alert_unknown_faces', False):
-                            self.alert_manager.create_alert(
-                                'unknown_person',
-                                camera_id,
-                                face,
-                                f"Unknown person detected on {camera_id}"
-                            )
-        
-        # Object detection (every N frames)
-        if frame_num % self.object_detection_interval == 0:
-            objects = self.model_manager.detect_objects(
-                frame,
+            for i, faces in zip(face_idx, batch_faces):
+                self._handle_faces(results[i], items[i][0], items[i][1], frame_nums[i], faces)
+        
+        # Object detection
+        if object_idx:
+            batch_objects = self.model_manager.detect_objects_batch(
+                [items[i][1] for i in object_idx],
                 conf=self.config.get('object_confidence', 0.5)
             )
-            result.objects = objects
+            for i, objects in zip(object_idx, batch_objects):
+                self._handle_objects(results[i], items[i][0], items[i][1], objects)
+        
+        elapsed = time.time() - start_time
+        if self.scheduler:
+            ran = set(face_idx)
+            for i, ((camera_id, _, _), result) in enumerate(zip(items, results)):
+                if i in ran:
+                    self.scheduler.record(camera_id, elapsed / len(ran),
+                                          len(result.faces) + len(result.objects), now=now)
+                    self.last_detections[camera_id] = (result.faces, result.objects)
+                else:
+                    # Skipped frame: the scene has not changed, keep showing the last detections
+                    result.faces, result.objects = (list(d) for d in self.last_detections.get(camera_id, ([], [])))
+                    self.stats[camera_id]['frames_skipped'] += 1
+        
+        for i, ((camera_id, _, _), result) in enumerate(zip(items, results)):
+            result.processing_time_ms = elapsed * 1000
             
-            # Check for alert conditions
-            for obj in objects:
-                if obj.class_name.lower() in self.alert_classes:
-                    alert = self.alert_manager.create_alert(
-                        obj.class_name.lower(),
-                        camera_id,
-                        obj,
-                        frame=frame
-                    )
-                    if alert:
-                        result.alerts.append(alert)
+            # Update stats
+            self.stats[camera_id]['frames_processed'] += 1
+            if not self.scheduler or i in face_idx:
+                self.stats[camera_id]['faces_detected'] += len(result.faces)
+                self.stats[camera_id]['objects_detected'] += len(result.objects)
         
-        result.processing_time_ms = (time.time() - start_time) * 1000
-        
-        # Update stats
-        self.stats[camera_id]['frames_processed'] += 1
-        self.stats[camera_id]['faces_detected'] += len(result.faces)
-        self.stats[camera_id]['objects_detected'] += len(result.objects)
+        return results
+    
+    def _handle_faces(self, result: FrameResult, camera_id: str, frame: np.ndarray,
+                      frame_num: int, faces: List[Detection]):
+        """Recognition and unknown-person alerts for the faces found in one frame."""
+        result.faces = faces
+        
+        # Face recognition (less frequent)
+        if frame_num % self.recognition_interval == 0:
+            for face in faces:
+                embedding = self.model_manager.recognize_face(frame, face.bbox)
+                if embedding is not None:
+                    face.embedding = embedding
+                    identity, score = self.face_database.find_match(
+                        embedding,
+                        threshold=self.config.get('recognition_threshold', 0.5)
+                    )
+                    face.identity = identity
+                    face.metadata['match_score'] = score
+                    
+                    # Alert for unknown person
+                    if identity is None and self.config.get('alert_unknown_faces', False):
+                        self.alert_manager.create_alert(
+                            'unknown_person',
+                            camera_id,
+                            face,
+                            f"Unknown person detected on {camera_id}"
+                        )
+    
+    def _handle_objects(self, result: FrameResult, camera_id: str, frame: np.ndarray,
+                        objects: List[Detection]):
+        """Alerts for the objects found in one frame."""
+        result.objects = objects
         
-        return result
+        # Check for alert conditions
+        for obj in objects:
+            if obj.class_name.lower() in self.alert_classes:
+                alert = self.alert_manager.create_alert(
+                    obj.class_name.lower(),
+                    camera_id,
+                    obj,
+                    frame=frame
+                )
+                if alert:
+                    result.alerts.append(alert)
     
     def draw_results(self, frame: np.ndarray, result: FrameResult) -> np.ndarray:
         """Draw detection results on frame."""
@@ -692,21 +1467,16 @@ class InvEyePipeline:
         if output_dir:
             Path(output_dir).mkdir(parents=True, exist_ok=True)
         
-        logger.info(f"Pipeline running with {len(self.cameras)} cameras")
+        batched = self.batch_inference and len(self.cameras) > 1
+        logger.info(f"Pipeline running with {len(self.cameras)} cameras"
+                    f"{' (batched inference)' if batched else ''}")
         
         try:
             while self.running:
-                for camera_id, camera in self.cameras.items():
-                    frame_data = camera.get_frame(timeout=0.01)
-                    
-                    if frame_data is None:
-                        continue
-                    
-                    frame, timestamp = frame_data
-                    frame_counts[camera_id] += 1
-                    
-                    # Process frame
-                    result = self.process_frame(camera_id, frame, frame_counts[camera_id])
+                tick = self._batched_tick(frame_counts) if batched else self._serial_tick(frame_counts)
+                
+                for result, timestamp in tick:
+                    camera_id, frame = result.camera_id, result.frame
                     
                     # Draw results
                     if show or output_dir:
@@ -749,8 +1519,37 @@ class InvEyePipeline:
             
             cv2.destroyAllWindows()
             
+            self.alert_manager.flush()
+            
             self._print_stats()
     
+    def _serial_tick(self, frame_counts: Dict[str, int]):
+        """One pass over the cameras, one detector call per camera frame; yields (result, capture timestamp)."""
+        for camera_id, camera in self.cameras.items():
+            frame_data = camera.get_frame(timeout=0.01)
+            
+            if frame_data is None:
+                continue
+            
+            frame, timestamp = frame_data
+            frame_counts[camera_id] += 1
+            
+            yield self.process_frame(camera_id, frame, frame_counts[camera_id]), timestamp
+    
+    def _batched_tick(self, frame_counts: Dict[str, int]) -> List[Tuple[FrameResult, datetime]]:
+        """Latest frame from each camera, processed as one batch; returns (result, capture timestamp) pairs."""
+        batch = self.batch_former.form(self.cameras, timeout=0.1)
+        if not batch:
+            return []
+        
+        items = []
+        for camera_id, frame, _ in batch:
+            frame_counts[camera_id] += 1
+            items.append((camera_id, frame, frame_counts[camera_id]))
+        
+        results = self.process_batch(items)
+        return [(result, timestamp) for result, (_, _, timestamp) in zip(results, batch)]
+    
     def _print_stats(self):
         """Print pipeline statistics."""
         print("\n" + "="*60)
@@ -762,9 +1561,19 @@ class InvEyePipeline:
             for key, value in stats.items():
                 print(f"  {key}: {value}")
         
+        if self.batch_inference and self.batch_former.stats['batches']:
+            batch_stats = self.batch_former.stats
+            print(f"\nBatching: {batch_stats['batches']} batches, "
+                  f"{batch_stats['frames'] / batch_stats['batches']:.2f} frames/batch, "
+                  f"{batch_stats['deadline_hits']} deadline hits")
+        
+        if self.scheduler:
+            print(f"\nScheduler: {self.scheduler.get_stats()}")
+        
         print("\nAlerts:")
-        for alert in self.alert_manager.alert_history[-10:]:
+        for alert in list(self.alert_manager.alert_history)[-10:]:
             print(f"  [{alert['severity']}] {alert['message']}")
+        print(f"  Dispatch: {self.alert_manager.dispatcher.get_stats()}")
         
         print("="*60)
 
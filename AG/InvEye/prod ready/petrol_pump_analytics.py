@@ -30,13 +30,12 @@ import sys
 import json
 import time
 import threading
-import queue
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field, asdict
-from collections import defaultdict
+from collections import defaultdict, OrderedDict, deque
 from enum import Enum
 import hashlib
 
@@ -202,16 +201,42 @@ class AnalyticsSnapshot:
 # FACE TRACKER
 # ============================================================================
 
+@dataclass(frozen=True)
+class _MatchIndex:
+    """Immutable view of the face matrix that find_match reads without the lock."""
+    matrix: np.ndarray   # (capacity, dim) normalised embeddings; rows >= count are unused
+    count: int
+    ids: np.ndarray      # row -> face_id (object array)
+    alive: np.ndarray    # row -> still tracked
+    pinned: np.ndarray   # row -> employee
+
+
 class FaceTracker:
-    """Tracks faces across frames and identifies returning visitors."""
+    """Tracks faces across frames and identifies returning visitors.
+
+    Embeddings live in a preallocated float32 matrix of normalised rows, so a
+    match is one matrix-vector product. Writers (new faces, employees,
+    eviction) hold the lock and publish a new `_MatchIndex`; readers match
+    against whichever index was current, outside the lock. Published rows are
+    never modified in place: new faces go into rows past the published count,
+    eviction publishes a copied `alive` mask, and compaction builds a new
+    matrix. Visitors are evicted once unseen for `face_ttl_hours`, or least
+    recently seen first when more than `max_faces` are tracked; employees are
+    pinned and never evicted.
+    """
     
-    def __init__(self, similarity_threshold: float = 0.5, revisit_window_hours: int = 24):
+    def __init__(self, similarity_threshold: float = 0.5, revisit_window_hours: int = 24,
+                 max_faces: int = 5000, face_ttl_hours: Optional[float] = None):
         self.similarity_threshold = similarity_threshold
         self.revisit_window = timedelta(hours=revisit_window_hours)
+        self.max_faces = max_faces
+        self.face_ttl = timedelta(hours=face_ttl_hours if face_ttl_hours is not None else revisit_window_hours)
         
-        self.known_faces: Dict[str, FaceRecord] = {}
+        self.known_faces: "OrderedDict[str, FaceRecord]" = OrderedDict()  # least recently seen first
         self.employees: Dict[str, FaceRecord] = {}
-        self.session_faces: Dict[str, FaceRecord] = {}  # Faces seen in current session
+        self._rows: Dict[str, int] = {}
+        self._index: Optional[_MatchIndex] = None
+        self._capacity = max_faces + 64
         
         self._lock = threading.Lock()
         
@@ -221,6 +246,8 @@ class FaceTracker:
             "returning_faces_today": 0,
             "employees_present": set(),
             "unknown_faces_today": 0,
+            "evicted_faces": 0,
+            "compactions": 0,
         }
     
     def _generate_face_id(self, embedding: np.ndarray) -> str:
@@ -231,44 +258,103 @@ class FaceTracker:
         """Calculate cosine similarity between embeddings."""
         return float(np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2)))
     
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else embedding
+    
+    def _compact(self, dim: int, capacity: int):
+        """Copy live rows into a fresh matrix. Caller holds the lock."""
+        old = self._index
+        matrix = np.zeros((capacity, dim), dtype=np.float32)
+        ids = np.empty(capacity, dtype=object)
+        alive = np.zeros(capacity, dtype=bool)
+        pinned = np.zeros(capacity, dtype=bool)
+        rows = {}
+        for row, (face_id, old_row) in enumerate(self._rows.items()):
+            matrix[row] = old.matrix[old_row]
+            ids[row] = face_id
+            alive[row] = True
+            pinned[row] = face_id in self.employees
+            rows[face_id] = row
+        self._rows = rows
+        self._capacity = capacity
+        self._index = _MatchIndex(matrix, len(rows), ids, alive, pinned)
+        if old is not None:
+            self.stats["compactions"] += 1
+    
+    def _add_row(self, face_id: str, embedding: np.ndarray, pinned: bool):
+        """Write a face into the next unused row and publish it. Caller holds the lock."""
+        embedding = self._normalize(embedding)
+        index = self._index
+        if index is None:
+            self._compact(embedding.shape[0], self._capacity)
+        elif index.matrix.shape[1] != embedding.shape[0]:
+            raise ValueError(f"Embedding size {embedding.shape[0]} does not match tracker size {index.matrix.shape[1]}")
+        elif index.count == self._capacity:
+            # Out of unused rows: drop evicted rows, and grow if live faces fill most of the matrix
+            capacity = self._capacity
+            if len(self._rows) + 1 > capacity * 3 // 4:
+                capacity *= 2
+            self._compact(embedding.shape[0], capacity)
+        index = self._index
+        row = index.count
+        # Rows past count are invisible to published indexes, so they can be written in place
+        index.matrix[row] = embedding
+        index.ids[row] = face_id
+        index.alive[row] = True
+        index.pinned[row] = pinned
+        self._rows[face_id] = row
+        self._index = _MatchIndex(index.matrix, row + 1, index.ids, index.alive, index.pinned)
+    
+    def _remove_rows(self, face_ids: List[str]):
+        """Hide faces from matching with a copied alive mask. Caller holds the lock."""
+        index = self._index
+        rows = [self._rows.pop(face_id) for face_id in face_ids if face_id in self._rows]
+        if not rows:
+            return
+        alive = index.alive.copy()
+        alive[rows] = False
+        self._index = _MatchIndex(index.matrix, index.count, index.ids, alive, index.pinned)
+    
+    def _evict(self, now: datetime):
+        """Drop visitors past the TTL or beyond max_faces, least recently seen first. Caller holds the lock."""
+        evicted = []
+        while self.known_faces:
+            face_id, record = next(iter(self.known_faces.items()))
+            if len(self.known_faces) <= self.max_faces and now - record.last_seen <= self.face_ttl:
+                break
+            del self.known_faces[face_id]
+            evicted.append(face_id)
+        if evicted:
+            self._remove_rows(evicted)
+            self.stats["evicted_faces"] += len(evicted)
+    
     def find_match(self, embedding: np.ndarray) -> Tuple[Optional[str], float, bool]:
         """Find matching face in database.
         
         Returns: (face_id, similarity_score, is_employee)
         """
-        best_match = None
-        best_score = 0.0
-        is_employee = False
+        index = self._index
+        if index is None or index.count == 0:
+            return None, 0.0, False
         
-        with self._lock:
-            # Check employees first
-            for face_id, record in self.employees.items():
-                if record.embedding is not None:
-                    score = self._cosine_similarity(embedding, record.embedding)
-                    if score > best_score:
-                        best_score = score
-                        best_match = face_id
-                        is_employee = True
-            
-            # Check known faces
-            for face_id, record in self.known_faces.items():
-                if record.embedding is not None:
-                    score = self._cosine_similarity(embedding, record.embedding)
-                    if score > best_score:
-                        best_score = score
-                        best_match = face_id
-                        is_employee = False
+        scores = index.matrix[:index.count] @ self._normalize(embedding)
+        scores[~index.alive[:index.count]] = -np.inf
+        row = int(np.argmax(scores))
+        best_score = float(scores[row])
         
         if best_score >= self.similarity_threshold:
-            return best_match, best_score, is_employee
+            return index.ids[row], best_score, bool(index.pinned[row])
         
-        return None, best_score, False
+        return None, max(best_score, 0.0), False
     
     def process_face(self, embedding: np.ndarray, frame: np.ndarray = None, 
-                     bbox: Tuple[int, int, int, int] = None) -> Dict:
+                     bbox: Tuple[int, int, int, int] = None, now: datetime = None) -> Dict:
         """Process a detected face and return tracking info."""
         
-        now = datetime.now()
+        now = now or datetime.now()
         
         # Find match
         match_id, score, is_employee = self.find_match(embedding)
@@ -284,30 +370,33 @@ class FaceTracker:
         }
         
         with self._lock:
+            record = None
             if match_id:
-                # Known face
+                # Known face (None if it was evicted after the match)
                 if is_employee:
-                    record = self.employees[match_id]
+                    record = self.employees.get(match_id)
                 else:
                     record = self.known_faces.get(match_id)
+            
+            if record:
+                # Check if returning (not seen recently)
+                time_since_last = now - record.last_seen
+                result["is_returning"] = time_since_last > timedelta(minutes=30)
                 
-                if record:
-                    # Check if returning (not seen recently)
-                    time_since_last = now - record.last_seen
-                    result["is_returning"] = time_since_last > timedelta(minutes=30)
-                    
-                    if result["is_returning"]:
-                        record.visit_count += 1
-                        self.stats["returning_faces_today"] += 1
-                    
-                    record.last_seen = now
-                    
-                    result["face_id"] = match_id
-                    result["person_name"] = record.person_name
-                    result["visit_count"] = record.visit_count
-                    
-                    if is_employee:
-                        self.stats["employees_present"].add(match_id)
+                if result["is_returning"]:
+                    record.visit_count += 1
+                    self.stats["returning_faces_today"] += 1
+                
+                record.last_seen = now
+                if not is_employee:
+                    self.known_faces.move_to_end(match_id)
+                
+                result["face_id"] = match_id
+                result["person_name"] = record.person_name
+                result["visit_count"] = record.visit_count
+                
+                if is_employee:
+                    self.stats["employees_present"].add(match_id)
             else:
                 # New face
                 face_id = self._generate_face_id(embedding)
@@ -316,17 +405,21 @@ class FaceTracker:
                     face_id=face_id,
                     first_seen=now,
                     last_seen=now,
-                    embedding=embedding.copy(),
                     is_employee=False,
                 )
                 
+                self._remove_rows([face_id])
+                self.known_faces.pop(face_id, None)
                 self.known_faces[face_id] = record
-                self.session_faces[face_id] = record
+                self._add_row(face_id, embedding, pinned=False)
                 self.stats["total_unique_faces"] += 1
                 self.stats["unknown_faces_today"] += 1
                 
                 result["face_id"] = face_id
                 result["is_new"] = True
+                result["is_employee"] = False
+            
+            self._evict(now)
         
         return result
     
@@ -335,14 +428,15 @@ class FaceTracker:
         face_id = self._generate_face_id(embedding)
         
         with self._lock:
+            self._remove_rows([face_id])
             self.employees[face_id] = FaceRecord(
                 face_id=face_id,
                 first_seen=datetime.now(),
                 last_seen=datetime.now(),
                 is_employee=True,
                 person_name=person_name,
-                embedding=embedding.copy(),
             )
+            self._add_row(face_id, embedding, pinned=True)
         
         logger.info(f"Registered employee: {person_name} (ID: {face_id})")
         return face_id
@@ -355,9 +449,17 @@ class FaceTracker:
                 "returning_faces_today": self.stats["returning_faces_today"],
                 "employees_present": len(self.stats["employees_present"]),
                 "unknown_faces_today": self.stats["unknown_faces_today"],
-                "session_faces": len(self.session_faces),
+                "session_faces": len(self.known_faces),
+                "evicted_faces": self.stats["evicted_faces"],
             }
     
+    def memory_bytes(self) -> int:
+        """Bytes held by the embedding matrix and its row arrays."""
+        index = self._index
+        if index is None:
+            return 0
+        return index.matrix.nbytes + index.ids.nbytes + index.alive.nbytes + index.pinned.nbytes
+    
     def get_all_faces(self) -> List[Dict]:
         """Get all face records."""
         with self._lock:
@@ -367,6 +469,265 @@ class FaceTracker:
             return faces
 
 
+# ============================================================================
+# FACE ALIGNMENT
+# ============================================================================
+
+# ArcFace 112x112 reference landmarks: left eye, right eye, nose, left and right mouth corner
+ARCFACE_TEMPLATE = np.array([
+    [38.2946, 51.6963],
+    [73.5318, 51.5014],
+    [56.0252, 71.7366],
+    [41.5493, 92.3655],
+    [70.7299, 92.2041],
+], dtype=np.float32)
+
+# Typical landmark positions inside a face detector box, as fractions of its width/height.
+# Used when the face model gives boxes only.
+BOX_LANDMARKS = np.array([
+    [0.33, 0.42],
+    [0.67, 0.42],
+    [0.50, 0.60],
+    [0.36, 0.78],
+    [0.64, 0.78],
+], dtype=np.float32)
+
+
+def landmarks_from_box(bbox: Tuple[int, int, int, int]) -> np.ndarray:
+    """Approximate 5-point landmarks for a face box."""
+    x1, y1, x2, y2 = bbox
+    return BOX_LANDMARKS * np.array([x2 - x1, y2 - y1], dtype=np.float32) + np.array([x1, y1], dtype=np.float32)
+
+
+def face_keypoints(result) -> List[Optional[np.ndarray]]:
+    """5-point landmarks per box of an ultralytics face result, None for each box if the model has none."""
+    count = len(result.boxes)
+    keypoints = getattr(result, "keypoints", None)
+    if keypoints is None or keypoints.xy is None or keypoints.xy.shape[1] < 5:
+        return [None] * count
+    return [points[:5] for points in keypoints.xy.cpu().numpy().astype(np.float32)]
+
+
+def similarity_transform(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """Least-squares rotation + uniform scale + translation mapping src points onto dst (Umeyama), as a 2x3 matrix."""
+    src_mean, dst_mean = src.mean(axis=0), dst.mean(axis=0)
+    src_c, dst_c = src - src_mean, dst - dst_mean
+    cov = dst_c.T @ src_c / len(src)
+    u, d, vt = np.linalg.svd(cov)
+    sign = np.ones(2, dtype=np.float64)
+    if np.linalg.det(u) * np.linalg.det(vt) < 0:
+        sign[1] = -1
+    rotation = u @ np.diag(sign) @ vt
+    scale = (d * sign).sum() / src_c.var(axis=0).sum()
+    matrix = np.empty((2, 3), dtype=np.float64)
+    matrix[:, :2] = scale * rotation
+    matrix[:, 2] = dst_mean - matrix[:, :2] @ src_mean
+    return matrix
+
+
+def align_faces(frame: np.ndarray, bboxes: List[Tuple[int, int, int, int]],
+                landmarks: Optional[List[Optional[np.ndarray]]] = None, size: int = 112) -> List[np.ndarray]:
+    """Warp each face to the ArcFace template, straight from the full frame.
+    
+    Uses the detector's 5-point landmarks where given, otherwise landmarks
+    estimated from the box, so the recognition model can be fed directly
+    without insightface running its own detector on a crop.
+    """
+    template = ARCFACE_TEMPLATE * (size / 112.0)
+    aligned = []
+    for i, bbox in enumerate(bboxes):
+        points = landmarks[i] if landmarks is not None and landmarks[i] is not None else landmarks_from_box(bbox)
+        matrix = similarity_transform(np.asarray(points, dtype=np.float64), template.astype(np.float64))
+        aligned.append(cv2.warpAffine(frame, matrix, (size, size), borderValue=0.0))
+    return aligned
+
+
+# ============================================================================
+# EVIDENCE WRITER
+# ============================================================================
+
+class EvidenceWriter:
+    """Writes incident frames from a background thread pool.
+    
+    The frame thread only copies the frame and takes a tiny difference hash;
+    downscaling, JPEG encoding and the file write happen on worker threads.
+    The caller never waits: when `queue_size` frames are already waiting,
+    the oldest non-critical one is evicted to make room (a critical frame is
+    only dropped if every waiting frame is critical too), and a warning is
+    logged at most every `drop_warning_s` with the number dropped. A frame
+    within `dedup_distance` hash bits of the last one written for the same
+    camera (within `dedup_window_s`) is not written again; the incident
+    points at that earlier file. Paths submit() returned whose frame was
+    later evicted or failed to write are handed out once by take_lost().
+    """
+    
+    def __init__(self, workers: int = 2, queue_size: int = 32, jpeg_quality: int = 85,
+                 max_width: int = 1280, dedup_distance: int = 4, dedup_window_s: float = 30.0,
+                 drop_warning_s: float = 10.0):
+        self.jpeg_quality = jpeg_quality
+        self.max_width = max_width
+        self.dedup_distance = dedup_distance
+        self.dedup_window_s = dedup_window_s
+        self.queue_size = queue_size
+        self.drop_warning_s = drop_warning_s
+        
+        # (camera, hash, time, path, frame, critical) jobs; None stops a worker
+        self._jobs: deque = deque()
+        self._pending = 0  # queued or being written
+        self._last: Dict[str, Tuple[int, float, str]] = {}  # camera -> (hash, time, path) of the last write
+        self._lost: List[str] = []  # returned paths that will never be written
+        self._lock = threading.Lock()
+        self._has_jobs = threading.Condition(self._lock)
+        self._drained = threading.Condition(self._lock)
+        self._unreported_drops = 0
+        self._last_drop_warning = 0.0
+        self.stats = {"submitted": 0, "written": 0, "deduplicated": 0, "dropped": 0, "evicted": 0,
+                      "failed": 0, "bytes": 0, "encode_ms": 0.0}
+        
+        self._workers = [
+            threading.Thread(target=self._run, name=f"evidence-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+    
+    @staticmethod
+    def frame_hash(frame: np.ndarray) -> int:
+        """64-bit difference hash from a strided view, cheap enough for the frame thread."""
+        step = max(1, min(frame.shape[0], frame.shape[1]) // 64)
+        small = frame[::step, ::step]
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        tiny = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = (tiny[:, 1:] > tiny[:, :-1]).flatten()
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+    
+    def submit(self, camera_id: str, path: Path, frame: np.ndarray, critical: bool = False) -> Optional[str]:
+        """Queue a frame for `path`. Returns the path the evidence will be at, or None if dropped.
+        
+        The path is not final until written: if the frame is evicted or its
+        write fails, the path is reported by take_lost().
+        """
+        value = self.frame_hash(frame)
+        now = time.monotonic()
+        with self._lock:
+            self.stats["submitted"] += 1
+            last = self._last.get(camera_id)
+            if (last is not None and self.dedup_distance >= 0 and now - last[1] <= self.dedup_window_s
+                    and bin(value ^ last[0]).count("1") <= self.dedup_distance):
+                self.stats["deduplicated"] += 1
+                return last[2]
+        
+        job = (camera_id, value, now, Path(path), frame.copy(), critical)
+        with self._lock:
+            if len(self._jobs) >= self.queue_size:
+                victim = next((i for i, queued in enumerate(self._jobs) if not queued[5]), None)
+                if victim is None:
+                    self._note_drop("dropped", path, now)
+                    return None
+                evicted = self._jobs[victim]
+                del self._jobs[victim]
+                self._pending -= 1
+                self._lost.append(str(evicted[3]))
+                self._note_drop("evicted", evicted[3], now)
+            self._jobs.append(job)
+            self._pending += 1
+            self._has_jobs.notify()
+        return str(path)
+    
+    def _note_drop(self, kind: str, path, now: float):
+        """Count a frame that will not be written; warns at most every drop_warning_s (caller holds the lock)."""
+        self.stats[kind] += 1
+        self._unreported_drops += 1
+        if now - self._last_drop_warning >= self.drop_warning_s:
+            logger.warning(f"Evidence queue full ({self.queue_size} frames): {self._unreported_drops} frame(s) "
+                           f"not saved since the last warning, latest {path}")
+            self._last_drop_warning = now
+            self._unreported_drops = 0
+    
+    def _run(self):
+        if hasattr(os, "setpriority") and hasattr(threading, "get_native_id"):
+            try:
+                # Linux: per-thread niceness, so encoding yields to the frame threads on busy CPUs
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+            except OSError:
+                pass
+        while True:
+            with self._lock:
+                while not self._jobs:
+                    self._has_jobs.wait()
+                job = self._jobs.popleft()
+            if job is None:
+                self._done()
+                return
+            camera_id, value, submitted_at, path, frame, _ = job
+            try:
+                self._write(path, frame)
+                with self._lock:
+                    # Only frames that made it to disk are reused by later incidents
+                    last = self._last.get(camera_id)
+                    if last is None or last[1] <= submitted_at:
+                        self._last[camera_id] = (value, submitted_at, str(path))
+            except Exception as e:
+                with self._lock:
+                    self.stats["failed"] += 1
+                    self._lost.append(str(path))
+                logger.error(f"Failed to write evidence {path}: {e}")
+            finally:
+                self._done()
+    
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._drained.notify_all()
+    
+    def _write(self, path: Path, frame: np.ndarray):
+        start = time.perf_counter()
+        if self.max_width and frame.shape[1] > self.max_width:
+            scale = self.max_width / frame.shape[1]
+            frame = cv2.resize(frame, (self.max_width, int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+        ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+        encode_ms = (time.perf_counter() - start) * 1000
+        tmp = path.with_suffix(f"{path.suffix}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data.tobytes())
+        os.replace(tmp, path)
+        with self._lock:
+            self.stats["written"] += 1
+            self.stats["bytes"] += len(data)
+            self.stats["encode_ms"] += encode_ms
+    
+    def take_lost(self) -> List[str]:
+        """Paths returned by submit() that will never be written, since the last call."""
+        with self._lock:
+            lost, self._lost = self._lost, []
+        return lost
+    
+    def flush(self):
+        """Block until every queued frame is written."""
+        with self._lock:
+            while self._pending:
+                self._drained.wait()
+    
+    def close(self):
+        """Write what is queued and stop the workers."""
+        with self._lock:
+            self._jobs.extend([None] * len(self._workers))
+            self._pending += len(self._workers)
+            self._has_jobs.notify_all()
+        for worker in self._workers:
+            worker.join()
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["queued"] = len(self._jobs)
+        stats["encode_ms"] = round(stats["encode_ms"], 1)
+        return stats
+
+
 # ============================================================================
 # INCIDENT MANAGER
 # ============================================================================
@@ -374,18 +735,27 @@ class FaceTracker:
 class IncidentManager:
     """Manages incidents and KPI violations."""
     
-    def __init__(self, output_dir: str = "incidents"):
+    def __init__(self, output_dir: str = "incidents", history_size: int = 1000,
+                 evidence_writer: Optional[EvidenceWriter] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
         self.active_incidents: Dict[str, Incident] = {}
-        self.incident_history: List[Incident] = []
+        self._active_records: Dict[str, Dict] = {}  # to_dict() of each active incident, built once
+        # Recent incidents only; the full history is appended to index.jsonl
+        self.incident_history: deque = deque(maxlen=history_size)
         self.last_incident_time: Dict[str, datetime] = {}
+        self.evidence = evidence_writer or EvidenceWriter()
+        self._index = open(self.output_dir / "index.jsonl", "a", encoding="utf-8")
         
         self._lock = threading.Lock()
         
-        # Daily stats
+        # Daily stats, and counts over active incidents kept up to date on create/resolve
         self.daily_stats = defaultdict(lambda: defaultdict(int))
+        self.active_by_severity: Dict[str, int] = defaultdict(int)
+        self.active_by_kpi: Dict[str, int] = defaultdict(int)
+        # Creations/resolutions not yet picked up by the analytics output
+        self._changes: deque = deque(maxlen=10000)
     
     def _get_cooldown(self, kpi_name: str) -> int:
         """Get cooldown period for KPI."""
@@ -399,6 +769,7 @@ class IncidentManager:
         confidence: float,
         bbox: Tuple[int, int, int, int] = None,
         frame: np.ndarray = None,
+        now: datetime = None,
     ) -> Optional[Incident]:
         """Create a new incident if not in cooldown."""
         
@@ -406,7 +777,7 @@ class IncidentManager:
         if not kpi:
             return None
         
-        now = datetime.now()
+        now = now or datetime.now()
         key = f"{kpi_name}_{camera_id}"
         
         with self._lock:
@@ -422,32 +793,39 @@ class IncidentManager:
         # Create incident
         incident_id = f"{kpi_name}_{camera_id}_{int(now.timestamp())}"
         
-        # Save frame if provided
-        frame_path = None
-        if frame is not None:
-            frame_path = str(self.output_dir / f"{incident_id}.jpg")
-            cv2.imwrite(frame_path, frame)
-        
-        incident = Incident(
-            id=incident_id,
-            kpi_name=kpi_name,
-            severity=kpi["severity"].value,
-            camera_id=camera_id,
-            timestamp=now,
-            description=kpi["description"],
-            confidence=confidence,
-            bbox=bbox,
-            frame_path=frame_path,
-        )
-        
         with self._lock:
+            # Save frame if provided (written in the background). Submitted under the lock,
+            # so a path reported lost by the writer always belongs to a registered incident.
+            frame_path = None
+            if frame is not None:
+                frame_path = self.evidence.submit(camera_id, self.output_dir / f"{incident_id}.jpg", frame,
+                                                  critical=kpi["severity"] == Severity.CRITICAL)
+            
+            incident = Incident(
+                id=incident_id,
+                kpi_name=kpi_name,
+                severity=kpi["severity"].value,
+                camera_id=camera_id,
+                timestamp=now,
+                description=kpi["description"],
+                confidence=confidence,
+                bbox=bbox,
+                frame_path=frame_path,
+            )
+            
             self.active_incidents[incident_id] = incident
             self.incident_history.append(incident)
+            record = incident.to_dict()
+            self._active_records[incident_id] = record
+            self._append_index(record)
+            self._changes.append(record)
             
             # Update stats
             date_key = now.strftime("%Y-%m-%d")
             self.daily_stats[date_key][kpi_name] += 1
             self.daily_stats[date_key]["total"] += 1
+            self.active_by_severity[incident.severity] += 1
+            self.active_by_kpi[kpi_name] += 1
         
         severity_emoji = {"critical": "🚨", "high": "⚠️", "medium": "📋", "low": "ℹ️"}
         emoji = severity_emoji.get(incident.severity, "📋")
@@ -455,54 +833,147 @@ class IncidentManager:
         
         return incident
     
-    def resolve_incident(self, incident_id: str):
+    def resolve_incident(self, incident_id: str, now: datetime = None):
         """Mark incident as resolved."""
         with self._lock:
             if incident_id in self.active_incidents:
                 incident = self.active_incidents[incident_id]
                 incident.resolved = True
-                incident.resolved_at = datetime.now()
+                incident.resolved_at = now or datetime.now()
                 del self.active_incidents[incident_id]
+                self._active_records.pop(incident_id, None)
+                self.active_by_severity[incident.severity] -= 1
+                self.active_by_kpi[incident.kpi_name] -= 1
+                record = {"id": incident_id, "resolved_at": incident.resolved_at.isoformat()}
+                self._append_index(record)
+                self._changes.append(record)
+    
+    def _apply_lost_evidence(self):
+        """Clear frame_path of incidents whose frame the writer evicted or failed to write.
+        
+        Appends an {id, frame_path: None} correction to the index and the change
+        feed. Evidence files are named after the incident id. Caller holds the lock.
+        """
+        for path in self.evidence.take_lost():
+            incident_id = Path(path).stem
+            incident = self.active_incidents.get(incident_id) or next(
+                (i for i in reversed(self.incident_history) if i.id == incident_id), None)
+            if incident is not None:
+                incident.frame_path = None
+            if incident_id in self._active_records:
+                self._active_records[incident_id]["frame_path"] = None
+            record = {"id": incident_id, "frame_path": None}
+            self._append_index(record)
+            self._changes.append(record)
+    
+    def drain_changes(self) -> List[Dict]:
+        """New incidents (full records), resolutions ({id, resolved_at}) and lost
+        evidence ({id, frame_path: None}) since the last call."""
+        with self._lock:
+            self._apply_lost_evidence()
+            changes = list(self._changes)
+            self._changes.clear()
+        return changes
+    
+    def _append_index(self, record: Dict):
+        """Append one line to the on-disk incident index. Caller holds the lock."""
+        self._index.write(json.dumps(record, default=str) + "\n")
+        self._index.flush()
+    
+    def read_index(self, limit: Optional[int] = None) -> List[Dict]:
+        """Incidents from the on-disk index, oldest first, with resolutions and lost evidence applied."""
+        with self._lock:
+            if not self._index.closed:
+                self._apply_lost_evidence()
+                self._index.flush()
+        incidents: Dict[str, Dict] = {}
+        with open(self.output_dir / "index.jsonl", "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line after a crash
+                if "kpi_name" in record:
+                    incidents[record["id"]] = record
+                elif record.get("id") not in incidents:
+                    continue
+                elif "resolved_at" in record:
+                    incidents[record["id"]].update(resolved=True, resolved_at=record["resolved_at"])
+                else:
+                    incidents[record["id"]]["frame_path"] = record.get("frame_path")  # evidence never written
+        history = list(incidents.values())
+        return history[-limit:] if limit else history
+    
+    def close(self):
+        """Finish pending evidence writes and close the index."""
+        self.evidence.close()
+        with self._lock:
+            self._apply_lost_evidence()
+            self._index.close()
     
     def get_active_incidents(self) -> List[Dict]:
         """Get list of active incidents."""
         with self._lock:
-            return [i.to_dict() for i in self.active_incidents.values()]
+            self._apply_lost_evidence()
+            return list(self._active_records.values())
     
     def get_incident_history(self, limit: int = 100) -> List[Dict]:
         """Get incident history."""
         with self._lock:
-            return [i.to_dict() for i in self.incident_history[-limit:]]
+            self._apply_lost_evidence()
+            history = list(self.incident_history)
+        return [i.to_dict() for i in history[-limit:]]
     
-    def get_kpi_summary(self) -> Dict:
+    def get_kpi_summary(self, now: datetime = None) -> Dict:
         """Get KPI summary statistics."""
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        summary = {
-            "today": dict(self.daily_stats.get(today, {})),
-            "by_severity": defaultdict(int),
-            "by_kpi": defaultdict(int),
-            "active_count": len(self.active_incidents),
-        }
+        today = (now or datetime.now()).strftime("%Y-%m-%d")
         
         with self._lock:
-            for incident in self.active_incidents.values():
-                summary["by_severity"][incident.severity] += 1
-                summary["by_kpi"][incident.kpi_name] += 1
-        
-        return dict(summary)
+            return {
+                "today": dict(self.daily_stats.get(today, {})),
+                "by_severity": {k: v for k, v in self.active_by_severity.items() if v},
+                "by_kpi": {k: v for k, v in self.active_by_kpi.items() if v},
+                "active_count": len(self.active_incidents),
+            }
 
 
 # ============================================================================
 # ANALYTICS ENGINE
 # ============================================================================
 
+def write_json_atomic(path, data: Dict):
+    """Write compact JSON to a temp file and rename it over `path`, so readers never see a partial file."""
+    # json.dumps uses the C encoder; json.dump to a file streams through the pure-Python one
+    text = json.dumps(data, separators=(',', ':'), default=str)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
 class AnalyticsEngine:
-    """Generates real-time analytics and JSON output."""
+    """Generates real-time analytics and JSON output.
     
-    def __init__(self, output_file: str = None, output_interval: int = 5):
+    Every `output_interval` seconds one delta line is appended to
+    `deltas_file` (NDJSON, default: output_file with a .ndjson suffix) holding
+    only what changed: camera stats of cameras that processed frames, new and
+    resolved incidents, face stats and today's KPI counts if they moved. Every
+    `snapshot_interval` seconds (default: every output interval, which is
+    what the dashboard polls) the full snapshot is written to `output_file`
+    (compact JSON, temp file + rename) with the `seq` of the last delta it
+    includes. The delta file is rotated to `<deltas_file>.1` once it grows
+    past `deltas_max_bytes`. A reader loads the snapshot and applies the
+    deltas with a higher seq.
+    """
+    
+    def __init__(self, output_file: str = None, output_interval: int = 5,
+                 snapshot_interval: int = None, deltas_file: str = None,
+                 deltas_max_bytes: int = 16 * 1024 * 1024):
         self.output_file = output_file
         self.output_interval = output_interval
+        self.snapshot_interval = output_interval if snapshot_interval is None else snapshot_interval
+        self.deltas_max_bytes = deltas_max_bytes
+        self.deltas_file = deltas_file or (str(Path(output_file).with_suffix('.ndjson')) if output_file else None)
         
         self.camera_stats: Dict[str, Dict] = defaultdict(lambda: {
             "frames_processed": 0,
@@ -515,6 +986,15 @@ class AnalyticsEngine:
         
         self.start_time = datetime.now()
         self.last_output_time = time.time()
+        self.last_snapshot_time = 0.0
+        
+        self._seq = 0
+        self._dirty_cameras = set()
+        self._last_face_stats: Dict = {}
+        self._last_kpi_today: Dict = {}
+        self._last_kpi_date: Optional[str] = None
+        self._deltas = None
+        self.output_stats = {"deltas": 0, "snapshots": 0, "delta_bytes": 0, "snapshot_bytes": 0}
         
         self._lock = threading.Lock()
     
@@ -529,41 +1009,249 @@ class AnalyticsEngine:
             stats["incidents_today"] += incidents
             stats["fps"] = 1000 / processing_time if processing_time > 0 else 0
             stats["last_update"] = datetime.now().isoformat()
+            self._dirty_cameras.add(camera_id)
     
     def generate_snapshot(self, face_tracker: FaceTracker, 
-                         incident_manager: IncidentManager) -> AnalyticsSnapshot:
+                         incident_manager: IncidentManager, now: datetime = None) -> AnalyticsSnapshot:
         """Generate current analytics snapshot."""
+        with self._lock:
+            camera_stats = {cam: dict(stats) for cam, stats in self.camera_stats.items()}
         
         snapshot = AnalyticsSnapshot(
-            timestamp=datetime.now(),
-            camera_stats=dict(self.camera_stats),
+            timestamp=now or datetime.now(),
+            camera_stats=camera_stats,
             active_incidents=incident_manager.get_active_incidents(),
             face_stats=face_tracker.get_stats(),
-            kpi_summary=incident_manager.get_kpi_summary(),
+            kpi_summary=incident_manager.get_kpi_summary(now),
         )
         
         return snapshot
     
+    def generate_delta(self, face_tracker: FaceTracker,
+                       incident_manager: IncidentManager, now: datetime = None) -> Dict:
+        """Changes since the previous delta."""
+        now = now or datetime.now()
+        with self._lock:
+            cameras = {cam: dict(self.camera_stats[cam]) for cam in self._dirty_cameras}
+            self._dirty_cameras.clear()
+        
+        self._seq += 1
+        delta = {"seq": self._seq, "timestamp": now.isoformat()}
+        if cameras:
+            delta["camera_stats"] = cameras
+        
+        changes = incident_manager.drain_changes()
+        new = [c for c in changes if "kpi_name" in c]
+        if new:
+            delta["incidents"] = new
+        resolved = [c for c in changes if "resolved_at" in c]
+        if resolved:
+            delta["resolved"] = resolved
+        lost = [c["id"] for c in changes if "kpi_name" not in c and "frame_path" in c]
+        if lost:
+            delta["evidence_lost"] = lost  # incidents above (or earlier) whose frame_path is now None
+        
+        face_stats = face_tracker.get_stats()
+        if face_stats != self._last_face_stats:
+            delta["face_stats"] = face_stats
+            self._last_face_stats = face_stats
+        
+        date = now.strftime("%Y-%m-%d")
+        kpi_today = incident_manager.get_kpi_summary(now)["today"]
+        if date != self._last_kpi_date:
+            # New day: send the full counts so readers drop yesterday's
+            delta["kpi_today"] = {"date": date, **kpi_today}
+        elif kpi_today != self._last_kpi_today:
+            delta["kpi_today"] = {"date": date, **{k: v for k, v in kpi_today.items()
+                                                   if self._last_kpi_today.get(k) != v}}
+        self._last_kpi_today = kpi_today
+        self._last_kpi_date = date
+        
+        return delta
+    
+    def _append_delta(self, delta: Dict):
+        if self._deltas is None:
+            self._deltas = open(self.deltas_file, 'a')
+        line = json.dumps(delta, separators=(',', ':'), default=str) + "\n"
+        self._deltas.write(line)
+        self._deltas.flush()
+        self.output_stats["deltas"] += 1
+        self.output_stats["delta_bytes"] += len(line)
+        if self._deltas.tell() >= self.deltas_max_bytes:
+            self._deltas.close()
+            self._deltas = None
+            os.replace(self.deltas_file, f"{self.deltas_file}.1")
+    
+    def _write_snapshot(self, snapshot: Dict):
+        snapshot["seq"] = self._seq
+        write_json_atomic(self.output_file, snapshot)
+        self.output_stats["snapshots"] += 1
+        self.output_stats["snapshot_bytes"] = os.path.getsize(self.output_file)
+    
     def maybe_output(self, face_tracker: FaceTracker, 
-                     incident_manager: IncidentManager) -> Optional[Dict]:
-        """Output analytics if interval has passed."""
+                     incident_manager: IncidentManager, now: float = None) -> Optional[Dict]:
+        """Output analytics if interval has passed. Returns the delta written."""
         
-        now = time.time()
+        now = now or time.time()
         if now - self.last_output_time < self.output_interval:
             return None
         
         self.last_output_time = now
-        snapshot = self.generate_snapshot(face_tracker, incident_manager)
+        when = datetime.fromtimestamp(now)
+        delta = self.generate_delta(face_tracker, incident_manager, when)
         
         # Write to file if configured
         if self.output_file:
             try:
-                with open(self.output_file, 'w') as f:
-                    json.dump(snapshot.to_dict(), f, indent=2)
+                self._append_delta(delta)
+                if now - self.last_snapshot_time >= self.snapshot_interval:
+                    self.last_snapshot_time = now
+                    self._write_snapshot(self.generate_snapshot(face_tracker, incident_manager, when).to_dict())
             except Exception as e:
                 logger.error(f"Failed to write analytics: {e}")
         
-        return snapshot.to_dict()
+        return delta
+    
+    @property
+    def seq(self) -> int:
+        """Sequence number of the last delta written."""
+        return self._seq
+    
+    def close(self):
+        if self._deltas is not None:
+            self._deltas.close()
+            self._deltas = None
+
+
+# ============================================================================
+# CAMERA READER
+# ============================================================================
+
+class CameraReader:
+    """Reads one camera on its own thread into a latest-frame slot.
+    
+    The processing loop takes whatever frame is newest (older unread frames
+    are overwritten, never queued), so a slow or reconnecting camera only
+    delays itself. Lost streams are reopened with exponential backoff on
+    this camera's thread. Video files are paced at their own FPS and looped,
+    so they behave like live cameras.
+    """
+    
+    def __init__(self, camera_id: str, source, capture_factory=None,
+                 reconnect_min_s: float = 0.5, reconnect_max_s: float = 30.0, loop_files: bool = True):
+        self.camera_id = camera_id
+        self.source = source
+        self.capture_factory = capture_factory or cv2.VideoCapture
+        self.reconnect_min_s = reconnect_min_s
+        self.reconnect_max_s = reconnect_max_s
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.loop_files = loop_files
+        
+        self.cap = None
+        self.running = False
+        self.thread = None
+        self.frame_ready: Optional[threading.Event] = None  # shared by all readers of a pipeline
+        
+        self._lock = threading.Lock()
+        self._frame: Optional[np.ndarray] = None
+        self._frame_time = 0.0
+        self._seq = 0
+        self._taken_seq = 0
+        
+        self.stats = {"frames_read": 0, "frames_taken": 0, "frames_skipped": 0,
+                      "read_failures": 0, "reconnects": 0}
+    
+    def open(self):
+        """Open the source; raises if it cannot be opened."""
+        self.cap = self.capture_factory(self.source)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Failed to open camera: {self.source}")
+        # Set buffer size to minimize latency
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    
+    def start(self, frame_ready: threading.Event = None):
+        if self.cap is None:
+            self.open()
+        self.frame_ready = frame_ready
+        self.running = True
+        self.thread = threading.Thread(target=self._read_frames, name=f"camera-{self.camera_id}", daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2.0)
+        if self.cap:
+            self.cap.release()
+    
+    def _reconnect(self, delay: float) -> float:
+        """Reopen the source after `delay` seconds; returns the next delay to use."""
+        logger.warning(f"Camera {self.camera_id}: stream lost, reconnecting in {delay:.1f}s")
+        deadline = time.time() + delay
+        while self.running and time.time() < deadline:
+            time.sleep(0.05)
+        if self.cap:
+            self.cap.release()
+        self.stats["reconnects"] += 1
+        try:
+            self.cap = self.capture_factory(self.source)
+            if self.cap.isOpened():
+                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                logger.info(f"Camera {self.camera_id}: reconnected")
+                return self.reconnect_min_s
+        except Exception as e:
+            logger.warning(f"Camera {self.camera_id}: reconnect failed: {e}")
+        return min(delay * 2, self.reconnect_max_s)
+    
+    def _read_frames(self):
+        """Background thread to read frames."""
+        delay = self.reconnect_min_s
+        file_interval = 0.0
+        if self.is_file:
+            fps = self.cap.get(cv2.CAP_PROP_FPS)
+            file_interval = 1.0 / fps if fps and fps > 0 else 1.0 / 25
+        next_due = time.time()
+        
+        while self.running:
+            ret, frame = self.cap.read()
+            
+            if not ret:
+                self.stats["read_failures"] += 1
+                if self.is_file and self.loop_files:
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    ret, frame = self.cap.read()
+                if not ret:
+                    delay = self._reconnect(delay)
+                    next_due = time.time()
+                    continue
+            
+            if file_interval:
+                # Play files at their own rate instead of decoding as fast as possible
+                next_due += file_interval
+                wait = next_due - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+                else:
+                    next_due = time.time()
+            
+            with self._lock:
+                if self._seq > self._taken_seq:
+                    self.stats["frames_skipped"] += 1  # previous frame was never processed
+                self._frame = frame
+                self._frame_time = time.time()
+                self._seq += 1
+                self.stats["frames_read"] += 1
+            if self.frame_ready is not None:
+                self.frame_ready.set()
+    
+    def latest(self) -> Optional[Tuple[np.ndarray, float]]:
+        """Newest frame and its capture time, or None if there is no frame newer than the last one taken."""
+        with self._lock:
+            if self._seq == self._taken_seq:
+                return None
+            self._taken_seq = self._seq
+            self.stats["frames_taken"] += 1
+            return self._frame, self._frame_time
 
 
 # ============================================================================
@@ -580,21 +1268,35 @@ class PetrolPumpPipeline:
         self._face_detector = None
         self._object_detector = None
         self._face_recognizer = None
+        self._face_embedder = None
+        self._batch_embedding = True
         
         # Components
         self.face_tracker = FaceTracker(
-            similarity_threshold=self.config.get("recognition_threshold", 0.5)
+            similarity_threshold=self.config.get("recognition_threshold", 0.5),
+            revisit_window_hours=self.config.get("revisit_window_hours", 24),
+            max_faces=self.config.get("max_tracked_faces", 5000),
+            face_ttl_hours=self.config.get("face_ttl_hours"),
         )
         self.incident_manager = IncidentManager(
-            output_dir=self.config.get("incidents_dir", "incidents")
+            output_dir=self.config.get("incidents_dir", "incidents"),
+            history_size=self.config.get("incident_history_size", 1000),
+            evidence_writer=EvidenceWriter(
+                workers=self.config.get("evidence_workers", 2),
+                queue_size=self.config.get("evidence_queue_size", 32),
+                jpeg_quality=self.config.get("evidence_jpeg_quality", 85),
+                max_width=self.config.get("evidence_max_width", 1280),
+                dedup_distance=self.config.get("evidence_dedup_distance", 4),
+            ),
         )
         self.analytics = AnalyticsEngine(
             output_file=self.config.get("json_output"),
-            output_interval=self.config.get("analytics_interval", 5)
+            output_interval=self.config.get("analytics_interval", 5),
+            snapshot_interval=self.config.get("analytics_snapshot_interval"),
         )
         
         # Cameras
-        self.cameras: Dict[str, cv2.VideoCapture] = {}
+        self.cameras: Dict[str, CameraReader] = {}
         self.camera_fps: Dict[str, float] = {}
         
         # State
@@ -649,6 +1351,7 @@ class PetrolPumpPipeline:
                 model_name = self.config.get("recognition_model", "buffalo_sc")
                 self._face_recognizer = FaceAnalysis(
                     name=model_name,
+                    allowed_modules=['detection', 'recognition'],
                     providers=['CUDAExecutionProvider', 'CPUExecutionProvider']
                 )
                 self._face_recognizer.prepare(ctx_id=0, det_size=(160, 160))
@@ -657,6 +1360,32 @@ class PetrolPumpPipeline:
                 logger.warning(f"Face recognition unavailable: {e}")
         return self._face_recognizer
     
+    @property
+    def face_embedder(self):
+        """ArcFace recognition model of the face recognizer, used without its detector."""
+        if self._face_embedder is None and self.face_recognizer is not None:
+            self._face_embedder = self.face_recognizer.models.get('recognition')
+        return self._face_embedder
+    
+    def embed_faces(self, frame: np.ndarray, bboxes: List[Tuple[int, int, int, int]],
+                    landmarks: Optional[List[Optional[np.ndarray]]] = None) -> Optional[np.ndarray]:
+        """Embeddings for faces found by the YOLO face detector, one row per box.
+        
+        Faces are aligned from the frame and sent to the recognition model as
+        one batch. Returns None if no recognition model is available.
+        """
+        if not bboxes or self.face_embedder is None:
+            return None
+        aligned = align_faces(frame, bboxes, landmarks, size=self.face_embedder.input_size[0])
+        if self._batch_embedding:
+            try:
+                return self.face_embedder.get_feat(aligned)
+            except Exception as e:
+                # Some exported recognition models have a fixed batch size of 1
+                logger.warning(f"Batched recognition failed, falling back to one face per call: {e}")
+                self._batch_embedding = False
+        return np.vstack([self.face_embedder.get_feat(img) for img in aligned])
+    
     def _download_model(self, model_type: str):
         """Download model if not present."""
         import urllib.request
@@ -676,18 +1405,19 @@ class PetrolPumpPipeline:
             urllib.request.urlretrieve(url, path)
             logger.info(f"Downloaded to {path}")
     
-    def add_camera(self, camera_id: str, source, fps_limit: int = 15):
+    def add_camera(self, camera_id: str, source, fps_limit: int = 15, capture_factory=None):
         """Add a camera source."""
         if isinstance(source, str) and source.isdigit():
             source = int(source)
         
-        cap = cv2.VideoCapture(source)
-        if not cap.isOpened():
-            raise RuntimeError(f"Failed to open camera: {source}")
-        
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        reader = CameraReader(
+            camera_id, source, capture_factory=capture_factory,
+            reconnect_min_s=self.config.get("reconnect_min_s", 0.5),
+            reconnect_max_s=self.config.get("reconnect_max_s", 30.0),
+        )
+        reader.open()
         
-        self.cameras[camera_id] = cap
+        self.cameras[camera_id] = reader
         self.camera_fps[camera_id] = fps_limit
         logger.info(f"Added camera: {camera_id} -> {source}")
     
@@ -718,14 +1448,13 @@ class PetrolPumpPipeline:
         if self.face_recognizer is None:
             raise RuntimeError("Face recognizer not available")
         
-        x1, y1, x2, y2 = bbox
-        face_crop = frame[y1:y2, x1:x2]
-        faces = self.face_recognizer.get(face_crop)
+        landmarks = face_keypoints(results[0])
+        embeddings = self.embed_faces(frame, [bbox], [landmarks[best_idx]])
         
-        if not faces:
+        if embeddings is None:
             raise ValueError("Failed to extract embedding")
         
-        self.face_tracker.register_employee(name, faces[0].embedding)
+        self.face_tracker.register_employee(name, embeddings[0])
         logger.info(f"Registered employee: {name}")
     
     def process_frame(self, camera_id: str, frame: np.ndarray) -> Dict:
@@ -754,41 +1483,42 @@ class PetrolPumpPipeline:
                 verbose=False
             )
             
+            face_infos = []
+            landmarks = []
             for r in face_results:
-                for box in r.boxes:
-                    bbox = tuple(map(int, box.xyxy[0].cpu().numpy()))
-                    conf = float(box.conf[0])
-                    
-                    face_info = {
-                        "bbox": bbox,
-                        "confidence": conf,
-                    }
-                    
-                    # Face recognition
-                    recog_interval = self.config.get("recognition_interval", 3)
-                    if frame_num % recog_interval == 0 and self.face_recognizer:
-                        x1, y1, x2, y2 = bbox
-                        face_crop = frame[y1:y2, x1:x2]
+                keypoints = face_keypoints(r)
+                for i, box in enumerate(r.boxes):
+                    face_infos.append({
+                        "bbox": tuple(map(int, box.xyxy[0].cpu().numpy())),
+                        "confidence": float(box.conf[0]),
+                    })
+                    landmarks.append(keypoints[i])
+            
+            # Face recognition: all faces of the frame in one recognition batch
+            recog_interval = self.config.get("recognition_interval", 3)
+            if face_infos and frame_num % recog_interval == 0:
+                try:
+                    embeddings = self.embed_faces(frame, [f["bbox"] for f in face_infos], landmarks)
+                except Exception as e:
+                    embeddings = None
+                    logger.debug(f"Recognition failed: {e}")
+                
+                if embeddings is not None:
+                    for face_info, embedding in zip(face_infos, embeddings):
+                        track_info = self.face_tracker.process_face(
+                            embedding, frame, face_info["bbox"]
+                        )
+                        face_info.update(track_info)
                         
-                        try:
-                            faces = self.face_recognizer.get(face_crop)
-                            if faces:
-                                track_info = self.face_tracker.process_face(
-                                    faces[0].embedding, frame, bbox
-                                )
-                                face_info.update(track_info)
-                                
-                                # Unknown person alert
-                                if track_info["is_new"] and not track_info["is_employee"]:
-                                    incident = self.incident_manager.create_incident(
-                                        "unknown_person", camera_id, conf, bbox, frame
-                                    )
-                                    if incident:
-                                        result["incidents"].append(incident.to_dict())
-                        except Exception as e:
-                            logger.debug(f"Recognition failed: {e}")
-                    
-                    result["faces"].append(face_info)
+                        # Unknown person alert
+                        if track_info["is_new"] and not track_info["is_employee"]:
+                            incident = self.incident_manager.create_incident(
+                                "unknown_person", camera_id, face_info["confidence"], face_info["bbox"], frame
+                            )
+                            if incident:
+                                result["incidents"].append(incident.to_dict())
+            
+            result["faces"].extend(face_infos)
         
         # Object detection
         obj_interval = self.config.get("object_detection_interval", 1)
@@ -909,28 +1639,41 @@ class PetrolPumpPipeline:
         }
         last_frame_times = defaultdict(float)
         
+        # Each camera is read on its own thread; this loop takes whatever frames are ready
+        frame_ready = threading.Event()
+        for reader in self.cameras.values():
+            reader.start(frame_ready)
+        
         try:
             while self.running:
-                for camera_id, cap in self.cameras.items():
+                frame_ready.clear()
+                processed = 0
+                for camera_id, reader in self.cameras.items():
                     # FPS limiting
                     now = time.time()
                     if now - last_frame_times[camera_id] < frame_intervals.get(camera_id, 0.066):
                         continue
-                    last_frame_times[camera_id] = now
                     
-                    ret, frame = cap.read()
-                    if not ret:
-                        logger.warning(f"Failed to read from {camera_id}")
+                    latest = reader.latest()
+                    if latest is None:
                         continue
+                    frame, captured_at = latest
+                    last_frame_times[camera_id] = now
+                    processed += 1
                     
                     # Process
                     result = self.process_frame(camera_id, frame)
+                    result["frame_age_ms"] = (now - captured_at) * 1000
                     
                     # Display
                     if show:
                         display_frame = self.draw_frame(frame, result)
                         cv2.imshow(f"InvEye - {camera_id}", display_frame)
                 
+                if not show and not processed:
+                    # Nothing new: sleep until a reader delivers a frame
+                    frame_ready.wait(0.01)
+                
                 if show:
                     key = cv2.waitKey(1) & 0xFF
                     if key == ord('q'):
@@ -945,12 +1688,15 @@ class PetrolPumpPipeline:
         
         finally:
             self.running = False
-            for cap in self.cameras.values():
-                cap.release()
-            cv2.destroyAllWindows()
+            for reader in self.cameras.values():
+                reader.stop()
+            if show:
+                cv2.destroyAllWindows()
             
             self._print_stats()
+            self.analytics.close()
             self._output_json()
+            self.incident_manager.close()
     
     def _print_stats(self):
         """Print statistics."""
@@ -977,6 +1723,13 @@ class PetrolPumpPipeline:
             for sev, count in kpi_summary['by_severity'].items():
                 print(f"      {sev}: {count}")
         
+        # Camera stats
+        print(f"\n📷 CAMERAS:")
+        for camera_id, reader in self.cameras.items():
+            cs = reader.stats
+            print(f"   {camera_id}: read {cs['frames_read']}, processed {cs['frames_taken']}, "
+                  f"skipped {cs['frames_skipped']}, reconnects {cs['reconnects']}")
+        
         print("="*60)
     
     def _output_json(self):
@@ -991,10 +1744,10 @@ class PetrolPumpPipeline:
             "kpi_summary": self.incident_manager.get_kpi_summary(),
             "incidents": self.incident_manager.get_incident_history(),
             "camera_stats": dict(self.analytics.camera_stats),
+            "seq": self.analytics.seq,
         }
         
-        with open(output_file, 'w') as f:
-            json.dump(analytics, f, indent=2, default=str)
+        write_json_atomic(output_file, analytics)
         
         logger.info(f"Analytics saved to: {output_file}")
 
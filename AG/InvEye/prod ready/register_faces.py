@@ -240,11 +240,7 @@ def main():
         return
     
     if args.delete:
-        if args.delete in face_db.embeddings:
-            del face_db.embeddings[args.delete]
-            if args.delete in face_db.metadata:
-                del face_db.metadata[args.delete]
-            face_db.save_database()
+        if face_db.remove_face(args.delete):
             print(f"✅ Deleted: {args.delete}")
         else:
             print(f"❌ Not found: {args.delete}")
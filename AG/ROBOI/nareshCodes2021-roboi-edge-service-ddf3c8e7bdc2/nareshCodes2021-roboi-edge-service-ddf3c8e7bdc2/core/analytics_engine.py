@@ -6,6 +6,8 @@ import socket
 import yaml
 import traceback
 from core.logger import JSONLogger, get_app_logger
+from core.config_watcher import ConfigWatcher, file_signature
+from core.policy_engine import PolicySet
 
 # Initialize Logger
 logger = get_app_logger("analytics-engine")
@@ -13,162 +15,230 @@ logger = get_app_logger("analytics-engine")
 # Load Configuration
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "configs", "app_config.yaml")
 
-def load_config():
+def load_config(path=CONFIG_PATH):
     try:
-        with open(CONFIG_PATH, 'r') as f:
-            return yaml.safe_load(f)
+        with open(path, 'r') as f:
+            return yaml.safe_load(f) or {}
     except Exception as e:
         logger.error(f"Failed to load config: {e}")
         return {}
 
+CONFIG_SIGNATURE = file_signature(CONFIG_PATH) # taken before the read, so a concurrent edit still reloads
 config = load_config()
 
-# --- DYNAMIC CONFIGURATION ---
+# --- STATIC CONFIGURATION (read once at startup) ---
 HEARTBEAT_INTERVAL = config.get('analytics', {}).get('heartbeat_interval', 60.0)
 ALERT_COOLDOWN = config.get('analytics', {}).get('alert_cooldown', 5.0)
-SNAPSHOTS_PER_EVENT = config.get('analytics', {}).get('snapshots_per_event', 0)
-PRE_EVENT_SECONDS = config.get('analytics', {}).get('pre_event_seconds', 3)
-POST_EVENT_SECONDS = config.get('analytics', {}).get('post_event_seconds', 5)
+DEVICE_ID = socket.gethostname()
+
+# --- DYNAMIC CONFIGURATION ---
+# Reloadable settings: (attribute, config key, default). A key missing from a
+# reloaded file keeps its previous value.
+ANALYTICS_SETTINGS = (
+    ("recognition_threshold", "face_recognition_threshold", 0.5),
+    ("face_threshold", "face_detection_threshold", 0.5),
+    ("people_threshold", "person_detection_threshold", 0.7),
+    ("violence_threshold", "violence_threshold", 0.2),
+    ("fire_threshold", "fire_threshold", 0.2),
+    ("vehicle_threshold", "vehicle_threshold", 0.2),
+    ("emergency_alerts", "emergency_alert_policies", ["fire_detected_critical"]),
+    ("critical_alerts", "critical_alert_policies", ["fight_detected_critical", "crowd_policy_violation"]),
+    ("warning_alerts", "warning_alert_policies", []),
+    ("ai_insights_enabled", "ai_insights_enabled", True),
+    ("ai_insights_per_hour", "ai_insights_per_hour", 10),
+    ("ai_insights_duration", "ai_insights_duration", 30),
+    ("ai_insights_snapshots", "ai_insights_snapshots", 10),
+    ("snapshots_per_event", "snapshots_per_event", 0),
+    ("pre_event_seconds", "pre_event_seconds", 3),
+    ("post_event_seconds", "post_event_seconds", 5),
+)
+SITE_SETTINGS = (
+    ("client_id", "INVINCIBLE_OCEAN"),
+    ("site_name", "HEAD_OFFICE"),
+    ("site_id", "ro001"),
+    ("country", "india"),
+    ("state", "west_bengal"),
+    ("district", "kolkata"),
+    ("latitude", 0.0),
+    ("longitude", 0.0),
+)
+ALERT_PRIORITY_FIELDS = ("emergency_alerts", "critical_alerts", "warning_alerts")
+
+class PolicySnapshot:
+    """
+    Immutable, pre-compiled view of the reloadable config.
+    Built off the frame path whenever the config file changes and swapped into
+    the engine with a single assignment, so a frame reads one consistent
+    snapshot and never parses YAML.
+    """
+    __slots__ = tuple(attr for attr, _, _ in ANALYTICS_SETTINGS) + tuple(key for key, _ in SITE_SETTINGS) + (
+        "policy", "rules", "site_meta",
+    )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PolicySnapshot is immutable; use replace()")
+
+    def replace(self, **changes):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return PolicySnapshot(**values)
+
+    @classmethod
+    def compile(cls, cfg, previous=None):
+        analytics = cfg.get('analytics') or {}
+        site_info = cfg.get('site_info') or {}
+        values = {}
+        for attr, key, default in ANALYTICS_SETTINGS:
+            values[attr] = analytics.get(key, getattr(previous, attr) if previous else default)
+        for attr in ALERT_PRIORITY_FIELDS:
+            values[attr] = frozenset(values[attr])
+        for key, default in SITE_SETTINGS:
+            values[key] = site_info.get(key, getattr(previous, key) if previous else default)
+
+        policy = cfg.get('policy', previous.policy if previous else {}) or {}
+        values["policy"] = policy
+        values["rules"] = PolicySet(policy)
+        # Site fields of every payload's "meta", in payload order
+        values["site_meta"] = {k: values[k] for k in ("site_name", "site_id", "latitude", "longitude", "country", "state", "district")}
+        return cls(**values)
+
+STARTUP_POLICY = PolicySnapshot.compile(config)
 
 # --- ACCESS CONTROL POLICIES ---
-POLICY = config.get('policy', {})
-CLIENT_ID = config.get('site_info', {}).get('client_id', "INVINCIBLE_OCEAN")
-SITE_NAME = config.get('site_info', {}).get('site_name', "HEAD_OFFICE")
-SITE_ID = config.get('site_info', {}).get('site_id', "ro001")
-COUNTRY = config.get('site_info', {}).get('country', "india")
-STATE = config.get('site_info', {}).get('state', "west_bengal")
-DISTRICT = config.get('site_info', {}).get('district', "kolkata")
-LATITUDE = config.get('site_info', {}).get('latitude', 0.0)
-LONGITUDE = config.get('site_info', {}).get('longitude', 0.0)
-DEVICE_ID = socket.gethostname()
+# Startup values, kept for importers; the live values are on AnalyticsEngine.policy.
+POLICY = STARTUP_POLICY.policy
+CLIENT_ID = STARTUP_POLICY.client_id
+SITE_NAME = STARTUP_POLICY.site_name
+SITE_ID = STARTUP_POLICY.site_id
+COUNTRY = STARTUP_POLICY.country
+STATE = STARTUP_POLICY.state
+DISTRICT = STARTUP_POLICY.district
+LATITUDE = STARTUP_POLICY.latitude
+LONGITUDE = STARTUP_POLICY.longitude
+
+# --- DETECTION CATEGORIES ---
+PEOPLE_LABELS = frozenset(["person", "face"])
+FIRE_LABELS = frozenset(["fire", "smoke"])
+VIOLENCE_LABELS = frozenset(["violence"])
+VEHICLE_LABELS = frozenset(["bicycle", "car", "motorcycle", "bus", "train", "truck", "boat"])
+OTHER_OBJECT_THRESHOLD = 0.5 # Non-policy objects kept in logs to keep metrics interesting
+
+class FrameDetections:
+    """
+    Detections of one frame, bucketed by category in a single pass.
+    Each bucket keeps frame order; log_detections preserves the historical
+    ordering (people, fire, violence, vehicles, then other objects).
+    """
+    __slots__ = ("people", "fire", "violence", "vehicles", "other", "identities", "_log_detections")
+
+    def __init__(self, frame_objects, people_threshold, fire_threshold, violence_threshold, vehicle_threshold):
+        self.people = []
+        self.fire = []
+        self.violence = []
+        self.vehicles = []
+        self.other = []
+        self.identities = [] # lower-cased recognition identities of person/face objects
+        self._log_detections = None
+
+        for obj in frame_objects:
+            label = obj["label"].lower()
+            conf = obj.get("confidence", 0)
+
+            if label in PEOPLE_LABELS:
+                bucket, threshold = self.people, people_threshold
+                recognition = obj.get("recognition")
+                if recognition is not None:
+                    self.identities.append(recognition["identity"].lower())
+            elif label in FIRE_LABELS:
+                bucket, threshold = self.fire, fire_threshold
+            elif label in VIOLENCE_LABELS:
+                bucket, threshold = self.violence, violence_threshold
+            elif label in VEHICLE_LABELS:
+                bucket, threshold = self.vehicles, vehicle_threshold
+            else:
+                bucket, threshold = None, None
+
+            if bucket is not None and conf >= threshold:
+                bucket.append(obj)
+            elif conf >= OTHER_OBJECT_THRESHOLD:
+                self.other.append(obj)
+
+    @property
+    def log_detections(self):
+        if self._log_detections is None:
+            self._log_detections = self.people + self.fire + self.violence + self.vehicles + self.other
+        return self._log_detections
 
-def check_timebased_policy_violation(camera_name, current_time):
+def detach_detections(payload):
+    """
+    Gives the payload its own copies of the detection dicts before it is queued:
+    the runner keeps mutating its frame objects (e.g. adding recognition) while
+    the JSONLogger writer thread serializes them.
+    """
+    data = payload["data"]
+    data["detections"] = [dict(obj) for obj in data["detections"]]
+    return payload
+
+def check_timebased_policy_violation(camera_name, current_time, policy=None):
     """
     Checks if presence is unauthorized based on time and location from config.
     """
-    alerts = []
-    is_sunday = (current_time.weekday() == 6)
-    hour = current_time.hour
-    minute = current_time.minute
-
-    if is_sunday:
-        alerts.append("restricted_access_sunday")
-
-    # Get specific camera policy or default to office
-    policy_key = 'boss_cabin' if camera_name == "boss_cabin" else 'office'
-    p = POLICY.get(policy_key, {})
-    
-    open_h = p.get('open_hour', 0)
-    open_m = p.get('open_min', 0)
-    close_h = p.get('close_hour', 23)
-    close_m = p.get('close_min', 59)
-
-    if hour < open_h or (hour == open_h and minute < open_m):
-        alerts.append(f"restricted_access_before_hours")
-    elif hour > close_h or (hour == close_h and minute >= close_m):
-        alerts.append(f"restricted_access_after_hours")
-    
-    return alerts
+    policy = policy or STARTUP_POLICY
+    return policy.rules.for_camera(camera_name).time_alerts(current_time)
 
-def check_countbased_policy_violation(camera_name, num_people, num_vehicles):
+def check_countbased_policy_violation(camera_name, num_people, num_vehicles, policy=None):
+    """Instantaneous crowd check (ignores crowd_limits window/dwell, which need per-camera state)."""
+    policy = policy or STARTUP_POLICY
     alerts = []
-    
-    crowd_controlled_zones = POLICY.get('crowd_controlled_zones', [])
-
-    # Alert if more than 5 people are present in crowd controlled zones
-    if camera_name in crowd_controlled_zones and (num_people > 5):
-        alerts.append("crowd_policy_violation")
-    
-    # Alert if more than 12 vehicles are present in crowd controlled zones
-    if camera_name in crowd_controlled_zones and (num_vehicles > 12):
-        alerts.append("vehicle_crowd_policy_violation")
-
+    for rules in policy.rules.for_camera(camera_name).rules_by_class.values():
+        for rule in rules:
+            count = num_people if rule.label_class == "people" else num_vehicles
+            if count > rule.limit:
+                alerts.append(rule.alert)
     return alerts
 
 class AnalyticsEngine:
-    def __init__(self, face_recognizer=None):
+    def __init__(self, face_recognizer=None, config_path=CONFIG_PATH, watch_config=True):
         self.last_heartbeat_time = {}
         self.last_alert_time = {}
+        self.policy_state = {} # {cam_id: {rule key: counters}} for windowed / dwell policies
         self.face_recognizer = face_recognizer
-        self.last_config_check = 0
-        
-        # Load thresholds from config
-        self.recognition_threshold = config.get('analytics', {}).get('face_recognition_threshold', 0.5)
-        self.face_threshold = config.get('analytics', {}).get('face_detection_threshold', 0.5)
-        self.people_threshold = config.get('analytics', {}).get('person_detection_threshold', 0.7)
-        self.violence_threshold = config.get('analytics', {}).get('violence_threshold', 0.2)
-        self.fire_threshold = config.get('analytics', {}).get('fire_threshold', 0.2)
-        self.vehicle_threshold = config.get('analytics', {}).get('vehicle_threshold', 0.2)
-        
-        self.VEHICLE_LABELS = ["bicycle", "car", "motorcycle", "bus", "train", "truck", "boat"]
         
-        # Priority Lists for Alerts
-        self.emergency_alerts = config.get('analytics', {}).get('emergency_alert_policies', ["fire_detected_critical"])
-        self.critical_alerts = config.get('analytics', {}).get('critical_alert_policies', ["fight_detected_critical", "crowd_policy_violation"])
-        self.warning_alerts = config.get('analytics', {}).get('warning_alert_policies', [])
-
-        # --- AI INSIGHTS CONFIGURATION ---
-        self.ai_insights_enabled = config.get('analytics', {}).get('ai_insights_enabled', True)
-        self.ai_insights_per_hour = config.get('analytics', {}).get('ai_insights_per_hour', 10)
-        self.ai_insights_duration = config.get('analytics', {}).get('ai_insights_duration', 30)
-        self.ai_insights_snapshots = config.get('analytics', {}).get('ai_insights_snapshots', 10)
+        self.VEHICLE_LABELS = VEHICLE_LABELS
+
+        # Dynamic config: thresholds, alert priorities, AI insights, site info and policy.
+        # Reloaded off-thread only when the file changes; frames just read self.policy.
+        # The watcher's signature must predate the policy's load, or edits in between are never applied.
+        self.config_watcher = None
+        if config_path == CONFIG_PATH:
+            signature, self.policy = CONFIG_SIGNATURE, STARTUP_POLICY
+        else:
+            signature = file_signature(config_path)
+            self.policy = PolicySnapshot.compile(load_config(config_path))
+        if watch_config:
+            self.config_watcher = ConfigWatcher(config_path, self._apply_config, signature=signature)
+            self.config_watcher.start()
         
         self.ai_insights_schedule = {} # {cam_id: [timestamps]}
         self.ai_insights_period_start = {} # {cam_id: start_of_current_hour_window}
 
-    def _check_config_updates(self):
-        """Reloads dynamic config parameters periodicially."""
-        now = time.time()
-        if now - self.last_config_check > 5.0: # Check every 5 seconds
-            try:
-                with open(CONFIG_PATH, 'r') as f:
-                    new_config = yaml.safe_load(f)
-                    
-                    # 1. Update Thresholds
-                    self.recognition_threshold = new_config.get('analytics', {}).get('face_recognition_threshold', self.recognition_threshold)
-                    self.face_threshold = new_config.get('analytics', {}).get('face_detection_threshold', self.face_threshold)
-                    self.people_threshold = new_config.get('analytics', {}).get('person_detection_threshold', self.people_threshold)
-                    self.violence_threshold = new_config.get('analytics', {}).get('violence_threshold', self.violence_threshold)
-                    self.fire_threshold = new_config.get('analytics', {}).get('fire_threshold', self.fire_threshold)
-                    self.vehicle_threshold = new_config.get('analytics', {}).get('vehicle_threshold', self.vehicle_threshold)
-                    
-                    # Update Alert Priorities
-                    self.emergency_alerts = new_config.get('analytics', {}).get('emergency_alert_policies', self.emergency_alerts)
-                    self.critical_alerts = new_config.get('analytics', {}).get('critical_alert_policies', self.critical_alerts)
-                    self.warning_alerts = new_config.get('analytics', {}).get('warning_alert_policies', self.warning_alerts)
-                    
-                    # Update AI Insights Params
-                    self.ai_insights_enabled = new_config.get('analytics', {}).get('ai_insights_enabled', self.ai_insights_enabled)
-                    self.ai_insights_per_hour = new_config.get('analytics', {}).get('ai_insights_per_hour', self.ai_insights_per_hour)
-                    self.ai_insights_duration = new_config.get('analytics', {}).get('ai_insights_duration', self.ai_insights_duration)
-                    self.ai_insights_snapshots = new_config.get('analytics', {}).get('ai_insights_snapshots', self.ai_insights_snapshots)
-
-                    # 1.1 Update Site Info and Analytics Params
-                    global CLIENT_ID, SITE_NAME, SITE_ID, COUNTRY, STATE, DISTRICT, SNAPSHOTS_PER_EVENT, PRE_EVENT_SECONDS, POST_EVENT_SECONDS, LATITUDE, LONGITUDE
-                    
-                    SNAPSHOTS_PER_EVENT = new_config.get('analytics', {}).get('snapshots_per_event', SNAPSHOTS_PER_EVENT)
-                    PRE_EVENT_SECONDS = new_config.get('analytics', {}).get('pre_event_seconds', PRE_EVENT_SECONDS)
-                    POST_EVENT_SECONDS = new_config.get('analytics', {}).get('post_event_seconds', POST_EVENT_SECONDS)
-                    
-                    site_info = new_config.get('site_info', {})
-                    CLIENT_ID = site_info.get('client_id', CLIENT_ID)
-                    SITE_NAME = site_info.get('site_name', SITE_NAME)
-                    SITE_ID = site_info.get('site_id', SITE_ID)
-                    COUNTRY = site_info.get('country', COUNTRY)
-                    STATE = site_info.get('state', STATE)
-                    DISTRICT = site_info.get('district', DISTRICT)
-                    LATITUDE = site_info.get('latitude', LATITUDE)
-                    LONGITUDE = site_info.get('longitude', LONGITUDE)
-
-                    # 2. Update Global Policy
-                    global POLICY
-                    POLICY = new_config.get('policy', POLICY)
-                    
-            except Exception as e:
-                logger.error(f"Config reload failed: {e}")
-            self.last_config_check = now
+    @property
+    def recognition_threshold(self):
+        return self.policy.recognition_threshold
 
-    def _determine_status(self, site_alerts):
+    def _apply_config(self, new_config):
+        """Compiles a freshly loaded config and swaps it in (runs on the watcher thread)."""
+        self.policy = PolicySnapshot.compile(new_config, previous=self.policy)
+
+    def close(self):
+        if self.config_watcher:
+            self.config_watcher.stop()
+
+    def _determine_status(self, site_alerts, policy):
         """
         Determines the highest priority status based on active alerts.
         """
@@ -177,25 +247,25 @@ class AnalyticsEngine:
             
         # Check iteratively for priority
         for alert in site_alerts:
-            if alert in self.emergency_alerts:
+            if alert in policy.emergency_alerts:
                 return "emergency"
         
         for alert in site_alerts:
-            if alert in self.critical_alerts:
+            if alert in policy.critical_alerts:
                 return "critical"
                 
         for alert in site_alerts:
-            if alert in self.warning_alerts:
+            if alert in policy.warning_alerts:
                 return "warning"
         
         # Default for unmapped alerts
         return "critical"
 
-    def _update_ai_insights_schedule(self, unique_cam_id, current_time):
+    def _update_ai_insights_schedule(self, unique_cam_id, current_time, policy):
         """
         Ensures a valid schedule of random timestamps exists for the current hour.
         """
-        if not self.ai_insights_enabled:
+        if not policy.ai_insights_enabled:
             self.ai_insights_schedule[unique_cam_id] = []
             return
 
@@ -215,7 +285,7 @@ class AnalyticsEngine:
             # Generate random offsets within 3600 seconds
             # Ensure we don't pick a time already passed in the very immediate logic, 
             # though taking current_time as base deals with that.
-            offsets = sorted(random.sample(range(0, 3600), min(3600, self.ai_insights_per_hour)))
+            offsets = sorted(random.sample(range(0, 3600), min(3600, policy.ai_insights_per_hour)))
             
             # Convert to absolute timestamps
             self.ai_insights_schedule[unique_cam_id] = [new_start + o for o in offsets]
@@ -227,6 +297,7 @@ class AnalyticsEngine:
         """
         current_time = time.time()
         current_time_int = int(current_time)
+        policy = self.policy # one consistent config snapshot for the whole frame
         
         # Initialize heartbeat timer for new cameras to avoid startup burst
         if unique_cam_id not in self.last_heartbeat_time:
@@ -244,7 +315,7 @@ class AnalyticsEngine:
         
         
         # --- AI INSIGHTS TRIGGER CHECK (Schedule Update) ---
-        self._update_ai_insights_schedule(unique_cam_id, current_time)
+        self._update_ai_insights_schedule(unique_cam_id, current_time, policy)
         schedule = self.ai_insights_schedule.get(unique_cam_id, [])
         is_ai_insight_due = bool(schedule and schedule[0] <= current_time)
 
@@ -254,66 +325,29 @@ class AnalyticsEngine:
 
         # Metadata enrichment is handled by the Runner Probes now.
         
-        # Extraction for logic - Apply dynamic thresholds
-        self._check_config_updates()
-
-        # Filter valid detections based on their specific labels and thresholds
-        valid_people = [obj for obj in frame_objects if obj["label"].lower() in ["person", "face"] and obj.get("confidence", 0) >= self.people_threshold]
-        valid_fire = [obj for obj in frame_objects if obj["label"].lower() in ["fire", "smoke"] and obj.get("confidence", 0) >= self.fire_threshold]
-        valid_violence = [obj for obj in frame_objects if obj["label"].lower() == "violence" and obj.get("confidence", 0) >= self.violence_threshold]
-        valid_vehicles = [obj for obj in frame_objects if obj["label"].lower() in self.VEHICLE_LABELS and obj.get("confidence", 0) >= self.vehicle_threshold]
-
-        num_people = len(valid_people)
-        num_vehicles = len(valid_vehicles)
-        fire_detected = len(valid_fire) > 0
-        violence_detected = len(valid_violence) > 0
-        vehicle_detected = len(valid_vehicles) > 0
+        # Extraction for logic - bucket detections by category and dynamic threshold in one pass
+        detections = FrameDetections(
+            frame_objects, policy.people_threshold, policy.fire_threshold,
+            policy.violence_threshold, policy.vehicle_threshold
+        )
+
+        num_people = len(detections.people)
+        num_vehicles = len(detections.vehicles)
+        fire_detected = len(detections.fire) > 0
+        violence_detected = len(detections.violence) > 0
+        vehicle_detected = len(detections.vehicles) > 0
         
         # Consistent UTC time for policy check
         now_dt = datetime.datetime.now(datetime.timezone.utc)
         
-        # 1. Get initial time-based alerts (Only if someone is present)
-        site_alerts = []
-        if num_people > 0:
-            site_alerts = check_timebased_policy_violation(unique_cam_id, now_dt)
-            site_alerts.extend(check_countbased_policy_violation(unique_cam_id, num_people, num_vehicles))
-        
-        # 2. Refine alerts for BOSS_CABIN based on identity
-        # 2. Refine alerts for BOSS_CABIN based on identity
-        if unique_cam_id == "boss_cabin" and site_alerts:
-            self._check_config_updates()
-            boss_policy = POLICY.get('boss_cabin', {})
-            allowlist = [name.lower() for name in boss_policy.get('allowlist', [])]
-            
-            authorized_person_present = False
-            unauthorized_identities = []
-            
-            # Check each detected face
-            for obj in frame_objects:
-                label = obj["label"].lower()
-                if label in ["face", "person"] and "recognition" in obj:
-                    identity = obj["recognition"]["identity"].lower()
-                    
-                    if identity in allowlist:
-                        authorized_person_present = True
-                        break # Found the boss, stop checking others for current logic
-                    elif identity == "stranger":
-                        unauthorized_identities.append("stranger")
-                    else:
-                        unauthorized_identities.append(identity.lower())
-            
-            if authorized_person_present:
-                # The Boss is here! Suppress time-based alerts.
-                site_alerts = []
-            elif unauthorized_identities:
-                # Time violation + Unauthorized person/stranger
-                # Tag for identity violation
-                site_alerts = []
-                for identity in unauthorized_identities:
-                    tag = "unauthorized_stranger" if identity == "stranger" else f"unauthorized_person_{identity}"
-                    if tag not in site_alerts:
-                        site_alerts.append(tag)
-            # If site_alerts had time violations but NO face was found, we KEEP the time alerts.
+        # 1. Time-, count- and identity-based alerts from the compiled camera policy
+        #    (only raised while someone is present; BOSS_CABIN allowlist refines them)
+        state = self.policy_state.get(unique_cam_id)
+        if state is None:
+            state = self.policy_state[unique_cam_id] = {}
+        site_alerts = policy.rules.for_camera(unique_cam_id).evaluate(
+            state, num_people, num_vehicles, detections.identities, now_dt, current_time
+        )
 
         # 3. Add fire alerts (global)
         if fire_detected:
@@ -339,14 +373,10 @@ class AnalyticsEngine:
             logger.info('EVENT DETECTED')
             self.last_alert_time[unique_cam_id] = current_time
             # Dynamic status mapping
-            status = self._determine_status(site_alerts)
-            
-            # Collect all valid detections for the log
-            all_valid_detections = valid_people + valid_fire + valid_violence + valid_vehicles
+            status = self._determine_status(site_alerts, policy)
             
-            # Add any other objects that pass a default threshold (e.g. 0.5) to keep metrics interesting
-            other_objects = [obj for obj in frame_objects if obj.get("confidence", 0) >= 0.5 and obj not in all_valid_detections]
-            log_detections = all_valid_detections + other_objects
+            # All valid detections plus other objects above OTHER_OBJECT_THRESHOLD
+            log_detections = detections.log_detections
 
             # Add display_label to objects if missing
             for obj in log_detections:
@@ -365,13 +395,7 @@ class AnalyticsEngine:
                 "meta": {
                     "ts": current_time_int,
                     "cam_id": unique_cam_id,
-                    "site_name": SITE_NAME,
-                    "site_id": SITE_ID,
-                    "latitude": LATITUDE,
-                    "longitude": LONGITUDE,
-                    "country": COUNTRY,
-                    "state": STATE,
-                    "district": DISTRICT
+                    **policy.site_meta
                 },
                 "data": {
                     "triggers": site_alerts,
@@ -403,44 +427,36 @@ class AnalyticsEngine:
                     
                     if recorder:
                          # Use lower case for directory
-                         event_dir = f"{COUNTRY}_{STATE}_{DISTRICT}_{SITE_ID}_{unique_cam_id}_{ts_str}".lower()
+                         event_dir = f"{policy.country}_{policy.state}_{policy.district}_{policy.site_id}_{unique_cam_id}_{ts_str}".lower()
                     logger.info(f"Triggering recording for {unique_cam_id} with event_dir: {event_dir} at {ts_str}")
                     recorder.trigger_recording(
                         site_alerts, 
                         snapshot_sequence=True, 
                         frame_objects=frame_objects, 
                         event_dir=event_dir, 
-                        num_snapshots=SNAPSHOTS_PER_EVENT,
-                        pre_event_seconds=PRE_EVENT_SECONDS,
-                        post_event_seconds=POST_EVENT_SECONDS
+                        num_snapshots=policy.snapshots_per_event,
+                        pre_event_seconds=policy.pre_event_seconds,
+                        post_event_seconds=policy.post_event_seconds
                     )
                     logger.info(f"Recording triggered for {unique_cam_id} with event_dir: {event_dir} at {ts_str}")
                     payload["data"]["capture_triggered"] = True
                     payload["data"]["evidence_path"] = event_dir
                     payload["data"]["video_count"] = 1
-                    payload["data"]["image_count"] = SNAPSHOTS_PER_EVENT
+                    payload["data"]["image_count"] = policy.snapshots_per_event
                 except Exception as e:
                     logger.error(f"Trigger failed for {unique_cam_id}: {e}")
         
         elif should_log_heartbeat:
             self.last_heartbeat_time[unique_cam_id] = current_time
             # Same for heartbeats
-            all_valid_detections = valid_people + valid_fire + valid_violence + valid_vehicles
-            other_objects = [obj for obj in frame_objects if obj.get("confidence", 0) >= 0.5 and obj not in all_valid_detections]
-            log_detections = all_valid_detections + other_objects
+            log_detections = detections.log_detections
 
             payload = {
                 "type": "metric",
                 "meta": {
                     "ts": current_time_int,
                     "cam_id": unique_cam_id,
-                    "site_name": SITE_NAME,
-                    "site_id": SITE_ID,
-                    "latitude": LATITUDE,
-                    "longitude": LONGITUDE,
-                    "country": COUNTRY,
-                    "state": STATE,
-                    "district": DISTRICT
+                    **policy.site_meta
                 },
                 "data": {
                     "status": "safe",
@@ -479,22 +495,14 @@ class AnalyticsEngine:
             
             # Construct Payload
             # Reusing detection logic from event/metric
-            all_valid_detections = valid_people + valid_fire + valid_violence + valid_vehicles
-            other_objects = [obj for obj in frame_objects if obj.get("confidence", 0) >= 0.5 and obj not in all_valid_detections]
-            log_detections = all_valid_detections + other_objects
+            log_detections = detections.log_detections
             
             insight_payload = {
                 "type": "ai-info",
                 "meta": {
                     "ts": int(trigger_ts),
                     "cam_id": unique_cam_id,
-                    "site_name": SITE_NAME,
-                    "site_id": SITE_ID,
-                    "latitude": LATITUDE,
-                    "longitude": LONGITUDE,
-                    "country": COUNTRY,
-                    "state": STATE,
-                    "district": DISTRICT
+                    **policy.site_meta
                 },
                 "data": {
                     "status": "safe",
@@ -516,7 +524,7 @@ class AnalyticsEngine:
             if recorder:
                 try:
                     ts_str = str(int(current_time))
-                    event_dir = f"insight_{COUNTRY}_{STATE}_{DISTRICT}_{SITE_ID}_{unique_cam_id}_{ts_str}".lower()
+                    event_dir = f"insight_{policy.country}_{policy.state}_{policy.district}_{policy.site_id}_{unique_cam_id}_{ts_str}".lower()
                     
                     logger.info(f"Triggering AI Insight recording for {unique_cam_id}: {event_dir}")
                     recorder.trigger_recording(
@@ -524,21 +532,21 @@ class AnalyticsEngine:
                         snapshot_sequence=True,
                         frame_objects=frame_objects,
                         event_dir=event_dir,
-                        num_snapshots=self.ai_insights_snapshots,     # 10 photos
+                        num_snapshots=policy.ai_insights_snapshots,     # 10 photos
                         pre_event_seconds=0,                            # Start now
-                        post_event_seconds=self.ai_insights_duration    # 30 seconds
+                        post_event_seconds=policy.ai_insights_duration    # 30 seconds
                     )
                     
                     insight_payload["data"]["capture_triggered"] = True
                     insight_payload["data"]["evidence_path"] = event_dir
                     insight_payload["data"]["video_count"] = 1
-                    insight_payload["data"]["image_count"] = self.ai_insights_snapshots
+                    insight_payload["data"]["image_count"] = policy.ai_insights_snapshots
                     
                 except Exception as e:
                      logger.error(f"AI Insight trigger failed for {unique_cam_id}: {e}")
 
             if insight_payload:
-                 JSONLogger.write_log(insight_payload)
+                 JSONLogger.write_log(detach_detections(insight_payload))
         
         if payload:
-            JSONLogger.write_log(payload)
\ No newline at end of file
+            JSONLogger.write_log(detach_detections(payload))
\ No newline at end of file
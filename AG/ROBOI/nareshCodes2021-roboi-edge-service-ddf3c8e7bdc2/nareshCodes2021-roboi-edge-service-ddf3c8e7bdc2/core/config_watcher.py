@@ -0,0 +1,71 @@
+import os
+import threading
+import yaml
+from core.logger import get_app_logger
+
+logger = get_app_logger("config-watcher")
+
+POLL_INTERVAL = 1.0 # Seconds between stat() calls
+_UNSET = object()
+
+
+def file_signature(path):
+    """(mtime_ns, size, inode) of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class ConfigWatcher(threading.Thread):
+    """
+    Watches a YAML config file off the frame path and calls `on_change(config)`
+    only when its contents actually changed.
+
+    The file is stat()ed every `poll_interval` seconds; it is re-read and parsed
+    only when mtime, size or inode differ from the last load. Stat-polling (rather
+    than inotify) keeps working when editors replace the file by rename. A file
+    that fails to parse is logged and skipped, leaving the last good config live.
+
+    Pass `signature` (file_signature() taken before the config in use was read)
+    when that config was loaded earlier, so edits made since are picked up.
+    """
+
+    def __init__(self, path, on_change, poll_interval=POLL_INTERVAL, signature=_UNSET):
+        super().__init__(name="config-watcher", daemon=True)
+        self.path = path
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.signature = file_signature(path) if signature is _UNSET else signature
+        self.reloads = 0
+        self._stop_event = threading.Event()
+
+    def check(self):
+        """Reloads if the file changed. Returns True if on_change was called."""
+        signature = file_signature(self.path)
+        if signature is None or signature == self.signature:
+            return False
+        try:
+            with open(self.path, 'r') as f:
+                new_config = yaml.safe_load(f) or {}
+        except Exception as e:
+            logger.error(f"Config reload failed: {e}")
+            self.signature = signature # don't retry a broken file until it changes again
+            return False
+        self.signature = signature
+        try:
+            self.on_change(new_config)
+        except Exception as e:
+            logger.error(f"Applying reloaded config failed: {e}")
+            return False
+        self.reloads += 1
+        logger.info(f"Reloaded {os.path.basename(self.path)}")
+        return True
+
+    def run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            self.check()
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,364 @@
+import os
+import json
+import gzip
+import time
+import hashlib
+import datetime
+from urllib.parse import quote, unquote
+from core.logger import DETECTION_LOG_FILE, PROJECT_ROOT, get_app_logger
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+logger = get_app_logger("detection-store")
+
+STORE_DIR = os.path.join(PROJECT_ROOT, "data", "detection_store")
+MANIFEST = "_segments.json"     # Closed segments already compacted, by content fingerprint
+ROWS_PER_PART = 250000          # Records buffered per segment before a set of parts is written
+FINGERPRINT_BYTES = 64 * 1024
+
+# Column names follow the ClickHouse camera_events table (docs/schema_doc.md)
+EVENTS = "camera_events"        # One row per logged record
+DETECTIONS = "detections"       # One row per detection of a record
+
+
+def _schemas():
+    return {
+        EVENTS: {
+            "event_timestamp": pl.Int64, "cam_id": pl.Utf8, "cam_name": pl.Utf8, "site_name": pl.Utf8,
+            "site_id": pl.Utf8, "event_type": pl.Utf8, "event_status": pl.Utf8, "detection_count": pl.Int32,
+            "people_count": pl.Int32, "video_count": pl.Int32, "image_count": pl.Int32,
+            "capture_triggered": pl.Boolean, "event_triggers": pl.List(pl.Utf8), "event_trigger_count": pl.Int32,
+            "high_confidence_count": pl.Int32, "evidence_path": pl.Utf8, "ai_insights": pl.Utf8,
+        },
+        DETECTIONS: {
+            "event_timestamp": pl.Int64, "cam_id": pl.Utf8, "event_type": pl.Utf8, "class_id": pl.Int32,
+            "label": pl.Utf8, "confidence": pl.Float32, "identity": pl.Utf8,
+        },
+    }
+
+
+def _require_polars():
+    if pl is None:
+        raise ImportError("The detection store needs polars for Parquet I/O and queries: "
+                          "pip install polars (pinned in requirements.txt)")
+
+
+def closed_segments(log_path=DETECTION_LOG_FILE):
+    """Rotated segments of the detection log (log.N and log.N.gz), oldest first. The live file is never included."""
+    directory, name = os.path.split(log_path)
+    segments = []
+    for candidate in os.listdir(directory or "."):
+        if not candidate.startswith(name + "."):
+            continue
+        suffix = candidate[len(name) + 1:]
+        number = suffix[:-3] if suffix.endswith(".gz") else suffix
+        if number.isdigit():
+            segments.append((-int(number), os.path.join(directory, candidate)))
+    return [path for _, path in sorted(segments)]
+
+
+def _open_segment(path):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb", buffering=1024 * 1024)
+
+
+def _logical_size(path):
+    """Uncompressed size mod 2**32: the gzip ISIZE trailer for .gz, the file size otherwise."""
+    if path.endswith(".gz"):
+        with open(path, "rb") as f:
+            f.seek(-4, os.SEEK_END)
+            return int.from_bytes(f.read(4), "little")
+    return os.path.getsize(path) & 0xFFFFFFFF
+
+
+def segment_fingerprint(path):
+    """
+    Content id of a closed segment, taken over the decompressed data so it is
+    stable across the .1 -> .2 renames of rotation and across logrotate
+    compressing a segment to .gz.
+    """
+    with _open_segment(path) as f:
+        head = f.read(FINGERPRINT_BYTES)
+    return f"{_logical_size(path):x}-{hashlib.sha1(head).hexdigest()[:16]}"
+
+
+def to_epoch(value):
+    """Epoch seconds from an epoch number, datetime/date (naive = UTC) or ISO-8601 string."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        value = datetime.datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return int(value.timestamp())
+
+
+def parse_bucket(bucket):
+    """Bucket width in seconds from seconds or a '30s' / '15m' / '1h' / '1d' string."""
+    if bucket is None or isinstance(bucket, (int, float)):
+        return bucket
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    return int(float(bucket[:-1]) * units[bucket[-1]])
+
+
+class DetectionStore:
+    """
+    Columnar copy of the detection log for historical queries.
+
+    compact() rolls closed NDJSON segments written by JSONLogger into Parquet
+    files partitioned by UTC date and camera:
+
+        <root>/camera_events/date=2025-12-15/cam_id=cam_01/part-<segment>-<n>.parquet
+        <root>/detections/date=2025-12-15/cam_id=cam_01/part-<segment>-<n>.parquet
+
+    Segments are identified by a content fingerprint recorded in the manifest,
+    so re-running after a rotation (which renames .1 to .2, and may gzip it)
+    does not compact a segment twice, and parts are named after the segment, so a compaction that
+    died halfway is simply redone.
+
+    aggregate() answers filtered group-by queries reading only the partitions
+    in the requested date range and cameras, and only the columns the query
+    uses; time filters are also pushed down to Parquet row-group statistics.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        _require_polars()
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST)
+        os.makedirs(root, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_manifest(self, manifest):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def compact(self, log_path=DETECTION_LOG_FILE):
+        """Compacts every closed segment not yet in the store. Returns counts of what was done."""
+        manifest = self._load_manifest()
+        stats = {"segments": 0, "skipped": 0, "records": 0, "detections": 0, "bad_lines": 0, "bytes": 0}
+        for path in closed_segments(log_path):
+            fingerprint = segment_fingerprint(path)
+            if fingerprint in manifest:
+                stats["skipped"] += 1
+                continue
+            started = time.perf_counter()
+            result = self.compact_segment(path, fingerprint)
+            manifest[fingerprint] = {"source": os.path.basename(path), "compacted_at": int(time.time()), **result}
+            self._save_manifest(manifest)
+            stats["segments"] += 1
+            for key in ("records", "detections", "bad_lines"):
+                stats[key] += result[key]
+            stats["bytes"] += os.path.getsize(path)
+            logger.info(f"Compacted {os.path.basename(path)}: {result['records']} records, "
+                        f"{result['parts']} parts in {time.perf_counter() - started:.1f}s")
+        return stats
+
+    def compact_segment(self, path, fingerprint):
+        """Writes the Parquet parts of one segment."""
+        schemas = _schemas()
+        result = {"records": 0, "detections": 0, "bad_lines": 0, "parts": 0}
+        buffers = {}
+        buffered = 0
+        part = 0
+
+        with _open_segment(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = _loads(line)
+                    event, detections = self._flatten(record)
+                except (ValueError, TypeError, KeyError, AttributeError):
+                    result["bad_lines"] += 1
+                    continue
+                key = (datetime.datetime.fromtimestamp(event["event_timestamp"], datetime.timezone.utc)
+                       .strftime("%Y-%m-%d"), event["cam_id"])
+                rows = buffers.setdefault(key, ({c: [] for c in schemas[EVENTS]}, {c: [] for c in schemas[DETECTIONS]}))
+                for column, values in rows[0].items():
+                    values.append(event[column])
+                for det in detections:
+                    for column, values in rows[1].items():
+                        values.append(det[column])
+                result["records"] += 1
+                result["detections"] += len(detections)
+                buffered += 1
+                if buffered >= ROWS_PER_PART:
+                    result["parts"] += self._write_parts(buffers, fingerprint, part, schemas)
+                    buffers, buffered, part = {}, 0, part + 1
+        result["parts"] += self._write_parts(buffers, fingerprint, part, schemas)
+        return result
+
+    @staticmethod
+    def _flatten(record):
+        meta = record.get("meta") or {}
+        data = record.get("data") or {}
+        ts = to_epoch(meta["ts"])
+        cam_id = str(meta.get("cam_id", "unknown"))
+        event_type = record.get("type")
+        triggers = [str(t) for t in data.get("triggers") or []]
+        detections = []
+        high_confidence = 0
+        for obj in data.get("detections") or []:
+            confidence = obj.get("confidence")
+            if confidence is not None and confidence > 0.7:
+                high_confidence += 1
+            recognition = obj.get("recognition") or {}
+            detections.append({
+                "event_timestamp": ts, "cam_id": cam_id, "event_type": event_type,
+                "class_id": obj.get("class_id"), "label": obj.get("label"), "confidence": confidence,
+                "identity": recognition.get("identity"),
+            })
+        event = {
+            "event_timestamp": ts, "cam_id": cam_id, "cam_name": meta.get("cam_name"),
+            "site_name": meta.get("site_name"), "site_id": meta.get("site_id"),
+            "event_type": event_type, "event_status": data.get("status"),
+            "detection_count": data.get("detection_count", len(detections)),
+            "people_count": data.get("people_count"), "video_count": data.get("video_count"),
+            "image_count": data.get("image_count"), "capture_triggered": data.get("capture_triggered"),
+            "event_triggers": triggers, "event_trigger_count": len(triggers),
+            "high_confidence_count": high_confidence, "evidence_path": data.get("evidence_path"),
+            "ai_insights": data.get("ai_insights"),
+        }
+        return event, detections
+
+    def _write_parts(self, buffers, fingerprint, part, schemas):
+        written = 0
+        for (date, cam_id), rows in buffers.items():
+            for table, columns in zip((EVENTS, DETECTIONS), rows):
+                if not columns["event_timestamp"]:
+                    continue
+                directory = os.path.join(self.root, table, f"date={date}", f"cam_id={quote(cam_id, safe='')}")
+                os.makedirs(directory, exist_ok=True)
+                target = os.path.join(directory, f"part-{fingerprint}-{part:04d}.parquet")
+                tmp = target + ".tmp"
+                pl.DataFrame(columns, schema=schemas[table], strict=False).write_parquet(tmp, compression="zstd", statistics=True)
+                os.replace(tmp, target)
+                written += 1
+        return written
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def partitions(self, table=EVENTS, start=None, end=None, cameras=None):
+        """Parquet files of the partitions overlapping [start, end) for the given cameras."""
+        start, end = to_epoch(start), to_epoch(end)
+        first = datetime.datetime.fromtimestamp(start, datetime.timezone.utc).strftime("%Y-%m-%d") if start is not None else None
+        last = datetime.datetime.fromtimestamp(end - 1, datetime.timezone.utc).strftime("%Y-%m-%d") if end is not None else None
+        wanted = {str(c) for c in cameras} if cameras is not None else None
+
+        files = []
+        table_dir = os.path.join(self.root, table)
+        if not os.path.isdir(table_dir):
+            return files
+        for date_dir in sorted(os.listdir(table_dir)):
+            date = date_dir.partition("=")[2]
+            if (first and date < first) or (last and date > last):
+                continue
+            for cam_dir in sorted(os.listdir(os.path.join(table_dir, date_dir))):
+                if wanted is not None and unquote(cam_dir.partition("=")[2]) not in wanted:
+                    continue
+                directory = os.path.join(table_dir, date_dir, cam_dir)
+                files.extend(os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                             if name.endswith(".parquet"))
+        return files
+
+    def scan(self, table=EVENTS, columns=None, start=None, end=None, cameras=None):
+        """Lazy frame over the pruned partitions, with the time/camera filters applied (None if nothing matches)."""
+        files = self.partitions(table, start, end, cameras)
+        if not files:
+            return None
+        frame = pl.scan_parquet(files, hive_partitioning=False)
+        if columns is not None:
+            frame = frame.select(columns)
+        start, end = to_epoch(start), to_epoch(end)
+        if start is not None:
+            frame = frame.filter(pl.col("event_timestamp") >= start)
+        if end is not None:
+            frame = frame.filter(pl.col("event_timestamp") < end)
+        if cameras is not None:
+            frame = frame.filter(pl.col("cam_id").is_in([str(c) for c in cameras]))
+        return frame
+
+    def aggregate(self, table=EVENTS, group_by=("cam_id",), bucket=None, metrics=("count",), start=None,
+                  end=None, cameras=None, where=None, trigger=None):
+        """
+        Filtered aggregate as a list of dicts, sorted by the group keys.
+
+        group_by: columns; add "bucket" to group by time bucket (bucket=seconds or "15m"/"1h"/"1d",
+                  the bucket value being its start in epoch seconds).
+        metrics:  "count", or "<sum|mean|min|max|n_unique>:<column>" (output column "<fn>_<column>").
+        where:    {column: value or list of values}.
+        trigger:  keep only camera_events rows whose event_triggers contain this trigger.
+
+        Example, violations per camera per hour last month:
+            store.aggregate(group_by=("cam_id", "bucket"), bucket="1h", start="2025-11-01",
+                            end="2025-12-01", where={"event_type": "event"})
+        """
+        width = parse_bucket(bucket)
+        group_by = list(group_by)
+        if "bucket" in group_by and not width:
+            raise ValueError("group_by 'bucket' needs a bucket width")
+        where = where or {}
+
+        exprs = []
+        columns = {c for c in group_by if c != "bucket"} | set(where)
+        for metric in metrics:
+            if metric == "count":
+                exprs.append(pl.len().alias("count"))
+                continue
+            fn, _, column = metric.partition(":")
+            if fn not in ("sum", "mean", "min", "max", "n_unique") or not column:
+                raise ValueError(f"Unknown metric: {metric}")
+            exprs.append(getattr(pl.col(column), fn)().alias(f"{fn}_{column}"))
+            columns.add(column)
+        if width or start is not None or end is not None:
+            columns.add("event_timestamp")
+        if cameras is not None:
+            columns.add("cam_id")
+        if trigger is not None:
+            columns.add("event_triggers")
+
+        frame = self.scan(table, sorted(columns or {"event_timestamp"}), start, end, cameras)
+        if frame is None:
+            return []
+        for column, value in where.items():
+            if isinstance(value, (list, tuple, set)):
+                frame = frame.filter(pl.col(column).is_in(list(value)))
+            else:
+                frame = frame.filter(pl.col(column) == value)
+        if trigger is not None:
+            frame = frame.filter(pl.col("event_triggers").list.contains(trigger))
+        if width:
+            frame = frame.with_columns((pl.col("event_timestamp") // width * width).alias("bucket"))
+
+        if group_by:
+            result = frame.group_by(group_by).agg(exprs).sort(group_by)
+        else:
+            result = frame.select(exprs)
+        return result.collect().to_dicts()
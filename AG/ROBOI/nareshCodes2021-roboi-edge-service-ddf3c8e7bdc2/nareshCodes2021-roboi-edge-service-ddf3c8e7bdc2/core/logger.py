@@ -1,8 +1,11 @@
 import os
 import time
 import json
+import atexit
 import logging
 import datetime
+import threading
+from collections import deque
 from logging.handlers import RotatingFileHandler
 
 # --- PATHS ---
@@ -14,37 +17,232 @@ APP_LOG_FILE = os.path.join(LOG_DIR, "app.log")
 # Ensure log directory exists
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# --- DETECTION LOG WRITER SETTINGS ---
+DETECTION_LOG_MAX_BYTES = 10*1024*1024 # Same rotation as before: 10MB, 5 backups
+DETECTION_LOG_BACKUPS = 5
+BATCH_SIZE = 256            # Records per write() call
+FLUSH_INTERVAL = 0.2        # Max seconds a record waits before reaching the file
+FSYNC_INTERVAL = 5.0        # Seconds between fsyncs (0 = fsync every batch)
+MAX_PENDING = 100000        # Records held in memory before new ones are dropped
+WRITE_BUFFER = 1024*1024    # Userspace file buffer
+
+try:
+    import orjson
+
+    def _encode(data):
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson is stricter about exotic types than json; keep the old behaviour
+            return json.dumps(data, separators=(',', ':')).encode()
+except ImportError:
+    orjson = None
+
+    def _encode(data):
+        return json.dumps(data, separators=(',', ':')).encode()
+
+class _NDJSONWriter(threading.Thread):
+    """
+    Background writer for the detection log.
+    Drains queued records in batches, serializes them off the caller's thread and
+    appends them as newline-delimited JSON with large buffered writes.
+    Rotation mirrors RotatingFileHandler (file -> file.1 -> ... -> file.N), which
+    is what the Vector file source in vector.toml already follows.
+    """
+
+    def __init__(self, path, max_bytes=DETECTION_LOG_MAX_BYTES, backup_count=DETECTION_LOG_BACKUPS,
+                 batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, fsync_interval=FSYNC_INTERVAL,
+                 max_pending=MAX_PENDING):
+        super().__init__(name="detection-json-writer", daemon=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_pending = max_pending
+
+        self.pending = deque()
+        self.lock = threading.Lock()  # put() runs on every camera thread
+        self.wakeup = threading.Event()
+        self.idle = threading.Condition()
+        self.stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+
+        self.stream = None
+        self.size = 0
+        self.last_fsync = time.monotonic()
+
+    def put(self, data):
+        with self.lock:
+            if len(self.pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.pending.append(data)
+            self.enqueued += 1
+            full = len(self.pending) >= self.batch_size
+        # Timer wakeups cover small bursts; only nudge the writer for full batches
+        if full:
+            self.wakeup.set()
+        return True
+
+    def _open(self):
+        self.stream = open(self.path, "ab", buffering=WRITE_BUFFER)
+        self.size = self.stream.tell()
+
+    def _rotate(self):
+        self.stream.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            open(self.path, "wb").close()
+        self._open()
+
+    def _write_batch(self, batch):
+        lines = []
+        for data in batch:
+            try:
+                lines.append(_encode(data))
+            except Exception as e:
+                get_app_logger().error(f"Failed to write JSON log: {e}")
+        if not lines:
+            return
+        lines.append(b"")
+        buf = b"\n".join(lines)
+
+        if self.stream is None:
+            self._open()
+        if self.max_bytes > 0 and self.size > 0 and self.size + len(buf) > self.max_bytes:
+            self._rotate()
+
+        self.stream.write(buf)
+        self.size += len(buf)
+
+    def _drain(self):
+        while self.pending:
+            batch = []
+            while self.pending and len(batch) < self.batch_size:
+                batch.append(self.pending.popleft())
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                get_app_logger().error(f"Detection log write failed: {e}")
+            self.written += len(batch)
+
+        if self.stream is not None:
+            try:
+                self.stream.flush()
+                now = time.monotonic()
+                if now - self.last_fsync >= self.fsync_interval:
+                    os.fsync(self.stream.fileno())
+                    self.last_fsync = now
+            except Exception as e:
+                get_app_logger().error(f"Detection log flush failed: {e}")
+
+        with self.idle:
+            self.idle.notify_all()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self._drain()
+            if self.stopping and not self.pending:
+                break
+        if self.stream is not None:
+            self.stream.flush()
+            os.fsync(self.stream.fileno())
+            self.stream.close()
+            self.stream = None
+
+    def flush(self, timeout=5.0):
+        """Blocks until everything enqueued so far is written to the OS."""
+        target = self.enqueued
+        deadline = time.monotonic() + timeout
+        with self.idle:
+            # enqueued counts accepted records only, so dropped ones never count towards it
+            while self.written < target and self.is_alive():
+                self.wakeup.set()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.idle.wait(min(remaining, 0.05))
+        return True
+
+    def stop(self, timeout=5.0):
+        self.stopping = True
+        self.wakeup.set()
+        self.join(timeout)
+
 class JSONLogger:
-    """Handles appending detection events and metrics to a newline-delimited JSON file with rotation."""
+    """
+    Appends detection events and metrics to a newline-delimited JSON file with rotation.
+
+    write_log() only enqueues; serialization and file I/O happen on a background
+    writer thread. Callers must not mutate a payload after handing it over.
+    """
     
-    _logger = None
+    _writer = None
+    _lock = threading.Lock()
+    _settings = {}
 
     @classmethod
-    def _get_logger(cls):
-        if cls._logger is None:
-            cls._logger = logging.getLogger("detection-json")
-            cls._logger.setLevel(logging.INFO)
-            cls._logger.propagate = False # Don't send to root logger
-            
-            # Rotating File Handler for JSON logs
-            # 10MB limit, keep 5 backups
-            handler = RotatingFileHandler(DETECTION_LOG_FILE, maxBytes=10*1024*1024, backupCount=5)
-            # Use a formatter that just outputs the message (which will be JSON)
-            formatter = logging.Formatter('%(message)s')
-            handler.setFormatter(formatter)
-            cls._logger.addHandler(handler)
-        return cls._logger
+    def configure(cls, **settings):
+        """Overrides writer settings (path, max_bytes, backup_count, batch_size,
+        flush_interval, fsync_interval, max_pending). Must run before the first write."""
+        cls._settings.update(settings)
+
+    @classmethod
+    def _get_writer(cls):
+        writer = cls._writer
+        if writer is None:
+            with cls._lock:
+                if cls._writer is None:
+                    settings = dict(cls._settings)
+                    path = settings.pop("path", DETECTION_LOG_FILE)
+                    cls._writer = _NDJSONWriter(path, **settings)
+                    cls._writer.start()
+                    atexit.register(cls.close)
+                writer = cls._writer
+        return writer
 
     @staticmethod
     def write_log(data):
         try:
-            logger = JSONLogger._get_logger()
-            # Convert data to compact JSON string without newlines within the object
-            json_line = json.dumps(data, separators=(',', ':'))
-            logger.info(json_line)
+            writer = JSONLogger._get_writer()
+            if not writer.put(data) and writer.dropped % 1000 == 1:
+                get_app_logger().warning(f"Detection log backlog full, dropped {writer.dropped} records")
         except Exception as e:
             get_app_logger().error(f"Failed to write JSON log: {e}")
 
+    @classmethod
+    def flush(cls, timeout=5.0):
+        if cls._writer is not None:
+            return cls._writer.flush(timeout)
+        return True
+
+    @classmethod
+    def stats(cls):
+        """Writer counters: records pending in memory, enqueued, written and dropped so far."""
+        writer = cls._writer
+        if writer is None:
+            return {"pending": 0, "enqueued": 0, "written": 0, "dropped": 0}
+        return {"pending": len(writer.pending), "enqueued": writer.enqueued,
+                "written": writer.written, "dropped": writer.dropped}
+
+    @classmethod
+    def close(cls):
+        with cls._lock:
+            writer, cls._writer = cls._writer, None
+        if writer is not None:
+            writer.stop()
+
 def get_app_logger(name="roboi-edge"):
     """Returns a standard Python logger that writes to console and file."""
     logger = logging.getLogger(name)
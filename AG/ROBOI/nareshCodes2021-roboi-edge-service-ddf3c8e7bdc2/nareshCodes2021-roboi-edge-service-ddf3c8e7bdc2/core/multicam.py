@@ -0,0 +1,139 @@
+import time
+import threading
+import cv2
+from core.logger import get_app_logger
+
+logger = get_app_logger("multicam")
+
+RECONNECT_DELAY = 2.0 # Seconds before reopening a stream that stopped delivering frames
+
+
+class LatestFrameReader(threading.Thread):
+    """
+    Reads one camera on its own thread and keeps only the newest frame.
+
+    Consumers call latest() whenever they are ready for more work and always get
+    the most recent frame, so a slow consumer skips stale frames instead of
+    falling behind the stream. `loop=True` rewinds local files at EOF and
+    `realtime=True` paces them at their native FPS, which makes a video file
+    behave like a live camera.
+    """
+
+    def __init__(self, name, uri, new_frame=None, loop=False, realtime=False):
+        super().__init__(name=f"reader-{name}", daemon=True)
+        self.cam_name = name
+        self.uri = uri
+        self.new_frame = new_frame # shared threading.Event, set on every new frame
+        self.loop = loop
+        self.realtime = realtime
+
+        self.cap = self._open()
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = int(self.cap.get(cv2.CAP_PROP_FPS)) or 15
+
+        self.lock = threading.Lock()
+        self.frame = None
+        self.seq = 0
+        self.captured_at = 0.0
+        self.consumed_seq = 0
+        self.frames_read = 0
+        self.frames_skipped = 0 # overwritten before anyone consumed them
+        self.stopping = False
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.uri)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1) # Internal buffer size 1
+        return cap
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def run(self):
+        period = 1.0 / self.fps if self.realtime else 0.0
+        next_due = time.monotonic()
+        while not self.stopping:
+            ret, frame = self.cap.read()
+            if not ret:
+                if self.loop:
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    ret, frame = self.cap.read()
+                if not ret:
+                    logger.warning(f"Frame Loss: {self.cam_name} stopped delivering frames, reconnecting in {RECONNECT_DELAY}s")
+                    self.cap.release()
+                    time.sleep(RECONNECT_DELAY)
+                    self.cap = self._open()
+                    continue
+
+            with self.lock:
+                if self.seq > self.consumed_seq:
+                    self.frames_skipped += 1
+                self.frame = frame
+                self.seq += 1
+                self.captured_at = time.time()
+                self.frames_read += 1
+            if self.new_frame is not None:
+                self.new_frame.set()
+
+            if period:
+                next_due += period
+                delay = next_due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_due = time.monotonic()
+        self.cap.release()
+
+    def latest(self):
+        """Returns (frame, seq, captured_at) if a frame arrived since the last call, else None."""
+        with self.lock:
+            if self.seq == self.consumed_seq:
+                return None
+            self.consumed_seq = self.seq
+            return self.frame, self.seq, self.captured_at
+
+    def stop(self):
+        self.stopping = True
+
+
+def collect_batch(readers):
+    """Newest unseen frame of every reader: [(reader, frame, captured_at)]."""
+    batch = []
+    for reader in readers:
+        item = reader.latest()
+        if item is not None:
+            frame, _, captured_at = item
+            batch.append((reader, frame, captured_at))
+    return batch
+
+
+def results_to_frame_objects(result):
+    """Converts one ultralytics Results into the standard frame_objects list."""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+    names = result.names
+    frame_objects = []
+    # One device->host transfer per tensor instead of one per box attribute
+    for (x1, y1, x2, y2), cls, conf in zip(boxes.xyxy.tolist(), boxes.cls.tolist(), boxes.conf.tolist()):
+        frame_objects.append({
+            "label": names[int(cls)],
+            "class_id": int(cls),
+            "confidence": float(conf),
+            "bbox": {
+                "top": int(y1),
+                "left": int(x1),
+                "width": int(x2 - x1),
+                "height": int(y2 - y1)
+            }
+        })
+    return frame_objects
+
+
+def batched_inference(model, frames, max_batch=8, **kwargs):
+    """Runs the model over `frames` in chunks of at most `max_batch`; returns one Results per frame."""
+    results = []
+    step = max_batch if max_batch > 0 else max(1, len(frames))
+    for i in range(0, len(frames), step):
+        results.extend(model(frames[i:i + step], verbose=False, **kwargs))
+    return results
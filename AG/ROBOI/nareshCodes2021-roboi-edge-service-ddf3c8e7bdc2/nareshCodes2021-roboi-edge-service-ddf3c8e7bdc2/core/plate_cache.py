@@ -0,0 +1,251 @@
+import re
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+_NOT_PLATE_CHARS = re.compile(r"[^A-Z0-9]")
+
+
+def crop_hash(crop, width=32, height=8):
+    """
+    256-bit average hash of a plate crop: one bit per cell of a plate-shaped
+    grid, set where the cell is brighter than the crop mean. Averaging over
+    cells keeps it stable under sensor noise and small scale or lighting
+    changes, unlike difference hashes, which flip randomly on the flat
+    background of a plate.
+    """
+    gray = crop if crop.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(small > small.mean()).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def normalize_plate(text):
+    """Voting key for an OCR read: upper case, letters and digits only."""
+    return _NOT_PLATE_CHARS.sub("", text.upper())
+
+
+def same_plate(a, b, max_diff=1):
+    """True if two normalized plate texts differ in at most `max_diff` characters."""
+    if len(a) != len(b):
+        return False
+    return sum(1 for x, y in zip(a, b) if x != y) <= max_diff
+
+
+class PlateEntry:
+    """Reads and votes collected for one vehicle's plate."""
+    __slots__ = ("key", "hash", "box", "votes", "reads", "last_read", "last_seen", "text", "score", "candidate")
+
+    def __init__(self, key, crop_hash_value, box, frame_id):
+        self.key = key
+        self.hash = crop_hash_value
+        self.box = box # last (x1, y1, x2, y2), None if the caller gives no boxes
+        self.votes = {} # normalized text -> [count, score sum, raw text]
+        self.reads = 0
+        self.last_read = None
+        self.last_seen = frame_id
+        self.text = None # consensus text so far
+        self.score = 0.0 # mean OCR score of the consensus text
+        self.candidate = None # entry this one may be the same vehicle as, pending a verification read
+
+    def add_read(self, read):
+        self.reads += 1
+        if not read:
+            return
+        text, score = read
+        norm = normalize_plate(text)
+        if not norm:
+            return
+        vote = self.votes.get(norm)
+        if vote is None:
+            vote = self.votes[norm] = [0, 0.0, text]
+        vote[0] += 1
+        vote[1] += score
+        vote[2] = text
+        count, total, raw = max(self.votes.values(), key=lambda v: (v[0], v[1]))
+        self.text = raw
+        self.score = total / count
+
+    def agreeing(self):
+        if self.text is None:
+            return 0
+        # text may be borrowed from a candidate entry before this one has votes
+        return self.votes.get(normalize_plate(self.text), (0,))[0]
+
+
+class PlateCache:
+    """
+    License plate OCR results per vehicle, so a plate is read a handful of times
+    instead of in every frame it stays visible.
+
+    Entries are keyed by tracker id. A crop without one, or with an id the cache
+    has not seen (tracker switch), is matched to a recent entry by crop hash
+    within `hash_distance` bits and, when boxes are given, a box centre within
+    `max_shift` box widths of where that entry was last seen. Plates of the same
+    format hash alike and vehicles stop at the same bays, so such a match is
+    only trusted outright for an untracked plate seen again within `max_gap`
+    frames; otherwise one verification read decides whether it joins the
+    matched entry or starts its own.
+
+    An entry stops being re-read once `agree` reads vote for the same text with
+    a mean score of at least `confident`, or after `max_reads`. Until then it is
+    re-read every `reread_interval` frames scaled by the current consensus
+    score, so weak reads are retried sooner.
+    """
+
+    def __init__(self, agree=2, confident=0.9, max_reads=5, reread_interval=15, hash_distance=20,
+                 max_shift=1.0, max_gap=5, ttl_frames=300, max_entries=512):
+        self.agree = agree
+        self.confident = confident
+        self.max_reads = max_reads
+        self.reread_interval = reread_interval
+        self.hash_distance = hash_distance
+        self.max_shift = max_shift
+        self.max_gap = max_gap
+        self.ttl_frames = ttl_frames
+        self.max_entries = max_entries
+
+        self.entries = OrderedDict() # key -> PlateEntry, least recently seen first
+        self.aliases = {} # tracker id -> key of the entry it was merged into
+        self.next_key = 0
+        self.lookups = 0
+        self.reads = 0
+        self.hash_matches = 0
+        self.merges = 0
+        self.splits = 0
+        self.evictions = 0
+
+    def settled(self, entry):
+        if entry.reads >= self.max_reads:
+            return True
+        return entry.agreeing() >= self.agree and entry.score >= self.confident
+
+    def _near(self, a, b):
+        if a is None or b is None:
+            return True
+        limit = self.max_shift * max(a[2] - a[0], b[2] - b[0], 1)
+        return (abs((a[0] + a[2]) - (b[0] + b[2])) <= 2 * limit and
+                abs((a[1] + a[3]) - (b[1] + b[3])) <= 2 * limit)
+
+    def _find_by_hash(self, value, frame_id, box):
+        # Entries already matched in this frame belong to another plate in view
+        best, best_distance = None, self.hash_distance + 1
+        for entry in reversed(self.entries.values()):
+            if entry.last_seen == frame_id or entry.candidate is not None or not self._near(entry.box, box):
+                continue
+            distance = hamming(entry.hash, value)
+            if distance < best_distance:
+                best, best_distance = entry, distance
+                if distance == 0:
+                    break
+        return best
+
+    def _expire(self, frame_id):
+        while self.entries:
+            key, entry = next(iter(self.entries.items()))
+            if len(self.entries) <= self.max_entries and frame_id - entry.last_seen <= self.ttl_frames:
+                break
+            del self.entries[key]
+            self.evictions += 1
+        if len(self.aliases) > 2 * self.max_entries:
+            self.aliases = {tid: key for tid, key in self.aliases.items() if key in self.entries}
+
+    def _new_entry(self, track_id, value, box, frame_id):
+        if track_id is not None:
+            key = ("track", track_id)
+        else:
+            key = ("hash", self.next_key)
+            self.next_key += 1
+        entry = self.entries[key] = PlateEntry(key, value, box, frame_id)
+        return entry
+
+    def lookup(self, track_id, crop, frame_id, box=None):
+        """
+        Returns (entry, need_read). When need_read is True the caller should OCR
+        the crop and pass the result to record(); otherwise entry.text is the
+        cached consensus (None if nothing has been read yet). `box` is the plate's
+        (x1, y1, x2, y2) in the frame, used to gate hash matches by position.
+        """
+        self.lookups += 1
+        entry = None
+        value = None
+        if track_id is not None:
+            entry = self.entries.get(self.aliases.get(track_id, ("track", track_id)))
+        if entry is None:
+            value = crop_hash(crop)
+            match = self._find_by_hash(value, frame_id, box)
+            if match is not None:
+                self.hash_matches += 1
+            if match is not None and track_id is None and frame_id - match.last_seen <= self.max_gap:
+                entry = match
+            else:
+                entry = self._new_entry(track_id, value, box, frame_id)
+                if match is not None and match.text is not None:
+                    entry.candidate = match
+
+        entry.last_seen = frame_id
+        entry.box = box
+        if value is not None:
+            entry.hash = value # follow gradual changes of scale and lighting
+        self.entries.move_to_end(entry.key)
+        self._expire(frame_id)
+
+        if entry.candidate is not None:
+            # Show the matched vehicle's plate until the verification read says otherwise
+            if entry.last_read is None:
+                entry.last_read = frame_id
+                return entry, True
+            if entry.text is None:
+                entry.text, entry.score = entry.candidate.text, entry.candidate.score
+        if self.settled(entry):
+            return entry, False
+        if entry.last_read is not None:
+            interval = max(1, int(self.reread_interval * entry.score))
+            if frame_id - entry.last_read < interval:
+                return entry, False
+        if value is None:
+            entry.hash = crop_hash(crop) # kept fresh for matching after a tracker id switch
+        entry.last_read = frame_id
+        return entry, True
+
+    def record(self, entry, read):
+        """Adds one OCR result, (text, score) or None, to the entry's votes."""
+        self.reads += 1
+        candidate = entry.candidate
+        if candidate is None:
+            entry.add_read(read)
+            return
+        if not read:
+            entry.reads += 1
+            return
+        entry.candidate = None
+        if candidate.key in self.entries and same_plate(normalize_plate(read[0]), normalize_plate(candidate.text)):
+            # Same vehicle: fold into the matched entry and route its tracker id there
+            self.merges += 1
+            candidate.add_read(read)
+            candidate.last_seen = entry.last_seen
+            candidate.box = entry.box
+            candidate.hash = entry.hash
+            del self.entries[entry.key]
+            self.entries.move_to_end(candidate.key)
+            if entry.key[0] == "track":
+                self.aliases[entry.key[1]] = candidate.key
+            entry.text, entry.score = candidate.text, candidate.score
+        else:
+            self.splits += 1
+            entry.add_read(read)
+
+    def stats(self):
+        return {
+            "lookups": self.lookups,
+            "ocr_reads": self.reads,
+            "ocr_avoided": self.lookups - self.reads,
+            "hash_matches": self.hash_matches,
+            "merges": self.merges,
+            "splits": self.splits,
+            "entries": len(self.entries),
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,208 @@
+import math
+
+# --- DEFAULT LIMITS (policy.crowd_limits) ---
+DEFAULT_PEOPLE_LIMIT = 5      # crowd_policy_violation above this many people
+DEFAULT_VEHICLE_LIMIT = 12    # vehicle_crowd_policy_violation above this many vehicles
+WINDOW_RESOLUTION = 1.0       # Seconds per sliding-window bucket
+
+
+class SlidingWindowMean:
+    """
+    Mean of the samples seen in the last `window` seconds.
+    Samples are summed into a fixed ring of `window / resolution` buckets, so an
+    update costs O(1) and memory does not grow with the frame rate.
+    """
+    __slots__ = ("resolution", "slots", "sums", "counts", "head", "total", "n")
+
+    def __init__(self, window, resolution=WINDOW_RESOLUTION):
+        self.resolution = resolution
+        self.slots = max(1, int(math.ceil(window / resolution)))
+        self.sums = [0.0] * self.slots
+        self.counts = [0] * self.slots
+        self.head = None # id of the newest bucket
+        self.total = 0.0
+        self.n = 0
+
+    def add(self, value, now):
+        slot_id = int(now // self.resolution)
+        if slot_id != self.head:
+            # Expire buckets that fell out of the window (at most `slots` of them)
+            start = slot_id - self.slots + 1 if self.head is None else max(self.head + 1, slot_id - self.slots + 1)
+            for sid in range(start, slot_id + 1):
+                i = sid % self.slots
+                self.total -= self.sums[i]
+                self.n -= self.counts[i]
+                self.sums[i] = 0.0
+                self.counts[i] = 0
+            self.head = slot_id
+        i = slot_id % self.slots
+        self.sums[i] += value
+        self.counts[i] += 1
+        self.total += value
+        self.n += 1
+        return self.total / self.n
+
+
+class DwellTimer:
+    """Seconds a condition has been continuously true."""
+    __slots__ = ("since",)
+
+    def __init__(self):
+        self.since = None
+
+    def update(self, active, now):
+        if not active:
+            self.since = None
+            return 0.0
+        if self.since is None:
+            self.since = now
+        return now - self.since
+
+
+class CountRule:
+    """
+    Fires `alert` when the count of `label_class` exceeds `limit`.
+    With `window` > 0 the count is averaged over that many seconds; with
+    `dwell` > 0 the condition must hold that long before it fires.
+    """
+    __slots__ = ("label_class", "limit", "alert", "window", "dwell", "key", "stateful")
+
+    def __init__(self, label_class, limit, alert, window=0.0, dwell=0.0):
+        self.label_class = label_class
+        self.limit = limit
+        self.alert = alert
+        self.window = window
+        self.dwell = dwell
+        # Runtime state is keyed by this, so counters survive a reload that leaves the rule unchanged
+        self.key = (alert, limit, window, dwell)
+        self.stateful = window > 0 or dwell > 0
+
+    def evaluate(self, state, count, now):
+        if not self.stateful:
+            return count > self.limit
+        rule_state = state.get(self.key)
+        if rule_state is None:
+            rule_state = state[self.key] = (
+                SlidingWindowMean(self.window) if self.window > 0 else None,
+                DwellTimer() if self.dwell > 0 else None,
+            )
+        window, dwell = rule_state
+        value = window.add(count, now) if window is not None else count
+        active = value > self.limit
+        if dwell is not None:
+            return dwell.update(active, now) >= self.dwell and active
+        return active
+
+
+class CameraRules:
+    """
+    Compiled policy of one camera: opening hours as minutes of the day, count
+    rules indexed by object class, and the identity allowlist if it has one.
+    """
+    __slots__ = ("name", "open_at", "close_at", "rules_by_class", "allowlist", "stateful")
+
+    def __init__(self, name, hours, rules_by_class, allowlist=None):
+        open_h, open_m, close_h, close_m = hours
+        self.name = name
+        self.open_at = open_h * 60 + open_m
+        self.close_at = close_h * 60 + close_m
+        self.rules_by_class = rules_by_class # {label_class: [CountRule]}
+        self.allowlist = allowlist
+        # Windowed / dwell rules must see every frame, empty ones included
+        self.stateful = any(rule.stateful for rules in rules_by_class.values() for rule in rules)
+
+    def time_alerts(self, current_time):
+        alerts = []
+        if current_time.weekday() == 6:
+            alerts.append("restricted_access_sunday")
+        minute_of_day = current_time.hour * 60 + current_time.minute
+        if minute_of_day < self.open_at:
+            alerts.append("restricted_access_before_hours")
+        elif minute_of_day >= self.close_at:
+            alerts.append("restricted_access_after_hours")
+        return alerts
+
+    def count_alerts(self, state, people, vehicles, now):
+        """Updates every rule's counters and returns the alerts that fire."""
+        alerts = []
+        for label_class, rules in self.rules_by_class.items():
+            count = people if label_class == "people" else vehicles
+            for rule in rules:
+                if rule.evaluate(state, count, now):
+                    alerts.append(rule.alert)
+        return alerts
+
+    def refine_identities(self, site_alerts, identities):
+        """
+        Boss-cabin style identity check: an allowlisted face suppresses the
+        alerts; otherwise recognized people replace them with per-identity tags.
+        Without any recognized face the alerts are kept.
+        """
+        unauthorized = []
+        for identity in identities:
+            if identity in self.allowlist:
+                return []
+            unauthorized.append(identity)
+        if not unauthorized:
+            return site_alerts
+        tags = []
+        for identity in unauthorized:
+            tag = "unauthorized_stranger" if identity == "stranger" else f"unauthorized_person_{identity}"
+            if tag not in tags:
+                tags.append(tag)
+        return tags
+
+    def evaluate(self, state, people, vehicles, identities, current_time, now):
+        """
+        Site alerts for one frame; `state` is this camera's counter dict.
+        As before, policies only apply while people are present, so a frame
+        without people returns at once unless windowed / dwell counters
+        need to see it.
+        """
+        if not people and not self.stateful:
+            return []
+        count_alerts = self.count_alerts(state, people, vehicles, now) if self.rules_by_class else None
+        if not people:
+            return []
+        site_alerts = self.time_alerts(current_time)
+        if count_alerts:
+            site_alerts += count_alerts
+        if self.allowlist is not None and site_alerts:
+            site_alerts = self.refine_identities(site_alerts, identities)
+        return site_alerts
+
+
+class PolicySet:
+    """
+    The `policy:` config section compiled into per-camera CameraRules.
+    Cameras not named by any policy share the default (office hours) rules.
+    """
+
+    def __init__(self, policy):
+        hours = {}
+        for key in ("boss_cabin", "office"):
+            p = policy.get(key, {})
+            hours[key] = (p.get('open_hour', 0), p.get('open_min', 0), p.get('close_hour', 23), p.get('close_min', 59))
+
+        limits = policy.get('crowd_limits', {}) or {}
+        window = float(limits.get('window_seconds', 0))
+        dwell = float(limits.get('dwell_seconds', 0))
+        crowd_rules = {
+            "people": [CountRule("people", limits.get('people', DEFAULT_PEOPLE_LIMIT), "crowd_policy_violation", window, dwell)],
+            "vehicles": [CountRule("vehicles", limits.get('vehicles', DEFAULT_VEHICLE_LIMIT), "vehicle_crowd_policy_violation", window, dwell)],
+        }
+
+        self.crowd_controlled_zones = frozenset(policy.get('crowd_controlled_zones', []))
+        self.boss_allowlist = frozenset(name.lower() for name in policy.get('boss_cabin', {}).get('allowlist', []))
+        self.default = CameraRules("default", hours['office'], {})
+        self.cameras = {}
+        for name in self.crowd_controlled_zones | {"boss_cabin"}:
+            self.cameras[name] = CameraRules(
+                name,
+                hours['boss_cabin'] if name == "boss_cabin" else hours['office'],
+                crowd_rules if name in self.crowd_controlled_zones else {},
+                self.boss_allowlist if name == "boss_cabin" else None,
+            )
+
+    def for_camera(self, name):
+        return self.cameras.get(name, self.default)
@@ -0,0 +1,90 @@
+import time
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageTimer:
+    """
+    Per-stage timing counters for runner loops (capture, inference, analytics, ...).
+
+    Keeps running count / total / max per stage instead of individual samples,
+    so it is cheap enough to leave on for every frame. summary() reports the
+    current window; maybe_log() logs it every `log_every` seconds and starts a
+    new window. keep_samples=True also keeps every sample so summary() can add
+    p50 / p95 / p99 (offline tools only, memory grows with the run).
+    """
+
+    def __init__(self, log_every=30.0, keep_samples=False):
+        self.log_every = log_every
+        self.keep_samples = keep_samples
+        self.reset()
+
+    def reset(self):
+        self.stats = {}  # name -> [count, total, max]
+        self.samples = {}  # name -> [seconds, ...] when keep_samples
+        self.frames = 0
+        self.window_start = time.perf_counter()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add(self, name, seconds):
+        s = self.stats.get(name)
+        if s is None:
+            self.stats[name] = [1, seconds, seconds]
+        else:
+            s[0] += 1
+            s[1] += seconds
+            if seconds > s[2]:
+                s[2] = seconds
+        if self.keep_samples:
+            self.samples.setdefault(name, []).append(seconds)
+
+    def frame_done(self, frames=1):
+        self.frames += frames
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.window_start
+        stages = {}
+        for name, (count, total, peak) in self.stats.items():
+            stages[name] = {
+                "count": count,
+                "mean_ms": round(total / count * 1000, 3),
+                "max_ms": round(peak * 1000, 3),
+                "share": round(total / elapsed, 3) if elapsed else 0.0, # fraction of wall time
+            }
+            values = self.samples.get(name)
+            if values:
+                values = sorted(values)
+                for q in (50, 95, 99):
+                    stages[name][f"p{q}_ms"] = round(values[min(len(values) - 1, len(values) * q // 100)] * 1000, 3)
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "frames": self.frames,
+            "fps": round(self.frames / elapsed, 2) if elapsed else 0.0,
+            "stages": stages,
+        }
+
+    def maybe_log(self, logger, extra=None):
+        if time.perf_counter() - self.window_start < self.log_every:
+            return False
+        summary = self.summary()
+        parts = [f"{name} {s['mean_ms']:.1f}ms" for name, s in summary["stages"].items()]
+        suffix = f" | {extra}" if extra else ""
+        logger.info(f"Pipeline: {summary['fps']:.1f} fps | " + ", ".join(parts) + suffix)
+        self.reset()
+        return True
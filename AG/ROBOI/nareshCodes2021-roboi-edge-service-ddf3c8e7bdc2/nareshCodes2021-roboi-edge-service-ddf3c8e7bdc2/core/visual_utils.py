@@ -1,3 +1,4 @@
+import os
 import cv2
 from core.logger import get_app_logger
 
@@ -64,3 +65,36 @@ def draw_annotations(frame, objects):
             continue
             
     return frame
+
+
+class AnnotatedFrameSampler:
+    """
+    Headless stand-in for the preview window: writes every `every`-th frame of
+    each camera, annotated, to `out_dir/<cam>/<frame_id>.jpg`. every <= 0 disables it.
+    """
+
+    def __init__(self, out_dir, every=0, jpeg_quality=85):
+        self.out_dir = out_dir
+        self.every = every
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        self.counts = {}
+        self.saved = 0
+
+    def offer(self, cam_name, frame, objects, frame_id):
+        """Returns the saved path, or None if this frame is not sampled."""
+        if self.every <= 0:
+            return None
+        n = self.counts.get(cam_name, 0)
+        self.counts[cam_name] = n + 1
+        if n % self.every:
+            return None
+        cam_dir = os.path.join(self.out_dir, str(cam_name))
+        os.makedirs(cam_dir, exist_ok=True)
+        path = os.path.join(cam_dir, f"{frame_id}.jpg")
+        try:
+            cv2.imwrite(path, draw_annotations(frame.copy(), objects), self.params)
+        except Exception as e:
+            logger.error(f"Failed to save annotated sample for {cam_name}: {e}")
+            return None
+        self.saved += 1
+        return path
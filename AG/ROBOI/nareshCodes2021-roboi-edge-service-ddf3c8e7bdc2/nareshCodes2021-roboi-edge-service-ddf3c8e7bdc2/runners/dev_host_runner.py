@@ -3,6 +3,8 @@ import os
 import cv2
 import time
 import yaml
+import argparse
+import threading
 import traceback
 from ultralytics import YOLO
 
@@ -11,9 +13,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.analytics_engine import AnalyticsEngine, CONFIG_PATH
 from tools.capture_video import VideoRecorder
-from core.visual_utils import draw_annotations
+from core.visual_utils import draw_annotations, AnnotatedFrameSampler
 from core.face_recognizer import RoboFaceID
-from core.logger import get_app_logger
+from core.logger import get_app_logger, JSONLogger
+from core.stage_timer import StageTimer
+from core.multicam import LatestFrameReader, collect_batch, results_to_frame_objects, batched_inference
 
 # Initialize Logger
 logger = get_app_logger("dev-runner")
@@ -38,8 +42,147 @@ MODEL_PATH = "models/exports/yolo11_finetuned.pt"
 MODEL_CONF = 0.15 # Lowered from default 0.25 to catch small fires
 RTSP_URIS = [cam['uri'] for cam in camera_config.values()]
 CAMERA_MAP = {int(k): cam['name'] for k, cam in camera_config.items()}
+MAX_BATCH = 8 # Frames per batched YOLO call
+SAMPLE_DIR = "data/annotated_samples" # Headless mode: sampled annotated frames
 
-def main():
+def log_fire_diagnostics(frame_objects, cam_name):
+    # Diagnostic: Print all raw detections for debugging
+    for obj in frame_objects:
+        if obj["label"] in ["fire", "smoke"]:
+            logger.info(f"DIAGNOSTIC Detection: {obj['label']} @ {obj['confidence']:.2f} confidence from {cam_name}")
+
+def log_pipeline_stats(timer):
+    """Periodic per-stage timing line, with the detection logger's queue counters."""
+    timer.maybe_log(logger, extra=f"detection log {JSONLogger.stats()}")
+
+def handle_camera_frame(cam_name, frame, frame_objects, frame_count, engine, face_engine, recorder, det_threshold,
+                        timer, headless=False, sampler=None):
+    """Face enrichment, recording, analytics and display (or sampling when headless) for one camera's frame."""
+    # 1. Enrich Metadata (Face Recognition happens here - INLINE)
+    with timer.stage("face"):
+        if face_engine:
+            for obj in frame_objects:
+                label = obj.get("label", "").lower()
+                if label in ["person", "face"]:
+                    bbox = obj.get("bbox", {})
+                    x = bbox.get("left", 0)
+                    y = bbox.get("top", 0)
+                    w = bbox.get("width", 0)
+                    h = bbox.get("height", 0)
+                
+                    bbox_coords = [x, y, x+w, y+h]
+                
+                    try:
+                        # Use frame_count as ID
+                        name, face_conf, face_id = face_engine.recognize(
+                            frame, bbox_coords, frame_count, 
+                            recognition_threshold=engine.recognition_threshold,
+                            detection_threshold=det_threshold
+                        )
+                    
+                        obj["recognition"] = {
+                            "identity": name,
+                            "confidence": face_conf,
+                            "identity_id": face_id
+                        }
+                        obj["display_label"] = f"{name} ({int(face_conf*100)}%)" if name != "Stranger" else "Stranger"
+                    except Exception as e:
+                        logger.warning(f"Metadata enrichment failed: {e}")
+
+    # 2. Add to Recorder Buffer (now has recognition labels)
+    with timer.stage("recorder"):
+        recorder.add_frame(frame, frame_objects=frame_objects)
+
+    # 3. Process Logic (Handles alerts/logging, avoids redundant enrichment)
+    with timer.stage("analytics"):
+        engine.process_frame(cam_name, frame_objects, frame=frame, recorder=recorder, frame_id=frame_count)
+
+    with timer.stage("render"):
+        if headless:
+            # No window: annotate only the frames the sampler keeps
+            if sampler is not None:
+                sampler.offer(cam_name, frame, frame_objects, frame_count)
+        else:
+            # Display Annotated Frame (visual_utils uses engine-enriched metadata)
+            display_frame = draw_annotations(frame.copy(), frame_objects)
+            cv2.imshow(f"Dev Host - {cam_name}", cv2.resize(display_frame, (720, 480)))
+    timer.frame_done()
+
+def run_batched(model, engine, face_engine, det_threshold, timer, headless=False, sampler=None):
+    """
+    Multi-camera mode: one reader thread per camera keeps only its latest frame,
+    and the latest frames of all cameras go through a single batched YOLO call.
+    """
+    new_frame = threading.Event()
+    readers = []
+    recorders = {}
+    for i, uri in enumerate(RTSP_URIS):
+        cam_name = CAMERA_MAP.get(i, f"UNKNOWN_CAM_{i}")
+        try:
+            reader = LatestFrameReader(cam_name, uri, new_frame=new_frame)
+            if not reader.is_opened():
+                logger.error(f"Connection Failed: Could not open RTSP stream for {cam_name}")
+                continue
+            logger.info(f"Initialized recorder for {cam_name} ({reader.width}x{reader.height} @ {reader.fps}fps)")
+            recorders[cam_name] = VideoRecorder(cam_name, resolution=(reader.width, reader.height), fps=reader.fps, buffer_seconds=10, draw_on_video=True)
+            reader.start()
+            readers.append(reader)
+        except Exception as e:
+            logger.error(f"Setup Error for stream {i}: {e}")
+            logger.error(traceback.format_exc())
+
+    if not readers:
+        logger.error("Critical: No active camera streams found. Exiting.")
+        return
+
+    logger.info(f"Starting Batched Dev Host Loop ({len(readers)} cameras, batch <= {MAX_BATCH})...")
+    fps_limit = 15
+    target_frame_time = 1.0 / fps_limit
+    frame_count = 0
+    try:
+        while True:
+            loop_start = time.time()
+            with timer.stage("capture"):
+                batch = collect_batch(readers)
+            if not batch:
+                new_frame.wait(0.1)
+                new_frame.clear()
+                continue
+            frame_count += 1
+
+            try:
+                with timer.stage("inference"):
+                    results = batched_inference(model, [frame for _, frame, _ in batch], max_batch=MAX_BATCH, conf=MODEL_CONF)
+            except Exception as e:
+                logger.error(f"Batched inference failed: {e}")
+                continue
+
+            for (reader, frame, _), result in zip(batch, results):
+                cam_name = reader.cam_name
+                try:
+                    frame_objects = results_to_frame_objects(result)
+                    log_fire_diagnostics(frame_objects, cam_name)
+                    handle_camera_frame(cam_name, frame, frame_objects, frame_count, engine, face_engine, recorders[cam_name], det_threshold,
+                                        timer, headless, sampler)
+                except Exception as e:
+                    logger.error(f"Runtime Error in loop for {cam_name}: {e}")
+
+            log_pipeline_stats(timer)
+            if not headless and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+            # Control FPS
+            elapsed = time.time() - loop_start
+            sleep_time = target_frame_time - elapsed
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+    finally:
+        for reader in readers:
+            reader.stop()
+        for reader in readers:
+            reader.join(timeout=2.0)
+
+def main(batched=False, headless=False, sample_every=0, sample_dir=SAMPLE_DIR, stats_every=30.0):
     caps = []
     recorders = {}
     try:
@@ -50,6 +193,15 @@ def main():
         det_threshold = config.get('analytics', {}).get('face_detection_threshold', 0.6)
         face_engine = RoboFaceID(score_threshold=det_threshold)
         engine = AnalyticsEngine(face_recognizer=face_engine)
+
+        timer = StageTimer(log_every=stats_every)
+        sampler = AnnotatedFrameSampler(sample_dir, every=sample_every) if headless and sample_every > 0 else None
+        if headless:
+            logger.info("Headless mode: no preview windows" + (f", saving every {sample_every}th annotated frame to {sample_dir}" if sampler else ""))
+
+        if batched:
+            run_batched(model, engine, face_engine, det_threshold, timer, headless, sampler)
+            return
         
         # Initialize Recorders & Caps
         for i, uri in enumerate(RTSP_URIS):
@@ -87,89 +239,35 @@ def main():
             
             for cam_id, cam_name, cap in caps:
                 try:
-                    # 1. Flush the buffer
-                    for _ in range(5):
-                        if not cap.grab():
-                            break
+                    with timer.stage("capture"):
+                        # 1. Flush the buffer
+                        for _ in range(5):
+                            if not cap.grab():
+                                break
                     
-                    # 2. Retrieve the latest grabbed frame
-                    ret, frame = cap.retrieve()
-                    if not ret:
-                        ret, frame = cap.read()
+                        # 2. Retrieve the latest grabbed frame
+                        ret, frame = cap.retrieve()
                         if not ret:
-                            logger.warning(f"Frame Loss: Failed to grab frame from {cam_name}")
-                            continue
+                            ret, frame = cap.read()
+                    if not ret:
+                        logger.warning(f"Frame Loss: Failed to grab frame from {cam_name}")
+                        continue
 
                     # Inference
-                    results = model(frame, verbose=False, conf=MODEL_CONF)[0]
-                    
-                    # Diagnostic: Print all raw detections for debugging
-                    for box in results.boxes:
-                        lbl = results.names[int(box.cls[0])]
-                        conf = float(box.conf[0])
-                        if lbl in ["fire", "smoke"]:
-                            logger.info(f"DIAGNOSTIC Detection: {lbl} @ {conf:.2f} confidence from {cam_name}")
-                    
+                    with timer.stage("inference"):
+                        results = model(frame, verbose=False, conf=MODEL_CONF)[0]
                     
                     # Adapt to Standard Format
-                    frame_objects = []
-                    for box in results.boxes:
-                        obj = {
-                            "label": results.names[int(box.cls[0])],
-                            "class_id": int(box.cls[0]),
-                            "confidence": float(box.conf[0]),
-                            "bbox": {
-                                "top": int(box.xyxy[0][1]),
-                                "left": int(box.xyxy[0][0]),
-                                "width": int(box.xyxy[0][2] - box.xyxy[0][0]),
-                                "height": int(box.xyxy[0][3] - box.xyxy[0][1])
-                            }
-                        }
-                        frame_objects.append(obj)
-
-                    # 1. Enrich Metadata (Face Recognition happens here - INLINE)
-                    if face_engine:
-                        for obj in frame_objects:
-                            label = obj.get("label", "").lower()
-                            if label in ["person", "face"]:
-                                bbox = obj.get("bbox", {})
-                                x = bbox.get("left", 0)
-                                y = bbox.get("top", 0)
-                                w = bbox.get("width", 0)
-                                h = bbox.get("height", 0)
-                                
-                                bbox_coords = [x, y, x+w, y+h]
-                                
-                                try:
-                                    # Use frame_count as ID
-                                    name, face_conf, face_id = face_engine.recognize(
-                                        frame, bbox_coords, frame_count, 
-                                        recognition_threshold=engine.recognition_threshold,
-                                        detection_threshold=det_threshold
-                                    )
-                                    
-                                    obj["recognition"] = {
-                                        "identity": name,
-                                        "confidence": face_conf,
-                                        "identity_id": face_id
-                                    }
-                                    obj["display_label"] = f"{name} ({int(face_conf*100)}%)" if name != "Stranger" else "Stranger"
-                                except Exception as e:
-                                    logger.warning(f"Metadata enrichment failed: {e}")
-
-                    # 2. Add to Recorder Buffer (now has recognition labels)
-                    recorders[cam_name].add_frame(frame, frame_objects=frame_objects)
-
-                    # 3. Process Logic (Handles alerts/logging, avoids redundant enrichment)
-                    engine.process_frame(cam_name, frame_objects, frame=frame, recorder=recorders[cam_name], frame_id=frame_count)
-
-                    # Display Annotated Frame (visual_utils uses engine-enriched metadata)
-                    display_frame = draw_annotations(frame.copy(), frame_objects)
-                    cv2.imshow(f"Dev Host - {cam_name}", cv2.resize(display_frame, (720, 480)))
+                    frame_objects = results_to_frame_objects(results)
+                    log_fire_diagnostics(frame_objects, cam_name)
+
+                    handle_camera_frame(cam_name, frame, frame_objects, frame_count, engine, face_engine, recorders[cam_name], det_threshold,
+                                        timer, headless, sampler)
                 except Exception as e:
                     logger.error(f"Runtime Error in loop for {cam_name}: {e}")
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            log_pipeline_stats(timer)
+            if not headless and cv2.waitKey(1) & 0xFF == ord('q'):
                 break
                 
             # Control FPS
@@ -186,8 +284,17 @@ def main():
     finally:
         for _, _, cap in caps:
             cap.release()
-        cv2.destroyAllWindows()
+        if not headless:
+            cv2.destroyAllWindows()
         logger.info("Cleanup complete. Resource released.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Dev host runner (x86, OpenCV + Ultralytics)")
+    parser.add_argument("--batched", action="store_true", help="Per-camera reader threads and one batched YOLO call across cameras")
+    parser.add_argument("--headless", action="store_true", help="No preview windows; skip annotation rendering")
+    parser.add_argument("--sample-every", type=int, default=0, help="Headless: save every Nth annotated frame per camera (0 = off)")
+    parser.add_argument("--sample-dir", default=SAMPLE_DIR)
+    parser.add_argument("--stats-every", type=float, default=30.0, help="Seconds between per-stage timing log lines")
+    args = parser.parse_args()
+    main(batched=args.batched, headless=args.headless, sample_every=args.sample_every,
+         sample_dir=args.sample_dir, stats_every=args.stats_every)
\ No newline at end of file
@@ -1,9 +1,15 @@
 import cv2
 import sys
 import os
+import json
 import argparse
 from ultralytics import YOLO
 
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.stage_timer import StageTimer
+
 def main():
     parser = argparse.ArgumentParser(description="Simple Host Runner for YOLO on Video")
     parser.add_argument("--video", type=str, required=True, help="Path to input video file")
@@ -15,6 +21,9 @@ def main():
     parser.add_argument("--width", type=int, default=1920, help="Output video width")
     parser.add_argument("--height", type=int, default=1080, help="Output video height")
     parser.add_argument("--fps", type=float, default=30.0, help="Output video FPS")
+    parser.add_argument("--headless", action="store_true", help="Detections only: no rendering, no output video")
+    parser.add_argument("--sample-every", type=int, default=0, help="Headless: save every Nth annotated frame as JPEG (0 = off)")
+    parser.add_argument("--sample-dir", type=str, default="data/annotated_samples", help="Headless: directory for sampled frames")
     args = parser.parse_args()
 
     # Check input file
@@ -61,29 +70,47 @@ def main():
         cap.set(cv2.CAP_PROP_POS_MSEC, start_seconds * 1000)
 
     # Setup Writer
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(args.output, fourcc, args.fps, (args.width, args.height))
-
+    out = None
+    if not args.headless:
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(args.output, fourcc, args.fps, (args.width, args.height))
+    elif args.sample_every > 0:
+        os.makedirs(args.sample_dir, exist_ok=True)
+
+    timer = StageTimer()
     frame_count = 0
+    detections = 0
     
     try:
         while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Resize
-            frame = cv2.resize(frame, (args.width, args.height))
+            with timer.stage("capture"):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                # Resize
+                frame = cv2.resize(frame, (args.width, args.height))
 
             frame_count += 1
             if frame_count % 50 == 0:
                 print(f"Processing frame {frame_count}/{total_frames}...")
 
             # Inference
-            results = model(frame, conf=args.conf, verbose=False)[0]
+            with timer.stage("inference"):
+                results = model(frame, conf=args.conf, verbose=False)[0]
+            detections += len(results.boxes)
+            timer.frame_done()
+
+            if args.headless:
+                # Only the sampled frames are ever drawn
+                if args.sample_every > 0 and frame_count % args.sample_every == 0:
+                    with timer.stage("render"):
+                        cv2.imwrite(os.path.join(args.sample_dir, f"frame_{frame_count:06d}.jpg"), results.plot())
+                continue
 
             # Draw
-            annotated_frame = results.plot()
+            with timer.stage("render"):
+                annotated_frame = results.plot()
 
             # Show
             if args.show:
@@ -92,7 +119,8 @@ def main():
                     break
 
             # Write
-            out.write(annotated_frame)
+            with timer.stage("write"):
+                out.write(annotated_frame)
 
     except KeyboardInterrupt:
         print("Interrupted by user.")
@@ -100,10 +128,17 @@ def main():
         print(f"Error during processing: {e}")
     finally:
         cap.release()
-        out.release()
-        if args.show:
+        if out is not None:
+            out.release()
+        if args.show and not args.headless:
             cv2.destroyAllWindows()
-        print(f"Done! Saved to {args.output}")
+        summary = timer.summary()
+        summary["detections"] = detections
+        print(f"Stage timings: {json.dumps(summary)}")
+        if out is not None:
+            print(f"Done! Saved to {args.output}")
+        else:
+            print("Done! (headless, no output video)")
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,19 @@
 import cv2
 import sys
 import os
+import time
+import queue
 import argparse
+import threading
+import traceback
 from ultralytics import YOLO
 from pathlib import Path
 
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.plate_cache import PlateCache
+
 # Try to import PaddleOCR
 try:
     from paddleocr import PaddleOCR
@@ -55,36 +64,278 @@ def init_ocr():
         print(f"Warning: Could not initialize PaddleOCR: {e}")
         return None
 
+def crop_plate(image, bbox, pad=5):
+    """Padded license plate crop, or None if the box is empty"""
+    x1, y1, x2, y2 = map(int, bbox)
+    h, w = image.shape[:2]
+    x1 = max(0, x1 - pad)
+    y1 = max(0, y1 - pad)
+    x2 = min(w, x2 + pad)
+    y2 = min(h, y2 + pad)
+    plate_img = image[y1:y2, x1:x2]
+    if plate_img.size == 0:
+        return None
+    return plate_img
+
+def parse_ocr_result(result):
+    """(text, mean score) from one image's OCR result, for both PaddleOCR 2.x and 3.x output"""
+    if not result:
+        return None
+    if hasattr(result, "get") and "rec_texts" in result:
+        # PaddleOCR 3.x: one dict-like result per image
+        texts = [t for t in result["rec_texts"] if t]
+        scores = list(result.get("rec_scores", []))[:len(texts)]
+    else:
+        # PaddleOCR 2.x: list of [box, (text, score)] lines
+        texts = [line[1][0] for line in result]
+        scores = [line[1][1] for line in result]
+    if not texts:
+        return None
+    return " ".join(texts), (sum(scores) / len(scores) if scores else 0.0)
+
+def read_license_plates(ocr, crops):
+    """
+    OCR for a batch of plate crops: one (text, score) or None per crop.
+    PaddleOCR 3.x takes the whole list in a single predict() call; 2.x only
+    accepts one image per call, so it falls back to a loop there.
+    """
+    if ocr is None or not crops:
+        return [None] * len(crops)
+    try:
+        if hasattr(ocr, "predict"):
+            return [parse_ocr_result(r) for r in ocr.predict(crops)]
+        reads = []
+        for crop in crops:
+            result = ocr.ocr(crop, cls=True)
+            reads.append(parse_ocr_result(result[0]) if result else None)
+        return reads
+    except Exception as e:
+        print(f"Warning: OCR failed for batch of {len(crops)} plates: {e}")
+        return [None] * len(crops)
+
 def read_license_plate(ocr, image, bbox):
     """Extract and read license plate text from bounding box"""
     if ocr is None:
         return None
-    
-    try:
-        x1, y1, x2, y2 = map(int, bbox)
-        # Add padding
-        pad = 5
-        h, w = image.shape[:2]
-        x1 = max(0, x1 - pad)
-        y1 = max(0, y1 - pad)
-        x2 = min(w, x2 + pad)
-        y2 = min(h, y2 + pad)
-        
-        # Crop license plate region
-        plate_img = image[y1:y2, x1:x2]
-        
-        if plate_img.size == 0:
-            return None
-        
-        # Run OCR
-        result = ocr.ocr(plate_img, cls=True)
-        
-        if result and result[0]:
-            texts = [line[1][0] for line in result[0]]
-            return " ".join(texts)
-        return None
-    except Exception as e:
+    plate_img = crop_plate(image, bbox)
+    if plate_img is None:
         return None
+    read = read_license_plates(ocr, [plate_img])[0]
+    return read[0] if read else None
+
+class ImageReader(threading.Thread):
+    """Decodes images ahead of the model on its own thread; yields (path, frame), frame is None if unreadable."""
+
+    def __init__(self, paths, prefetch=16):
+        super().__init__(name="image-reader", daemon=True)
+        self.paths = paths
+        self.queue = queue.Queue(maxsize=prefetch)
+
+    def run(self):
+        for path in self.paths:
+            self.queue.put((path, cv2.imread(path)))
+        self.queue.put(None)
+
+    def batches(self, batch_size):
+        batch = []
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+class ImageWriter(threading.Thread):
+    """Writes annotated images off the inference thread. put() blocks when `max_pending` images are waiting."""
+
+    def __init__(self, max_pending=32):
+        super().__init__(name="image-writer", daemon=True)
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.written = 0
+        self.failed = 0
+
+    def put(self, path, image):
+        self.queue.put((path, image))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            path, image = item
+            if cv2.imwrite(path, image):
+                self.written += 1
+            else:
+                self.failed += 1
+                print(f"Warning: Could not write {path}")
+
+    def close(self):
+        self.queue.put(None)
+        self.join()
+
+def build_class_lookup(names, license_classes, nozzle_classes):
+    """class id -> "plate" / "nozzle" / None, computed once per model instead of per box"""
+    license_set = {c.lower() for c in license_classes}
+    nozzle_set = {c.lower() for c in nozzle_classes}
+    lookup = {}
+    for cls_id, cls_name in names.items():
+        name = cls_name.lower()
+        lookup[cls_id] = "plate" if name in license_set else "nozzle" if name in nozzle_set else None
+    return lookup
+
+def process_images(model, images, ocr, license_classes, nozzle_classes, output_dir, conf=0.25,
+                   batch_size=8, prefetch=16, verbose=False, quiet=False, show=False, plate_cache=None, track=False):
+    """
+    Batch pipeline: a reader thread decodes images ahead, YOLO runs on batches of
+    `batch_size`, every plate crop of a batch goes through a single OCR call and a
+    writer thread saves the annotated outputs. Returns throughput counters.
+
+    For image sequences (frames of one camera), `track=True` runs the tracker one
+    image at a time and `plate_cache` (a PlateCache) skips OCR for plates that
+    were already read with enough agreement.
+    """
+    log = (lambda *a: None) if quiet else print
+    reader = ImageReader(images, prefetch=prefetch)
+    writer = ImageWriter(max_pending=prefetch * 2)
+    reader.start()
+    writer.start()
+
+    lookup = None
+    stats = {"images": 0, "unreadable": 0, "objects": 0, "plates": 0, "plates_read": 0,
+             "nozzles": 0, "batches": 0, "ocr_calls": 0, "plates_ocr": 0}
+    frame_index = 0
+    started = time.perf_counter()
+    try:
+        for batch in reader.batches(batch_size):
+            try:
+                readable = []
+                for img_path, frame in batch:
+                    if frame is None:
+                        print(f"Warning: Could not read image {img_path}")
+                        stats["unreadable"] += 1
+                    else:
+                        readable.append((img_path, frame))
+                if not readable:
+                    continue
+
+                # Inference
+                if track:
+                    # The tracker needs frames in order, one per call
+                    results = [model.track(frame, persist=True, conf=conf, verbose=False)[0] for _, frame in readable]
+                else:
+                    results = model([frame for _, frame in readable], conf=conf, verbose=False)
+                stats["batches"] += 1
+                if lookup is None:
+                    lookup = build_class_lookup(results[0].names, license_classes, nozzle_classes)
+
+                # Collect detections and plate crops across the whole batch
+                per_image = []
+                crops = []
+                for (img_path, frame), result in zip(readable, results):
+                    frame_index += 1
+                    detected_plates = []
+                    detected_nozzles = []
+                    boxes = result.boxes
+                    if boxes is not None and len(boxes) > 0:
+                        track_ids = boxes.id.tolist() if boxes.id is not None else [None] * len(boxes)
+                        for i, (bbox, cls_id, box_conf, track_id) in enumerate(zip(boxes.xyxy.tolist(), boxes.cls.tolist(), boxes.conf.tolist(), track_ids)):
+                            cls_id = int(cls_id)
+                            if verbose:
+                                log(f"    {os.path.basename(img_path)} [{i}] {result.names[cls_id]}: {box_conf:.2f}")
+                            kind = lookup.get(cls_id)
+                            if kind == "plate":
+                                plate = {"bbox": bbox, "confidence": box_conf, "text": None}
+                                detected_plates.append(plate)
+                                crop = crop_plate(frame, bbox) if ocr else None
+                                if crop is None:
+                                    continue
+                                entry = None
+                                if plate_cache is not None:
+                                    entry, need_read = plate_cache.lookup(track_id, crop, frame_index, box=bbox)
+                                    plate["entry"] = entry
+                                    if not need_read:
+                                        continue
+                                crops.append((plate, crop, entry))
+                            elif kind == "nozzle":
+                                detected_nozzles.append({"bbox": bbox, "confidence": box_conf})
+                    per_image.append((img_path, result, detected_plates, detected_nozzles))
+
+                # One OCR call for every plate in the batch
+                if crops:
+                    stats["ocr_calls"] += 1
+                    stats["plates_ocr"] += len(crops)
+                    for (plate, _, entry), read in zip(crops, read_license_plates(ocr, [crop for _, crop, _ in crops])):
+                        if entry is not None:
+                            plate_cache.record(entry, read)
+                        elif read:
+                            plate["text"] = read[0]
+                if plate_cache is not None:
+                    # Consensus of all reads so far, including plates skipped this time
+                    for _, _, detected_plates, _ in per_image:
+                        for plate in detected_plates:
+                            if "entry" in plate:
+                                plate["text"] = plate.pop("entry").text
+
+                for img_path, result, detected_plates, detected_nozzles in per_image:
+                    total_objects = len(result.boxes) if result.boxes is not None else 0
+                    log(f"\nProcessed: {img_path}")
+                    for plate in detected_plates:
+                        if plate["text"]:
+                            log(f"  📋 License Plate: {plate['text']} (conf: {plate['confidence']:.2f})")
+                        else:
+                            log(f"  📋 License Plate detected (conf: {plate['confidence']:.2f}) - OCR failed")
+                    for nozzle in detected_nozzles:
+                        log(f"  ⛽ Fuel Nozzle detected (conf: {nozzle['confidence']:.2f})")
+
+                    # Draw annotations
+                    annotated_frame = result.plot()
+
+                    # Add OCR text overlay for license plates
+                    for plate in detected_plates:
+                        if plate["text"]:
+                            x1, y1, x2, y2 = map(int, plate["bbox"])
+                            # Draw text above the plate
+                            cv2.putText(annotated_frame, plate["text"],
+                                       (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX,
+                                       0.7, (0, 255, 0), 2)
+
+                    # Save (on the writer thread)
+                    output_path = os.path.join(output_dir, f"detected_{os.path.basename(img_path)}")
+                    writer.put(output_path, annotated_frame)
+                    log(f"  Summary: {total_objects} objects, {len(detected_plates)} plates, {len(detected_nozzles)} nozzles -> {output_path}")
+
+                    stats["images"] += 1
+                    stats["objects"] += total_objects
+                    stats["plates"] += len(detected_plates)
+                    stats["plates_read"] += sum(1 for plate in detected_plates if plate["text"])
+                    stats["nozzles"] += len(detected_nozzles)
+
+                    # Show
+                    if show:
+                        cv2.imshow("Detection Results", annotated_frame)
+                        key = cv2.waitKey(0)
+                        if key & 0xFF == ord('q'):
+                            print("Quitting display...")
+                            show = False
+            except Exception as e:
+                print(f"Error processing batch starting at {batch[0][0]}: {e}")
+                traceback.print_exc()
+    finally:
+        writer.close()
+        if show:
+            cv2.destroyAllWindows()
+
+    elapsed = time.perf_counter() - started
+    stats["written"] = writer.written
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["images_per_s"] = round(stats["images"] / elapsed, 2) if elapsed else 0.0
+    if plate_cache is not None:
+        stats["plate_cache"] = plate_cache.stats()
+    return stats
 
 def is_yoloe_model(model_path):
     """Check if the model is a YOLOE model"""
@@ -102,6 +353,10 @@ def main():
                         help="Classes to detect (only for YOLOE models)")
     parser.add_argument("--no-ocr", action="store_true", help="Disable license plate OCR")
     parser.add_argument("--verbose", action="store_true", help="Print ALL detected objects")
+    parser.add_argument("--batch-size", type=int, default=8, help="Images per YOLO call (plates of a batch share one OCR call)")
+    parser.add_argument("--prefetch", type=int, default=16, help="Images decoded ahead by the reader thread")
+    parser.add_argument("--sequence", action="store_true",
+                        help="Images are ordered frames of one camera: track vehicles and cache plate reads per vehicle")
     args = parser.parse_args()
 
     # Initialize OCR if not disabled
@@ -145,7 +400,7 @@ def main():
     # Prepare input images
     images = []
     if os.path.isdir(args.source):
-        for file in os.listdir(args.source):
+        for file in sorted(os.listdir(args.source)):
             if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff')):
                 images.append(os.path.join(args.source, file))
     elif os.path.isfile(args.source):
@@ -161,94 +416,15 @@ def main():
     # Ensure output directory exists
     os.makedirs(args.output_dir, exist_ok=True)
 
-    print(f"Processing {len(images)} images...")
-
-    for img_path in images:
-        try:
-            print(f"\nProcessing: {img_path}")
-            frame = cv2.imread(img_path)
-            if frame is None:
-                print(f"Warning: Could not read image {img_path}")
-                continue
-
-            # Inference
-            results = model(frame, conf=args.conf, verbose=False)[0]
-
-            # Process detections
-            detected_plates = []
-            detected_nozzles = []
-            
-            if results.boxes is not None and len(results.boxes) > 0:
-                print(f"  Found {len(results.boxes)} detections:")
-                for i, box in enumerate(results.boxes):
-                    cls_id = int(box.cls[0])
-                    cls_name = results.names[cls_id]
-                    conf = float(box.conf[0])
-                    bbox = box.xyxy[0].cpu().numpy()
-                    
-                    # Print ALL detections if verbose
-                    if args.verbose:
-                        print(f"    [{i}] {cls_name}: {conf:.2f}")
-                    
-                    # Check for license plates
-                    if cls_name.lower() in [c.lower() for c in license_classes]:
-                        plate_text = read_license_plate(ocr, frame, bbox) if ocr else None
-                        detected_plates.append({
-                            "bbox": bbox,
-                            "confidence": conf,
-                            "text": plate_text
-                        })
-                        if plate_text:
-                            print(f"  📋 License Plate: {plate_text} (conf: {conf:.2f})")
-                        else:
-                            print(f"  📋 License Plate detected (conf: {conf:.2f}) - OCR failed")
-                    
-                    # Check for nozzles
-                    if cls_name.lower() in [c.lower() for c in nozzle_classes]:
-                        detected_nozzles.append({
-                            "bbox": bbox,
-                            "confidence": conf
-                        })
-                        print(f"  ⛽ Fuel Nozzle detected (conf: {conf:.2f})")
-
-            # Draw annotations
-            annotated_frame = results.plot()
-            
-            # Add OCR text overlay for license plates
-            for plate in detected_plates:
-                if plate["text"]:
-                    x1, y1, x2, y2 = map(int, plate["bbox"])
-                    # Draw text above the plate
-                    cv2.putText(annotated_frame, plate["text"], 
-                               (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 
-                               0.7, (0, 255, 0), 2)
-
-            # Save
-            filename = os.path.basename(img_path)
-            output_path = os.path.join(args.output_dir, f"detected_{filename}")
-            cv2.imwrite(output_path, annotated_frame)
-            print(f"  Saved to {output_path}")
-
-            # Summary
-            total_objects = len(results.boxes) if results.boxes is not None else 0
-            print(f"  Summary: {total_objects} objects, {len(detected_plates)} plates, {len(detected_nozzles)} nozzles")
-
-            # Show
-            if args.show:
-                cv2.imshow("Detection Results", annotated_frame)
-                key = cv2.waitKey(0)
-                if key & 0xFF == ord('q'):
-                    print("Quitting display...")
-                    args.show = False
-                
-        except Exception as e:
-            print(f"Error processing {img_path}: {e}")
-            import traceback
-            traceback.print_exc()
-
-    if args.show:
-        cv2.destroyAllWindows()
-    print("\nDone!")
+    print(f"Processing {len(images)} images (batch size {args.batch_size})...")
+    stats = process_images(model, images, ocr, license_classes, nozzle_classes, args.output_dir,
+                           conf=args.conf, batch_size=args.batch_size, prefetch=args.prefetch,
+                           verbose=args.verbose, show=args.show,
+                           plate_cache=PlateCache() if args.sequence else None, track=args.sequence)
+    print(f"\nDone! {stats['images']} images in {stats['elapsed_s']}s ({stats['images_per_s']} images/s), "
+          f"{stats['plates_read']}/{stats['plates']} plates read")
+    if "plate_cache" in stats:
+        print(f"Plate cache: {stats['plate_cache']}")
 
 if __name__ == "__main__":
     main()
@@ -6,9 +6,17 @@ import cv2
 import numpy as np
 import argparse
 import os
+import sys
 from ultralytics import YOLO
 from ultralytics.models.yolo.yoloe import YOLOEVPSegPredictor
 
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.plate_cache import PlateCache
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov')
+
 # Try to import PaddleOCR
 try:
     from paddleocr import PaddleOCR
@@ -25,7 +33,16 @@ def init_ocr():
     except:
         return None
 
-def read_license_plate(ocr, image, bbox, debug=False):
+def _plate_text(result):
+    """(text, mean score) from one PaddleOCR result, or None"""
+    if result and result[0]:
+        texts = [line[1][0] for line in result[0]]
+        scores = [line[1][1] for line in result[0]]
+        return " ".join(texts), sum(scores) / len(scores)
+    return None
+
+def read_license_plate(ocr, image, bbox, debug=False, with_score=False):
+    """Plate text (or (text, score) with `with_score`) for the box, None if OCR found nothing"""
     if ocr is None:
         return None
     try:
@@ -64,25 +81,80 @@ def read_license_plate(ocr, image, bbox, debug=False):
             cv2.imwrite("debug_plate_processed.png", processed)
             print(f"      Debug: Saved processed plate to debug_plate_processed.png")
         
-        # Try OCR on processed image
-        result = ocr.ocr(processed)
-        if result and result[0]:
-            texts = [line[1][0] for line in result[0]]
-            return " ".join(texts)
-        
-        # If processed fails, try original color
-        result = ocr.ocr(plate_img)
-        if result and result[0]:
-            texts = [line[1][0] for line in result[0]]
-            return " ".join(texts)
+        # Try OCR on processed image, if that fails try original color
+        read = _plate_text(ocr.ocr(processed)) or _plate_text(ocr.ocr(plate_img))
+        if read:
+            return read if with_score else read[0]
             
     except Exception as e:
         print(f"      OCR Error: {e}")
     return None
 
+def run_video(args, model, ocr, visual_prompts, class_names):
+    """
+    Visual-prompt detection over a video. The same plate stays in view for many
+    frames, so plate reads go through a PlateCache (crop hash keyed, the VP
+    predictor has no tracker ids) and each vehicle is OCR'd only a few times.
+    """
+    cap = cv2.VideoCapture(args.source)
+    if not cap.isOpened():
+        print(f"Error: Could not open video {args.source}")
+        return
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    cap.release()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(args.source))[0]
+    output_path = os.path.join(args.output_dir, f"vp_{name}.mp4")
+    out = None
+    cache = PlateCache(reread_interval=args.plate_reread)
+    plates_seen = set()
+
+    results = model.predict(args.source, visual_prompts=visual_prompts, predictor=YOLOEVPSegPredictor,
+                            conf=args.conf, verbose=False, stream=True)
+    frame_id = 0
+    try:
+        for result in results:
+            frame_id += 1
+            annotated = result.plot()
+            if out is None:
+                h, w = annotated.shape[:2]
+                out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (w, h))
+            if result.boxes is not None and ocr:
+                for bbox, cls_id in zip(result.boxes.xyxy.tolist(), result.boxes.cls.tolist()):
+                    cls_id = int(cls_id)
+                    if cls_id >= len(class_names) or class_names[cls_id] != "license_plate":
+                        continue
+                    x1, y1, x2, y2 = map(int, bbox)
+                    crop = result.orig_img[max(0, y1):y2, max(0, x1):x2]
+                    if crop.size == 0:
+                        continue
+                    entry, need_read = cache.lookup(None, crop, frame_id, box=(x1, y1, x2, y2))
+                    if need_read:
+                        cache.record(entry, read_license_plate(ocr, result.orig_img, bbox, with_score=True))
+                    if entry.text:
+                        if entry.key not in plates_seen and cache.settled(entry):
+                            plates_seen.add(entry.key)
+                            print(f"  📋 Plate {entry.text} (score {entry.score:.2f}, {entry.reads} reads) at frame {frame_id}")
+                        cv2.putText(annotated, entry.text, (x1, y1 - 10),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+            out.write(annotated)
+            if args.show:
+                cv2.imshow("Visual Prompt Detection", annotated)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+    finally:
+        if out is not None:
+            out.release()
+        if args.show:
+            cv2.destroyAllWindows()
+
+    print(f"\nProcessed {frame_id} frames, plate cache: {cache.stats()}")
+    print(f"Saved to: {output_path}")
+
 def main():
     parser = argparse.ArgumentParser(description="YOLOE Visual Prompt Runner")
-    parser.add_argument("--source", type=str, required=True, help="Path to image")
+    parser.add_argument("--source", type=str, required=True, help="Path to image or video")
     parser.add_argument("--model", type=str, default="yoloe-26s-seg.pt", help="YOLOE model")
     parser.add_argument("--output-dir", type=str, default="output_visual", help="Output directory")
     parser.add_argument("--show", action="store_true", help="Show result")
@@ -95,12 +167,22 @@ def main():
                         help="Nozzle box: x1,y1,x2,y2 (e.g., '485,540,570,600')")
     parser.add_argument("--draw-prompts", action="store_true",
                         help="Draw the visual prompt boxes on the image first to help you find coordinates")
+    parser.add_argument("--plate-reread", type=int, default=15,
+                        help="Video: frames between re-reads of a plate not yet read confidently")
     args = parser.parse_args()
 
-    # Read image to get dimensions
-    image = cv2.imread(args.source)
+    # Read image (first frame for videos) to get dimensions
+    is_video = args.source.lower().endswith(VIDEO_EXTENSIONS)
+    if is_video:
+        cap = cv2.VideoCapture(args.source)
+        ok, image = cap.read()
+        cap.release()
+        if not ok:
+            image = None
+    else:
+        image = cv2.imread(args.source)
     if image is None:
-        print(f"Error: Could not read image {args.source}")
+        print(f"Error: Could not read {args.source}")
         return
     
     h, w = image.shape[:2]
@@ -168,6 +250,11 @@ def main():
     )
     print(f"\nRunning inference with {len(bboxes)} visual prompts...")
 
+    if is_video:
+        run_video(args, model, ocr, visual_prompts, class_names)
+        print("Done!")
+        return
+
     # Run inference with visual prompts
     results = model.predict(
         args.source,
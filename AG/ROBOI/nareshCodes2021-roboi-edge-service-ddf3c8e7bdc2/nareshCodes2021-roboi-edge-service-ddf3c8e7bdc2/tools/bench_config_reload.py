@@ -0,0 +1,136 @@
+import sys
+import os
+import time
+import json
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import statistics
+import yaml
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import analytics_engine
+from core.analytics_engine import AnalyticsEngine, CONFIG_PATH, load_config
+from core.logger import JSONLogger
+
+
+class LegacyReloadEngine(AnalyticsEngine):
+    """Previous behaviour: re-read and parse the YAML inside process_frame every `interval` seconds."""
+
+    def __init__(self, path, interval):
+        super().__init__(config_path=path, watch_config=False)
+        self.path = path
+        self.interval = interval
+        self.last_config_check = time.time()
+
+    def process_frame(self, *args, **kwargs):
+        now = time.time()
+        if now - self.last_config_check > self.interval:
+            self._apply_config(load_config(self.path))
+            self.last_config_check = now
+        return super().process_frame(*args, **kwargs)
+
+
+def editor(path, every, stop):
+    """Rewrites the config every `every` seconds with a new fire threshold, like an operator tuning it."""
+    with open(path) as f:
+        cfg = yaml.safe_load(f)
+    while not stop.wait(every):
+        cfg['analytics']['fire_threshold'] = round(random.uniform(0.2, 0.6), 3)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            yaml.safe_dump(cfg, f)
+        os.replace(tmp, path)
+
+
+def make_frame(objects, rng):
+    labels = ["person", "car", "chair", "fire", "truck"]
+    return [{
+        "label": rng.choice(labels),
+        "class_id": j,
+        "confidence": round(rng.random(), 4),
+        "model_id": 1,
+        "bbox": {"top": 10, "left": 10 * j, "width": 60, "height": 140},
+    } for j in range(objects)]
+
+
+def pct(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run(mode, args, work):
+    path = os.path.join(work, f"{mode}_config.yaml")
+    shutil.copyfile(CONFIG_PATH, path)
+
+    if mode == "legacy":
+        engine = LegacyReloadEngine(path, args.interval)
+    else:
+        engine = AnalyticsEngine(config_path=path)
+        engine.config_watcher.poll_interval = args.poll
+    stop = threading.Event()
+    edit_thread = threading.Thread(target=editor, args=(path, args.edit_every, stop), daemon=True)
+    edit_thread.start()
+
+    rng = random.Random(args.seed)
+    frames = [make_frame(args.objects, rng) for _ in range(64)]
+    thresholds = set()
+    latencies = []
+    period = 1.0 / args.fps
+    deadline = time.monotonic() + args.seconds
+    i = 0
+    while time.monotonic() < deadline:
+        t0 = time.perf_counter()
+        engine.process_frame("cafeteria", frames[i % len(frames)])
+        latencies.append(time.perf_counter() - t0)
+        thresholds.add(engine.policy.fire_threshold)
+        i += 1
+        time.sleep(max(0.0, period - (time.perf_counter() - t0)))
+
+    stop.set()
+    edit_thread.join()
+    engine.close()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "frames": len(latencies),
+        "p50_us": round(pct(latencies, 0.5) * 1e6, 1),
+        "p99_us": round(pct(latencies, 0.99) * 1e6, 1),
+        "p999_us": round(pct(latencies, 0.999) * 1e6, 1),
+        "max_us": round(latencies[-1] * 1e6, 1),
+        "stdev_us": round(statistics.pstdev(latencies) * 1e6, 1),
+        "frames_over_1ms": sum(1 for t in latencies if t > 0.001),
+        "config_versions_seen": len(thresholds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame-time jitter of AnalyticsEngine with in-frame YAML reloads vs the off-thread config watcher.")
+    parser.add_argument("--seconds", type=float, default=15.0, help="Duration per mode")
+    parser.add_argument("--fps", type=float, default=100.0)
+    parser.add_argument("--objects", type=int, default=20, help="Detections per frame")
+    parser.add_argument("--interval", type=float, default=5.0, help="Legacy in-frame reload interval")
+    parser.add_argument("--poll", type=float, default=1.0, help="Watcher stat interval")
+    parser.add_argument("--edit-every", type=float, default=4.0, help="Seconds between config edits")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    analytics_engine.logger.setLevel(logging.WARNING)
+    logging.getLogger("config-watcher").setLevel(logging.WARNING)
+    work = tempfile.mkdtemp(prefix="roboi_config_")
+    JSONLogger.configure(path=os.path.join(work, "detection_log.json"))
+    try:
+        for mode in ("legacy", "watched"):
+            print(json.dumps(run(mode, args, work)))
+    finally:
+        JSONLogger.close()
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Historical query latency: raw NDJSON scans versus the Parquet detection store.
+
+Generates --days of detection log for --cameras (rotated into 10 MB segments
+like JSONLogger), compacts them with core.detection_store, then runs the same
+questions both ways and checks the answers match:
+
+  violations_per_cam_hour   events per camera per hour over the whole range
+  one_cam_day_status        records per status, one camera, one day
+  labels_one_cam_week       detections and mean confidence per label, one camera, last 7 days
+  fire_per_day              records with the fire trigger per day, all cameras
+
+The raw scan is the best case for the old path (orjson when installed, one
+pass per question over every segment). Before the queries, the log is rotated
+once more with the newest backup gzipped (logrotate's compress) and compacted
+again, which must not compact anything twice.
+"""
+import sys
+import os
+import json
+import time
+import random
+import gzip
+import shutil
+import argparse
+import tempfile
+import statistics
+from collections import defaultdict
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.detection_store import DetectionStore, EVENTS, DETECTIONS, closed_segments, _open_segment, _loads
+
+LABELS = ["person", "chair", "car", "fire", "smoke", "knife", "backpack", "laptop"]
+TRIGGERS = [("fire_detected_critical", 0.01), ("crowd_detected", 0.03), ("RESTRICTED_ACCESS", 0.02)]
+DAY = 86400
+
+
+def generate_log(path, start, days, cameras, per_hour, segment_bytes, seed):
+    """Writes path.N ... path.1 (oldest first numbering as after rotation) and an empty live file."""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(2048):
+        objs = [{"label": rng.choice(LABELS), "class_id": i, "confidence": round(rng.uniform(0.25, 0.99), 4),
+                 "bbox": {"top": rng.randint(0, 600), "left": rng.randint(0, 1000), "width": 80, "height": 160}}
+                for i in range(rng.randint(0, 10))]
+        pool.append((json.dumps(objs, separators=(",", ":")), len(objs), sum(o["label"] == "person" for o in objs)))
+
+    segments, lines, size = [], [], 0
+
+    def close_segment():
+        segment = f"{path}.seg{len(segments):05d}"
+        with open(segment, "w") as f:
+            f.writelines(lines)
+        segments.append(segment)
+
+    step = 3600 / per_hour
+    for i in range(int(days * 24 * per_hour)):
+        t = start + i * step
+        for cam in range(cameras):
+            triggers = [name for name, p in TRIGGERS if rng.random() < p]
+            objs, count, people = pool[rng.randrange(len(pool))]
+            event = "event" if triggers else "metric"
+            status = "critical" if any("fire" in t for t in triggers) else "warning" if triggers else "safe"
+            line = (f'{{"type":"{event}","meta":{{"ts":{int(t + rng.random() * step)},"cam_id":"cam_{cam:02d}",'
+                    f'"site_name":"bench","site_id":"ro001","country":"india"}},"data":{{"triggers":{json.dumps(triggers)},'
+                    f'"status":"{status}","people_count":{people},"detection_count":{count},'
+                    f'"video_count":0,"image_count":0,"detections":{objs},"triaged_by":"","triage_notes":"",'
+                    f'"triage_timestamp":0,"ai_insights":"","capture_triggered":false,"evidence_path":""}}}}\n')
+            if size + len(line) > segment_bytes and lines:
+                close_segment()
+                lines, size = [], 0
+            lines.append(line)
+            size += len(line)
+    if lines:
+        close_segment()
+    for age, segment in enumerate(reversed(segments), start=1):
+        os.replace(segment, f"{path}.{age}")
+    open(path, "w").close()
+    return sum(os.path.getsize(p) for p in closed_segments(path))
+
+
+def rotate_and_compress(path):
+    """One more rotation: path.N -> path.N+1, then gzip the new path.2 as logrotate's compress would."""
+    for segment in closed_segments(path):  # oldest first, so no rename lands on an existing segment
+        number, dot, ext = segment[len(path) + 1:].partition(".")
+        os.replace(segment, f"{path}.{int(number) + 1}{dot}{ext}")
+    second = f"{path}.2"
+    if os.path.exists(second):
+        with open(second, "rb") as src, gzip.open(second + ".gz", "wb", compresslevel=1) as dst:
+            shutil.copyfileobj(src, dst, 4 * 1024 * 1024)
+        os.remove(second)
+
+
+def store_records(store):
+    rows = store.aggregate(group_by=())
+    return rows[0]["count"] if rows else 0
+
+
+# ---------------------------------------------------------------------------
+# The same questions, answered by scanning the raw log
+# ---------------------------------------------------------------------------
+
+def raw_records(log_path):
+    for segment in closed_segments(log_path):
+        with _open_segment(segment) as f:
+            for line in f:
+                if line.strip():
+                    yield _loads(line)
+
+
+def raw_violations_per_cam_hour(log_path, q):
+    counts = defaultdict(int)
+    for r in raw_records(log_path):
+        if r["type"] == "event":
+            counts[(r["meta"]["cam_id"], r["meta"]["ts"] // 3600 * 3600)] += 1
+    return [{"cam_id": c, "bucket": b, "count": n} for (c, b), n in sorted(counts.items())]
+
+
+def raw_one_cam_day_status(log_path, q):
+    counts = defaultdict(int)
+    for r in raw_records(log_path):
+        meta = r["meta"]
+        if meta["cam_id"] == q["camera"] and q["start"] <= meta["ts"] < q["start"] + DAY:
+            counts[r["data"]["status"]] += 1
+    return [{"event_status": s, "count": n} for s, n in sorted(counts.items())]
+
+
+def raw_labels_one_cam_week(log_path, q):
+    confs = defaultdict(list)
+    for r in raw_records(log_path):
+        meta = r["meta"]
+        if meta["cam_id"] == q["camera"] and meta["ts"] >= q["end"] - 7 * DAY:
+            for obj in r["data"]["detections"]:
+                confs[obj["label"]].append(obj["confidence"])
+    return [{"label": l, "count": len(c), "mean_confidence": statistics.fmean(c)} for l, c in sorted(confs.items())]
+
+
+def raw_fire_per_day(log_path, q):
+    counts = defaultdict(int)
+    for r in raw_records(log_path):
+        if "fire_detected_critical" in r["data"]["triggers"]:
+            counts[r["meta"]["ts"] // DAY * DAY] += 1
+    return [{"bucket": b, "count": n} for b, n in sorted(counts.items())]
+
+
+def store_queries(q):
+    """aggregate() arguments answering the same questions from the store."""
+    return {
+        "violations_per_cam_hour": dict(group_by=("cam_id", "bucket"), bucket="1h", where={"event_type": "event"}),
+        "one_cam_day_status": dict(group_by=("event_status",), cameras=[q["camera"]], start=q["start"],
+                                   end=q["start"] + DAY),
+        "labels_one_cam_week": dict(table=DETECTIONS, group_by=("label",), metrics=("count", "mean:confidence"),
+                                    cameras=[q["camera"]], start=q["end"] - 7 * DAY),
+        "fire_per_day": dict(group_by=("bucket",), bucket="1d", trigger="fire_detected_critical"),
+    }
+
+
+def same(a, b):
+    if len(a) != len(b):
+        return False
+    for x, y in zip(a, b):
+        if x.keys() != y.keys():
+            return False
+        for k in x:
+            if isinstance(x[k], float) or isinstance(y[k], float):
+                if abs(x[k] - y[k]) > 1e-4:
+                    return False
+            elif x[k] != y[k]:
+                return False
+    return True
+
+
+def timed(fn, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return result, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query latency of raw NDJSON scans vs the Parquet detection store.")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--cameras", type=int, default=8)
+    parser.add_argument("--per-hour", type=int, default=60, help="Records per camera per hour")
+    parser.add_argument("--segment-mb", type=float, default=10, help="Log rotation size")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per query (median reported)")
+    parser.add_argument("--raw-repeat", type=int, default=1, help="Runs per raw scan (median reported)")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="roboi_store_")
+    try:
+        log_path = os.path.join(work, "detection_log.json")
+        start = 1761955200  # 2025-11-01 00:00 UTC
+        t0 = time.perf_counter()
+        raw_bytes = generate_log(log_path, start, args.days, args.cameras, args.per_hour,
+                                 int(args.segment_mb * 1024 * 1024), args.seed)
+        print(json.dumps({"stage": "generate", "segments": len(closed_segments(log_path)),
+                          "raw_mb": round(raw_bytes / 1e6, 1), "seconds": round(time.perf_counter() - t0, 1)}))
+
+        store = DetectionStore(os.path.join(work, "store"))
+        t0 = time.perf_counter()
+        stats = store.compact(log_path)
+        compact_s = time.perf_counter() - t0
+        store_bytes = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(store.root) for f in files)
+        print(json.dumps({"stage": "compact", "records": stats["records"], "detections": stats["detections"],
+                          "seconds": round(compact_s, 1), "mb_per_s": round(raw_bytes / 1e6 / compact_s, 1),
+                          "store_mb": round(store_bytes / 1e6, 1),
+                          "ratio": round(raw_bytes / max(1, store_bytes), 1),
+                          "recompact_skipped": store.compact(log_path)["skipped"]}))
+
+        records = store_records(store)
+        rotate_and_compress(log_path)
+        again = store.compact(log_path)
+        print(json.dumps({"stage": "rotate_compress", "segments": len(closed_segments(log_path)),
+                          "gz_segments": sum(p.endswith(".gz") for p in closed_segments(log_path)),
+                          "compacted": again["segments"], "skipped": again["skipped"],
+                          "store_records": store_records(store), "expected_records": records,
+                          "match": again["segments"] == 0 and store_records(store) == records}))
+
+        q = {"camera": "cam_03", "start": start + int(args.days // 2) * DAY, "end": start + int(args.days * DAY)}
+        raw = {
+            "violations_per_cam_hour": raw_violations_per_cam_hour,
+            "one_cam_day_status": raw_one_cam_day_status,
+            "labels_one_cam_week": raw_labels_one_cam_week,
+            "fire_per_day": raw_fire_per_day,
+        }
+        for name, kwargs in store_queries(q).items():
+            expected, raw_s = timed(lambda: raw[name](log_path, q), args.raw_repeat)
+            result, store_s = timed(lambda: store.aggregate(**kwargs), args.repeat)
+            files = store.partitions(kwargs.get("table", EVENTS), kwargs.get("start"), kwargs.get("end"),
+                                     kwargs.get("cameras"))
+            print(json.dumps({
+                "query": name,
+                "rows": len(result),
+                "raw_scan_ms": round(raw_s * 1000, 1),
+                "store_ms": round(store_s * 1000, 1),
+                "speedup": round(raw_s / store_s, 1),
+                "files_read": len(files),
+                "files_total": len(store.partitions(kwargs.get("table", EVENTS))),
+                "match": same(expected, result),
+            }))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
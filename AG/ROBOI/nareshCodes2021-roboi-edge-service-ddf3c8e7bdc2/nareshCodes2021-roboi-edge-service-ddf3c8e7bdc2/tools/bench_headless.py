@@ -0,0 +1,110 @@
+import sys
+import os
+import json
+import logging
+import argparse
+import tempfile
+import shutil
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+from ultralytics import YOLO
+from core import analytics_engine
+from core.analytics_engine import AnalyticsEngine
+from core.logger import JSONLogger
+from core.multicam import results_to_frame_objects
+from core.stage_timer import StageTimer
+from core.visual_utils import draw_annotations, AnnotatedFrameSampler
+
+
+def run(mode, model, engine, video, frames, conf, sample_every, work, window):
+    """One pass over the clip with the dev runner's per-frame work; only the render step differs per mode."""
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise SystemExit(f"Error: cannot open {video}")
+    sampler = None
+    if mode == "sampled":
+        sampler = AnnotatedFrameSampler(os.path.join(work, "samples"), every=sample_every)
+
+    timer = StageTimer()
+    cam_name = "bench_cam"
+    for frame_id in range(frames):
+        with timer.stage("capture"):
+            ret, frame = cap.read()
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = cap.read()
+        if not ret:
+            break
+        if model is not None:
+            with timer.stage("inference"):
+                frame_objects = results_to_frame_objects(model(frame, verbose=False, conf=conf)[0])
+        else:
+            frame_objects = []
+        with timer.stage("analytics"):
+            engine.process_frame(cam_name, frame_objects, frame=frame, frame_id=frame_id)
+        with timer.stage("render"):
+            if mode == "display":
+                display_frame = cv2.resize(draw_annotations(frame.copy(), frame_objects), (720, 480))
+                if window:
+                    cv2.imshow("bench_headless", display_frame)
+                    cv2.waitKey(1)
+            elif sampler is not None:
+                sampler.offer(cam_name, frame, frame_objects, frame_id)
+        timer.frame_done()
+    cap.release()
+    if window and mode == "display":
+        cv2.destroyAllWindows()
+
+    summary = timer.summary()
+    return {
+        "mode": mode,
+        "video": os.path.basename(video),
+        "frames": summary["frames"],
+        "fps": summary["fps"],
+        "window": window if mode == "display" else False,
+        "samples_saved": sampler.saved if sampler else 0,
+        "stages": summary["stages"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPS of the display path versus headless (and headless with sampled frames) on recorded clips.")
+    parser.add_argument("--video", action="append", required=True, help="Recorded clip (repeat for several)")
+    parser.add_argument("--modes", default="display,headless,sampled")
+    parser.add_argument("--frames", type=int, default=600, help="Frames per run (clips loop)")
+    parser.add_argument("--model", default="models/exports/yolo11_finetuned.pt")
+    parser.add_argument("--no-model", action="store_true", help="Skip inference to isolate capture/analytics/render cost")
+    parser.add_argument("--conf", type=float, default=0.15)
+    parser.add_argument("--sample-every", type=int, default=30)
+    parser.add_argument("--no-window", action="store_true",
+                        help="Display mode renders and resizes but does not open a window (automatic without DISPLAY)")
+    args = parser.parse_args()
+
+    # Keep per-event INFO lines and detection records out of the tracked logs
+    for name in ("analytics-engine", "visual-utils"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    analytics_engine.logger.setLevel(logging.WARNING)
+    work = tempfile.mkdtemp(prefix="roboi_headless_")
+    JSONLogger.configure(path=os.path.join(work, "detection_log.json"))
+
+    window = not args.no_window and (sys.platform == "win32" or bool(os.environ.get("DISPLAY")))
+    model = None if args.no_model else YOLO(args.model)
+    engine = AnalyticsEngine(watch_config=False)
+    try:
+        for video in args.video:
+            if model is not None:
+                # Warm up so the first mode does not pay for lazy initialisation
+                run("headless", model, engine, video, 5, args.conf, 0, work, False)
+            for mode in args.modes.split(","):
+                print(json.dumps(run(mode, model, engine, video, args.frames, args.conf, args.sample_every, work, window)))
+    finally:
+        engine.close()
+        JSONLogger.close()
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
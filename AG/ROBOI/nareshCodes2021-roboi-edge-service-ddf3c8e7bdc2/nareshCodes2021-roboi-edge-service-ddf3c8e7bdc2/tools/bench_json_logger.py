@@ -0,0 +1,117 @@
+import sys
+import os
+import time
+import json
+import random
+import logging
+import argparse
+import tempfile
+import shutil
+from logging.handlers import RotatingFileHandler
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import logger as core_logger
+from core.logger import JSONLogger
+
+
+def make_payload(i, detections):
+    objs = []
+    for j in range(detections):
+        objs.append({
+            "label": random.choice(["person", "car", "chair", "fire"]),
+            "class_id": j % 80,
+            "confidence": round(random.random(), 4),
+            "bbox": {"top": 10 * j, "left": 20 * j, "width": 50, "height": 120},
+        })
+    return {
+        "type": "event" if i % 10 == 0 else "metric",
+        "meta": {"ts": int(time.time()), "cam_id": f"cam_{i % 4}", "site_name": "head_office", "site_id": "ro001",
+                 "latitude": 22.98, "longitude": 72.47, "country": "india", "state": "gujarat", "district": "ahmedabad"},
+        "data": {"triggers": [], "status": "safe", "people_count": detections, "detection_count": detections,
+                 "video_count": 0, "image_count": 0, "detections": objs, "triaged_by": "", "triage_notes": "",
+                 "triage_timestamp": 0, "ai_insights": "", "capture_triggered": False, "evidence_path": ""},
+    }
+
+
+def legacy_writer(path, max_bytes):
+    """The previous JSONLogger: json.dumps + RotatingFileHandler on the caller thread."""
+    log = logging.getLogger("bench-legacy-json")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=5)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(handler)
+
+    def write(data):
+        log.info(json.dumps(data, separators=(',', ':')))
+
+    def close():
+        log.removeHandler(handler)
+        handler.close()
+    return write, close
+
+
+def pct(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run(mode, payloads, work, max_bytes):
+    path = os.path.join(work, f"{mode}.json")
+    if mode == "legacy":
+        write, close = legacy_writer(path, max_bytes)
+        flush = lambda: None
+    else:
+        JSONLogger.close()
+        JSONLogger.configure(path=path, max_bytes=max_bytes)
+        write, close, flush = JSONLogger.write_log, JSONLogger.close, JSONLogger.flush
+
+    latencies = []
+    start = time.perf_counter()
+    for data in payloads:
+        t0 = time.perf_counter()
+        write(data)
+        latencies.append(time.perf_counter() - t0)
+    caller_done = time.perf_counter()
+    flush()
+    end = time.perf_counter()
+    close()
+
+    latencies.sort()
+    lines = 0
+    for name in os.listdir(work):
+        if name.startswith(f"{mode}.json"):
+            with open(os.path.join(work, name), "rb") as f:
+                lines += sum(1 for _ in f)
+    return {
+        "mode": mode,
+        "records": len(payloads),
+        "lines_on_disk": lines,
+        "caller_p50_us": round(pct(latencies, 0.5) * 1e6, 2),
+        "caller_p99_us": round(pct(latencies, 0.99) * 1e6, 2),
+        "caller_max_us": round(latencies[-1] * 1e6, 2),
+        "caller_records_per_s": round(len(payloads) / (caller_done - start)),
+        "end_to_end_records_per_s": round(len(payloads) / (end - start)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caller latency and throughput of JSONLogger vs the old synchronous writer.")
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--detections", type=int, default=12, help="Detections per payload")
+    parser.add_argument("--max-mb", type=int, default=1024, help="Rotation size; large by default so every line is kept for the count check")
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if core_logger.orjson else 'json'}")
+    payloads = [make_payload(i, args.detections) for i in range(args.records)]
+    work = tempfile.mkdtemp(prefix="roboi_jsonlog_")
+    try:
+        for mode in ("legacy", "async"):
+            print(json.dumps(run(mode, payloads, work, args.max_mb * 1024 * 1024)))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
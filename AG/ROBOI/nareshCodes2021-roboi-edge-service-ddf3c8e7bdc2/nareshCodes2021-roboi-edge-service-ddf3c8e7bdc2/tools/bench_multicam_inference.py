@@ -0,0 +1,97 @@
+import sys
+import os
+import time
+import json
+import logging
+import argparse
+import threading
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ultralytics import YOLO
+from core.multicam import LatestFrameReader, collect_batch, results_to_frame_objects, batched_inference
+
+
+def run(mode, model, videos, streams, seconds, max_batch, conf, realtime):
+    """Looping local videos stand in for cameras; counts frames inferred per second."""
+    new_frame = threading.Event()
+    readers = [LatestFrameReader(f"stream_{i}", videos[i % len(videos)], new_frame=new_frame, loop=True, realtime=realtime)
+               for i in range(streams)]
+    for reader in readers:
+        if not reader.is_opened():
+            raise SystemExit(f"Error: cannot open {reader.uri}")
+        reader.start()
+
+    inferred = {reader.cam_name: 0 for reader in readers}
+    latencies = []
+    calls = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        batch = collect_batch(readers)
+        if not batch:
+            new_frame.wait(0.05)
+            new_frame.clear()
+            continue
+        if mode == "batched":
+            results = batched_inference(model, [frame for _, frame, _ in batch], max_batch=max_batch, conf=conf)
+            calls += (len(batch) + max_batch - 1) // max_batch
+        else:
+            # Previous behaviour: one YOLO call per camera
+            results = [model(frame, verbose=False, conf=conf)[0] for _, frame, _ in batch]
+            calls += len(batch)
+        done = time.time()
+        for (reader, _, captured_at), result in zip(batch, results):
+            results_to_frame_objects(result)
+            inferred[reader.cam_name] += 1
+            latencies.append(done - captured_at)
+
+    for reader in readers:
+        reader.stop()
+    for reader in readers:
+        reader.join(timeout=2.0)
+
+    total = sum(inferred.values())
+    latencies.sort()
+    return {
+        "mode": mode,
+        "streams": streams,
+        "aggregate_fps": round(total / seconds, 2),
+        "per_stream_fps": round(total / seconds / streams, 2),
+        "model_calls": calls,
+        "mean_batch": round(total / calls, 2) if calls else 0.0,
+        "capture_to_result_p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        "frames_read": sum(r.frames_read for r in readers),
+        "frames_skipped": sum(r.frames_skipped for r in readers),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate inference FPS of per-camera vs batched YOLO over looping local videos.")
+    parser.add_argument("--video", action="append", required=True, help="Local video file (repeat to mix clips across streams)")
+    parser.add_argument("--streams", default="1,4,8", help="Comma separated stream counts")
+    parser.add_argument("--modes", default="serial,batched")
+    parser.add_argument("--model", default="models/exports/yolo11_finetuned.pt")
+    parser.add_argument("--conf", type=float, default=0.15)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20.0, help="Measurement time per run")
+    parser.add_argument("--no-realtime", action="store_true", help="Decode files as fast as possible instead of at their native FPS")
+    args = parser.parse_args()
+
+    logging.getLogger("multicam").setLevel(logging.ERROR)
+    model = YOLO(args.model)
+    # Warm up so the first run does not pay for lazy initialisation
+    warm = LatestFrameReader("warmup", args.video[0])
+    ok, frame = warm.cap.read()
+    warm.cap.release()
+    if not ok:
+        raise SystemExit(f"Error: cannot read {args.video[0]}")
+    model([frame] * args.max_batch, verbose=False)
+
+    for streams in [int(s) for s in args.streams.split(",")]:
+        for mode in args.modes.split(","):
+            print(json.dumps(run(mode, model, args.video, streams, args.seconds, args.max_batch, args.conf, not args.no_realtime)))
+
+
+if __name__ == "__main__":
+    main()
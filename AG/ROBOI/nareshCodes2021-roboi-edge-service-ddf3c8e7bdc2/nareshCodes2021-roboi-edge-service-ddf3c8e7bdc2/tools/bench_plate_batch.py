@@ -0,0 +1,112 @@
+import sys
+import os
+import time
+import json
+import random
+import argparse
+import tempfile
+import shutil
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+from runners.yoloe_image_runner import (init_ocr, read_license_plate, process_images, is_yoloe_model,
+                                        YOLOE_CLASSES)
+
+LICENSE_CLASSES = ["license plate", "number plate", "vehicle registration plate", "car number plate", "vehicle plate"]
+NOZZLE_CLASSES = ["fuel nozzle", "petrol pump nozzle", "gas pump handle"]
+
+
+def make_images(folder, count, width, height, seed):
+    """Noisy backgrounds with car-like blocks carrying white plates of random registration text."""
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(count):
+        img = np_rng.integers(40, 200, size=(height, width, 3), dtype=np.uint8)
+        for _ in range(rng.randint(1, 4)):
+            cw, ch = rng.randint(width // 6, width // 3), rng.randint(height // 6, height // 3)
+            x, y = rng.randint(0, width - cw), rng.randint(0, height - ch)
+            cv2.rectangle(img, (x, y), (x + cw, y + ch), [rng.randint(0, 255) for _ in range(3)], -1)
+            pw, ph = cw // 2, max(24, ch // 6)
+            px, py = x + (cw - pw) // 2, y + ch - ph - 4
+            cv2.rectangle(img, (px, py), (px + pw, py + ph), (245, 245, 245), -1)
+            text = f"MH{rng.randint(10, 99)} AB {rng.randint(1000, 9999)}"
+            cv2.putText(img, text, (px + 4, py + ph - 6), cv2.FONT_HERSHEY_SIMPLEX, ph / 40, (10, 10, 10), 2)
+        path = os.path.join(folder, f"synthetic_{i:05d}.jpg")
+        cv2.imwrite(path, img)
+        paths.append(path)
+    return paths
+
+
+def legacy_process(model, images, ocr, output_dir, conf):
+    """The previous loop: one image per YOLO call, one OCR call per plate, synchronous imwrite."""
+    started = time.perf_counter()
+    done = 0
+    for img_path in images:
+        frame = cv2.imread(img_path)
+        if frame is None:
+            continue
+        results = model(frame, conf=conf, verbose=False)[0]
+        if results.boxes is not None and len(results.boxes) > 0:
+            for box in results.boxes:
+                cls_name = results.names[int(box.cls[0])]
+                bbox = box.xyxy[0].cpu().numpy()
+                if cls_name.lower() in [c.lower() for c in LICENSE_CLASSES]:
+                    read_license_plate(ocr, frame, bbox) if ocr else None
+                if cls_name.lower() in [c.lower() for c in NOZZLE_CLASSES]:
+                    pass
+        annotated_frame = results.plot()
+        cv2.imwrite(os.path.join(output_dir, f"detected_{os.path.basename(img_path)}"), annotated_frame)
+        done += 1
+    elapsed = time.perf_counter() - started
+    return {"images": done, "elapsed_s": round(elapsed, 3), "images_per_s": round(done / elapsed, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Images/s of the per-image YOLOE plate OCR loop versus the batched pipeline on synthetic images.")
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--model", default="yoloe-26s-seg.pt")
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--no-ocr", action="store_true", help="Measure detection, drawing and I/O only")
+    parser.add_argument("--source", help="Use an existing image folder instead of generating synthetic images")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="roboi_plates_")
+    try:
+        if args.source:
+            images = sorted(os.path.join(args.source, f) for f in os.listdir(args.source)
+                            if f.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')))
+        else:
+            src = os.path.join(work, "src")
+            os.makedirs(src)
+            images = make_images(src, args.images, args.width, args.height, args.seed)
+        out = os.path.join(work, "out")
+        os.makedirs(out)
+
+        ocr = None if args.no_ocr else init_ocr()
+        model = YOLO(args.model)
+        if is_yoloe_model(args.model):
+            model.set_classes(YOLOE_CLASSES, model.get_text_pe(YOLOE_CLASSES))
+        # Warm up so the first mode does not pay for lazy initialisation
+        model(cv2.imread(images[0]), verbose=False)
+
+        result = legacy_process(model, images, ocr, out, args.conf)
+        print(json.dumps({"mode": "legacy", "batch_size": 1, "ocr": ocr is not None, **result}))
+        for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+            stats = process_images(model, images, ocr, LICENSE_CLASSES, NOZZLE_CLASSES, out, conf=args.conf,
+                                   batch_size=batch_size, quiet=True)
+            print(json.dumps({"mode": "batched", "batch_size": batch_size, "ocr": ocr is not None, **stats}))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
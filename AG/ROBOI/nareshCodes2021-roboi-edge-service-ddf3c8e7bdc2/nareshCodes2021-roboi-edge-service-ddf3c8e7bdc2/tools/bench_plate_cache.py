@@ -0,0 +1,158 @@
+import sys
+import os
+import time
+import json
+import random
+import string
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from core.plate_cache import PlateCache, normalize_plate
+
+
+def random_plate(rng):
+    return f"{rng.choice(['MH', 'KA', 'DL', 'TN'])}{rng.randint(10, 99)} {''.join(rng.choices(string.ascii_uppercase, k=2))} {rng.randint(1000, 9999)}"
+
+
+def render_plate(text, scale, brightness, np_rng):
+    """Plate crop as the detector would hand it over: white plate, dark text, per-frame scale/lighting/noise."""
+    w, h = int(220 * scale), int(50 * scale)
+    img = np.full((h, w, 3), 235, dtype=np.uint8)
+    cv2.putText(img, text, (int(6 * scale), int(36 * scale)), cv2.FONT_HERSHEY_SIMPLEX, 0.75 * scale, (20, 20, 20), 2)
+    img = cv2.convertScaleAbs(img, alpha=brightness, beta=0)
+    noise = np_rng.integers(-10, 11, img.shape, dtype=np.int16)
+    return np.clip(img + noise, 0, 255).astype(np.uint8)
+
+
+def make_replay(vehicles, min_frames, max_frames, concurrent, id_switch_rate, seed):
+    """Frames of (track_id, truth, scale, brightness, box): vehicles enter and leave, `concurrent`
+    in view at most, each in its own lane. Crops are rendered during the replay so memory stays flat."""
+    rng = random.Random(seed)
+    pending = [(random_plate(rng), rng.randint(min_frames, max_frames)) for _ in range(vehicles)]
+    active = []
+    next_track = 1
+    frames = []
+    while pending or active:
+        while pending and len(active) < concurrent and rng.random() < 0.2:
+            text, life = pending.pop()
+            lane = min(set(range(concurrent)) - {v["lane"] for v in active})
+            active.append({"text": text, "life": life, "age": 0, "track": next_track, "lane": lane,
+                           "x": 100.0 + 450 * lane, "y": 200.0,
+                           "scale": rng.uniform(0.6, 0.9), "brightness": rng.uniform(0.8, 1.1)})
+            next_track += 1
+        if not active and pending:
+            continue
+        frame = []
+        for v in active:
+            if rng.random() < id_switch_rate:
+                # Tracker lost the vehicle and gave it a new id
+                v["track"] = next_track
+                next_track += 1
+            v["scale"] = min(1.6, v["scale"] * 1.004) # approaching the camera
+            v["brightness"] = min(1.2, max(0.7, v["brightness"] + rng.uniform(-0.01, 0.01)))
+            v["x"] += rng.uniform(-1.5, 1.5)
+            v["y"] += 1.0
+            box = (int(v["x"]), int(v["y"]), int(v["x"] + 220 * v["scale"]), int(v["y"] + 50 * v["scale"]))
+            frame.append((v["track"], v["text"], v["scale"], v["brightness"], box))
+            v["age"] += 1
+        active = [v for v in active if v["age"] < v["life"]]
+        frames.append(frame)
+    return frames
+
+
+class SimulatedOCR:
+    """Stands in for PaddleOCR: returns the true text with per-character errors, and a score that drops with them."""
+
+    def __init__(self, error_rate, latency, seed):
+        self.error_rate = error_rate
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def read(self, crop, truth):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.rng.random() < 0.05:
+            return None
+        chars = list(truth)
+        errors = 0
+        for i, c in enumerate(chars):
+            if c != " " and self.rng.random() < self.error_rate:
+                chars[i] = self.rng.choice(string.ascii_uppercase + string.digits)
+                errors += 1
+        score = max(0.3, 0.97 - 0.12 * errors - self.rng.uniform(0, 0.05))
+        return "".join(chars), score
+
+
+def run(mode, frames, ocr, cache_kwargs, seed):
+    cache = PlateCache(**cache_kwargs) if mode != "no_cache" else None
+    np_rng = np.random.default_rng(seed)
+    final = {} # truth -> last text shown for that vehicle
+    started = time.perf_counter()
+    for frame_id, frame in enumerate(frames, 1):
+        for track_id, truth, scale, brightness, box in frame:
+            crop = render_plate(truth, scale, brightness, np_rng)
+            if cache is None:
+                read = ocr.read(crop, truth)
+                final[truth] = read[0] if read else final.get(truth)
+                continue
+            entry, need_read = cache.lookup(track_id if mode == "track" else None, crop, frame_id, box=box)
+            if need_read:
+                cache.record(entry, ocr.read(crop, truth))
+            if entry.text:
+                final[truth] = entry.text
+    elapsed = time.perf_counter() - started
+
+    plates = sum(len(f) for f in frames)
+    correct = sum(1 for truth, text in final.items() if text and normalize_plate(text) == normalize_plate(truth))
+    vehicles = len({truth for f in frames for _, truth, _, _, _ in f})
+    result = {
+        "mode": mode,
+        "frames": len(frames),
+        "plate_sightings": plates,
+        "vehicles": vehicles,
+        "ocr_calls": ocr.calls,
+        "ocr_avoided_pct": round(100.0 * (plates - ocr.calls) / plates, 2) if plates else 0.0,
+        "ocr_calls_per_vehicle": round(ocr.calls / vehicles, 2) if vehicles else 0.0,
+        "final_text_accuracy": round(correct / vehicles, 3) if vehicles else 0.0,
+        "elapsed_s": round(elapsed, 3),
+    }
+    if cache is not None:
+        result["cache"] = cache.stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay simulated vehicles through the plate OCR cache and report OCR calls avoided.")
+    parser.add_argument("--vehicles", type=int, default=300)
+    parser.add_argument("--min-frames", type=int, default=60, help="Shortest time a vehicle stays in view")
+    parser.add_argument("--max-frames", type=int, default=600)
+    parser.add_argument("--concurrent", type=int, default=4, help="Vehicles in view at once, at most")
+    parser.add_argument("--id-switch-rate", type=float, default=0.002, help="Per-frame chance the tracker re-ids a vehicle")
+    parser.add_argument("--ocr-error-rate", type=float, default=0.06, help="Per-character error rate of the simulated OCR")
+    parser.add_argument("--ocr-ms", type=float, default=0.0, help="Simulated OCR latency per call")
+    parser.add_argument("--agree", type=int, default=2)
+    parser.add_argument("--confident", type=float, default=0.9)
+    parser.add_argument("--max-reads", type=int, default=5)
+    parser.add_argument("--reread-interval", type=int, default=15)
+    parser.add_argument("--hash-distance", type=int, default=20)
+    parser.add_argument("--max-shift", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = make_replay(args.vehicles, args.min_frames, args.max_frames, args.concurrent, args.id_switch_rate, args.seed)
+    cache_kwargs = {"agree": args.agree, "confident": args.confident, "max_reads": args.max_reads,
+                    "reread_interval": args.reread_interval, "hash_distance": args.hash_distance,
+                    "max_shift": args.max_shift}
+    for mode in ("no_cache", "track", "hash"):
+        ocr = SimulatedOCR(args.ocr_error_rate, args.ocr_ms / 1000.0, args.seed)
+        print(json.dumps(run(mode, frames, ocr, cache_kwargs, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
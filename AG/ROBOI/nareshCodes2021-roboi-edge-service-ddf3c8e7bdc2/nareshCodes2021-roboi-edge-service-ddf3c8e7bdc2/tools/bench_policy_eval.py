@@ -0,0 +1,137 @@
+import sys
+import os
+import time
+import json
+import random
+import argparse
+import datetime
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.policy_engine import PolicySet
+
+
+def legacy_evaluate(policy, camera_name, num_people, num_vehicles, identities, current_time):
+    """The previous per-frame evaluation: config dicts re-read for every frame."""
+    if num_people == 0:
+        return []
+    alerts = []
+    if current_time.weekday() == 6:
+        alerts.append("restricted_access_sunday")
+    policy_key = 'boss_cabin' if camera_name == "boss_cabin" else 'office'
+    p = policy.get(policy_key, {})
+    open_h = p.get('open_hour', 0)
+    open_m = p.get('open_min', 0)
+    close_h = p.get('close_hour', 23)
+    close_m = p.get('close_min', 59)
+    hour, minute = current_time.hour, current_time.minute
+    if hour < open_h or (hour == open_h and minute < open_m):
+        alerts.append("restricted_access_before_hours")
+    elif hour > close_h or (hour == close_h and minute >= close_m):
+        alerts.append("restricted_access_after_hours")
+
+    crowd_controlled_zones = policy.get('crowd_controlled_zones', [])
+    if camera_name in crowd_controlled_zones and (num_people > 5):
+        alerts.append("crowd_policy_violation")
+    if camera_name in crowd_controlled_zones and (num_vehicles > 12):
+        alerts.append("vehicle_crowd_policy_violation")
+
+    if camera_name == "boss_cabin" and alerts:
+        allowlist = [name.lower() for name in policy.get('boss_cabin', {}).get('allowlist', [])]
+        unauthorized = []
+        for identity in identities:
+            if identity in allowlist:
+                return []
+            unauthorized.append(identity)
+        if unauthorized:
+            tags = []
+            for identity in unauthorized:
+                tag = "unauthorized_stranger" if identity == "stranger" else f"unauthorized_person_{identity}"
+                if tag not in tags:
+                    tags.append(tag)
+            return tags
+    return alerts
+
+
+def make_policy(cameras, crowd_share, window, dwell, rng):
+    zones = [c for c in cameras if rng.random() < crowd_share] + ["boss_cabin"]
+    return {
+        "crowd_controlled_zones": zones,
+        "crowd_limits": {"people": 5, "vehicles": 12, "window_seconds": window, "dwell_seconds": dwell},
+        "boss_cabin": {"open_hour": 6, "close_hour": 19, "allowlist": ["Sampad", "Sagar"]},
+        "office": {"open_hour": 4, "open_min": 0, "close_hour": 12, "close_min": 45},
+    }
+
+
+def make_frames(cameras, frames, fps, rng):
+    """Round-robin frames over all cameras, clock advancing at `fps` per camera, spanning a day boundary."""
+    start = datetime.datetime(2026, 3, 7, 22, 0, tzinfo=datetime.timezone.utc).timestamp() # Saturday night
+    step = 1.0 / (fps * len(cameras))
+    result = []
+    for i in range(frames):
+        now = start + i * step
+        cam = cameras[i % len(cameras)]
+        people = rng.choice([0, 0, 1, 2, 3, 6, 8])
+        vehicles = rng.choice([0, 2, 13])
+        identities = [rng.choice(["stranger", "sagar", "ravi"])] if cam == "boss_cabin" and rng.random() < 0.5 else []
+        result.append((cam, people, vehicles, identities, datetime.datetime.fromtimestamp(now, datetime.timezone.utc), now))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay simulated frames through the legacy and compiled policy evaluators.")
+    parser.add_argument("--cameras", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=200000)
+    parser.add_argument("--fps", type=float, default=10.0, help="Simulated frames per second per camera")
+    parser.add_argument("--crowd-share", type=float, default=0.5, help="Fraction of cameras in crowd controlled zones")
+    parser.add_argument("--window", type=float, default=10.0, help="crowd_limits.window_seconds for the windowed run")
+    parser.add_argument("--dwell", type=float, default=3.0, help="crowd_limits.dwell_seconds for the windowed run")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cameras = [f"cam_{i:04d}" for i in range(args.cameras - 1)] + ["boss_cabin"]
+    frames = make_frames(cameras, args.frames, args.fps, rng)
+
+    policy = make_policy(cameras, args.crowd_share, 0, 0, random.Random(args.seed))
+    windowed_policy = make_policy(cameras, args.crowd_share, args.window, args.dwell, random.Random(args.seed))
+    compiled = PolicySet(policy)
+    compiled_windowed = PolicySet(windowed_policy)
+
+    def run_legacy():
+        return [legacy_evaluate(policy, cam, p, v, ids, dt) for cam, p, v, ids, dt, now in frames]
+
+    def run_compiled(policy_set):
+        state = {}
+        out = []
+        for cam, p, v, ids, dt, now in frames:
+            cam_state = state.get(cam)
+            if cam_state is None:
+                cam_state = state[cam] = {}
+            out.append(policy_set.for_camera(cam).evaluate(cam_state, p, v, ids, dt, now))
+        return out
+
+    results = {}
+    for mode, fn in (("legacy", run_legacy), ("compiled", lambda: run_compiled(compiled)),
+                     ("compiled_windowed", lambda: run_compiled(compiled_windowed))):
+        t0 = time.perf_counter()
+        alerts = fn()
+        elapsed = time.perf_counter() - t0
+        results[mode] = alerts
+        print(json.dumps({
+            "mode": mode,
+            "cameras": args.cameras,
+            "frames": args.frames,
+            "frames_with_alerts": sum(1 for a in alerts if a),
+            "evals_per_s": round(args.frames / elapsed),
+            "us_per_eval": round(elapsed / args.frames * 1e6, 3),
+        }))
+
+    if results["legacy"] != results["compiled"]:
+        print("Error: compiled evaluator disagrees with legacy evaluation")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
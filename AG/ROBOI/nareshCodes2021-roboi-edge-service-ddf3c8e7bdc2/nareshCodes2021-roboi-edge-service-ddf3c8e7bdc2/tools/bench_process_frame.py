@@ -0,0 +1,120 @@
+import sys
+import os
+import time
+import json
+import random
+import logging
+import argparse
+import tempfile
+import shutil
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import analytics_engine
+from core.analytics_engine import AnalyticsEngine, FrameDetections, VEHICLE_LABELS
+from core.logger import JSONLogger
+
+LABELS = ["person", "person", "person", "face", "car", "truck", "chair", "bottle", "fire", "smoke", "violence", "dog"]
+
+
+def make_frames(frames, objects, seed):
+    rng = random.Random(seed)
+    result = []
+    for _ in range(frames):
+        objs = []
+        for j in range(objects):
+            label = rng.choice(LABELS)
+            obj = {
+                "label": label,
+                "class_id": LABELS.index(label),
+                "confidence": round(rng.random(), 4),
+                "model_id": 1,
+                "bbox": {"top": rng.randint(0, 600), "left": rng.randint(0, 1000), "width": 60, "height": 140},
+            }
+            if label == "face" and rng.random() < 0.5:
+                obj["recognition"] = {"identity": rng.choice(["stranger", "sagar", "guest"]), "confidence": 0.8}
+            objs.append(obj)
+        result.append(objs)
+    return result
+
+
+def legacy_filter(frame_objects, t):
+    """The previous per-frame filtering: one list comprehension per category plus a list membership scan."""
+    valid_people = [obj for obj in frame_objects if obj["label"].lower() in ["person", "face"] and obj.get("confidence", 0) >= t]
+    valid_fire = [obj for obj in frame_objects if obj["label"].lower() in ["fire", "smoke"] and obj.get("confidence", 0) >= t]
+    valid_violence = [obj for obj in frame_objects if obj["label"].lower() == "violence" and obj.get("confidence", 0) >= t]
+    valid_vehicles = [obj for obj in frame_objects if obj["label"].lower() in list(VEHICLE_LABELS) and obj.get("confidence", 0) >= t]
+    all_valid_detections = valid_people + valid_fire + valid_violence + valid_vehicles
+    other_objects = [obj for obj in frame_objects if obj.get("confidence", 0) >= 0.5 and obj not in all_valid_detections]
+    return all_valid_detections + other_objects
+
+
+def indexed_filter(frame_objects, t):
+    return FrameDetections(frame_objects, t, t, t, t).log_detections
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def time_filter(fn, frames, threshold):
+    latencies = []
+    for objs in frames:
+        t0 = time.perf_counter()
+        fn(objs, threshold)
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def time_engine(frames):
+    """Full process_frame with every frame logged as an event (cooldown disabled)."""
+    analytics_engine.ALERT_COOLDOWN = 0.0
+    engine = AnalyticsEngine(watch_config=False)
+    engine.policy = engine.policy.replace(ai_insights_enabled=False)
+    latencies = []
+    for objs in frames:
+        t0 = time.perf_counter()
+        engine.process_frame("cafeteria", objs)
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def summary(stage, objects, latencies):
+    return {
+        "stage": stage,
+        "objects_per_frame": objects,
+        "frames": len(latencies),
+        "p50_us": round(pct(latencies, 0.5) * 1e6, 2),
+        "p99_us": round(pct(latencies, 0.99) * 1e6, 2),
+        "frames_per_s": round(len(latencies) / sum(latencies)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame cost of AnalyticsEngine detection filtering at increasing object counts.")
+    parser.add_argument("--objects", default="10,100,500", help="Comma separated objects per frame")
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    analytics_engine.logger.setLevel(logging.WARNING) # one EVENT DETECTED line per frame otherwise
+    work = tempfile.mkdtemp(prefix="roboi_frame_")
+    JSONLogger.configure(path=os.path.join(work, "detection_log.json"))
+    try:
+        for objects in [int(n) for n in args.objects.split(",")]:
+            frames = make_frames(args.frames, objects, args.seed)
+            assert legacy_filter(frames[0], args.threshold) == indexed_filter(frames[0], args.threshold)
+            print(json.dumps(summary("legacy_filter", objects, time_filter(legacy_filter, frames, args.threshold))))
+            print(json.dumps(summary("indexed_filter", objects, time_filter(indexed_filter, frames, args.threshold))))
+            print(json.dumps(summary("process_frame", objects, time_engine(frames))))
+        JSONLogger.flush()
+    finally:
+        JSONLogger.close()
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
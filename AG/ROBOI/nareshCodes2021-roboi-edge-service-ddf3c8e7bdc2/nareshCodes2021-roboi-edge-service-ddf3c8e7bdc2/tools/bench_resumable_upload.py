@@ -0,0 +1,150 @@
+import sys
+import os
+import time
+import json
+import signal
+import hashlib
+import argparse
+import tempfile
+import subprocess
+import shutil
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.fake_object_store import FakeObjectStore
+
+
+def md5(path):
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def build_events(captures_dir, events, video_mb):
+    """Returns {blob_name: md5} of everything that must end up in the store."""
+    expected = {}
+    for i in range(events):
+        name = f"bench_event_{i:04d}"
+        event_dir = os.path.join(captures_dir, name)
+        os.makedirs(event_dir)
+        files = {"1.webm": video_mb * 1024 * 1024}
+        for j in range(3):
+            files[f"dist_{j}.jpg"] = 200 * 1024
+        for fname, size in files.items():
+            path = os.path.join(event_dir, fname)
+            with open(path, "wb") as f:
+                f.write(os.urandom(size))
+            expected[f"events/{name}/{fname}"] = md5(path)
+        with open(os.path.join(event_dir, ".upload_ready"), "w") as f:
+            f.write(str(time.time()))
+    return expected
+
+
+def child(args):
+    """Worker process: uploads everything it finds, resuming from the journal."""
+    from uploader import upload_worker
+    from uploader.journal import UploadJournal
+    from uploader.pipeline import UploadPipeline
+    from uploader.resumable import HttpResumableBucket
+    from uploader.watcher import find_ready_events
+
+    upload_worker.logging.getLogger('').setLevel(upload_worker.logging.ERROR)
+    pipeline = UploadPipeline(
+        HttpResumableBucket(args.endpoint, "bench"),
+        journal=UploadJournal(args.journal),
+        transcode_workers=1,
+        upload_workers=args.upload_workers,
+        chunk_size=args.chunk_kb * 1024,
+        bandwidth_limit=args.kbps * 1024,
+        max_backoff=0.5,
+    )
+    for event_dir in find_ready_events(args.captures):
+        pipeline.submit_event(event_dir)
+    pipeline.drain()
+    pipeline.close()
+
+
+def run(label, chunk_kb, args):
+    work = tempfile.mkdtemp(prefix="roboi_resumable_")
+    captures_dir = os.path.join(work, "captures")
+    journal = os.path.join(work, "journal.db")
+    os.makedirs(captures_dir)
+    expected = build_events(captures_dir, args.events, args.video_mb)
+    payload = sum(os.path.getsize(os.path.join(r, f)) for r, _, fs in os.walk(captures_dir) for f in fs if f != ".upload_ready")
+
+    store = FakeObjectStore(os.path.join(work, "store"), drop_rate=args.drop_rate,
+                            error_rate=args.error_rate, seed=args.seed).start()
+    cmd = [sys.executable, os.path.abspath(__file__), "--child",
+           "--endpoint", store.endpoint, "--journal", journal, "--captures", captures_dir,
+           "--chunk-kb", str(chunk_kb), "--kbps", str(args.kbps), "--upload-workers", str(args.upload_workers)]
+
+    start = time.monotonic()
+    kills = 0
+    while True:
+        proc = subprocess.Popen(cmd)
+        try:
+            proc.wait(timeout=args.kill_every if kills < args.kills else None)
+            break
+        except subprocess.TimeoutExpired:
+            # Simulated power loss / crash of the worker mid-upload
+            proc.send_signal(signal.SIGKILL)
+            proc.wait()
+            kills += 1
+    elapsed = time.monotonic() - start
+    store.stop()
+
+    stored_ok = all(
+        os.path.exists(store.object_path(blob)) and md5(store.object_path(blob)) == digest
+        for blob, digest in expected.items()
+    )
+    result = {
+        "mode": label,
+        "chunk_kb": chunk_kb,
+        "payload_mb": round(payload / 1e6, 2),
+        "received_mb": round(store.bytes_received / 1e6, 2),
+        "resent_mb": round((store.bytes_received - payload) / 1e6, 2),
+        "resent_pct": round((store.bytes_received - payload) * 100.0 / payload, 1),
+        "dropped_chunks": store.chunks_dropped,
+        "failed_chunks": store.chunks_failed,
+        "worker_kills": kills,
+        "elapsed_s": round(elapsed, 2),
+        "all_objects_intact": stored_ok,
+        "captures_left": len(os.listdir(captures_dir)),
+    }
+    shutil.rmtree(work, ignore_errors=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes re-sent by the upload pipeline under injected failures and worker crashes.")
+    parser.add_argument("--events", type=int, default=4)
+    parser.add_argument("--video-mb", type=int, default=8)
+    parser.add_argument("--drop-rate", type=float, default=0.05, help="Chunk PUTs cut off mid-body")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Chunk PUTs answered with 503")
+    parser.add_argument("--kills", type=int, default=2, help="Times the worker is SIGKILLed")
+    parser.add_argument("--kill-every", type=float, default=1.5, help="Seconds between kills")
+    parser.add_argument("--kbps", type=float, default=8192, help="Bandwidth limit in KB/s (0 = unlimited)")
+    parser.add_argument("--upload-workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    # Child process arguments
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--endpoint", help=argparse.SUPPRESS)
+    parser.add_argument("--journal", help=argparse.SUPPRESS)
+    parser.add_argument("--captures", help=argparse.SUPPRESS)
+    parser.add_argument("--chunk-kb", type=int, default=256, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    # Whole-file mode: one PUT per file, so any failure re-sends the whole file
+    for label, chunk_kb in (("chunked_256k", 256), ("chunked_1m", 1024), ("whole_file", 1024 * 1024)):
+        print(json.dumps(run(label, chunk_kb, args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import sys
+import os
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uploader import upload_worker
+from uploader.upload_worker import LocalBucket
+from uploader.pipeline import UploadPipeline, TranscodeSettings
+
+
+def make_clip(path, seconds, width, height, fps):
+    """Synthetic MP4 clip (moving test pattern + noise) so VP9 has real work to do."""
+    subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds}",
+        "-vf", "noise=alls=20:allf=t",
+        "-c:v", "mpeg4", "-q:v", "5", path,
+    ], check=True)
+
+
+def build_events(captures_dir, template_clip, events):
+    for i in range(events):
+        event_dir = os.path.join(captures_dir, f"bench_event_{i:04d}")
+        os.makedirs(event_dir)
+        shutil.copyfile(template_clip, os.path.join(event_dir, "1.mp4"))
+        for j in range(3):
+            with open(os.path.join(event_dir, f"dist_{j}.jpg"), "wb") as f:
+                f.write(os.urandom(64 * 1024))
+        with open(os.path.join(event_dir, ".upload_ready"), "w") as f:
+            f.write(str(time.time()))
+
+
+def pct(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run(workers, events, template_clip, settings):
+    work = tempfile.mkdtemp(prefix="roboi_transcode_")
+    captures_dir = os.path.join(work, "captures")
+    os.makedirs(captures_dir)
+    build_events(captures_dir, template_clip, events)
+
+    latencies = []
+    pipeline = UploadPipeline(
+        LocalBucket(os.path.join(work, "bucket")),
+        transcode_workers=workers,
+        upload_workers=4,
+        settings=settings,
+        on_event_done=lambda job: latencies.append(time.time() - job.submitted_at),
+    )
+
+    start = time.monotonic()
+    for name in sorted(os.listdir(captures_dir)):
+        pipeline.submit_event(os.path.join(captures_dir, name))
+    pipeline.drain()
+    elapsed = time.monotonic() - start
+    pipeline.close()
+    shutil.rmtree(work, ignore_errors=True)
+
+    return {
+        "concurrent_encodes": workers,
+        "events": events,
+        "elapsed_s": round(elapsed, 2),
+        "events_per_min": round(events / elapsed * 60.0, 2),
+        "event_latency_p50_s": round(pct(latencies, 0.5), 2),
+        "event_latency_max_s": round(max(latencies) if latencies else 0.0, 2),
+        "transcode_queue_wait_mean_s": round(statistics.mean(pipeline.transcode_wait), 2) if pipeline.transcode_wait else 0.0,
+        "transcode_queue_wait_p95_s": round(pct(pipeline.transcode_wait, 0.95), 2),
+        "upload_queue_wait_mean_ms": round(statistics.mean(pipeline.upload_wait) * 1000.0, 2) if pipeline.upload_wait else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parallel MP4->WebM transcode + upload pipeline.")
+    parser.add_argument("--workers", default="1,2,4", help="Comma separated concurrent encode counts")
+    parser.add_argument("--events", type=int, default=8, help="Events in the burst")
+    parser.add_argument("--seconds", type=int, default=8, help="Length of each synthetic clip")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=int, default=15)
+    parser.add_argument("--deadline", default="realtime")
+    parser.add_argument("--cpu-used", type=int, default=8)
+    parser.add_argument("--no-row-mt", action="store_true")
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None:
+        print("Error: ffmpeg not found in PATH")
+        sys.exit(1)
+
+    upload_worker.logging.getLogger('').setLevel(upload_worker.logging.WARNING)
+
+    settings = TranscodeSettings(deadline=args.deadline, cpu_used=args.cpu_used, row_mt=not args.no_row_mt)
+    clip_dir = tempfile.mkdtemp(prefix="roboi_clip_")
+    template_clip = os.path.join(clip_dir, "template.mp4")
+    try:
+        make_clip(template_clip, args.seconds, args.width, args.height, args.fps)
+        for workers in [int(w) for w in args.workers.split(",")]:
+            print(json.dumps(run(workers, args.events, template_clip, settings)))
+    finally:
+        shutil.rmtree(clip_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
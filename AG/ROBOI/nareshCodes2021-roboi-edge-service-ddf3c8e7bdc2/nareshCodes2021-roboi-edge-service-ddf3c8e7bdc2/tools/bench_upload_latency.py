@@ -0,0 +1,119 @@
+import sys
+import os
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import threading
+import statistics
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uploader import upload_worker
+from uploader.upload_worker import LocalBucket, run_worker, scan_and_upload
+
+
+class TimedBucket(LocalBucket):
+    """LocalBucket that records when the first blob of each event starts uploading."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.first_upload = {}
+        self.lock = threading.Lock()
+
+    def blob(self, blob_name):
+        # blob_name = events/{dir_name}/{file}
+        event = blob_name.split("/")[1]
+        with self.lock:
+            self.first_upload.setdefault(event, time.monotonic())
+        return super().blob(blob_name)
+
+
+def legacy_loop(captures_dir, bucket, stop_event, interval=5.0):
+    """The previous behaviour: full scan, then sleep."""
+    while not stop_event.is_set():
+        scan_and_upload(captures_dir, bucket=bucket)
+        stop_event.wait(interval)
+
+
+def write_event(captures_dir, name, payload_bytes):
+    event_dir = os.path.join(captures_dir, name)
+    os.makedirs(event_dir)
+    for i in range(3):
+        with open(os.path.join(event_dir, f"snap_{i}.jpg"), "wb") as f:
+            f.write(os.urandom(payload_bytes))
+    marker = os.path.join(event_dir, ".upload_ready")
+    started = time.monotonic()
+    with open(marker, "w") as f:
+        f.write(str(time.time()))
+    return started
+
+
+def run_mode(mode, events, gap, payload_bytes):
+    work = tempfile.mkdtemp(prefix="roboi_bench_")
+    captures_dir = os.path.join(work, "captures")
+    os.makedirs(captures_dir)
+    bucket = TimedBucket(os.path.join(work, "bucket"))
+    stop_event = threading.Event()
+
+    if mode == "legacy":
+        worker = threading.Thread(target=legacy_loop, args=(captures_dir, bucket, stop_event), daemon=True)
+    else:
+        worker = threading.Thread(
+            target=run_worker,
+            args=(captures_dir, bucket),
+            kwargs={"stop_event": stop_event, "use_inotify": mode == "inotify"},
+            daemon=True,
+        )
+    worker.start()
+    time.sleep(0.5)
+
+    written = {}
+    for i in range(events):
+        name = f"bench_event_{i:04d}"
+        written[name] = write_event(captures_dir, name, payload_bytes)
+        time.sleep(gap)
+
+    deadline = time.monotonic() + 15.0
+    while time.monotonic() < deadline and len(bucket.first_upload) < events:
+        time.sleep(0.01)
+
+    stop_event.set()
+    worker.join(timeout=10.0)
+    shutil.rmtree(work, ignore_errors=True)
+
+    latencies = [(bucket.first_upload[n] - t) * 1000.0 for n, t in written.items() if n in bucket.first_upload]
+    latencies.sort()
+    if not latencies:
+        return {"mode": mode, "events": events, "uploaded": 0}
+    return {
+        "mode": mode,
+        "events": events,
+        "uploaded": len(latencies),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark marker-to-upload-start latency of the upload worker.")
+    parser.add_argument("--modes", default="inotify,poll,legacy", help="Comma separated: inotify, poll, legacy")
+    parser.add_argument("--events", type=int, default=20, help="Number of synthetic events per mode")
+    parser.add_argument("--gap", type=float, default=0.37, help="Seconds between events")
+    parser.add_argument("--payload-kb", type=int, default=64, help="Size of each synthetic snapshot")
+    args = parser.parse_args()
+
+    # Keep benchmark noise out of the console
+    upload_worker.logging.getLogger('').setLevel(upload_worker.logging.WARNING)
+
+    results = [run_mode(m.strip(), args.events, args.gap, args.payload_kb * 1024) for m in args.modes.split(",")]
+    for r in results:
+        print(json.dumps(r))
+
+
+if __name__ == "__main__":
+    main()
@@ -189,6 +189,15 @@ class VideoRecorder:
             frame_objects=frame_objects
         )
 
+    def stop(self):
+        """
+        Ends a recording in progress before its post-event frames are in (e.g. on shutdown):
+        closes the video and writes the upload marker. Does nothing when not recording.
+        """
+        with self.lock:
+            if self.is_recording:
+                self._stop_recording()
+
     def _stop_recording(self):
         """Stops the current recording."""
         self.is_recording = False
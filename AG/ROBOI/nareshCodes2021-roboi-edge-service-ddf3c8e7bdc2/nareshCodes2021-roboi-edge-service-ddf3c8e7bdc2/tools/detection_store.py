@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compacts closed detection log segments into the Parquet detection store and
+runs aggregate queries against it (see core/detection_store.py).
+
+  compact    roll detection_log.json.N (and .N.gz) not yet compacted into
+             <store>/<table>/date=YYYY-MM-DD/cam_id=<cam>/; safe to run from cron
+  query      filtered group-by over the store, one JSON object per result row
+
+JSONLogger keeps only DETECTION_LOG_BACKUPS rotated segments, so compact has to
+run more often than that many rotations happen (e.g. every few minutes from
+cron or a systemd timer); a segment deleted before compaction is lost to the store.
+
+Examples:
+  python3 tools/detection_store.py compact
+  python3 tools/detection_store.py query --group-by cam_id,bucket --bucket 1h \
+      --start 2025-11-01 --end 2025-12-01 --where event_type=event
+  python3 tools/detection_store.py query --table detections --group-by label \
+      --metric count --metric mean:confidence --camera cam_01 --start 2025-11-24
+"""
+import sys
+import os
+import json
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.logger import DETECTION_LOG_FILE
+from core.detection_store import DetectionStore, STORE_DIR, EVENTS, DETECTIONS
+
+
+def parse_where(items):
+    """['event_type=event', 'event_status=warning,critical'] -> {column: value or [values]}"""
+    where = {}
+    for item in items or []:
+        column, _, value = item.partition("=")
+        values = value.split(",")
+        where[column] = values if len(values) > 1 else value
+    return where
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet detection store: compaction and aggregate queries.")
+    parser.add_argument("--store", default=STORE_DIR, help="Store root directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    compact = sub.add_parser("compact", help="Compact closed log segments into the store")
+    compact.add_argument("--log", default=DETECTION_LOG_FILE, help="Live detection log; its rotated segments are compacted")
+
+    query = sub.add_parser("query", help="Filtered aggregate over the store")
+    query.add_argument("--table", choices=(EVENTS, DETECTIONS), default=EVENTS)
+    query.add_argument("--group-by", default="cam_id", help="Comma list of columns, 'bucket' for time buckets ('' for none)")
+    query.add_argument("--bucket", help="Time bucket width: seconds or 15m / 1h / 1d")
+    query.add_argument("--metric", action="append", help="count (default) or sum|mean|min|max|n_unique:<column>")
+    query.add_argument("--start", help="Inclusive start: ISO date/time (UTC) or epoch seconds")
+    query.add_argument("--end", help="Exclusive end: ISO date/time (UTC) or epoch seconds")
+    query.add_argument("--camera", action="append", help="Camera id (repeatable)")
+    query.add_argument("--where", action="append", help="column=value or column=v1,v2 (repeatable)")
+    query.add_argument("--trigger", help="Only camera_events whose triggers include this one")
+    args = parser.parse_args()
+
+    store = DetectionStore(args.store)
+    if args.command == "compact":
+        print(json.dumps(store.compact(args.log)))
+        return
+
+    as_time = lambda v: int(v) if v and v.isdigit() else v
+    rows = store.aggregate(
+        table=args.table,
+        group_by=[c for c in args.group_by.split(",") if c],
+        bucket=int(args.bucket) if args.bucket and args.bucket.isdigit() else args.bucket,
+        metrics=args.metric or ["count"],
+        start=as_time(args.start),
+        end=as_time(args.end),
+        cameras=args.camera,
+        where=parse_where(args.where),
+        trigger=args.trigger,
+    )
+    for row in rows:
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import os
+import re
+import uuid
+import random
+import socket
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_CONTENT_RANGE_RE = re.compile(r"bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)")
+
+
+class FakeObjectStore:
+    """
+    Minimal local server for the GCS resumable upload protocol, with failure injection.
+
+    drop_rate:  per-MiB probability that a PUT is cut off mid-body (connection closed, no reply)
+    error_rate: per-MiB probability that a PUT is fully read and then answered with 503
+
+    Rates are per MiB of body so that large requests fail more often than small
+    ones, as they do on a flaky uplink.
+    """
+
+    def __init__(self, root, host="127.0.0.1", port=0, drop_rate=0.0, error_rate=0.0, seed=None):
+        self.root = root
+        self.drop_rate = drop_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.sessions = {}  # id -> {"name", "committed", "path"}
+        self.lock = threading.Lock()
+        self.bytes_received = 0
+        self.chunks_dropped = 0
+        self.chunks_failed = 0
+        os.makedirs(root, exist_ok=True)
+
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):
+                pass
+
+            def do_POST(self):
+                store._handle_start(self)
+
+            def do_PUT(self):
+                store._handle_put(self)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def object_path(self, name):
+        return os.path.join(self.root, "objects", name)
+
+    # --- Protocol ---
+    def _reply(self, handler, status, headers=None):
+        handler.send_response(status)
+        for k, v in (headers or {}).items():
+            handler.send_header(k, v)
+        handler.send_header("Content-Length", "0")
+        handler.end_headers()
+
+    def _range_headers(self, session):
+        if session["committed"] > 0:
+            return {"Range": f"bytes=0-{session['committed'] - 1}"}
+        return {}
+
+    def _handle_start(self, handler):
+        parts = urlsplit(handler.path)
+        name = parse_qs(parts.query).get("name", [None])[0]
+        if not parts.path.startswith("/upload/") or not name:
+            return self._reply(handler, 400)
+        session_id = uuid.uuid4().hex
+        with self.lock:
+            self.sessions[session_id] = {
+                "name": name,
+                "committed": 0,
+                "path": os.path.join(self.root, "partial", session_id),
+            }
+        os.makedirs(os.path.join(self.root, "partial"), exist_ok=True)
+        open(self.sessions[session_id]["path"], "wb").close()
+        self._reply(handler, 200, {"Location": f"{self.endpoint}/session/{session_id}"})
+
+    def _handle_put(self, handler):
+        session_id = handler.path.rsplit("/", 1)[-1]
+        with self.lock:
+            session = self.sessions.get(session_id)
+        if session is None:
+            return self._reply(handler, 404)
+
+        length = int(handler.headers.get("Content-Length", 0))
+        match = _CONTENT_RANGE_RE.match(handler.headers.get("Content-Range", ""))
+        if not match:
+            return self._reply(handler, 400)
+        start, end, total = match.groups()
+        total = int(total) if total != "*" else None
+
+        if start is None:
+            # Status query
+            if total is not None and session["committed"] >= total:
+                return self._reply(handler, 200)
+            return self._reply(handler, 308, self._range_headers(session))
+
+        start, end = int(start), int(end)
+        mib = max(length, 1) / (1024 * 1024)
+        p_drop = 1.0 - (1.0 - self.drop_rate) ** mib
+        p_error = 1.0 - (1.0 - self.error_rate) ** mib
+        roll = self.random.random()
+        if roll < p_drop:
+            # Read part of the body, then vanish like a dead uplink
+            partial = handler.rfile.read(max(1, int(length * self.random.random())))
+            with self.lock:
+                self.bytes_received += len(partial)
+                self.chunks_dropped += 1
+            handler.close_connection = True
+            try:
+                handler.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            return
+
+        body = handler.rfile.read(length)
+        with self.lock:
+            self.bytes_received += len(body)
+
+        if roll < p_drop + p_error:
+            with self.lock:
+                self.chunks_failed += 1
+            return self._reply(handler, 503)
+
+        if start != session["committed"]:
+            # Client is out of sync; tell it what we have
+            return self._reply(handler, 308, self._range_headers(session))
+
+        with open(session["path"], "ab") as f:
+            f.write(body)
+        session["committed"] = end + 1
+
+        if total is not None and session["committed"] >= total:
+            dest = self.object_path(session["name"])
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(session["path"], dest)
+            return self._reply(handler, 200)
+        return self._reply(handler, 308, self._range_headers(session))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake GCS resumable-upload server.")
+    parser.add_argument("--root", default="data/fake_object_store")
+    parser.add_argument("--port", type=int, default=9023)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    store = FakeObjectStore(args.root, port=args.port, drop_rate=args.drop_rate, error_rate=args.error_rate)
+    print(f"Fake object store listening on {store.endpoint} (objects in {args.root}/objects)")
+    try:
+        store.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Offline replay of the ROBOI analytics path on a plain CPU box.
+
+Feeds frames and object lists (the dict shape tiler_sink_pad_buffer_probe builds)
+through the real AnalyticsEngine, VideoRecorder and JSONLogger, without
+DeepStream, a Jetson or RTSP cameras, and writes a JSON report with per-stage
+timings, queue depths and memory use.
+
+Object sources:
+  synthetic (default)       random people / fire / violence per camera
+  --detection-log FILE      replay the detections of an existing detection_log.json
+
+Frame sources (needs numpy + cv2, otherwise the recorder stage is skipped):
+  synthetic (default)       moving test pattern at --width x --height
+  --video FILE              frames from a local video, looped
+"""
+import sys
+import os
+import time
+import json
+import random
+import shutil
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import tracemalloc
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import analytics_engine
+from core.analytics_engine import AnalyticsEngine
+from core.logger import JSONLogger, orjson
+from core.stage_timer import StageTimer
+
+try:
+    import numpy as np
+    import cv2
+    from tools.capture_video import VideoRecorder
+except ImportError as e:
+    np = cv2 = VideoRecorder = None
+    FRAME_IMPORT_ERROR = str(e)
+else:
+    FRAME_IMPORT_ERROR = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CAMERAS = ["reception_area", "employee_area", "boss_cabin", "cafeteria"]
+IDENTITIES = ["Stranger", "sagar", "sampad", "ravi"]
+
+
+# --- OBJECT SOURCES ---
+class SyntheticObjects:
+    """Per-camera random walk of people count with occasional fire / violence bursts."""
+
+    def __init__(self, cameras, max_people, event_rate, recognition_rate, seed):
+        self.rng = random.Random(seed)
+        self.cameras = cameras
+        self.max_people = max_people
+        self.event_rate = event_rate
+        self.recognition_rate = recognition_rate
+        self.people = {cam: self.rng.randint(0, max_people) for cam in cameras}
+
+    def _obj(self, label, class_id, model_id, conf):
+        rng = self.rng
+        return {
+            "label": label,
+            "class_id": class_id,
+            "confidence": round(conf, 4),
+            "model_id": model_id,
+            "bbox": {"top": rng.randint(0, 300), "left": rng.randint(0, 560), "width": rng.randint(30, 120), "height": rng.randint(60, 200)},
+        }
+
+    def __iter__(self):
+        rng = self.rng
+        while True:
+            for cam in self.cameras:
+                n = max(0, min(self.max_people, self.people[cam] + rng.choice((-1, 0, 0, 0, 1))))
+                self.people[cam] = n
+                objs = []
+                for _ in range(n):
+                    obj = self._obj("person", 0, 1, rng.uniform(0.3, 0.99))
+                    if rng.random() < self.recognition_rate:
+                        name = rng.choice(IDENTITIES)
+                        face_conf = round(rng.uniform(0.3, 0.9), 3)
+                        obj["recognition"] = {"identity": name, "confidence": face_conf, "identity_id": IDENTITIES.index(name)}
+                        obj["display_label"] = f"{name} ({int(face_conf*100)}%)" if name != "Stranger" else "Stranger"
+                    objs.append(obj)
+                if rng.random() < self.event_rate:
+                    objs.append(self._obj(rng.choice(("fire", "smoke")), 0, 2, rng.uniform(0.3, 0.9)))
+                if n and rng.random() < self.event_rate:
+                    objs.append(self._obj("violence", 1, 3, rng.uniform(0.2, 0.9)))
+                yield cam, objs
+
+
+class DetectionLogObjects:
+    """Detections of a JSONLogger detection log, looped. Each record becomes one frame of its camera."""
+
+    def __init__(self, path):
+        self.records = []
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    self.records.append((rec["meta"]["cam_id"], json.dumps(rec["data"].get("detections", []))))
+                except (ValueError, KeyError, TypeError):
+                    continue
+        if not self.records:
+            raise ValueError(f"No usable records in {path}")
+        self.cameras = sorted({cam for cam, _ in self.records})
+
+    def __iter__(self):
+        while True:
+            for cam, objs in self.records:
+                yield cam, json.loads(objs) # fresh dicts each frame, as the probe builds them
+
+
+# --- FRAME SOURCES ---
+class SyntheticFrames:
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.base = np.zeros((height, width, 3), dtype=np.uint8)
+        cv2.randu(self.base, 0, 255)
+        self.i = 0
+
+    def next(self):
+        frame = self.base.copy() # the probe hands over a fresh copy per frame as well
+        x = (self.i * 8) % max(1, self.width - 80)
+        cv2.rectangle(frame, (x, 40), (x + 80, 200), (0, 255, 0), -1)
+        self.i += 1
+        return frame
+
+
+class VideoFrames:
+    def __init__(self, path, width, height):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Cannot open video {path}")
+        self.size = (width, height)
+
+    def next(self):
+        ok, frame = self.cap.read()
+        if not ok:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+            if not ok:
+                raise ValueError("Video yielded no frames")
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size)
+        return frame
+
+
+# --- REPORTING ---
+def pct(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def depth_summary(values):
+    if not values:
+        return {"max": 0, "mean": 0.0, "p99": 0}
+    ordered = sorted(values)
+    return {"max": ordered[-1], "mean": round(sum(values) / len(values), 2), "p99": pct(ordered, 0.99)}
+
+
+def run(args):
+    work = args.work_dir or tempfile.mkdtemp(prefix="roboi_replay_")
+    captures_dir = os.path.join(work, "captures")
+    os.makedirs(captures_dir, exist_ok=True)
+    JSONLogger.configure(path=os.path.join(work, "detection_log.json"))
+    if args.alert_cooldown is not None:
+        analytics_engine.ALERT_COOLDOWN = args.alert_cooldown
+    if args.heartbeat_interval is not None:
+        analytics_engine.HEARTBEAT_INTERVAL = args.heartbeat_interval
+
+    if args.detection_log:
+        source = DetectionLogObjects(args.detection_log)
+        cameras = source.cameras
+    else:
+        cameras = DEFAULT_CAMERAS[:args.cameras] + [f"cam_{i}" for i in range(len(DEFAULT_CAMERAS), args.cameras)]
+        source = SyntheticObjects(cameras, args.max_people, args.event_rate, args.recognition_rate, args.seed)
+
+    recorder_note = None
+    frames = {}
+    recorders = {}
+    if args.no_recorder:
+        recorder_note = "disabled by --no-recorder"
+    elif FRAME_IMPORT_ERROR:
+        recorder_note = f"skipped: {FRAME_IMPORT_ERROR}"
+    else:
+        for cam in cameras:
+            frames[cam] = VideoFrames(args.video, args.width, args.height) if args.video else SyntheticFrames(args.width, args.height)
+            recorders[cam] = VideoRecorder(cam, save_dir=captures_dir, buffer_seconds=args.buffer_seconds,
+                                           fps=args.fps or 15, resolution=(args.width, args.height))
+
+    engine = AnalyticsEngine(watch_config=False)
+    if args.no_ai_insights:
+        engine.policy = engine.policy.replace(ai_insights_enabled=False)
+
+    timer = StageTimer(keep_samples=True)
+    log_depth = []
+    recording = []
+    period = 1.0 / (args.fps * len(cameras)) if args.fps else 0.0
+
+    if args.tracemalloc:
+        tracemalloc.start(10)
+    started = time.perf_counter()
+    next_due = started
+    for frame_id, (cam, frame_objects) in enumerate(source):
+        if frame_id >= args.frames:
+            break
+        if period:
+            delay = next_due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            next_due += period
+
+        t0 = time.perf_counter()
+        frame = None
+        recorder = recorders.get(cam)
+        if recorder is not None:
+            frame = frames[cam].next()
+            t1 = time.perf_counter()
+            recorder.add_frame(frame, frame_objects=frame_objects)
+            t2 = time.perf_counter()
+            timer.add("frame_source", t1 - t0)
+            timer.add("recorder.add_frame", t2 - t1)
+        t3 = time.perf_counter()
+        engine.process_frame(cam, frame_objects, frame=frame, recorder=recorder, frame_id=frame_id)
+        t4 = time.perf_counter()
+        timer.add("engine.process_frame", t4 - t3)
+        timer.add("frame_total", t4 - t0)
+
+        log_depth.append(JSONLogger.stats()["pending"])
+        recording.append(sum(1 for r in recorders.values() if r.is_recording))
+    replay_elapsed = time.perf_counter() - started
+
+    allocations = None
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:args.top_allocations]
+        tracemalloc.stop()
+        allocations = {
+            "current_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "top": [{"site": f"{os.path.relpath(s.traceback[0].filename, PROJECT_ROOT)}:{s.traceback[0].lineno}", "kb": round(s.size / 1024, 1), "blocks": s.count}
+                    for s in top],
+        }
+
+    for recorder in recorders.values():
+        recorder.stop()
+    t0 = time.perf_counter()
+    JSONLogger.flush(timeout=30.0)
+    log_flush = time.perf_counter() - t0
+    log_stats = JSONLogger.stats()
+    JSONLogger.close()
+
+    frames_done = len(log_depth)
+    evidence = sum(len(files) for _, _, files in os.walk(captures_dir))
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "json_encoder": "orjson" if orjson else "json",
+            "recorder": recorder_note or "enabled",
+        },
+        "run": {
+            "source": args.detection_log or "synthetic",
+            "frame_source": (args.video or "synthetic") if recorders else None,
+            "cameras": len(cameras),
+            "frames": frames_done,
+            "target_fps_per_camera": args.fps,
+            "elapsed_s": round(replay_elapsed, 3),
+            "frames_per_s": round(frames_done / replay_elapsed, 1) if replay_elapsed else None,
+        },
+        "stages": timer.summary()["stages"],
+        "queues": {
+            "json_logger_pending": depth_summary(log_depth),
+            "recorders_recording": depth_summary(recording),
+        },
+        "json_logger": dict(log_stats, final_flush_ms=round(log_flush * 1000, 2)),
+        "evidence_files": evidence,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "allocations": allocations,
+    }
+    if not args.work_dir:
+        shutil.rmtree(work, ignore_errors=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay frames and detections through AnalyticsEngine, VideoRecorder and JSONLogger and report per-stage timings.")
+    parser.add_argument("--frames", type=int, default=20000, help="Total frames across all cameras")
+    parser.add_argument("--cameras", type=int, default=4, help="Synthetic cameras")
+    parser.add_argument("--fps", type=float, default=0.0, help="Frames per second per camera (0 = full speed)")
+    parser.add_argument("--detection-log", help="Replay detections from a detection_log.json instead of synthetic ones")
+    parser.add_argument("--video", help="Local video used as the frame source (looped)")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=384)
+    parser.add_argument("--buffer-seconds", type=int, default=3, help="VideoRecorder pre-event buffer")
+    parser.add_argument("--no-recorder", action="store_true", help="Skip frames and VideoRecorder; objects only")
+    parser.add_argument("--max-people", type=int, default=8)
+    parser.add_argument("--event-rate", type=float, default=0.002, help="Per-frame chance of fire / violence detections")
+    parser.add_argument("--recognition-rate", type=float, default=0.3, help="Share of people carrying a face recognition result")
+    parser.add_argument("--alert-cooldown", type=float, help="Override analytics.alert_cooldown")
+    parser.add_argument("--heartbeat-interval", type=float, help="Override analytics.heartbeat_interval")
+    parser.add_argument("--no-ai-insights", action="store_true")
+    parser.add_argument("--tracemalloc", action="store_true", help="Track Python allocations (slows the replay)")
+    parser.add_argument("--top-allocations", type=int, default=10)
+    parser.add_argument("--work-dir", help="Keep logs and evidence here instead of a temp dir")
+    parser.add_argument("--report", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--budget-us", type=float, help="Exit 1 if engine.process_frame p99 exceeds this")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Keep per-event INFO lines out of the console and data/logs/app.log
+    for name in ("analytics-engine", "video-recorder", "image-capture"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    analytics_engine.logger.setLevel(logging.WARNING)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    p99 = report["stages"].get("engine.process_frame", {}).get("p99_ms", 0.0) * 1000
+    if args.budget_us is not None and p99 > args.budget_us:
+        print(f"Regression: engine.process_frame p99 {p99:.1f}us exceeds budget {args.budget_us}us", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
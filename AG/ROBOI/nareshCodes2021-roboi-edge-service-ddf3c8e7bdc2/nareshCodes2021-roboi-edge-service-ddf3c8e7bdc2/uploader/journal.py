@@ -0,0 +1,205 @@
+import os
+import time
+import sqlite3
+import threading
+
+# File states
+TRANSCODE = "transcode"  # waiting for / in MP4 -> WebM conversion
+PENDING = "pending"      # ready to upload (possibly with a partial session)
+ACTIVE = "active"        # claimed by an upload thread
+DONE = "done"            # upload confirmed by the object store
+FAILED = "failed"        # terminal: source vanished or rejected by the object store
+
+# Lower value = uploaded first
+PRIORITY_SNAPSHOT = 0
+PRIORITY_VIDEO = 1
+PRIORITY_OTHER = 2
+
+SNAPSHOT_EXTENSIONS = (".jpg", ".jpeg", ".png")
+VIDEO_EXTENSIONS = (".mp4", ".webm", ".avi", ".mkv")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_dir   TEXT PRIMARY KEY,
+    dir_name    TEXT NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_dir    TEXT NOT NULL,
+    file_path    TEXT NOT NULL,
+    blob_name    TEXT NOT NULL,
+    priority     INTEGER NOT NULL,
+    state        TEXT NOT NULL,
+    size         INTEGER NOT NULL DEFAULT 0,
+    committed    INTEGER NOT NULL DEFAULT 0,
+    session      TEXT,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    queued_at    REAL NOT NULL DEFAULT 0,
+    last_error   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_files_queue ON files (state, priority, next_attempt, id);
+CREATE INDEX IF NOT EXISTS idx_files_event ON files (event_dir);
+"""
+
+
+def file_priority(path):
+    lower = path.lower()
+    if lower.endswith(SNAPSHOT_EXTENSIONS):
+        return PRIORITY_SNAPSHOT
+    if lower.endswith(VIDEO_EXTENSIONS):
+        return PRIORITY_VIDEO
+    return PRIORITY_OTHER
+
+
+class UploadJournal:
+    """
+    Durable record (sqlite, WAL) of every event and file waiting to be uploaded.
+
+    Survives process restarts and power loss: upload byte counts and resumable
+    session URLs are persisted after each chunk, so an interrupted upload
+    continues where it stopped instead of starting over.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.lock = threading.Lock()
+
+    # --- Events ---
+    def has_event(self, event_dir):
+        with self.lock:
+            row = self.conn.execute("SELECT 1 FROM events WHERE event_dir = ?", (event_dir,)).fetchone()
+        return row is not None
+
+    def add_event(self, event_dir, files):
+        """
+        files: list of (file_path, blob_name, needs_transcode).
+        Returns {file_path: row id}; empty dict if the event was already journaled.
+        """
+        now = time.time()
+        ids = {}
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO events (event_dir, dir_name, created_at) VALUES (?, ?, ?)",
+                    (event_dir, os.path.basename(event_dir), now),
+                )
+                if cur.rowcount == 0:
+                    self.conn.execute("ROLLBACK")
+                    return ids
+                for file_path, blob_name, needs_transcode in files:
+                    cur = self.conn.execute(
+                        "INSERT INTO files (event_dir, file_path, blob_name, priority, state, queued_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (event_dir, file_path, blob_name, file_priority(file_path),
+                         TRANSCODE if needs_transcode else PENDING, now),
+                    )
+                    ids[file_path] = cur.lastrowid
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def event_created_at(self, event_dir):
+        with self.lock:
+            row = self.conn.execute("SELECT created_at FROM events WHERE event_dir = ?", (event_dir,)).fetchone()
+        return row["created_at"] if row else None
+
+    def event_counts(self, event_dir):
+        """{state: count} for one event."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT state, COUNT(*) AS n FROM files WHERE event_dir = ? GROUP BY state", (event_dir,)
+            ).fetchall()
+        return {r["state"]: r["n"] for r in rows}
+
+    def remove_event(self, event_dir):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("DELETE FROM files WHERE event_dir = ?", (event_dir,))
+            self.conn.execute("DELETE FROM events WHERE event_dir = ?", (event_dir,))
+            self.conn.execute("COMMIT")
+
+    def event_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def all_events(self):
+        with self.lock:
+            return [r["event_dir"] for r in self.conn.execute("SELECT event_dir FROM events")]
+
+    # --- Files ---
+    def transcode_backlog(self):
+        with self.lock:
+            return [dict(r) for r in self.conn.execute(
+                "SELECT * FROM files WHERE state = ? ORDER BY id", (TRANSCODE,))]
+
+    def set_ready(self, file_id, file_path, blob_name):
+        """Moves a transcoded (or transcode-skipped) file into the upload queue."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE files SET state = ?, file_path = ?, blob_name = ?, priority = ?, queued_at = ? WHERE id = ?",
+                (PENDING, file_path, blob_name, file_priority(file_path), time.time(), file_id),
+            )
+
+    def claim(self, now=None):
+        """Atomically takes the highest-priority due file. Returns a dict or None."""
+        now = time.time() if now is None else now
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM files WHERE state = ? AND next_attempt <= ? "
+                "ORDER BY priority, next_attempt, id LIMIT 1",
+                (PENDING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE files SET state = ? WHERE id = ?", (ACTIVE, row["id"]))
+        return dict(row)
+
+    def next_due(self):
+        """Earliest next_attempt among pending files, or None."""
+        with self.lock:
+            row = self.conn.execute("SELECT MIN(next_attempt) FROM files WHERE state = ?", (PENDING,)).fetchone()
+        return row[0]
+
+    def save_progress(self, file_id, committed, session, size):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE files SET committed = ?, session = ?, size = ? WHERE id = ?",
+                (committed, session, size, file_id),
+            )
+
+    def mark_done(self, file_id):
+        with self.lock:
+            self.conn.execute("UPDATE files SET state = ?, last_error = NULL WHERE id = ?", (DONE, file_id))
+
+    def mark_failed(self, file_id, error):
+        with self.lock:
+            self.conn.execute("UPDATE files SET state = ?, last_error = ? WHERE id = ?", (FAILED, str(error), file_id))
+
+    def reschedule(self, file_id, delay, error):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE files SET state = ?, attempts = attempts + 1, next_attempt = ?, last_error = ? WHERE id = ?",
+                (PENDING, time.time() + delay, str(error), file_id),
+            )
+
+    def recover(self):
+        """After a restart: files claimed by a dead process go back to the queue."""
+        with self.lock:
+            cur = self.conn.execute("UPDATE files SET state = ? WHERE state = ?", (PENDING, ACTIVE))
+        return cur.rowcount
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
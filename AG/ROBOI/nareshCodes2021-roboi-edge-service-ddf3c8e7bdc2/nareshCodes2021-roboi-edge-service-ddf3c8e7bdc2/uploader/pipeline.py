@@ -0,0 +1,312 @@
+import os
+import time
+import queue
+import shutil
+import logging
+import threading
+import subprocess
+
+from uploader.journal import UploadJournal, DONE, FAILED
+from uploader.resumable import (
+    ResumableUploader, TokenBucket, SessionExpiredError, PermanentUploadError, DEFAULT_CHUNK_SIZE, backoff_delay,
+)
+
+MARKER_NAME = ".upload_ready"
+FAILED_MARKER_NAME = ".upload_failed"  # replaces the marker of an event with files that could not be uploaded
+
+
+class TranscodeSettings:
+    """ffmpeg VP9 preset used for MP4 -> WebM conversion."""
+
+    def __init__(self, crf=30, deadline="realtime", cpu_used=8, row_mt=True, threads=0):
+        self.crf = crf
+        self.deadline = deadline      # good | realtime | best
+        self.cpu_used = cpu_used      # 0 (slowest/best) .. 8 (fastest) for realtime
+        self.row_mt = row_mt          # row based multithreading inside one encode
+        self.threads = threads        # 0 = let libvpx decide
+
+    @classmethod
+    def from_config(cls, config):
+        up = config.get('uploader', {}) or {}
+        return cls(
+            crf=up.get('vp9_crf', 30),
+            deadline=up.get('vp9_deadline', "realtime"),
+            cpu_used=up.get('vp9_cpu_used', 8),
+            row_mt=up.get('vp9_row_mt', True),
+            threads=up.get('vp9_threads', 0),
+        )
+
+
+def build_webm_command(src, dst, settings=None):
+    settings = settings or TranscodeSettings()
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-i", src,
+        "-c:v", "libvpx-vp9", "-b:v", "0", "-crf", str(settings.crf), # VP9, constant quality
+    ]
+    if settings.deadline:
+        command += ["-deadline", settings.deadline]
+    if settings.cpu_used is not None:
+        command += ["-cpu-used", str(settings.cpu_used)]
+    if settings.row_mt:
+        command += ["-row-mt", "1"]
+    if settings.threads:
+        command += ["-threads", str(settings.threads)]
+    command += [
+        "-an", # No audio for efficiency (add -c:a libopus if audio needed)
+        "-f", "webm",
+        dst,
+    ]
+    return command
+
+
+def transcode_to_webm(file_path, settings=None):
+    """
+    Converts an MP4 file to WebM and removes the original MP4.
+    Returns the new file path if successful, otherwise None.
+    """
+    webm_path = file_path[:-len(".mp4")] + ".webm"
+    try:
+        subprocess.run(build_webm_command(file_path, webm_path, settings), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if os.path.exists(webm_path):
+            os.remove(file_path)
+            return webm_path
+        logging.error(f"Conversion failed: WebM file not created for {file_path}")
+    except Exception as e:
+        logging.error(f"Failed to convert {file_path}: {e}")
+    return None
+
+
+class EventJob:
+    """Summary of a completed event, passed to on_event_done."""
+
+    def __init__(self, event_dir, submitted_at, total, failed=0):
+        self.event_dir = event_dir
+        self.dir_name = os.path.basename(event_dir)
+        self.submitted_at = submitted_at # wall clock, from the journal
+        self.total = total
+        self.failed = failed
+
+
+def _blob_name(event_dir, file_path):
+    rel_path = os.path.relpath(file_path, event_dir)
+    return f"events/{os.path.basename(event_dir)}/{rel_path}"
+
+
+class UploadPipeline:
+    """
+    Two-stage pipeline: transcode -> upload, driven by a durable UploadJournal.
+
+    MP4 clips go to a bounded transcode pool (one ffmpeg process per worker,
+    sized to the CPU count by default). Every file ready for upload sits in the
+    journal; upload threads claim them snapshots-first, send them in resumable
+    chunks through a shared bandwidth limiter and retry with exponential
+    backoff. An event directory is deleted only once the object store has
+    confirmed every one of its files. Files whose source vanished or that the
+    store rejected outright (4xx) are failed for good: their event finishes,
+    is kept on disk with its marker renamed to .upload_failed, and leaves the
+    journal.
+    """
+
+    def __init__(self, bucket, journal=None, transcode_workers=0, upload_workers=10, settings=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, bandwidth_limit=0, max_backoff=300.0, on_event_done=None):
+        self.bucket = bucket
+        self.journal = journal or UploadJournal(":memory:")
+        self.settings = settings or TranscodeSettings()
+        self.transcode_workers = transcode_workers or os.cpu_count() or 1
+        self.max_backoff = max_backoff
+        self.on_event_done = on_event_done
+        self.uploader = ResumableUploader(bucket, self.journal, chunk_size=chunk_size,
+                                          limiter=TokenBucket(bandwidth_limit))
+
+        self.transcode_queue = queue.Queue()
+        self.wake = threading.Condition()
+        self.finish_lock = threading.Lock()
+        self.stopping = False
+        self.stats_lock = threading.Lock()
+        self.transcode_wait = []  # seconds a clip waited before its encode started
+        self.upload_wait = []     # seconds a file waited before its first upload attempt
+
+        # Resume whatever a previous run left behind
+        recovered = self.journal.recover()
+        if recovered:
+            logging.info(f"Resuming {recovered} interrupted uploads from journal")
+        for row in self.journal.transcode_backlog():
+            self.transcode_queue.put((row, time.time()))
+        for event_dir in self.journal.all_events():
+            self._check_event(event_dir)
+
+        self.threads = []
+        for i in range(self.transcode_workers):
+            self._spawn(self._transcode_loop, f"transcode-{i}")
+        for i in range(upload_workers):
+            self._spawn(self._upload_loop, f"upload-{i}")
+
+    @property
+    def bytes_sent(self):
+        return self.uploader.bytes_sent
+
+    def _spawn(self, target, name):
+        t = threading.Thread(target=target, name=name, daemon=True)
+        t.start()
+        self.threads.append(t)
+
+    def _notify(self):
+        with self.wake:
+            self.wake.notify_all()
+
+    # --- Submission ---
+    def submit_event(self, event_dir):
+        """Journals all files of an event. Returns False if the event is already known."""
+        if self.journal.has_event(event_dir):
+            return False
+
+        files = []
+        for root, dirs, names in os.walk(event_dir):
+            for name in names:
+                if name not in (MARKER_NAME, FAILED_MARKER_NAME):
+                    file_path = os.path.join(root, name)
+                    files.append((file_path, _blob_name(event_dir, file_path), file_path.endswith(".mp4")))
+
+        ids = self.journal.add_event(event_dir, files)
+        if files and not ids:
+            return False
+
+        now = time.time()
+        for file_path, _, needs_transcode in files:
+            if needs_transcode:
+                self.transcode_queue.put(({"id": ids[file_path], "event_dir": event_dir, "file_path": file_path}, now))
+        if not files:
+            self._check_event(event_dir)
+        self._notify()
+        return True
+
+    def is_busy(self, event_dir):
+        return self.journal.has_event(event_dir)
+
+    # --- Stages ---
+    def _transcode_loop(self):
+        while True:
+            item = self.transcode_queue.get()
+            if item is None:
+                return
+            row, queued_at = item
+            with self.stats_lock:
+                self.transcode_wait.append(time.time() - queued_at)
+
+            mp4_path = row["file_path"]
+            webm_path = mp4_path[:-len(".mp4")] + ".webm"
+            if os.path.exists(mp4_path):
+                logging.info(f"Converting {mp4_path} to WebM...")
+                result = transcode_to_webm(mp4_path, self.settings)
+                if result is None:
+                    # Keep the evidence: upload the original clip instead
+                    logging.warning(f"Conversion failed, uploading original: {mp4_path}")
+                    result = mp4_path
+            elif os.path.exists(webm_path):
+                result = webm_path # converted before a restart
+            else:
+                self.journal.mark_failed(row["id"], "source clip missing")
+                logging.error(f"Clip vanished before conversion: {mp4_path}")
+                self._check_event(row["event_dir"])
+                continue
+
+            self.journal.set_ready(row["id"], result, _blob_name(row["event_dir"], result))
+            self._notify()
+
+    def _upload_loop(self):
+        while not self.stopping:
+            entry = self.journal.claim()
+            if entry is None:
+                next_due = self.journal.next_due()
+                timeout = 1.0 if next_due is None else min(1.0, max(0.01, next_due - time.time()))
+                with self.wake:
+                    self.wake.wait(timeout)
+                continue
+
+            if entry["attempts"] == 0:
+                with self.stats_lock:
+                    self.upload_wait.append(time.time() - entry["queued_at"])
+
+            try:
+                self.uploader.upload(entry)
+            except FileNotFoundError as e:
+                logging.error(f"Upload source missing {entry['file_path']}: {e}")
+                self.journal.mark_failed(entry["id"], e)
+                self._check_event(entry["event_dir"])
+                continue
+            except PermanentUploadError as e:
+                logging.error(f"Upload of {entry['blob_name']} rejected, not retrying: {e}")
+                self.journal.mark_failed(entry["id"], e)
+                self._check_event(entry["event_dir"])
+                continue
+            except SessionExpiredError as e:
+                logging.warning(f"Restarting upload of {entry['blob_name']}: {e}")
+                self.journal.save_progress(entry["id"], 0, None, 0)
+                self.journal.reschedule(entry["id"], 0, e)
+                continue
+            except Exception as e:
+                delay = backoff_delay(entry["attempts"], cap=self.max_backoff)
+                logging.warning(f"Upload of {entry['blob_name']} failed (attempt {entry['attempts'] + 1}), retrying in {delay:.1f}s: {e}")
+                self.journal.reschedule(entry["id"], delay, e)
+                continue
+
+            self.journal.mark_done(entry["id"])
+            self._check_event(entry["event_dir"])
+
+    def _check_event(self, event_dir):
+        """
+        Finishes an event once every file is uploaded or failed: deletes the
+        event dir if all were uploaded, otherwise keeps it for manual attention
+        with the marker renamed so sweeps do not resubmit it.
+        """
+        with self.finish_lock:
+            counts = self.journal.event_counts(event_dir)
+            if any(state not in (DONE, FAILED) for state in counts):
+                return
+            submitted_at = self.journal.event_created_at(event_dir)
+            if submitted_at is None:
+                return
+            done, failed = counts.get(DONE, 0), counts.get(FAILED, 0)
+            total = done + failed
+            name = os.path.basename(event_dir)
+            if failed:
+                logging.error(f"Uploaded {done}/{total} files for {name}; {failed} failed, "
+                              f"event kept with {FAILED_MARKER_NAME}")
+                marker = os.path.join(event_dir, MARKER_NAME)
+                try:
+                    if os.path.exists(marker):
+                        os.replace(marker, os.path.join(event_dir, FAILED_MARKER_NAME))
+                except OSError as e:
+                    logging.error(f"Could not mark {name} as failed: {e}")
+                    return
+            else:
+                logging.info(f"Uploaded {total}/{total} files for {name}")
+                try:
+                    if os.path.exists(event_dir):
+                        shutil.rmtree(event_dir)
+                    logging.info(f"Cleanup successful for {name}")
+                except Exception as e:
+                    logging.error(f"Cleanup failed for {name}: {e}")
+                    return
+            self.journal.remove_event(event_dir)
+        if self.on_event_done:
+            self.on_event_done(EventJob(event_dir, submitted_at, total, failed))
+
+    def drain(self, timeout=None):
+        """Waits until the journal holds no events. Returns True if drained."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.journal.event_count():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self):
+        self.stopping = True
+        for _ in range(self.transcode_workers):
+            self.transcode_queue.put(None)
+        self._notify()
+        for t in self.threads:
+            t.join(timeout=5.0)
@@ -0,0 +1,210 @@
+import os
+import re
+import time
+import random
+import threading
+import mimetypes
+import http.client
+from urllib.parse import urlsplit, quote
+
+# GCS requires every non-final chunk to be a multiple of 256 KiB
+CHUNK_ALIGN = 256 * 1024
+DEFAULT_CHUNK_SIZE = 4 * CHUNK_ALIGN
+
+_RANGE_RE = re.compile(r"bytes=0-(\d+)")
+
+
+class TransientUploadError(Exception):
+    """Network error or retryable server status; try again later."""
+
+
+class SessionExpiredError(Exception):
+    """The resumable session is gone (404/410); a new one must be started."""
+
+
+class PermanentUploadError(Exception):
+    """The object store rejected the upload (4xx other than 408/429); retrying will not help."""
+
+
+def _raise_for_status(status, what):
+    if status in (408, 429) or status >= 500:
+        raise TransientUploadError(f"{what}HTTP {status}")
+    if 400 <= status < 500:
+        raise PermanentUploadError(f"{what}HTTP {status}")
+
+
+class TokenBucket:
+    """Shared bandwidth limiter. rate is bytes per second; 0 disables limiting."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate or 0)
+        self.capacity = float(burst or max(self.rate, CHUNK_ALIGN))
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                # Chunks bigger than the burst size are let through once the bucket is full
+                need = min(amount, self.capacity)
+                if self.tokens >= need:
+                    self.tokens -= amount
+                    return
+                wait = (need - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def backoff_delay(attempts, base=2.0, cap=300.0):
+    """Exponential backoff with jitter: base * 2^attempts, capped, scaled by 0.5..1.0."""
+    return min(cap, base * (2 ** attempts)) * random.uniform(0.5, 1.0)
+
+
+def _request(url, method, body=b"", headers=None, timeout=60.0):
+    parts = urlsplit(url)
+    conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = conn_cls(parts.netloc, timeout=timeout)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        resp = conn.getresponse()
+        data = resp.read()
+        return resp.status, resp.headers, data
+    except (OSError, http.client.HTTPException) as e:
+        raise TransientUploadError(f"{method} {parts.netloc}: {e}") from e
+    finally:
+        conn.close()
+
+
+def _committed_from(status, headers, total):
+    if status in (200, 201):
+        return total
+    if status == 308:
+        match = _RANGE_RE.match(headers.get("Range", "") or "")
+        return int(match.group(1)) + 1 if match else 0
+    if status in (404, 410):
+        raise SessionExpiredError(f"session expired (HTTP {status})")
+    _raise_for_status(status, "")
+    raise RuntimeError(f"unexpected upload response HTTP {status}")
+
+
+def query_committed(session_url, total):
+    """Asks the server how many bytes of the session it has persisted."""
+    status, headers, _ = _request(session_url, "PUT", headers={
+        "Content-Length": "0",
+        "Content-Range": f"bytes */{total}",
+    })
+    return _committed_from(status, headers, total)
+
+
+def put_chunk(session_url, start, data, total):
+    """Sends one chunk; returns the new committed byte count."""
+    if data:
+        content_range = f"bytes {start}-{start + len(data) - 1}/{total}"
+    else:
+        content_range = f"bytes */{total}"
+    status, headers, _ = _request(session_url, "PUT", body=data, headers={
+        "Content-Length": str(len(data)),
+        "Content-Range": content_range,
+    })
+    return _committed_from(status, headers, total)
+
+
+class HttpResumableBucket:
+    """
+    Speaks the GCS JSON API resumable protocol to an arbitrary endpoint
+    (a storage emulator, or tools/fake_object_store.py).
+    """
+
+    def __init__(self, endpoint, bucket_name):
+        self.endpoint = endpoint.rstrip("/")
+        self.name = bucket_name
+
+    def create_resumable_session(self, blob_name, size, content_type):
+        url = f"{self.endpoint}/upload/storage/v1/b/{quote(self.name)}/o?uploadType=resumable&name={quote(blob_name, safe='')}"
+        status, headers, _ = _request(url, "POST", headers={
+            "Content-Length": "0",
+            "X-Upload-Content-Type": content_type,
+            "X-Upload-Content-Length": str(size),
+        })
+        _raise_for_status(status, "session start ")
+        if status != 200 or not headers.get("Location"):
+            raise RuntimeError(f"session start failed: HTTP {status}")
+        return headers["Location"]
+
+
+def create_session(bucket, blob_name, size, content_type):
+    """Returns a resumable session URL, or None if the bucket has no resumable support."""
+    if hasattr(bucket, "create_resumable_session"):
+        return bucket.create_resumable_session(blob_name, size, content_type)
+    blob = bucket.blob(blob_name)
+    if hasattr(blob, "create_resumable_upload_session"):
+        try:
+            return blob.create_resumable_upload_session(content_type=content_type, size=size)
+        except Exception as e:
+            raise TransientUploadError(f"session start failed: {e}") from e
+    return None
+
+
+class ResumableUploader:
+    """
+    Uploads a journaled file in chunks, persisting the committed byte count and
+    session URL after each one so a retry or a restart only sends what is missing.
+    """
+
+    def __init__(self, bucket, journal, chunk_size=DEFAULT_CHUNK_SIZE, limiter=None):
+        self.bucket = bucket
+        self.journal = journal
+        self.chunk_size = max(CHUNK_ALIGN, chunk_size - chunk_size % CHUNK_ALIGN)
+        self.limiter = limiter or TokenBucket(0)
+        self.bytes_sent = 0
+        self.stats_lock = threading.Lock()
+
+    def _count(self, n):
+        with self.stats_lock:
+            self.bytes_sent += n
+
+    def upload(self, entry):
+        """entry: journal row dict. Raises on failure; returns when the object is confirmed."""
+        file_path = entry["file_path"]
+        size = os.path.getsize(file_path)
+        content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+
+        session = entry.get("session")
+        committed = 0
+        if session and entry.get("size") == size:
+            try:
+                committed = query_committed(session, size)
+            except SessionExpiredError:
+                session = None
+        else:
+            session = None
+
+        if session is None:
+            session = create_session(self.bucket, entry["blob_name"], size, content_type)
+            if session is None:
+                # Plain bucket (e.g. LocalBucket): single-shot upload
+                self.limiter.consume(size)
+                self.bucket.blob(entry["blob_name"]).upload_from_filename(file_path)
+                self._count(size)
+                return
+            committed = 0
+            self.journal.save_progress(entry["id"], committed, session, size)
+
+        with open(file_path, "rb") as f:
+            while committed < size or size == 0:
+                f.seek(committed)
+                data = f.read(self.chunk_size)
+                self.limiter.consume(len(data))
+                try:
+                    committed = put_chunk(session, committed, data, size)
+                finally:
+                    self._count(len(data))
+                self.journal.save_progress(entry["id"], committed, session, size)
+                if size == 0:
+                    break
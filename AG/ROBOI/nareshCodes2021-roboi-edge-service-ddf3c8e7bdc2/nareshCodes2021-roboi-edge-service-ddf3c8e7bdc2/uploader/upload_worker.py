@@ -1,19 +1,36 @@
 import os
+import sys
 import time
 import zipfile
 import shutil
 import logging
 import datetime
-from google.cloud import storage
 import yaml
-import subprocess
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+try:
+    from google.cloud import storage
+except ImportError:
+    storage = None # Only required when uploading to GCS (see LocalBucket)
+
 # --- CONFIGURATION ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add project root to sys.path
+sys.path.append(BASE_DIR)
+
+from uploader.watcher import MarkerWatcher, find_ready_events
+from uploader.pipeline import UploadPipeline, TranscodeSettings, transcode_to_webm
+from uploader.journal import UploadJournal
+from uploader.resumable import HttpResumableBucket
+
 CONFIG_PATH = os.path.join(BASE_DIR, "configs", "app_config.yaml")
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 
+# Seconds between full reconciliation sweeps of the captures directory
+RECONCILE_INTERVAL = 60.0
+JOURNAL_PATH = os.path.join(BASE_DIR, "data", "uploader", "upload_journal.db")
+
 # Ensure log directory exists
 os.makedirs(LOG_DIR, exist_ok=True)
 
@@ -43,52 +60,50 @@ def get_target_bucket():
         bucket_name = os.environ.get("ROBOI_BUCKET_NAME")
     return bucket_name
 
-def convert_mp4_to_webm(file_path):
+class LocalBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+
+    def upload_from_filename(self, filename):
+        dest = os.path.join(self.bucket.root, self.name)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(filename, dest)
+
+class LocalBucket:
     """
-    Converts an MP4 file to WebM using ffmpeg and removes the original MP4.
-    Returns the new file path if successful, otherwise None.
+    Filesystem stand-in for a GCS bucket (same blob()/upload_from_filename() surface).
+    Enabled with 'cloud_storage.local_dir' in app_config.yaml or ROBOI_LOCAL_BUCKET_DIR.
     """
-    try:
-        if not file_path.endswith(".mp4"):
-            return file_path
-            
-        webm_path = file_path.replace(".mp4", ".webm")
-        # ffmpeg command: fast conversion, reasonable quality
-        command = [
-            "ffmpeg", "-y", 
-            "-i", file_path,
-            "-c:v", "libvpx-vp9", "-b:v", "0", "-crf", "30", # VP9, constant quality
-            "-an", # No audio for efficiency (add -c:a libopus if audio needed)
-            "-f", "webm",
-            webm_path
-        ]
-        
-        logging.info(f"Converting {file_path} to {webm_path}...")
-        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        
-        # Verify WebM exists
-        if os.path.exists(webm_path):
-            os.remove(file_path) # Remove original MP4
-            logging.info(f"Conversion successful. Removed {file_path}")
-            return webm_path
-        else:
-            logging.error(f"Conversion failed: WebM file not created for {file_path}")
-            return None
-            
-    except Exception as e:
-        logging.error(f"Failed to convert {file_path}: {e}")
-        return None
+    def __init__(self, root):
+        self.root = root
+        self.name = f"local:{root}"
+        os.makedirs(root, exist_ok=True)
 
-def scan_and_upload(captures_dir):
-    if not os.path.exists(captures_dir):
-        logging.warning(f"Captures directory not found: {captures_dir}")
-        return
+    def blob(self, blob_name):
+        return LocalBlob(self, blob_name)
+
+def create_bucket():
+    """
+    Builds the bucket handle once; the worker keeps it for its whole lifetime.
+    Returns None if nothing is configured or the client cannot be created.
+    """
+    config = load_config()
+    local_dir = config.get('cloud_storage', {}).get('local_dir') or os.environ.get("ROBOI_LOCAL_BUCKET_DIR")
+    if local_dir:
+        logging.info(f"Using local bucket directory: {local_dir}")
+        return LocalBucket(local_dir)
 
-    # Check for GCS Bucket
     bucket_name = get_target_bucket()
     if not bucket_name:
         logging.error("No bucket name configured. Set 'cloud_storage.bucket_name' in app_config.yaml or ROBOI_BUCKET_NAME env var.")
-        return
+        return None
+
+    # GCS-compatible endpoint (storage emulator / test server)
+    endpoint = config.get('cloud_storage', {}).get('endpoint') or os.environ.get("ROBOI_STORAGE_ENDPOINT")
+    if endpoint:
+        logging.info(f"Using storage endpoint: {endpoint}")
+        return HttpResumableBucket(endpoint, bucket_name)
 
     # Initialize GCS Client
     try:
@@ -100,21 +115,105 @@ def scan_and_upload(captures_dir):
             logging.warning(f"Key file not found at {key_path}, falling back to default credentials")
             storage_client = storage.Client()
             
-        bucket = storage_client.bucket(bucket_name)
+        return storage_client.bucket(bucket_name)
     except Exception as e:
         logging.error(f"Failed to initialize GCS client: {e}")
+        return None
+
+def convert_mp4_to_webm(file_path, settings=None):
+    """
+    Converts an MP4 file to WebM using ffmpeg and removes the original MP4.
+    Returns the new file path if successful, otherwise None.
+    """
+    if not file_path.endswith(".mp4"):
+        return file_path
+
+    if settings is None:
+        settings = TranscodeSettings.from_config(load_config())
+    logging.info(f"Converting {file_path} to WebM...")
+    webm_path = transcode_to_webm(file_path, settings)
+    if webm_path:
+        logging.info(f"Conversion successful. Removed {file_path}")
+    return webm_path
+
+def scan_and_upload(captures_dir, bucket=None):
+    """One full sweep: uploads every event directory that carries a marker."""
+    if not os.path.exists(captures_dir):
+        logging.warning(f"Captures directory not found: {captures_dir}")
         return
 
-    # Iterate over directories in captures_dir
-    for item in os.listdir(captures_dir):
-        item_path = os.path.join(captures_dir, item)
-        
-        if os.path.isdir(item_path):
-            # Check for marker file
-            ready_marker = os.path.join(item_path, ".upload_ready")
-            if os.path.exists(ready_marker):
-                logging.info(f"Processing event: {item}")
-                process_event_direct_upload(item_path, bucket)
+    if bucket is None:
+        bucket = create_bucket()
+        if bucket is None:
+            return
+
+    for item_path in find_ready_events(captures_dir):
+        logging.info(f"Processing event: {os.path.basename(item_path)}")
+        process_event_direct_upload(item_path, bucket)
+
+def create_pipeline(bucket, config=None):
+    """Builds the journaled transcode -> upload pipeline from the 'uploader' config section."""
+    config = config if config is not None else load_config()
+    up = config.get('uploader', {}) or {}
+    journal_path = up.get('journal_path') or JOURNAL_PATH
+    if not os.path.isabs(journal_path):
+        journal_path = os.path.join(BASE_DIR, journal_path)
+    return UploadPipeline(
+        bucket,
+        journal=UploadJournal(journal_path),
+        transcode_workers=up.get('transcode_workers', 0),
+        upload_workers=up.get('upload_workers', 10),
+        settings=TranscodeSettings.from_config(config),
+        chunk_size=int(up.get('chunk_kb', 1024)) * 1024,
+        bandwidth_limit=float(up.get('max_upload_kbytes_per_sec', 0)) * 1024,
+        max_backoff=float(up.get('max_retry_backoff', 300.0)),
+    )
+
+def run_worker(captures_dir, bucket=None, reconcile_interval=RECONCILE_INTERVAL, stop_event=None, use_inotify=True, pipeline=None):
+    """
+    Event-driven upload loop.
+    Event dirs are queued as soon as their marker appears (inotify, or a short
+    poll where inotify is unavailable). A full sweep every `reconcile_interval`
+    seconds catches anything missed, e.g. failed uploads or dropped events.
+    Transcoding and uploading run in the background pipeline, so a burst of
+    events is encoded in parallel while earlier ones are already uploading.
+    """
+    if bucket is None:
+        bucket = create_bucket()
+        if bucket is None:
+            return
+
+    owns_pipeline = pipeline is None
+    if owns_pipeline:
+        pipeline = create_pipeline(bucket)
+
+    watcher = MarkerWatcher(captures_dir, use_inotify=use_inotify)
+    logging.info(f"Watching {captures_dir} for upload markers ({watcher.mode})")
+    next_sweep = 0.0
+
+    try:
+        while stop_event is None or not stop_event.is_set():
+            try:
+                now = time.monotonic()
+                if now >= next_sweep:
+                    ready = find_ready_events(captures_dir)
+                    next_sweep = now + reconcile_interval
+                else:
+                    ready = watcher.wait(timeout=min(1.0, next_sweep - now))
+
+                for item_path in ready:
+                    # Already handled by an earlier notification or sweep
+                    if not os.path.isdir(item_path) or pipeline.is_busy(item_path):
+                        continue
+                    logging.info(f"Processing event: {os.path.basename(item_path)}")
+                    pipeline.submit_event(item_path)
+            except Exception as e:
+                logging.error(f"Worker Loop Error: {e}")
+                time.sleep(1.0)
+    finally:
+        watcher.close()
+        if owns_pipeline:
+            pipeline.close()
 
 def process_event(event_dir, bucket):
     try:
@@ -227,10 +326,6 @@ if __name__ == "__main__":
     CAPTURES_DIR = os.path.join(BASE_DIR, "data", "captures")
     
     while True:
-        try:
-            scan_and_upload(CAPTURES_DIR)
-        except Exception as e:
-            logging.error(f"Worker Loop Error: {e}")
-        
-        # Scan every 5 seconds
+        # Returns only if the bucket could not be set up; retry after a pause
+        run_worker(CAPTURES_DIR)
         time.sleep(5)
@@ -0,0 +1,171 @@
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+
+MARKER_NAME = ".upload_ready"
+
+# --- INOTIFY CONSTANTS (linux/inotify.h) ---
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _load_libc():
+    """Returns a libc handle exposing the inotify syscalls, or None."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def find_ready_events(captures_dir, marker=MARKER_NAME):
+    """Full directory sweep: event dirs under captures_dir holding the marker."""
+    ready = []
+    try:
+        with os.scandir(captures_dir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False) and os.path.exists(os.path.join(entry.path, marker)):
+                    ready.append(entry.path)
+    except FileNotFoundError:
+        pass
+    return ready
+
+
+class MarkerWatcher:
+    """
+    Reports event directories as soon as their `.upload_ready` marker is written.
+
+    Uses inotify through libc (no third-party binding needed) on Linux. Where
+    inotify is unavailable it falls back to an os.scandir poll at `poll_interval`.
+    """
+
+    def __init__(self, captures_dir, marker=MARKER_NAME, poll_interval=1.0, use_inotify=True):
+        self.captures_dir = captures_dir
+        self.marker = marker
+        self.poll_interval = poll_interval
+        self.fd = None
+        self.wd_to_path = {}
+        self.path_to_wd = {}
+
+        os.makedirs(captures_dir, exist_ok=True)
+
+        libc = _load_libc() if use_inotify else None
+        if libc is not None:
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self.libc = libc
+                self.fd = fd
+            else:
+                logging.warning(f"inotify_init1 failed ({os.strerror(ctypes.get_errno())}), falling back to polling")
+
+        self._pending = set()
+        if self.fd is not None:
+            self._watch(captures_dir)
+            # Pick up directories that existed before the watcher started
+            with os.scandir(captures_dir) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        self._watch_event_dir(entry.path)
+
+    @property
+    def mode(self):
+        return "inotify" if self.fd is not None else "poll"
+
+    def _watch(self, path):
+        mask = IN_CREATE | IN_MOVED_TO | IN_CLOSE_WRITE | IN_DELETE_SELF
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err != errno.ENOENT:
+                logging.warning(f"inotify_add_watch failed for {path}: {os.strerror(err)}")
+            return False
+        self.wd_to_path[wd] = path
+        self.path_to_wd[path] = wd
+        return True
+
+    def _watch_event_dir(self, path):
+        if path in self.path_to_wd:
+            return
+        if self._watch(path) and os.path.exists(os.path.join(path, self.marker)):
+            # Marker landed before the watch was in place
+            self._pending.add(path)
+
+    def _unwatch(self, wd):
+        path = self.wd_to_path.pop(wd, None)
+        if path is not None:
+            self.path_to_wd.pop(path, None)
+
+    def _drain(self):
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            name = buf[offset:offset + name_len].rstrip(b"\0").decode(errors="replace")
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                # Kernel dropped events; resync from disk
+                logging.warning("inotify queue overflow, rescanning captures directory")
+                for path in find_ready_events(self.captures_dir, self.marker):
+                    self._pending.add(path)
+                continue
+
+            if mask & (IN_IGNORED | IN_DELETE_SELF):
+                self._unwatch(wd)
+                continue
+
+            parent = self.wd_to_path.get(wd)
+            if parent is None:
+                continue
+
+            if parent == self.captures_dir:
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_event_dir(os.path.join(parent, name))
+            elif name == self.marker and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self._pending.add(parent)
+
+    def wait(self, timeout):
+        """Blocks up to `timeout` seconds and returns the event dirs that became ready."""
+        if self.fd is None:
+            if not self._pending:
+                time.sleep(min(timeout, self.poll_interval))
+            ready = set(find_ready_events(self.captures_dir, self.marker)) | self._pending
+            self._pending = set()
+            return sorted(ready)
+
+        if not self._pending:
+            readable, _, _ = select.select([self.fd], [], [], timeout)
+            if not readable:
+                return []
+        self._drain()
+        ready = sorted(self._pending)
+        self._pending = set()
+        return ready
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+            self.wd_to_path.clear()
+            self.path_to_wd.clear()